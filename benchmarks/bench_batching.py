@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: embedding throughput of length-bucketed batching.
+
+Encodes the benchmark corpus chunks in document order, as build_index hands
+them to the model: in unsorted fixed-size batches, with sentence-transformers'
+own batching (sorted within each encode call, fixed batch size) and with the
+length-bucketed scheduler. Reports chunks per second and the share of padded
+tokens of each. The embeddings must match (the scheduler restores input order).
+
+    python benchmarks/bench_batching.py --model all-MiniLM-L6-v2
+    python benchmarks/bench_batching.py --mean-blocks 4 --budgets 0.05 0.1 0.2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import corpus_chunks, generate_export  # noqa: E402
+from notion_archive.core.embeddings import SentenceTransformerEmbedding, length_bucketed_batches  # noqa: E402
+
+
+def padding_share(lengths: List[int], batches: List[List[int]]) -> float:
+    """Fraction of padded tokens that are padding."""
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
+    return 1 - sum(lengths) / padded
+
+
+def unsorted_batches(lengths: List[int], batch_size: int) -> List[List[int]]:
+    """Fixed-size batches in document order."""
+    return [list(range(i, min(i + batch_size, len(lengths)))) for i in range(0, len(lengths), batch_size)]
+
+
+def fixed_batches(lengths: List[int], batch_size: int) -> List[List[int]]:
+    """sentence-transformers' own batching: sorted by length, fixed batch size."""
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def encode_in_calls(encode, chunks: List[str], call_size: int) -> np.ndarray:
+    """Encode chunks the way build_index does: one encode call per build batch."""
+    return np.concatenate([encode(chunks[i:i + call_size]) for i in range(0, len(chunks), call_size)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence-transformers model (default: all-MiniLM-L6-v2)")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic export (default: 300)")
+    parser.add_argument("--mean-blocks", type=int, default=25, help="Mean blocks per page; lower gives more short pages (default: 25)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size in characters (default: 1000)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Chunks per encode call, as in build_index (default: 500)")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0.05], help="Padding budgets to test (default: 0.05)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per variant, best is reported (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = corpus_chunks(generate_export(tmp, n_pages=args.pages, mean_blocks=args.mean_blocks), chunk_size=args.chunk_size)
+
+    model = SentenceTransformerEmbedding(args.model)
+    lengths = model.token_lengths(chunks)
+    max_batch_tokens = model.batch_size * model.model.max_seq_length
+    print(f"{len(chunks)} chunks, {sum(lengths)} tokens, model {args.model}, "
+          f"{args.batch_size} chunks per encode call")
+
+    def timed(encode):
+        encode_in_calls(encode, chunks[:64], args.batch_size)  # warm up
+        best, embeddings = float("inf"), None
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            embeddings = encode_in_calls(encode, chunks, args.batch_size)
+            best = min(best, time.perf_counter() - start)
+        return best, embeddings
+
+    def call_batches(make_batches):
+        batches = []
+        for offset in range(0, len(chunks), args.batch_size):
+            call = lengths[offset:offset + args.batch_size]
+            batches.extend([[offset + i for i in batch] for batch in make_batches(call)])
+        return batches
+
+    print(f"{'variant':<22}{'padding':>9}{'batches':>9}{'chunks/s':>10}{'speedup':>9}{'max diff':>10}")
+
+    baseline_seconds, baseline = timed(lambda texts: model.encode(texts, show_progress_bar=False))
+
+    def encode_unsorted(texts):
+        return np.concatenate([
+            model.model.encode(texts[i:i + model.batch_size], batch_size=model.batch_size, show_progress_bar=False)
+            for i in range(0, len(texts), model.batch_size)
+        ])
+
+    seconds, embeddings = timed(encode_unsorted)
+    batches = call_batches(lambda call: unsorted_batches(call, model.batch_size))
+    diff = float(np.abs(np.asarray(embeddings) - np.asarray(baseline)).max())
+    print(f"{'unsorted batches':<22}{padding_share(lengths, batches):>9.1%}{len(batches):>9}"
+          f"{len(chunks) / seconds:>10.1f}{baseline_seconds / seconds:>9.2f}{diff:>10.1e}")
+
+    batches = call_batches(lambda call: fixed_batches(call, model.batch_size))
+    print(f"{'sorted fixed batches':<22}{padding_share(lengths, batches):>9.1%}{len(batches):>9}"
+          f"{len(chunks) / baseline_seconds:>10.1f}{1.0:>9.2f}{0.0:>10.1e}")
+
+    for budget in args.budgets:
+        model.padding_budget = budget
+        seconds, embeddings = timed(lambda texts: model.encode(texts, show_progress_bar=False))
+        batches = call_batches(lambda call: length_bucketed_batches(call, max_batch_tokens, budget))
+        diff = float(np.abs(np.asarray(embeddings) - np.asarray(baseline)).max())
+        print(f"{f'bucketed ({budget:.0%} budget)':<22}{padding_share(lengths, batches):>9.1%}{len(batches):>9}"
+              f"{len(chunks) / seconds:>10.1f}{baseline_seconds / seconds:>9.2f}{diff:>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
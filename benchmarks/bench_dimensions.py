@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recall, storage and scan time of reduced-dimension embeddings.
+
+Ground truth is exact search with the model's full-size embeddings. Each
+reduced dimension is measured with local truncation (and, with --native, with
+the model's own shortened embeddings, e.g. the `dimensions` parameter of the
+text-embedding-3 models).
+
+    python benchmarks/bench_dimensions.py --model all-MiniLM-L6-v2 --dims 64 128 256
+    python benchmarks/bench_dimensions.py --model text-embedding-3-small --dims 256 512 1024 --native
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import corpus_chunks, generate_export, sample_queries  # noqa: E402
+from notion_archive.core.embeddings import create_embedding_model  # noqa: E402
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argpartition(-scores, kth=min(k, corpus.shape[0] - 1), axis=1)[:, :k]
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def scan_ms(queries: np.ndarray, corpus: np.ndarray, k: int, repeats: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        top_k(queries, corpus, k)
+    return (time.perf_counter() - start) / repeats / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Embedding model (default: all-MiniLM-L6-v2)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256], help="Reduced dimensions to test")
+    parser.add_argument("--native", action="store_true", help="Also test the model's native shortened embeddings")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic export (default: 300)")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries (default: 100)")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off (default: 10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = corpus_chunks(generate_export(tmp, n_pages=args.pages))
+    queries = sample_queries(chunks, args.queries)
+
+    model = create_embedding_model(args.model)
+    full_corpus = normalize(model.encode(chunks, show_progress_bar=False))
+    full_queries = normalize(model.encode(queries, show_progress_bar=False))
+    truth = top_k(full_queries, full_corpus, args.k)
+
+    print(f"{len(chunks)} chunks, {len(queries)} queries, model {args.model} ({model.dimension} dims)")
+    print(f"{'variant':<18}{'dims':>6}{f'recall@{args.k}':>11}{'KB/1k vecs':>12}{'scan ms/q':>11}")
+    print(f"{'full':<18}{model.dimension:>6}{1.0:>11.3f}{model.dimension * 4:>12.0f}"
+          f"{scan_ms(full_queries, full_corpus, args.k):>11.3f}")
+
+    for dims in args.dims:
+        variants = [("local truncation", normalize(full_corpus[:, :dims]), normalize(full_queries[:, :dims]))]
+        if args.native:
+            native = create_embedding_model(args.model, dimensions=dims)
+            variants.append(("native", normalize(native.encode(chunks)), normalize(native.encode(queries))))
+        for name, corpus, query_vectors in variants:
+            found = top_k(query_vectors, corpus, args.k)
+            print(f"{name:<18}{dims:>6}{recall_at_k(truth, found):>11.3f}{dims * 4:>12.0f}"
+                  f"{scan_ms(query_vectors, corpus, args.k):>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark: retained memory per parsed NotionDocument for each html_mode.
+
+    python benchmarks/bench_memory.py --pages 2000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_export  # noqa: E402
+from notion_archive.core.parser import HTML_MODES, NotionExportParser  # noqa: E402
+
+
+def measure(export_path: str, html_mode: str):
+    """Parse the export and return (document count, retained bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    documents = NotionExportParser(export_path, html_mode=html_mode).parse_export()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    count = len(documents)
+    del documents
+    return count, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000, help="Pages in the synthetic export (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_path = generate_export(tmp, n_pages=args.pages, seed=args.seed)
+        print(f"{'html_mode':<12}{'documents':>10}{'total MB':>12}{'bytes/doc':>12}")
+        baseline = None
+        for html_mode in HTML_MODES:
+            count, retained = measure(export_path, html_mode)
+            per_doc = retained / max(count, 1)
+            baseline = baseline or per_doc
+            print(f"{html_mode:<12}{count:>10}{retained / 1e6:>12.2f}{per_doc:>12.0f}"
+                  f"  ({per_doc / baseline:.0%} of full)")
+
+
+if __name__ == "__main__":
+    main()
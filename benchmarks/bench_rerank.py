@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: quality and latency of cross-encoder reranking.
+
+Each query is a few words taken from one corpus chunk, which is the chunk it
+should find (known-item search). Candidates are the top --candidates chunks by
+exact vector search; the reranker reorders them in one batch. Reports hit@1,
+hit@3 and MRR@10 of the vector order and of the reranked order, the rerank
+stage's p50/p95 latency, and how many queries fell back to the vector order
+under each latency budget. A second pass over the same queries shows the pair
+cache.
+
+    python benchmarks/bench_rerank.py
+    python benchmarks/bench_rerank.py --candidates 20 50 --budgets 50 150 0
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import corpus_chunks, generate_export, labeled_queries  # noqa: E402
+from notion_archive.core.embeddings import create_embedding_model  # noqa: E402
+from notion_archive.core.rerank import DEFAULT_RERANK_MODEL, CrossEncoderReranker  # noqa: E402
+
+
+def quality(rankings: List[List[int]], targets: List[int]) -> str:
+    """hit@1, hit@3 and MRR@10 of rankings against the target chunk of each query."""
+    hit1 = hit3 = mrr = 0.0
+    for ranking, target in zip(rankings, targets):
+        if target in ranking[:10]:
+            rank = ranking.index(target) + 1
+            mrr += 1 / rank
+            hit1 += rank == 1
+            hit3 += rank <= 3
+    n = len(targets)
+    return f"{hit1 / n:>7.3f}{hit3 / n:>7.3f}{mrr / n:>8.3f}"
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Embedding model (default: all-MiniLM-L6-v2)")
+    parser.add_argument("--reranker", default=DEFAULT_RERANK_MODEL, help=f"Cross-encoder (default: {DEFAULT_RERANK_MODEL})")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic export (default: 300)")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries (default: 100)")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[30], help="Candidates reranked per query (default: 30)")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[150.0, 0.0],
+                        help="Latency budgets in ms to test; 0 means no budget (default: 150 0)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = corpus_chunks(generate_export(tmp, n_pages=args.pages))
+    queries = labeled_queries(chunks, args.queries)
+    targets = [target for _, target in queries]
+
+    model = create_embedding_model(args.model)
+    corpus = np.asarray(model.encode(chunks, show_progress_bar=False), dtype=np.float32)
+    corpus /= np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+    query_vectors = np.asarray(model.encode([query for query, _ in queries], show_progress_bar=False), dtype=np.float32)
+    query_vectors /= np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+    vector_order = np.argsort(-(query_vectors @ corpus.T), axis=1)
+
+    reranker = CrossEncoderReranker(args.reranker)
+    print(f"{len(chunks)} chunks, {len(queries)} queries, model {args.model}, reranker {args.reranker}")
+    print(f"{'variant':<30}{'hit@1':>7}{'hit@3':>7}{'MRR@10':>8}{'p50 ms':>8}{'p95 ms':>8}{'fallback':>10}")
+
+    for n_candidates in args.candidates:
+        vector_rankings = [row[:n_candidates].tolist() for row in vector_order]
+        print(f"{f'vector ({n_candidates} candidates)':<30}{quality(vector_rankings, targets)}")
+
+        for budget in args.budgets:
+            reranker.latency_budget_ms = budget if budget > 0 else None
+            for cache_pass in ("cold", "cached"):
+                if cache_pass == "cold":
+                    reranker.clear_cache()
+                rankings, latencies, fallbacks = [], [], 0
+                for (query, _), candidates in zip(queries, vector_rankings):
+                    start = time.perf_counter()
+                    scores = reranker.score(query, [chunks[i] for i in candidates])
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if scores is None:
+                        fallbacks += 1
+                        rankings.append(candidates)
+                    else:
+                        rankings.append([candidates[j] for j in np.argsort(-np.asarray(scores))])
+                label = f"rerank {f'{budget:.0f}ms' if budget > 0 else 'no budget'} {cache_pass}"
+                print(f"{label:<30}{quality(rankings, targets)}{percentile(latencies, 50):>8.1f}"
+                      f"{percentile(latencies, 95):>8.1f}{fallbacks / len(queries):>10.1%}")
+    reranker.close()
+
+
+if __name__ == "__main__":
+    main()
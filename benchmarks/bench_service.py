@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Benchmark: load test of the search API (examples/web_api.py).
+
+Starts the stub embedding service (deterministic hash embeddings, see
+examples/embedding_stub_server.py) and the web API serving an index of the
+benchmark corpus, then sends GET /search requests from a number of
+concurrent clients, for each concurrency level in turn. Queries are a mix of
+filtered (workspace) and unfiltered, repeated (drawn from a small set of hot
+queries) and unique ones; the schedule only depends on the seed.
+
+Reports throughput, p50/p95/p99 latency and the error rate per concurrency
+level, overall and per kind of query, and writes them as JSON (stable keys,
+rounded numbers) that can be diffed between releases or compared with
+--baseline:
+
+    python benchmarks/bench_service.py --concurrency 1 4 16 --output service.json
+    python benchmarks/bench_service.py --server-env QUERY_CACHE_THRESHOLD=0.95 --baseline service.json
+    python benchmarks/bench_service.py --server-env PREFORK_WORKERS=4 WORKER_THREADS=4
+    python benchmarks/bench_service.py --url http://localhost:5000   # a server that is already running
+
+Latency includes embedding the query through the stub service, so it
+measures the archive and the web API rather than an embedding model.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from corpus import corpus_chunks, generate_export, sample_queries  # noqa: E402
+from notion_archive import __version__  # noqa: E402
+
+KINDS = ["unfiltered/repeated", "unfiltered/unique", "filtered/repeated", "filtered/unique"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until(check, timeout: float, process: Optional[subprocess.Popen] = None, what: str = "server") -> None:
+    """Poll check() until it is true; fail if the process exits or the timeout passes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"The {what} exited with code {process.returncode}")
+        try:
+            if check():
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"The {what} was not ready after {timeout:.0f}s")
+
+
+def get_json(url: str, timeout: float = 5.0) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def start_services(tmp: str, args) -> Tuple[str, List[subprocess.Popen], str]:
+    """Start the stub embedding service and the web API on the benchmark corpus."""
+    export_path = generate_export(tmp, n_pages=args.pages, seed=args.seed)
+    stub_port, api_port = free_port(), free_port()
+    log_path = os.path.join(tmp, "web_api.log")
+    log = open(log_path, "w")
+
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "examples", "embedding_stub_server.py"),
+         "--port", str(stub_port), "--dimension", str(args.dimension)],
+        stdout=log, stderr=subprocess.STDOUT
+    )
+    wait_until(lambda: socket.create_connection(("127.0.0.1", stub_port), timeout=1).close() or True,
+               30, stub, "stub embedding service")
+
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]),
+               PYTHONUNBUFFERED="1",
+               EMBEDDING_MODEL="stub",
+               EMBEDDING_BASE_URL=f"http://127.0.0.1:{stub_port}/v1",
+               NOTION_EXPORT_PATH=export_path,
+               PORT=str(api_port))
+    for setting in args.server_env:
+        key, _, value = setting.partition("=")
+        env[key] = value
+    # The web API keeps its index in ./web_archive_db
+    api = subprocess.Popen([sys.executable, os.path.join(ROOT, "examples", "web_api.py")],
+                           cwd=tmp, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{api_port}"
+    try:
+        wait_until(lambda: get_json(f"{url}/health", timeout=1)["archive_initialized"],
+                   args.startup_timeout, api, "web API")
+    except RuntimeError:
+        log.flush()
+        with open(log_path) as f:
+            print("".join(f.readlines()[-30:]), file=sys.stderr)
+        raise
+    return url, [api, stub], export_path
+
+
+def make_schedule(queries: List[str], workspaces: List[str], n: int, rng: random.Random,
+                  args) -> List[Tuple[str, Dict[str, str]]]:
+    """(kind, query parameters) of n requests in the configured mix."""
+    hot = queries[:args.hot_queries]
+    unique = iter(queries[args.hot_queries:])
+    schedule = []
+    for _ in range(n):
+        repeated = rng.random() < args.repeated
+        filtered = rng.random() < args.filtered and bool(workspaces)
+        query = rng.choice(hot) if repeated else next(unique, None) or rng.choice(hot)
+        params = {"q": query, "limit": str(args.limit)}
+        if filtered:
+            params["workspace"] = rng.choice(workspaces)
+        if args.group_by:
+            params["group_by"] = args.group_by
+        kind = f"{'filtered' if filtered else 'unfiltered'}/{'repeated' if repeated else 'unique'}"
+        schedule.append((kind, params))
+    return schedule
+
+
+def run_level(url: str, schedule: List[Tuple[str, Dict[str, str]]], concurrency: int,
+              timeout: float) -> Tuple[float, List[Tuple[str, float, Optional[str], int]]]:
+    """
+    Send the scheduled requests from `concurrency` clients.
+
+    Returns:
+        Wall time, and (kind, latency, error, number of results) of each request
+    """
+    samples: List[Tuple[str, float, Optional[str], int]] = []
+    lock = threading.Lock()
+    position = iter(range(len(schedule)))
+
+    def client():
+        while True:
+            with lock:
+                i = next(position, None)
+            if i is None:
+                return
+            kind, params = schedule[i]
+            error, count = None, 0
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(f"{url}/search?{urllib.parse.urlencode(params)}",
+                                            timeout=timeout) as response:
+                    count = json.loads(response.read())["count"]
+            except urllib.error.HTTPError as e:
+                error = f"HTTP {e.code}"
+            except Exception as e:
+                error = type(e).__name__
+            latency = time.perf_counter() - start
+            with lock:
+                samples.append((kind, latency, error, count))
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, samples
+
+
+def summarize(samples: List[Tuple[str, float, Optional[str], int]], seconds: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles (of successful requests, in ms) and errors."""
+    ok = np.array([latency for _, latency, error, _ in samples if error is None]) * 1000
+    errors = Counter(error for _, _, error, _ in samples if error is not None)
+    summary = {
+        "requests": len(samples),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / seconds, 1) if seconds else 0.0,
+    }
+    for name, value in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+        summary[name] = round(float(np.percentile(ok, value)), 2) if len(ok) else None
+    summary["mean_ms"] = round(float(ok.mean()), 2) if len(ok) else None
+    # Searches that found nothing (e.g. a filter matching no page) are fast but not useful
+    summary["empty_results"] = sum(1 for _, _, error, count in samples if error is None and count == 0)
+    if errors:
+        summary["error_types"] = dict(sorted(errors.items()))
+    return summary
+
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+    """Print the change in throughput and latency against an earlier result file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {baseline_path} (version {baseline.get('version')}):")
+    print(f"{'concurrency':<12}{'rps':>16}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}{'errors':>10}")
+    for level, now in results["levels"].items():
+        before = baseline.get("levels", {}).get(level)
+        if before is None:
+            continue
+        now, before = now["overall"], before["overall"]
+        cells = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if now[key] is None or not before[key]:
+                cells.append(f"{'-':>16}")
+            else:
+                cells.append(f"{now[key]:>8.1f} ({now[key] / before[key] - 1:+.0%})")
+        print(f"{level:<12}{''.join(cells)}{now['error_rate'] - before['error_rate']:>+10.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load test a running web API instead of starting one")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic export (default: 300)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus and schedule seed (default: 0)")
+    parser.add_argument("--dimension", type=int, default=384, help="Stub embedding dimension (default: 384)")
+    parser.add_argument("--server-env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="Web API settings, e.g. QUERY_CACHE_THRESHOLD=0.95 PREFORK_WORKERS=4")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Concurrent clients per level (default: 1 4 16)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per level (default: 500)")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests before the first level (default: 20)")
+    parser.add_argument("--filtered", type=float, default=0.3, help="Share of queries filtered by workspace (default: 0.3)")
+    parser.add_argument("--repeated", type=float, default=0.5, help="Share of queries drawn from the hot set (default: 0.5)")
+    parser.add_argument("--hot-queries", type=int, default=20, help="Size of the hot query set (default: 20)")
+    parser.add_argument("--limit", type=int, default=10, help="Results per search (default: 10)")
+    parser.add_argument("--group-by", choices=["page"], help="Group results by page")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds (default: 30)")
+    parser.add_argument("--startup-timeout", type=float, default=600.0,
+                        help="Seconds to wait for the web API to index the corpus (default: 600)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare with")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        processes: List[subprocess.Popen] = []
+        try:
+            if args.url:
+                url = args.url.rstrip("/")
+                export_path = generate_export(tmp, n_pages=args.pages, seed=args.seed)
+            else:
+                print(f"Starting the web API on {args.pages} synthetic pages...")
+                start = time.perf_counter()
+                url, processes, export_path = start_services(tmp, args)
+                print(f"Ready in {time.perf_counter() - start:.1f}s")
+
+            # Enough distinct queries for every level to send only unique ones
+            n_queries = args.hot_queries + args.warmup + args.requests * len(args.concurrency)
+            queries = list(dict.fromkeys(sample_queries(corpus_chunks(export_path), n_queries * 2, args.seed)))
+            rng = random.Random(args.seed)
+            rng.shuffle(queries)
+            warmup = [("warmup", {"q": query, "limit": str(args.limit)})
+                      for query in queries[args.hot_queries:args.hot_queries + args.warmup]]
+            queries = queries[:args.hot_queries] + queries[args.hot_queries + args.warmup:]
+            if warmup:
+                run_level(url, warmup, min(4, max(args.concurrency)), args.timeout)
+
+            # Filtered queries use the workspaces the parser found in the corpus
+            stats = get_json(f"{url}/stats", timeout=args.timeout)
+            workspaces = stats.get("workspaces") or []
+            results = {
+                "version": __version__,
+                "config": {
+                    "pages": args.pages, "seed": args.seed, "dimension": args.dimension,
+                    "server_env": sorted(args.server_env), "requests": args.requests,
+                    "filtered": args.filtered, "repeated": args.repeated,
+                    "hot_queries": args.hot_queries, "limit": args.limit, "group_by": args.group_by,
+                },
+                "index": {key: stats.get(key) for key in ("total_documents", "total_chunks")},
+                "levels": {},
+            }
+
+            print(f"{'concurrency':<12}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+            for concurrency in args.concurrency:
+                # Unique queries are not reused between levels
+                schedule = make_schedule(queries, workspaces, args.requests, rng, args)
+                queries = queries[:args.hot_queries] + queries[args.hot_queries + args.requests:]
+                seconds, samples = run_level(url, schedule, concurrency, args.timeout)
+                overall = summarize(samples, seconds)
+                results["levels"][str(concurrency)] = {
+                    "overall": overall,
+                    "by_kind": {kind: summarize([s for s in samples if s[0] == kind], seconds)
+                                for kind in KINDS if any(s[0] == kind for s in samples)},
+                }
+                print(f"{concurrency:<12}{overall['throughput_rps']:>8.1f}{overall['p50_ms'] or 0:>9.1f}"
+                      f"{overall['p95_ms'] or 0:>9.1f}{overall['p99_ms'] or 0:>9.1f}{overall['error_rate']:>8.1%}")
+
+            query_cache = get_json(f"{url}/stats", timeout=args.timeout).get("query_cache")
+            if query_cache:
+                results["query_cache"] = {key: query_cache.get(key) for key in ("hit_rate", "exact_hits", "semantic_hits")}
+                print(f"Query cache hit rate: {query_cache.get('hit_rate', 0):.0%}")
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Synthetic Notion HTML export used by the benchmarks.
+
+Pages mimic the markup of a real Notion export (page title, properties table,
+nested blocks with ids and classes) so parser and memory numbers are
+representative without shipping anyone's workspace.
+"""
+
+import os
+import random
+import uuid
+from typing import List, Tuple
+
+WORKSPACES = ["Engineering", "Product", "People Ops", "Sales", "Support"]
+SECTIONS = ["Roadmaps", "Meeting Notes", "Onboarding", "Runbooks", "Specs", "Policies"]
+TAGS = ["planning", "roadmap", "infra", "hiring", "q3", "q4", "security", "customer", "draft", "archived"]
+USERS = ["Ada Lovelace", "Grace Hopper", "Alan Turing", "Edsger Dijkstra", "Barbara Liskov"]
+WORDS = (
+    "the a to of and in for on with team project plan meeting review launch release customer "
+    "policy budget hiring roadmap quarter goal metric incident deploy service api database "
+    "latency search index embedding model design spec decision owner deadline risk feedback "
+    "onboarding process document update status blocker priority support ticket escalation "
+    "vacation pto benefits payroll security audit compliance access account migration"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+    return " ".join(words).capitalize() + "."
+
+
+def _block(rng: random.Random) -> str:
+    block_id = uuid.UUID(int=rng.getrandbits(128))
+    kind = rng.random()
+    if kind < 0.15:
+        return f'<h2 id="{block_id}" class="">{_sentence(rng)[:40]}</h2>'
+    if kind < 0.35:
+        items = "".join(
+            f'<li style="list-style-type:disc">{_sentence(rng)}</li>' for _ in range(rng.randint(2, 5))
+        )
+        return f'<ul id="{block_id}" class="bulleted-list">{items}</ul>'
+    if kind < 0.40:
+        return (f'<figure id="{block_id}" class="block-color-gray_background callout" '
+                f'style="white-space:pre-wrap;display:flex"><div style="font-size:1.5em">'
+                f'<span class="icon">💡</span></div><div style="width:100%">{_sentence(rng)}</div></figure>')
+    text = " ".join(_sentence(rng) for _ in range(rng.randint(1, 6)))
+    return f'<p id="{block_id}" class="">{text}</p>'
+
+
+def _page_html(rng: random.Random, page_id: str, title: str, n_blocks: int) -> str:
+    tags = "".join(
+        f'<span class="selected-value select-value-color-{rng.choice(["gray", "blue", "red"])}">{tag}</span>'
+        for tag in rng.sample(TAGS, rng.randint(0, 3))
+    )
+    created_by = rng.choice(USERS)
+    edited_by = rng.choice(USERS)
+    body = "".join(_block(rng) for _ in range(n_blocks))
+    return f"""<html><head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>
+<title>{title}</title><style>
+/* Notion exports inline a large stylesheet in every page */
+{"html { -webkit-print-color-adjust: exact; } " * 40}
+</style></head><body><article id="{page_id}" class="page sans"><header>
+<h1 class="page-title">{title}</h1><p class="page-description"></p>
+<table class="properties"><tbody>
+<tr class="property-row property-row-created_by"><th>Created By</th><td><span class="user">{created_by}</span></td></tr>
+<tr class="property-row property-row-created_time"><th>Created</th><td><time>@March 3, 2023 10:15 AM</time></td></tr>
+<tr class="property-row property-row-last_edited_by"><th>Last Edited By</th><td><span class="user">{edited_by}</span></td></tr>
+<tr class="property-row property-row-last_edited_time"><th>Last Edited</th><td><time>@June 21, 2024 4:02 PM</time></td></tr>
+<tr class="property-row property-row-multi_select"><th>Tags</th><td>{tags}</td></tr>
+</tbody></table></header><div class="page-body">{body}</div></article></body></html>"""
+
+
+def generate_export(root: str, n_pages: int = 500, seed: int = 0, mean_blocks: int = 25) -> str:
+    """
+    Write a synthetic Notion export.
+
+    Args:
+        root: Directory to create the export in
+        n_pages: Number of pages to generate
+        seed: Random seed (the same seed always produces the same export)
+        mean_blocks: Average number of content blocks per page
+
+    Returns:
+        Path of the export folder (the one to pass to add_export)
+    """
+    rng = random.Random(seed)
+    export_dir = os.path.join(root, f"Export-{uuid.UUID(int=rng.getrandbits(128))}")
+    folders: List[str] = []
+    for workspace in WORKSPACES:
+        for section in SECTIONS:
+            folder = os.path.join(
+                export_dir,
+                f"{workspace} {uuid.UUID(int=rng.getrandbits(128)).hex}",
+                f"{section} {uuid.UUID(int=rng.getrandbits(128)).hex}",
+            )
+            os.makedirs(folder, exist_ok=True)
+            folders.append(folder)
+
+    for i in range(n_pages):
+        page_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        title = f"{rng.choice(SECTIONS)[:-1]} {i}: {' '.join(rng.sample(WORDS, 3)).title()}"
+        n_blocks = max(1, int(rng.expovariate(1 / mean_blocks)))
+        html = _page_html(rng, page_id, title, n_blocks)
+        path = os.path.join(rng.choice(folders), f"{title.replace(':', '')} {page_id.replace('-', '')}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+    return export_dir
+
+
+def corpus_chunks(export_path: str, chunk_size: int = 1000) -> List[str]:
+    """Parse an export and cut page text into fixed-size chunks (no overlap)."""
+    from notion_archive.core.parser import NotionExportParser
+
+    chunks = []
+    for doc in NotionExportParser(export_path, html_mode="none").parse_export():
+        text = doc.plain_text
+        chunks.extend(text[i:i + chunk_size] for i in range(0, len(text), chunk_size) if text[i:i + chunk_size].strip())
+    return chunks
+
+
+def sample_queries(chunks: List[str], n: int = 100, seed: int = 0) -> List[str]:
+    """Pick short queries made of a few consecutive words from random chunks."""
+    return [query for query, _ in labeled_queries(chunks, n, seed)]
+
+
+def labeled_queries(chunks: List[str], n: int = 100, seed: int = 0) -> List[Tuple[str, int]]:
+    """Like sample_queries, with the index of the chunk each query was taken from."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        source = rng.randrange(len(chunks))
+        words = chunks[source].split()
+        start = rng.randrange(max(1, len(words) - 6))
+        queries.append((" ".join(words[start:start + rng.randint(2, 6)]), source))
+    return queries
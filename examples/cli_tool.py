@@ -4,9 +4,11 @@ Example: Command-line interface for Notion Archive
 """
 
 import argparse
+import json
 import os
 import sys
 from notion_archive import NotionArchive
+from notion_archive.core.distributed import DistributedBuild, run_local_build
 
 def build_command(args):
     """Build search index from Notion export"""
@@ -19,8 +21,17 @@ def build_command(args):
     )
     
     try:
-        archive.add_export(args.export_path)
-        archive.build_index()
+        if args.plan_only:
+            if not args.build_dir:
+                raise ValueError("--plan-only needs --build-dir")
+            DistributedBuild.plan(args.build_dir, [args.export_path], archive)
+            print(f"✅ Build planned. Run workers with: python cli_tool.py worker {args.build_dir}")
+            return
+        if args.workers > 1 or args.build_dir:
+            run_local_build(archive, [args.export_path], build_dir=args.build_dir, workers=args.workers)
+        else:
+            archive.add_export(args.export_path, defer_load=True)
+            archive.build_index()
         
         stats = archive.get_stats()
         print(f"✅ Index built successfully!")
@@ -32,13 +43,68 @@ def build_command(args):
         print(f"❌ Error building index: {e}")
         sys.exit(1)
 
+def plan_command(args):
+    """Report what building the index would embed and cost, without embedding"""
+    print(f"📋 Planning build for: {args.export_path}")
+    
+    archive = NotionArchive(
+        embedding_model=args.model,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        db_path=args.db_path
+    )
+    
+    try:
+        archive.add_export(args.export_path, defer_load=True)
+        plan = archive.plan_build(resume=args.resume, calibration_chunks=args.calibration)
+        if args.json:
+            print(json.dumps(plan.as_dict(), indent=2))
+        else:
+            print(plan)
+        
+    except Exception as e:
+        print(f"❌ Error planning build: {e}")
+        sys.exit(1)
+
+def worker_command(args):
+    """Process work units of a planned distributed build"""
+    print(f"👷 Working on build: {args.build_dir}")
+    
+    try:
+        build = DistributedBuild(args.build_dir)
+        processed = build.run_worker(max_units=args.max_units, lease_seconds=args.lease)
+        status = build.status()
+        print(f"✅ Processed {processed} work units ({status['done']}/{status['units']} done)")
+        
+    except Exception as e:
+        print(f"❌ Error in worker: {e}")
+        sys.exit(1)
+
+def merge_command(args):
+    """Merge the shards of a distributed build into the archive"""
+    print(f"🔗 Merging build: {args.build_dir}")
+    
+    archive = NotionArchive(
+        embedding_model=args.model,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        db_path=args.db_path
+    )
+    
+    try:
+        chunks = DistributedBuild(args.build_dir).merge(archive)
+        print(f"✅ Merged {chunks} chunks into {args.db_path}")
+        
+    except Exception as e:
+        print(f"❌ Error merging build: {e}")
+        sys.exit(1)
+
 def search_command(args):
     """Search the archive"""
     print(f"🔍 Searching for: '{args.query}'")
     
     archive = NotionArchive(
         embedding_model=args.model,
-        db_path=args.db_path
+        db_path=args.db_path,
+        snapshot_path=args.snapshot
     )
     
     try:
@@ -49,7 +115,8 @@ def search_command(args):
         if args.tags:
             filters['tags'] = args.tags.split(',')
         
-        results = archive.search(args.query, limit=args.limit, **filters)
+        results = archive.search(args.query, limit=args.limit, group_by=args.group_by, as_of=args.as_of,
+                                 **filters)
         
         if not results:
             print("No results found.")
@@ -63,13 +130,41 @@ def search_command(args):
             print(f"   Workspace: {result['workspace']}")
             if result['tags']:
                 print(f"   Tags: {', '.join(result['tags'])}")
-            print(f"   Preview: {result['content'][:150]}...")
+            if 'snippet' in result:
+                print(f"   Snippet: {result['snippet']}")
+            else:
+                print(f"   Preview: {result['content'][:150]}...")
             print()
             
     except Exception as e:
         print(f"❌ Error searching: {e}")
         sys.exit(1)
 
+def add_snapshot_command(args):
+    """Add an export as a new snapshot of a versioned archive"""
+    print(f"🗂️  Adding snapshot: {args.export_path}")
+    
+    archive = NotionArchive(
+        embedding_model=args.model,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        db_path=args.db_path
+    )
+    
+    try:
+        record = archive.add_snapshot(args.export_path, label=args.label, snapshot_date=args.date)
+        print(f"✅ Snapshot {record['ordinal']} ({record['label']}, {record['date']}) added")
+        print(f"   Pages: {record['pages']} ({record['unchanged']} unchanged, {record['new']} new, "
+              f"{record['changed']} changed, {record['removed']} removed)")
+        print(f"   Chunks embedded: {record['embedded_chunks']}")
+        
+        print(f"\nSnapshots ({len(archive.list_snapshots())}):")
+        for snapshot in archive.list_snapshots():
+            print(f"  {snapshot['ordinal']:>3}. {snapshot['label']} ({snapshot['date']})")
+        
+    except Exception as e:
+        print(f"❌ Error adding snapshot: {e}")
+        sys.exit(1)
+
 def stats_command(args):
     """Show archive statistics"""
     print("📊 Archive Statistics")
@@ -100,6 +195,99 @@ def stats_command(args):
         print(f"❌ Error getting stats: {e}")
         sys.exit(1)
 
+def snapshot_command(args):
+    """Export the index to a portable read-only snapshot file"""
+    print(f"📦 Writing snapshot: {args.output}")
+    
+    archive = NotionArchive(
+        embedding_model=args.model,
+        db_path=args.db_path
+    )
+    
+    try:
+        if args.export_path:
+            archive.add_export(args.export_path, defer_load=True)
+        info = archive.export_snapshot(args.output)
+        size_mb = os.path.getsize(args.output) / 1024 / 1024
+        print(f"✅ Snapshot written: {info['count']} chunks, {info['dimension']} dimensions, {size_mb:.1f}MB")
+        
+    except Exception as e:
+        print(f"❌ Error writing snapshot: {e}")
+        sys.exit(1)
+
+def watch_command(args):
+    """Keep the index in sync with an export directory"""
+    from notion_archive.core.watcher import ExportWatcher
+    
+    print(f"👀 Watching: {args.export_path}")
+    
+    archive = NotionArchive(
+        embedding_model=args.model,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        db_path=args.db_path
+    )
+    
+    try:
+        if not archive.has_index():
+            archive.add_export(args.export_path)
+            archive.build_index()
+        
+        watcher = ExportWatcher(
+            archive,
+            args.export_path,
+            interval=args.interval,
+            debounce=args.debounce
+        )
+        watcher.run()
+        
+    except KeyboardInterrupt:
+        metrics = watcher.metrics
+        print(f"\nStopped. {metrics.batches} batches, {metrics.pages_indexed} pages re-indexed "
+              f"({metrics.pages_per_second:.1f} pages/s), max lag {metrics.max_lag_seconds:.1f}s")
+    except Exception as e:
+        print(f"❌ Error watching export: {e}")
+        sys.exit(1)
+
+def tune_command(args):
+    """Tune HNSW index settings for recall and latency"""
+    from notion_archive.core.tuning import tune_hnsw
+    
+    print("🎛️  Tuning vector index settings")
+    
+    archive = NotionArchive(
+        embedding_model=args.model,
+        db_path=args.db_path
+    )
+    
+    try:
+        queries = None
+        if args.queries_file:
+            with open(args.queries_file, 'r', encoding='utf-8') as f:
+                queries = [line.strip() for line in f if line.strip()]
+        
+        report = tune_hnsw(
+            archive,
+            queries=queries,
+            k=args.k,
+            target_recall=args.target_recall,
+            apply=args.apply
+        )
+        
+        print(f"\nTuned on {report.vectors} vectors with {report.queries} queries")
+        print(f"Exact search: {report.exact_ms_per_query:.2f}ms per query")
+        for note in report.notes:
+            print(f"Note: {note}")
+        print(f"\nRecommended (recall@{report.k} >= {report.target_recall}):")
+        print(f"  {report.recommended}")
+        if report.applied:
+            print("✅ Applied to the live index")
+        else:
+            print("Run again with --apply to rebuild the index with these settings")
+        
+    except Exception as e:
+        print(f"❌ Error tuning index: {e}")
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(
         description="Notion Archive CLI - Search your Notion exports",
@@ -109,17 +297,46 @@ Examples:
   # Build index from export
   python cli_tool.py build ./my_notion_export
 
+  # Chunk counts, tokens, cost and ETA before building
+  python cli_tool.py plan ./my_notion_export --model text-embedding-3-small
+
+  # Build with 8 local worker processes
+  python cli_tool.py build ./my_notion_export --workers 8
+
+  # Build on several machines sharing /shared/build
+  python cli_tool.py build ./my_notion_export --build-dir /shared/build --plan-only
+  python cli_tool.py worker /shared/build        # on each machine
+  python cli_tool.py merge /shared/build
+
   # Search with local model
   python cli_tool.py search "meeting notes" --limit 5
 
   # Search with OpenAI model (set OPENAI_API_KEY)
   python cli_tool.py search "AI strategy" --model text-embedding-3-large
 
+  # One result per page with a highlighted snippet
+  python cli_tool.py search "onboarding" --group-by page
+
   # Search in specific workspace
   python cli_tool.py search "planning" --workspace Engineering
 
+  # Keep monthly exports as versions, searchable as of any month
+  python cli_tool.py add-snapshot ./export-2024-01 --date 2024-01-31
+  python cli_tool.py add-snapshot ./export-2024-02 --date 2024-02-29
+  python cli_tool.py search "retention policy" --as-of 2024-01-31
+
   # Show statistics
   python cli_tool.py stats
+
+  # Ship the index to search replicas as one file
+  python cli_tool.py snapshot ./index.nasnap --export-path ./my_notion_export
+  python cli_tool.py search "meeting notes" --snapshot ./index.nasnap
+
+  # Keep the index in sync with a synced export folder
+  python cli_tool.py watch ./my_notion_export
+
+  # Find the fastest index settings with at least 95% recall@10 and apply them
+  python cli_tool.py tune --queries-file queries.txt --apply
         """
     )
     
@@ -140,6 +357,29 @@ Examples:
     # Build command
     build_parser = subparsers.add_parser('build', help='Build search index from Notion export')
     build_parser.add_argument('export_path', help='Path to Notion export folder')
+    build_parser.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1)')
+    build_parser.add_argument('--build-dir', help='Build directory for work units and shards (default: temporary)')
+    build_parser.add_argument('--plan-only', action='store_true',
+                              help='Only plan the work units, for workers started separately')
+    
+    # Plan command
+    plan_parser = subparsers.add_parser('plan', help='Report build volume, cost and ETA without building')
+    plan_parser.add_argument('export_path', help='Path to Notion export folder')
+    plan_parser.add_argument('--resume', action='store_true', help='Plan resuming an interrupted build')
+    plan_parser.add_argument('--calibration', type=int, default=64,
+                             help='Chunks embedded to measure throughput; 0 skips the ETA (default: 64)')
+    plan_parser.add_argument('--json', action='store_true', help='Print the plan as JSON')
+    
+    # Worker command
+    worker_parser = subparsers.add_parser('worker', help='Process work units of a planned build')
+    worker_parser.add_argument('build_dir', help='Build directory shared with the coordinator')
+    worker_parser.add_argument('--max-units', type=int, help='Stop after this many work units')
+    worker_parser.add_argument('--lease', type=float, default=600.0,
+                               help="Seconds before another worker's stalled unit is taken over (default: 600)")
+    
+    # Merge command
+    merge_parser = subparsers.add_parser('merge', help='Merge the shards of a planned build into the archive')
+    merge_parser.add_argument('build_dir', help='Build directory shared with the workers')
     
     # Search command
     search_parser = subparsers.add_parser('search', help='Search the archive')
@@ -147,6 +387,35 @@ Examples:
     search_parser.add_argument('--limit', type=int, default=10, help='Number of results (default: 10)')
     search_parser.add_argument('--workspace', help='Filter by workspace')
     search_parser.add_argument('--tags', help='Filter by tags (comma-separated)')
+    search_parser.add_argument('--group-by', choices=['page'], help='Return one result per page')
+    search_parser.add_argument('--snapshot', help='Search a snapshot file instead of the database')
+    search_parser.add_argument('--as-of', help='Export snapshot to search: number, label or date (versioned archives)')
+    
+    # Add-snapshot command
+    add_snapshot_parser = subparsers.add_parser('add-snapshot',
+                                                help='Add an export as a new version of a versioned archive')
+    add_snapshot_parser.add_argument('export_path', help='Path to Notion export folder')
+    add_snapshot_parser.add_argument('--label', help='Snapshot name (default: the folder name)')
+    add_snapshot_parser.add_argument('--date', help='Date the export was taken, YYYY-MM-DD (default: today)')
+    
+    # Snapshot command
+    snapshot_parser = subparsers.add_parser('snapshot', help='Export the index to a read-only snapshot file')
+    snapshot_parser.add_argument('output', help='Snapshot file to write')
+    snapshot_parser.add_argument('--export-path', help='Include the page catalog from this Notion export')
+    
+    # Watch command
+    watch_parser = subparsers.add_parser('watch', help='Re-index changed pages as the export changes')
+    watch_parser.add_argument('export_path', help='Path to Notion export folder')
+    watch_parser.add_argument('--interval', type=float, default=5.0, help='Seconds between scans (default: 5)')
+    watch_parser.add_argument('--debounce', type=float, default=2.0,
+                              help='Quiet seconds before a burst of changes is indexed (default: 2)')
+    
+    # Tune command
+    tune_parser = subparsers.add_parser('tune', help='Tune vector index settings for recall and latency')
+    tune_parser.add_argument('--queries-file', help='File with one sample query per line (default: sampled chunks)')
+    tune_parser.add_argument('--k', type=int, default=10, help='Recall cut-off (default: 10)')
+    tune_parser.add_argument('--target-recall', type=float, default=0.95, help='Minimum recall@k (default: 0.95)')
+    tune_parser.add_argument('--apply', action='store_true', help='Rebuild the index with the recommended settings')
     
     # Stats command
     stats_parser = subparsers.add_parser('stats', help='Show archive statistics')
@@ -159,10 +428,24 @@ Examples:
     
     if args.command == 'build':
         build_command(args)
+    elif args.command == 'plan':
+        plan_command(args)
+    elif args.command == 'worker':
+        worker_command(args)
+    elif args.command == 'merge':
+        merge_command(args)
     elif args.command == 'search':
         search_command(args)
+    elif args.command == 'add-snapshot':
+        add_snapshot_command(args)
     elif args.command == 'stats':
         stats_command(args)
+    elif args.command == 'tune':
+        tune_command(args)
+    elif args.command == 'watch':
+        watch_command(args)
+    elif args.command == 'snapshot':
+        snapshot_command(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
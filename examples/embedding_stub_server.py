@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Example: minimal embedding service for trying out the HTTP embedding backend
+
+Serves deterministic (hash-based, not semantic) embeddings over both the
+OpenAI embeddings API and the text-embeddings-inference API, so archives
+can be pointed at a local service without downloading a model:
+
+    python embedding_stub_server.py --port 8080
+
+    archive = NotionArchive(embedding_model="stub",
+                            embedding_base_url="http://localhost:8080/v1")
+"""
+
+import argparse
+import hashlib
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def stub_embedding(text: str, dimension: int):
+    """Deterministic unit vector for a text."""
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def make_handler(dimension: int):
+    class EmbeddingHandler(BaseHTTPRequestHandler):
+        # Keep connections alive between requests
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+            if self.path.endswith("/embeddings"):
+                texts = body.get("input", [])
+                texts = [texts] if isinstance(texts, str) else texts
+                payload = {
+                    "object": "list",
+                    "model": body.get("model", "stub"),
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": stub_embedding(text, dimension)}
+                        for i, text in enumerate(texts)
+                    ]
+                }
+            elif self.path.endswith("/embed"):
+                texts = body.get("inputs", [])
+                texts = [texts] if isinstance(texts, str) else texts
+                payload = [stub_embedding(text, dimension) for text in texts]
+            else:
+                self.send_error(404)
+                return
+
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return EmbeddingHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub embedding service (OpenAI and TEI APIs)")
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--dimension', type=int, default=384, help='Embedding dimension')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.dimension))
+    print(f"🚀 Stub embedding service on http://{args.host}:{args.port}")
+    print(f"   OpenAI API: http://{args.host}:{args.port}/v1/embeddings")
+    print(f"   TEI API:    http://{args.host}:{args.port}/embed")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,36 +4,84 @@ Example: Flask web API for Notion Archive
 """
 
 from flask import Flask, request, jsonify
-from notion_archive import NotionArchive
+from notion_archive import NotionArchive, SemanticQueryCache
 import os
 
 app = Flask(__name__)
 
 # Initialize archive (in production, do this once at startup)
 archive = None
+watcher = None
+# Pre-fork server, when serving with PREFORK_WORKERS
+server = None
 
 def init_archive():
     """Initialize the archive with your Notion export"""
-    global archive
+    global archive, watcher
     
     # Use environment variables for configuration
     embedding_model = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
     openai_api_key = os.getenv("OPENAI_API_KEY")
     export_path = os.getenv("NOTION_EXPORT_PATH", "./notion_export")
+    snapshot_path = os.getenv("SNAPSHOT_PATH")
+    # Self-hosted embedding service, e.g. http://embeddings.lan:8000/v1
+    embedding_base_url = os.getenv("EMBEDDING_BASE_URL")
+    embedding_options = {"api_format": os.getenv("EMBEDDING_API_FORMAT", "openai")}
+    # Answer near-duplicate queries from recent results (e.g. QUERY_CACHE_THRESHOLD=0.95)
+    cache_threshold = os.getenv("QUERY_CACHE_THRESHOLD")
+    query_cache = SemanticQueryCache(threshold=float(cache_threshold)) if cache_threshold else None
     
     print(f"Initializing archive with model: {embedding_model}")
     
+    # Search replicas serve a read-only snapshot: no parsing, no database
+    if snapshot_path:
+        archive = NotionArchive(
+            embedding_model=embedding_model,
+            openai_api_key=openai_api_key,
+            snapshot_path=snapshot_path,
+            embedding_base_url=embedding_base_url,
+            embedding_options=embedding_options,
+            query_cache=query_cache
+        )
+        print("✅ Archive ready (snapshot)!")
+        return
+    
     archive = NotionArchive(
         embedding_model=embedding_model,
         openai_api_key=openai_api_key,
-        db_path="./web_archive_db"
+        db_path="./web_archive_db",
+        embedding_base_url=embedding_base_url,
+        embedding_options=embedding_options,
+        query_cache=query_cache
     )
     
-    # Add your Notion export
+    # Add your Notion export (unchanged pages come from the document store;
+    # they are only loaded into memory if the index has to be built)
     if os.path.exists(export_path):
-        archive.add_export(export_path)
+        archive.add_export(export_path, defer_load=True)
         archive.build_index()
         print("✅ Archive ready!")
+        
+        # Forked workers share a read-only snapshot of the index
+        if os.getenv("PREFORK_WORKERS"):
+            snapshot_path = os.path.join("./web_archive_db", "serving.nasnap")
+            archive.export_snapshot(snapshot_path)
+            archive = NotionArchive(
+                embedding_model=embedding_model,
+                openai_api_key=openai_api_key,
+                snapshot_path=snapshot_path,
+                embedding_base_url=embedding_base_url,
+                embedding_options=embedding_options,
+                query_cache=query_cache
+            )
+            print(f"✅ Serving snapshot {snapshot_path}")
+            return
+        
+        # Optionally re-index pages as the export directory changes
+        if os.getenv("WATCH_EXPORT", "false").lower() == "true":
+            from notion_archive.core.watcher import ExportWatcher
+            watcher = ExportWatcher(archive, export_path).start()
+            print(f"👀 Watching {export_path} for changes")
     else:
         print(f"⚠️  Export path not found: {export_path}")
         print("   Set NOTION_EXPORT_PATH environment variable")
@@ -47,6 +95,9 @@ def search():
     query = request.args.get('q', '')
     limit = int(request.args.get('limit', 10))
     workspace = request.args.get('workspace')
+    group_by = request.args.get('group_by')
+    fields = request.args.get('fields')
+    as_of = request.args.get('as_of')
     
     if not query:
         return jsonify({"error": "Query parameter 'q' is required"}), 400
@@ -57,7 +108,14 @@ def search():
         if workspace:
             filters['workspace'] = workspace
         
-        results = archive.search(query, limit=limit, **filters)
+        results = archive.search(
+            query,
+            limit=limit,
+            group_by=group_by,
+            fields=fields.split(',') if fields else None,
+            as_of=as_of,
+            **filters
+        )
         
         return jsonify({
             "query": query,
@@ -68,6 +126,38 @@ def search():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/navigate', methods=['GET'])
+def navigate():
+    """Find pages by title"""
+    if not archive:
+        return jsonify({"error": "Archive not initialized"}), 500
+    
+    query = request.args.get('q', '')
+    limit = int(request.args.get('limit', 5))
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    
+    pages = archive.navigate(query, limit=limit)
+    return jsonify({
+        "query": query,
+        "results": pages,
+        "count": len(pages)
+    })
+
+@app.route('/related/<page_id>', methods=['GET'])
+def related(page_id):
+    """Pages linked with a page"""
+    if not archive:
+        return jsonify({"error": "Archive not initialized"}), 500
+    
+    limit = int(request.args.get('limit', 10))
+    pages = archive.related(page_id, limit=limit)
+    return jsonify({
+        "page_id": page_id,
+        "results": pages,
+        "count": len(pages)
+    })
+
 @app.route('/stats', methods=['GET'])
 def stats():
     """Get archive statistics"""
@@ -80,13 +170,26 @@ def stats():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/watch', methods=['GET'])
+def watch_metrics():
+    """Watch mode throughput and lag metrics"""
+    if not watcher:
+        return jsonify({"error": "Watch mode not enabled (set WATCH_EXPORT=true)"}), 404
+    return jsonify(watcher.metrics.as_dict())
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({
+    health = {
         "status": "healthy",
         "archive_initialized": archive is not None
-    })
+    }
+    # Pre-fork mode: readiness and memory (RSS, PSS, private USS) of every worker
+    if server is not None:
+        health["server"] = server.status()
+        if health["server"]["ready"] < server.workers:
+            health["status"] = "degraded"
+    return jsonify(health)
 
 @app.route('/', methods=['GET'])
 def home():
@@ -95,11 +198,16 @@ def home():
         "name": "Notion Archive API",
         "version": "1.0.0",
         "endpoints": {
-            "GET /search": "Search the archive. Params: q (query), limit (default 10), workspace (optional)",
-            "GET /stats": "Get archive statistics",
-            "GET /health": "Health check"
+            "GET /search": "Search the archive. Params: q (query), limit (default 10), workspace (optional), "
+                           "group_by (optional, 'page'), fields (optional, comma-separated), "
+                           "as_of (optional, export snapshot number, label or date)",
+            "GET /navigate": "Find pages by title. Params: q (page name or prefix), limit (default 5)",
+            "GET /related/<page_id>": "Pages linked with a page. Params: limit (default 10)",
+            "GET /stats": "Get archive statistics (with QUERY_CACHE_THRESHOLD: query cache hit rate and saved latency)",
+            "GET /watch": "Watch mode metrics (when WATCH_EXPORT=true)",
+            "GET /health": "Health check (with PREFORK_WORKERS: readiness and memory of each worker)"
         },
-        "example": "/search?q=meeting notes&limit=5&workspace=Engineering"
+        "example": "/search?q=meeting notes&limit=5&workspace=Engineering&group_by=page&fields=id,title,score,snippet"
     })
 
 if __name__ == "__main__":
@@ -110,5 +218,14 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
     debug = os.getenv("DEBUG", "false").lower() == "true"
     
-    print(f"🚀 Starting Notion Archive API on port {port}")
-    app.run(host="0.0.0.0", port=port, debug=debug)
\ No newline at end of file
+    # Load once, then fork workers that share the model and index copy-on-write
+    workers = int(os.getenv("PREFORK_WORKERS", 0))
+    if workers:
+        from notion_archive.core.serving import PreforkServer
+        server = PreforkServer(app, archive, port=port, workers=workers,
+                               threads=int(os.getenv("WORKER_THREADS", 1)))
+        print(f"🚀 Starting Notion Archive API on port {port} ({workers} workers)")
+        server.serve_forever()
+    else:
+        print(f"🚀 Starting Notion Archive API on port {port}")
+        app.run(host="0.0.0.0", port=port, debug=debug)
\ No newline at end of file
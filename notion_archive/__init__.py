@@ -7,9 +7,15 @@ a searchable archive that developers can integrate into any application.
 """
 
 from .core.archive import NotionArchive
+from .core.async_archive import AsyncNotionArchive
+from .core.embeddings import ModelRegistry
+from .core.multi import ArchiveManager
+from .core.query_cache import SemanticQueryCache
+from .core.rerank import CrossEncoderReranker
 
 __version__ = "0.1.0"
 __author__ = "Notion Archive Contributors"
 __email__ = "hello@notion-archive.com"
 
-__all__ = ["NotionArchive"]
\ No newline at end of file
+__all__ = ["NotionArchive", "AsyncNotionArchive", "ArchiveManager", "CrossEncoderReranker", "ModelRegistry",
+           "SemanticQueryCache"]
\ No newline at end of file
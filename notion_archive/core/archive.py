@@ -2,14 +2,89 @@
 Main NotionArchive class - the primary interface for the library.
 """
 
+import hashlib
+import itertools
+import json
 import os
-from typing import List, Dict, Any, Optional
+import tempfile
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from pathlib import Path
 import chromadb
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-from .parser import NotionDocument, NotionExportParser
-from .embeddings import create_embedding_model, EmbeddingModel
+from .databases import find_database_files, iter_database_rows
+from .parser import HTML_MODES, NotionDocument, NotionExportParser
+from .rerank import CrossEncoderReranker
+from .embeddings import create_embedding_model, EmbeddingModel, ModelRegistry, model_registry
+from .journal import BuildJournal, chunk_pairs_digest, chunks_digest
+from .links import LinkGraph
+from .pages import CHUNK_FIELDS, NATIVE_OPERATORS, NATIVE_PAGE_FIELDS, PageTable, where_fields, where_operators
+from .planning import DEFAULT_CALIBRATION_CHUNKS, TITLE_BATCH_SIZE, BuildPlan, embedding_cost, estimate_tokens, \
+    plan_chunks
+from .query_cache import SemanticQueryCache
+from .snapshot import Snapshot, SnapshotCollection, write_snapshot
+from .store import DocumentStore
+from .streaming import LARGE_PAGE_BYTES, PageStreamParser, stream_chunks, stream_page
+from .titles import TITLE_PREFIX_MATCH, TitleIndex
+from .tuning import HNSW_DEFAULTS, HNSW_SPACES, hnsw_metadata
+from .versions import OPEN, VERSION_FIELDS, VersionHistory, page_digest, parse_date, versioned_id
+from ..utils.files import Fingerprint, atomic_write_json, file_fingerprint, read_json
+from ..utils.memory import MemoryGovernor, parse_size
+from ..utils.text import make_snippet
+
+
+# Parsed document store, kept next to the ChromaDB files in db_path
+DOCUMENT_STORE_FILE = "documents.sqlite3"
+
+# Maps collection names to the physical collection currently serving searches
+MANIFEST_FILE = "archive_manifest.json"
+
+# Longest collection name ChromaDB accepts
+MAX_COLLECTION_NAME = 63
+
+# Parsed files written to the document store per batch (fewer when memory is short)
+PARSE_BATCH = 200
+
+# Fields returned per chunk hit when `fields` is not given
+# ("rerank_score" is only set when a reranker reordered the results)
+CHUNK_RESULT_FIELDS = frozenset({
+    "id", "content", "metadata", "score", "title", "workspace", "tags", "breadcrumb", "url",
+    "rerank_score"
+})
+
+# Lightweight fields returned per page when searching with group_by="page"
+PAGE_RESULT_FIELDS = frozenset({
+    "id", "chunk_id", "score", "title", "workspace", "tags", "breadcrumb", "url",
+    "matched_chunks", "snippet", "rerank_score"
+})
+
+# Chunks fetched per strongly title-matched page missing from the vector hits
+TITLE_HIT_OVERFETCH = 3
+
+# Page filters matching more pages than this are applied to over-fetched hits
+# instead of reaching the vector store as a long original_id $in list
+MAX_PAGE_FILTER_IDS = 1000
+
+
+@dataclass
+class _IndexBuild:
+    """An index build in progress: staging collection, journal and remaining chunks."""
+    staging: Any
+    journal: BuildJournal
+    chunks: Iterator[Tuple[str, Dict[str, Any], str]]
+    committed: int
+    total: Optional[int]
+    governor: MemoryGovernor
+    # Chunks per store write when batches are written in slices (None: whole batches)
+    write_batch: Optional[int] = None
+    
+    def progress(self) -> str:
+        return f"{self.committed}/{self.total}" if self.total is not None else str(self.committed)
 
 
 class NotionArchive:
@@ -29,7 +104,26 @@ class NotionArchive:
                  db_path: str = "./notion_archive_db",
                  collection_name: str = "documents",
                  chunk_size: int = 1000,
-                 chunk_overlap: int = 200):
+                 chunk_overlap: int = 200,
+                 group_overfetch: int = 4,
+                 document_store: bool = True,
+                 html_mode: str = "compressed",
+                 embedding_dimensions: Optional[int] = None,
+                 truncate_locally: bool = False,
+                 hnsw_space: str = "cosine",
+                 hnsw_m: Optional[int] = None,
+                 hnsw_construction_ef: Optional[int] = None,
+                 hnsw_search_ef: Optional[int] = None,
+                 snapshot_path: Optional[str] = None,
+                 embedding_base_url: Optional[str] = None,
+                 embedding_options: Optional[Dict[str, Any]] = None,
+                 title_boost: float = 0.0,
+                 link_boost: float = 0.0,
+                 reranker: Union[CrossEncoderReranker, str, None] = None,
+                 rerank_candidates: int = 30,
+                 memory_budget: Union[int, str, None] = None,
+                 query_cache: Union[SemanticQueryCache, bool, None] = None,
+                 share_model: Union[ModelRegistry, bool] = True):
         """
         Initialize Notion Archive.
         
@@ -40,21 +134,146 @@ class NotionArchive:
             collection_name: Name of the document collection
             chunk_size: Maximum size of document chunks
             chunk_overlap: Overlap between document chunks
+            group_overfetch: Chunks fetched per requested page when searching with group_by="page"
+            document_store: Cache parsed documents next to the index so unchanged
+                            pages are not re-parsed by later add_export calls
+            html_mode: How parsed documents keep their page HTML: "full", "compressed",
+                       "lazy" (re-read from the export on access) or "none".
+                       Indexing only uses the plain text.
+            embedding_dimensions: Reduced embedding dimension (default: the model's full
+                                  dimension). Trades a little recall for smaller, faster indexes.
+            truncate_locally: Truncate and renormalize embeddings locally even when the
+                              model can return shortened embeddings itself
+            hnsw_space: Distance metric of the vector index ("cosine", "ip" or "l2")
+            hnsw_m: HNSW graph degree (default: ChromaDB's default)
+            hnsw_construction_ef: HNSW candidate list size while building
+            hnsw_search_ef: HNSW candidate list size while searching
+            snapshot_path: Serve searches read-only from a snapshot file written by
+                           export_snapshot() instead of ChromaDB (for search replicas)
+            embedding_base_url: URL of a self-hosted embedding service (OpenAI-compatible
+                                or text-embeddings-inference) serving `embedding_model`
+            embedding_options: Extra HTTP backend settings, e.g. {"api_format": "tei",
+                               "batch_size": 64, "max_concurrency": 4, "timeout": 30}.
+                               Local models take {"batch_size": 32, "padding_budget": 0.05}.
+            title_boost: Score added to search hits whose page title matches the query,
+                         scaled by match strength (0, the default, disables it; boosted
+                         scores can exceed 1). Page titles are only embedded for
+                         semantic title matches when it is set.
+            link_boost: Score added to search hits scaled by their page's link
+                        authority in [0, 1] (0, the default, disables it)
+            reranker: Cross-encoder reranking of the top candidates: a
+                      CrossEncoderReranker, or a cross-encoder model name to create
+                      one with the default 150ms latency budget (default: no reranking)
+            rerank_candidates: Candidates (chunks, or pages with group_by="page")
+                               fetched and reranked per search
+            memory_budget: Resident memory (bytes, or a size like "6GB") for
+                           add_export and build_index to stay under: parse,
+                           embedding and store write batches shrink as usage
+                           approaches it, chunk texts are streamed rather than
+                           held, and title embeddings spill to disk when they
+                           would not fit (default: no budget)
+            query_cache: Answer repeated and near-duplicate queries from recent
+                         results: a SemanticQueryCache, or True for one with the
+                         default threshold and capacity (default: no cache).
+                         It is cleared whenever the index changes.
+            share_model: Reuse the embedding model of other archives in this
+                         process with the same model settings instead of loading
+                         another copy: True for the process-wide ModelRegistry,
+                         or a ModelRegistry to share within, False for a private model
+            
+        Index settings are stored with the collection when it is built. An existing
+        index keeps the settings it was built with until it is rebuilt (see
+        build_index and rebuild_vector_index).
         """
         self.embedding_model_name = embedding_model
         self.db_path = db_path
         self.collection_name = collection_name
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.group_overfetch = max(1, group_overfetch)
+        self.title_boost = title_boost
+        self.link_boost = link_boost
+        self.reranker = CrossEncoderReranker(reranker) if isinstance(reranker, str) else reranker
+        self.rerank_candidates = max(1, rerank_candidates)
+        self.memory_budget = parse_size(memory_budget)
+        if query_cache is True:
+            query_cache = SemanticQueryCache()
+        self.query_cache: Optional[SemanticQueryCache] = query_cache if query_cache is not False else None
+        if html_mode not in HTML_MODES:
+            raise ValueError(f"Unsupported html_mode: {html_mode}. Supported: {list(HTML_MODES)}")
+        self.html_mode = html_mode
+        if hnsw_space not in HNSW_SPACES:
+            raise ValueError(f"Unsupported hnsw_space: {hnsw_space}. Supported: {list(HNSW_SPACES)}")
+        self.hnsw_params: Dict[str, Any] = {
+            "space": hnsw_space,
+            "M": hnsw_m,
+            "construction_ef": hnsw_construction_ef,
+            "search_ef": hnsw_search_ef
+        }
+        
+        # Settings that decide chunk ids and embeddings; build workers must use the
+        # same ones (see distributed.py). API keys are deliberately left out.
+        self._build_settings: Dict[str, Any] = {
+            "embedding_model": embedding_model,
+            "embedding_dimensions": embedding_dimensions,
+            "truncate_locally": truncate_locally,
+            "embedding_base_url": embedding_base_url,
+            "embedding_options": {key: value for key, value in (embedding_options or {}).items()
+                                  if key != "api_key"},
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            # Workers of a distributed build embed titles only for a boosting archive
+            "title_boost": title_boost,
+        }
         
         # Initialize embedding model
-        self.embedding_model: EmbeddingModel = create_embedding_model(
+        registry = model_registry if share_model is True else share_model or None
+        # Registry the model is given back to on close() (None: the model is the archive's own)
+        self._model_registry: Optional[ModelRegistry] = registry
+        self._closed = False
+        factory = registry.get if registry is not None else create_embedding_model
+        self.embedding_model: EmbeddingModel = factory(
             embedding_model, 
-            api_key=openai_api_key
+            api_key=openai_api_key,
+            dimensions=embedding_dimensions,
+            truncate_locally=truncate_locally,
+            base_url=embedding_base_url,
+            http_options=embedding_options
         )
         
-        # Initialize ChromaDB
-        self._init_database()
+        # Initialize ChromaDB, or map a read-only snapshot
+        self.snapshot: Optional[Snapshot] = None
+        self.title_index: Optional[TitleIndex] = None
+        self.link_graph: Optional[LinkGraph] = None
+        # Page-level metadata of the live collection's chunks (None for indexes
+        # built when chunks still carried it), and of collections being built
+        self.pages: Optional[PageTable] = None
+        self._staging_pages: Dict[str, Optional[PageTable]] = {}
+        if snapshot_path:
+            self.snapshot = Snapshot(snapshot_path)
+            # ChromaDB client (none for snapshot replicas)
+            self.client: Any = None
+            self.collection = SnapshotCollection(self.snapshot)
+            titles = self.snapshot.extra("titles")
+            if titles is not None:
+                self.title_index = TitleIndex.from_bytes(titles)
+            links = self.snapshot.extra("links")
+            if links is not None:
+                self.link_graph = LinkGraph.from_bytes(links)
+            versions = self.snapshot.extra("versions")
+            self.versions = VersionHistory.from_bytes(versions) if versions is not None else VersionHistory(None)
+            pages = self.snapshot.extra("pages")
+            if pages is not None:
+                self.pages = PageTable.from_bytes(pages)
+            document_store = False
+            print(f"Loaded snapshot: {snapshot_path} ({self.collection.count()} chunks)")
+        else:
+            self._init_database()
+            self.title_index = self._load_page_index("titles", TitleIndex, self.collection.name)
+            self.link_graph = self._load_page_index("links", LinkGraph, self.collection.name)
+            self.pages = self._open_page_table(self.collection)
+            # Export snapshots added with add_snapshot (empty for unversioned archives)
+            self.versions = VersionHistory.load(self._versions_path())
         
         # Text splitter for chunking
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -66,6 +285,27 @@ class NotionArchive:
         
         # Store parsed documents before indexing
         self.documents: List[NotionDocument] = []
+        
+        # Chunk id -> page id, filled while building the index
+        self._chunk_pages: Dict[str, str] = {}
+        
+        # Parsed documents persisted next to the index
+        self.document_store: Optional[DocumentStore] = None
+        self._deferred_exports: Dict[str, int] = {}
+        
+        # Database CSVs as (export root, file path); rows are streamed at index time
+        self.databases: List[Tuple[str, str]] = []
+        # Pages over LARGE_PAGE_BYTES as (export root, file path); their text is streamed at index time
+        self.large_pages: List[Tuple[str, str]] = []
+        if document_store:
+            os.makedirs(self.db_path, exist_ok=True)
+            self.document_store = DocumentStore(os.path.join(self.db_path, DOCUMENT_STORE_FILE))
+    
+    def _store(self) -> DocumentStore:
+        """The document store, for code paths that only run with one."""
+        if self.document_store is None:
+            raise RuntimeError("This archive keeps no document store (document_store=False)")
+        return self.document_store
     
     def _init_database(self):
         """Initialize ChromaDB client and collection."""
@@ -75,27 +315,342 @@ class NotionArchive:
             print(f"Warning: ChromaDB initialization issue: {e}")
             self.client = chromadb.Client()
         
+        # The manifest maps the collection name to the physical collection that
+        # is currently live; builds write to a new one and swap it in when done.
+        self._manifest_fingerprint = self._read_manifest_fingerprint()
+        active_name = self._active_collection_name()
+        
         # Get or create collection
         try:
-            self.collection = self.client.get_collection(self.collection_name)
+            self.collection = self.client.get_collection(active_name)
             print(f"Loaded existing collection: {self.collection_name}")
+            
+            # Settings tuned on the existing index carry over to future rebuilds
+            # unless they are explicitly configured
+            for key, value in (self.collection.metadata or {}).items():
+                if key.startswith("hnsw:") and self.hnsw_params.get(key[len("hnsw:"):], "") is None:
+                    self.hnsw_params[key[len("hnsw:"):]] = value
         except Exception:
             try:
-                self.collection = self.client.create_collection(
+                self.collection = self.client.get_or_create_collection(
                     name=self.collection_name,
-                    metadata={"description": "Notion Archive documents"}
+                    metadata=self._collection_metadata()
                 )
                 print(f"Created new collection: {self.collection_name}")
             except Exception as e:
                 print(f"Error creating collection: {e}")
                 raise
     
-    def add_export(self, export_path: str) -> None:
+    def _collection_metadata(self) -> Dict[str, Any]:
+        """Metadata stored with every collection this archive creates."""
+        metadata = {
+            "description": "Notion Archive documents",
+            "embedding_model": self.embedding_model.model_name,
+            "embedding_dimension": self.embedding_model.dimension
+        }
+        metadata.update(hnsw_metadata(self.hnsw_params))
+        return metadata
+    
+    def index_params(self) -> Dict[str, Any]:
+        """HNSW settings of the live index (ChromaDB defaults for unset values)."""
+        metadata = self.collection.metadata or {}
+        params = dict(HNSW_DEFAULTS)
+        for key in params:
+            if f"hnsw:{key}" in metadata:
+                params[key] = metadata[f"hnsw:{key}"]
+        return params
+    
+    def _distance_to_score(self, distance: float) -> float:
+        """Convert a distance of the live index's metric to a similarity score (0-1, higher is better)."""
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        if space == "l2":
+            # Squared L2 distance; for unit-length embeddings this is 2 - 2 * cosine
+            return max(0.0, 1 - distance / 2)
+        # cosine and ip distances are 1 - similarity
+        return max(0.0, 1 - distance)
+    
+    def _model_signature(self) -> str:
+        """Embedding model and output dimension, e.g. "text-embedding-3-large@1024"."""
+        return f"{self.embedding_model.model_name}@{self.embedding_model.dimension}"
+    
+    def _check_index_compatibility(self) -> None:
+        """Refuse to query an index built with a different embedding model or dimension."""
+        metadata = self.collection.metadata or {}
+        dimension = metadata.get("embedding_dimension")
+        if dimension is not None and dimension != self.embedding_model.dimension:
+            raise ValueError(
+                f"Index was built with {metadata.get('embedding_model')} at {dimension} dimensions, "
+                f"but the archive is configured for {self.embedding_model.model_name} at "
+                f"{self.embedding_model.dimension} dimensions. Use the same embedding_model and "
+                f"embedding_dimensions, or rebuild with build_index(force_rebuild=True)."
+            )
+    
+    def _create_collection(self, name: str):
+        """Create an empty collection with this archive's settings."""
+        return self.client.create_collection(name=name, metadata=self._collection_metadata())
+    
+    def _require_writable(self) -> None:
+        """Index changes need ChromaDB; snapshots are read-only."""
+        if self.snapshot is not None:
+            raise ValueError("This archive serves a read-only snapshot. Build or update the index "
+                             "in a regular archive and export a new snapshot.")
+    
+    def _manifest_path(self) -> str:
+        return os.path.join(self.db_path, MANIFEST_FILE)
+    
+    def _journal_path(self) -> str:
+        return os.path.join(self.db_path, f"build_journal_{self.collection_name}.json")
+    
+    def _versions_path(self) -> str:
+        return os.path.join(self.db_path, f"versions_{self.collection_name}.json")
+    
+    def _require_unversioned(self) -> None:
+        """Builds and in-place updates would discard the snapshot history of a versioned archive."""
+        if self.versions:
+            raise ValueError("This archive keeps export snapshots; add new exports with add_snapshot()")
+    
+    def _index_changed(self) -> None:
+        """Drop cached search results once the index changed."""
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+    
+    def _active_collection_name(self) -> str:
+        """Physical name of the live collection (the collection name itself for older archives)."""
+        manifest = read_json(self._manifest_path(), default={})
+        return manifest.get("collections", {}).get(self.collection_name, self.collection_name)
+    
+    def _new_collection_name(self) -> str:
+        """Unique physical name for a collection that will replace the live one."""
+        suffix = f"_build_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        base = self.collection_name
+        if len(base) + len(suffix) > MAX_COLLECTION_NAME:
+            # Keep a prefix of long names and a digest of the whole name, so they stay distinct
+            digest = hashlib.blake2b(base.encode("utf-8"), digest_size=4).hexdigest()
+            base = f"{base[:MAX_COLLECTION_NAME - len(suffix) - len(digest) - 1]}_{digest}"
+        return base + suffix
+    
+    def _page_index_path(self, kind: str, physical_name: str) -> str:
+        """File of a page-level index ("titles" or "links") saved with a physical collection."""
+        return os.path.join(self.db_path, f"{kind}_{physical_name}.npz")
+    
+    def _load_page_index(self, kind: str, index_class, physical_name: str):
+        """Load a page-level index saved with a physical collection, if there is one."""
+        try:
+            with open(self._page_index_path(kind, physical_name), "rb") as f:
+                return index_class.from_bytes(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: could not load {kind} index: {e}")
+            return None
+    
+    def _save_page_index(self, kind: str, index, physical_name: str) -> None:
+        os.makedirs(self.db_path, exist_ok=True)
+        path = self._page_index_path(kind, physical_name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(index.to_bytes())
+        os.replace(path + ".tmp", path)
+    
+    def _page_table_path(self, physical_name: str) -> str:
+        """File of the page table saved with a physical collection."""
+        return os.path.join(self.db_path, f"pages_{physical_name}.sqlite3")
+    
+    def _open_page_table(self, collection) -> Optional[PageTable]:
+        """Page table of a physical collection; None if its chunks were stored with their page metadata."""
+        path = self._page_table_path(collection.name)
+        if not os.path.exists(path) and collection.count():
+            return None
+        os.makedirs(self.db_path, exist_ok=True)
+        return PageTable(path)
+    
+    def _page_table(self, collection) -> Optional[PageTable]:
+        """Page table that chunks written to `collection` keep their page metadata in."""
+        if collection.name == self.collection.name:
+            return self.pages
+        if collection.name not in self._staging_pages:
+            self._staging_pages[collection.name] = self._open_page_table(collection)
+        return self._staging_pages[collection.name]
+    
+    def _drop_page_table(self, physical_name: str) -> None:
+        pages = self._staging_pages.pop(physical_name, None)
+        if pages is not None:
+            pages.close()
+        try:
+            os.remove(self._page_table_path(physical_name))
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _title_record(doc: NotionDocument) -> Tuple[str, str, str, str, str]:
+        return doc.id, doc.title, " > ".join(doc.breadcrumb), doc.url_path, doc.workspace or ""
+    
+    def _embed_titles(self, titles: List[str], batch_size: int = TITLE_BATCH_SIZE,
+                      governor: Optional[MemoryGovernor] = None) -> Optional[np.ndarray]:
+        """
+        Embed titles into one matrix, memory-mapped from a temporary file if it would not fit the budget.
+        
+        Returns:
+            The title embeddings, or None without a title_boost, the only reader of them
+        """
+        if not self.title_boost:
+            return None
+        shape = (len(titles), self.embedding_model.dimension)
+        if not titles:
+            return np.zeros(shape, dtype=np.float32)
+        embeddings: np.ndarray
+        if governor is not None and governor.should_spill(shape[0] * shape[1] * 4):
+            os.makedirs(self.db_path, exist_ok=True)
+            # The file is already unlinked; the mapping keeps it until the matrix is freed
+            embeddings = np.memmap(tempfile.TemporaryFile(dir=self.db_path), dtype=np.float32,
+                                   mode="w+", shape=shape)
+        else:
+            embeddings = np.empty(shape, dtype=np.float32)
+        for i in range(0, len(titles), batch_size):
+            embeddings[i:i + batch_size] = self.embedding_model.encode(titles[i:i + batch_size],
+                                                                       show_progress_bar=False)
+        return embeddings
+    
+    def _build_title_index(self, documents: Iterable[NotionDocument],
+                           governor: Optional[MemoryGovernor] = None) -> TitleIndex:
+        """Index page titles and breadcrumbs, embedding each title once."""
+        pages = [self._title_record(doc) for doc in documents]
+        return TitleIndex.from_pages(pages, self._embed_titles([page[1] for page in pages], governor=governor))
+    
+    @staticmethod
+    def _build_link_graph(documents: Iterable[NotionDocument]) -> LinkGraph:
+        """Resolve the links between pages and score their link authority."""
+        return LinkGraph.from_links((doc.id, doc.links) for doc in documents)
+    
+    def _swap_collection(self, new_collection, title_index: Optional[TitleIndex] = None,
+                         link_graph: Optional[LinkGraph] = None) -> None:
+        """
+        Atomically make `new_collection` the live collection and retire the old one.
+        
+        The title index, link graph and page table saved for the new collection
+        are loaded (or the given ones are saved for it first). Other archives
+        on the same db_path may still be searching the old collection: it is
+        kept, with its page-level files, until the next swap deletes it (see
+        _follow_manifest).
+        """
+        old_name = self.collection.name
+        old_pages = self.pages
+        pages = self._staging_pages.pop(new_collection.name, None)
+        if pages is None:
+            pages = self._open_page_table(new_collection)
+        if title_index is not None:
+            self._save_page_index("titles", title_index, new_collection.name)
+        if link_graph is not None:
+            self._save_page_index("links", link_graph, new_collection.name)
+        
+        os.makedirs(self.db_path, exist_ok=True)
+        manifest = read_json(self._manifest_path(), default={})
+        manifest.setdefault("collections", {})[self.collection_name] = new_collection.name
+        # Collections retired by the previous swap: readers have had a whole build to move on
+        retired = manifest.setdefault("retired", {})
+        garbage = [name for name in retired.get(self.collection_name, []) if name != new_collection.name]
+        retired[self.collection_name] = [old_name] if old_name != new_collection.name else []
+        atomic_write_json(self._manifest_path(), manifest)
+        self._manifest_fingerprint = self._read_manifest_fingerprint()
+        self.collection = new_collection
+        self.pages = pages
+        self._index_changed()
+        self.title_index = title_index if title_index is not None else \
+            self._load_page_index("titles", TitleIndex, new_collection.name)
+        self.link_graph = link_graph if link_graph is not None else \
+            self._load_page_index("links", LinkGraph, new_collection.name)
+        if old_pages is not None and old_name != new_collection.name:
+            old_pages.close()
+        
+        for name in garbage:
+            self._delete_physical_collection(name)
+    
+    def _delete_physical_collection(self, physical_name: str) -> None:
+        """Delete a physical collection with its title index, link graph and page table."""
+        try:
+            self.client.delete_collection(physical_name)
+        except Exception as e:
+            print(f"Warning: could not delete previous collection {physical_name}: {e}")
+        for kind in ("titles", "links"):
+            try:
+                os.remove(self._page_index_path(kind, physical_name))
+            except OSError:
+                pass
+        self._drop_page_table(physical_name)
+    
+    def _read_manifest_fingerprint(self) -> Optional[Fingerprint]:
+        try:
+            return file_fingerprint(self._manifest_path())
+        except OSError:
+            return None
+    
+    def _follow_manifest(self) -> bool:
+        """
+        Switch to the live collection if another archive swapped in a new one.
+        
+        Archives on the same db_path (in this or another process) only learn
+        about a rebuild through the manifest; searches check whether it changed.
+        
+        Returns:
+            Whether the archive switched collections
+        """
+        if self.snapshot is not None:
+            return False
+        fingerprint = self._read_manifest_fingerprint()
+        if fingerprint == self._manifest_fingerprint:
+            return False
+        self._manifest_fingerprint = fingerprint
+        active_name = self._active_collection_name()
+        if active_name == self.collection.name:
+            return False
+        try:
+            collection = self.client.get_collection(active_name)
+        except Exception as e:
+            print(f"Warning: could not open rebuilt collection {active_name}: {e}")
+            return False
+        # The previous page table is not closed: concurrent searches may still read it
+        self.collection = collection
+        self.pages = self._open_page_table(collection)
+        self.title_index = self._load_page_index("titles", TitleIndex, active_name)
+        self.link_graph = self._load_page_index("links", LinkGraph, active_name)
+        self._chunk_pages = {}
+        self._index_changed()
+        print(f"Switched to rebuilt collection {active_name}")
+        return True
+    
+    @staticmethod
+    def _collection_missing(error: Exception) -> bool:
+        """Whether an error says the collection was deleted (e.g. by another archive's swap)."""
+        return "does not exist" in str(error) or "not found" in str(error).lower()
+    
+    def _collection_call(self, method: str, **kwargs):
+        """Call a method of the live collection, reopening it once if it was deleted under us."""
+        try:
+            return getattr(self.collection, method)(**kwargs)
+        except Exception as e:
+            if not self._collection_missing(e):
+                raise
+            # Re-read the manifest even if it looks unchanged (e.g. coarse mtimes)
+            self._manifest_fingerprint = None
+            if not self._follow_manifest():
+                raise
+            return getattr(self.collection, method)(**kwargs)
+    
+    def add_export(self, export_path: Union[str, Path], defer_load: bool = False, databases: bool = True) -> None:
         """
         Add a Notion export to the archive.
         
+        When the document store is enabled, only files whose mtime or size
+        changed since the last run are parsed; unchanged pages are loaded from
+        the store instead.
+        
         Args:
             export_path: Path to the Notion export folder
+            defer_load: Don't load stored documents into memory until they are
+                        needed (e.g. by build_index). Makes warm starts of an
+                        already indexed archive near-instant.
+            databases: Also index the rows of database CSV files. Rows are
+                       streamed from the CSVs by build_index, never held in memory
+                       (only a small hash of each row's title is kept while streaming).
         """
         export_path = Path(export_path).resolve()  # Resolve to absolute path
         
@@ -106,8 +661,25 @@ class NotionArchive:
             raise ValueError(f"Export path must be a directory: {export_path}")
         
         print(f"Parsing Notion export: {export_path}")
-        parser = NotionExportParser(export_path)
-        new_documents = parser.parse_export()
+        parser = NotionExportParser(export_path, html_mode=self.html_mode)
+        if databases:
+            self._add_databases(export_path)
+        
+        new_documents: Optional[List[NotionDocument]]
+        if self.document_store is None:
+            new_documents = parser.parse_export()
+            self._set_large_pages(str(export_path), parser.large_files)
+        else:
+            new_documents = self._sync_export(parser, defer_load)
+            if new_documents is None:
+                count = self.document_store.count(str(export_path))
+                self._deferred_exports[str(export_path)] = count
+                if defer_load:
+                    print(f"Deferred loading {count} stored documents from {export_path}")
+                else:
+                    print(f"Keeping {count} documents from {export_path} in the document store "
+                          f"(streamed while indexing under the memory budget)")
+                return
         
         if not new_documents:
             print(f"No documents found in {export_path}")
@@ -116,6 +688,454 @@ class NotionArchive:
         self.documents.extend(new_documents)
         print(f"Added {len(new_documents)} documents from {export_path}")
     
+    def _add_databases(self, export_path: Path) -> None:
+        """Register the database CSVs of an export for streaming ingestion."""
+        export_root = str(export_path)
+        files = find_database_files(export_path)
+        self.databases = [entry for entry in self.databases if entry[0] != export_root]
+        self.databases.extend((export_root, str(csv_file)) for csv_file in files)
+        if files:
+            print(f"Found {len(files)} database CSV files (rows are streamed while indexing)")
+    
+    def _set_large_pages(self, export_root: str, files: List[Path]) -> None:
+        """Register the pages of an export whose text is streamed while indexing."""
+        self.large_pages = [entry for entry in self.large_pages if entry[0] != export_root]
+        self.large_pages.extend((export_root, str(path)) for path in files)
+        if files:
+            print(f"Found {len(files)} pages over {LARGE_PAGE_BYTES // (1024 * 1024)}MB "
+                  f"(their text is streamed while indexing)")
+    
+    def _iter_large_page_chunks(self, pages: Optional[List[Tuple[str, str]]] = None
+                                ) -> Iterator[Tuple[str, Dict[str, Any], str]]:
+        """Stream (text, metadata, id) chunks of large pages (default: all of them) as they are parsed."""
+        for export_root, path in self.large_pages if pages is None else pages:
+            parser = NotionExportParser(export_root)
+            stream_parser = PageStreamParser()
+            doc = None
+            try:
+                chunks = stream_chunks(stream_page(path, stream_parser), self.text_splitter, self.chunk_size)
+                for i, chunk in enumerate(chunks):
+                    if doc is None:
+                        doc = parser.large_page_document(Path(path), stream_parser)
+                    # The number of chunks is only known once the page has been read
+                    yield chunk, self._chunk_metadata(doc, i, 0), f"{doc.id}_chunk_{i}"
+            except FileNotFoundError:
+                print(f"Warning: Large page disappeared before indexing: {path}")
+    
+    def _stream_sources(self) -> List[Tuple[str, Fingerprint]]:
+        """Files whose chunks are streamed at index time, with their fingerprints."""
+        return [(path, file_fingerprint(path)) for _, path in self.databases + self.large_pages]
+    
+    @staticmethod
+    def _batches(chunks: Iterator[Tuple[str, Dict[str, Any], str]], batch_size: int
+                 ) -> Iterator[Tuple[List[str], List[Dict[str, Any]], List[str]]]:
+        """Group a stream of (text, metadata, id) chunks into (texts, metadatas, ids) batches."""
+        while True:
+            batch = list(itertools.islice(chunks, batch_size))
+            if not batch:
+                return
+            texts, metadatas, ids = (list(column) for column in zip(*batch))
+            yield texts, metadatas, ids
+    
+    def _iter_database_chunks(self) -> Iterator[Tuple[str, Dict[str, Any], str]]:
+        """Stream (text, metadata, id) chunks of every database row, one row at a time."""
+        for export_root, csv_path in self.databases:
+            for doc, properties in iter_database_rows(csv_path, export_root):
+                if len(doc.plain_text) > self.chunk_size:
+                    chunks = self.text_splitter.split_text(doc.plain_text)
+                else:
+                    chunks = [doc.plain_text]
+                for i, chunk in enumerate(chunks):
+                    if not chunk.strip():
+                        continue
+                    metadata = self._chunk_metadata(doc, i, len(chunks))
+                    metadata.update(properties)
+                    yield chunk, metadata, f"{doc.id}_chunk_{i}" if len(chunks) > 1 else doc.id
+    
+    def _sync_export(self, parser: NotionExportParser, defer_load: bool) -> Optional[List[NotionDocument]]:
+        """
+        Bring the document store up to date with an export on disk.
+        
+        Under a memory budget the documents are not loaded at all: build_index
+        streams them from the store into chunking, in batches the governor sizes.
+        
+        Returns:
+            The export's documents, or None when they stay in the store (loading
+            deferred, or a memory budget is set)
+        """
+        export_root = str(parser.export_path)
+        store = self._store()
+        stored = store.fingerprints(export_root)
+        governor = MemoryGovernor(self.memory_budget)
+        in_store = defer_load or self.memory_budget is not None
+        
+        # Parsed files are stored in batches; their documents are kept for the
+        # result unless they stay in the store or memory is short (then they
+        # are loaded back from the store at the end)
+        pending = []
+        parsed: Dict[str, Optional[NotionDocument]] = {}
+        parse_batch = PARSE_BATCH
+        changed = 0
+        seen = set()
+        large_files = []
+        for html_file in parser.find_html_files():
+            url_path = str(html_file.relative_to(parser.export_path))
+            seen.add(url_path)
+            fingerprint = file_fingerprint(html_file)
+            if stored.get(url_path) != fingerprint:
+                pending.append((url_path, fingerprint, parser.parse_file(html_file)))
+                changed += 1
+                if len(pending) >= parse_batch:
+                    keep = not in_store and governor.pressure < governor.high
+                    self._store_parsed(export_root, pending, parsed, keep)
+                    pending = []
+                    parse_batch = governor.adapt(parse_batch, PARSE_BATCH)
+            if fingerprint[1] > LARGE_PAGE_BYTES:
+                large_files.append(html_file)
+        self._store_parsed(export_root, pending, parsed, not in_store)
+        self._set_large_pages(export_root, large_files)
+        
+        removed = [url_path for url_path in stored if url_path not in seen]
+        if removed:
+            store.remove(export_root, removed)
+        
+        print(f"Document store: {len(seen) - changed} unchanged, "
+              f"{changed} parsed, {len(removed)} removed")
+        
+        if in_store:
+            return None
+        
+        # Reuse the freshly parsed documents, load everything else from the store
+        unchanged = [url_path for url_path in seen if url_path not in parsed]
+        documents = store.load(export_root, unchanged, self.html_mode) if unchanged else []
+        documents.extend(doc for doc in parsed.values() if doc is not None)
+        documents.sort(key=lambda doc: doc.url_path)
+        return documents
+    
+    def _store_parsed(self, export_root: str, files: List[Tuple[str, Fingerprint, Optional[NotionDocument]]],
+                      parsed: Dict[str, Optional[NotionDocument]], keep: bool) -> None:
+        """Write a batch of parsed files to the document store, keeping their documents in `parsed` if asked."""
+        self._store().put_many(export_root, files)
+        if keep:
+            parsed.update((url_path, doc) for url_path, _, doc in files)
+    
+    def update_pages(self,
+                     export_path: Union[str, Path],
+                     changed: Optional[List[str]] = None,
+                     removed: Optional[List[str]] = None,
+                     batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Incrementally re-index pages of an export without rebuilding.
+        
+        Changed files are re-parsed and re-embedded; chunks of removed files are
+        deleted. The live index is updated in place, so searches keep working
+        while this runs.
+        
+        Args:
+            export_path: Path to the Notion export folder the files belong to
+            changed: Added or modified HTML files (paths relative to the export or absolute)
+            removed: Deleted HTML files (paths relative to the export)
+            batch_size: Chunks embedded and written per batch
+            
+        Returns:
+            Tuple of (pages indexed, chunks embedded)
+        """
+        self._require_writable()
+        self._require_unversioned()
+        export_path = Path(export_path).resolve()
+        export_root = str(export_path)
+        parser = NotionExportParser(export_path, html_mode=self.html_mode)
+        removed = [str(Path(path)) for path in removed or []]
+        
+        parsed = []
+        for path in changed or []:
+            html_file = export_path / path
+            url_path = str(html_file.relative_to(export_path))
+            try:
+                fingerprint = file_fingerprint(html_file)
+            except FileNotFoundError:
+                # Deleted again before we got to it
+                removed.append(url_path)
+                continue
+            parsed.append((url_path, fingerprint, parser.parse_file(html_file)))
+        
+        # Keep the document store and the in-memory documents in step with the index
+        if self.document_store is not None:
+            if removed:
+                self.document_store.remove(export_root, removed)
+            self.document_store.put_many(export_root, parsed)
+        
+        affected = {url_path for url_path, _, _ in parsed} | set(removed)
+        new_documents = [doc for _, _, doc in parsed if doc is not None]
+        # Ids of the pages the affected files held, for the page-level indexes; other
+        # exports can have files at the same relative paths
+        replaced = [doc.url_path in affected and doc.export_root in (export_root, None) for doc in self.documents]
+        stale = {doc.id for doc, hit in zip(self.documents, replaced) if hit}
+        self.documents = [doc for doc, hit in zip(self.documents, replaced) if not hit]
+        if export_root in self._deferred_exports:
+            # The export's documents are read from the store, which has the new ones already
+            self._deferred_exports[export_root] = self._store().count(export_root)
+        else:
+            self.documents.extend(new_documents)
+        
+        large_pages = [(export_root, str(path)) for path in parser.large_files]
+        self.large_pages = [
+            (root, path) for root, path in self.large_pages
+            if root != export_root or str(Path(path).relative_to(export_path)) not in affected
+        ] + large_pages
+        
+        # Replace the chunks of every affected page
+        if affected and self.pages is not None:
+            stale_pages = self.pages.page_ids(export_root, affected)
+            if stale_pages:
+                self.collection.delete(where={"original_id": {"$in": stale_pages}})
+                self.pages.remove(stale_pages)
+            stale.update(stale_pages)
+        elif affected:
+            self.collection.delete(where={"url_path": {"$in": sorted(affected)}})
+        
+        # Keep the title index and link graph in step too
+        if self.title_index is not None:
+            if self.pages is None:
+                stale.update(page_id for page_id, url_path
+                             in zip(self.title_index.page_ids, self.title_index.url_paths) if url_path in affected)
+            pages = [self._title_record(doc) for doc in new_documents]
+            self.title_index = self.title_index.update(
+                pages, self._embed_titles([page[1] for page in pages]), removed=stale
+            )
+            self._save_page_index("titles", self.title_index, self.collection.name)
+        if self.link_graph is not None:
+            self.link_graph = self.link_graph.update(
+                [(doc.id, doc.links) for doc in new_documents], removed=stale
+            )
+            self._save_page_index("links", self.link_graph, self.collection.name)
+        
+        texts, metadatas, ids = self._prepare_chunks(new_documents)
+        chunks = itertools.chain(zip(texts, metadatas, ids), self._iter_large_page_chunks(large_pages))
+        embedded = 0
+        for batch_texts, batch_metadatas, batch_ids in self._batches(chunks, batch_size):
+            embeddings = self.embedding_model.encode(batch_texts, show_progress_bar=False)
+            self._write_batch(self.collection, batch_texts, batch_metadatas, embeddings, batch_ids)
+            embedded += len(batch_texts)
+        
+        self._index_changed()
+        return len(new_documents), embedded
+    
+    def add_snapshot(self,
+                     export_path: Union[str, Path],
+                     label: Optional[str] = None,
+                     snapshot_date: Union[str, date, datetime, None] = None,
+                     databases: bool = True,
+                     batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Add an export as a new snapshot of a versioned archive.
+        
+        Every page version is stored once (see core/versions.py): pages unchanged
+        since the previous snapshot cost nothing, new and changed pages are
+        embedded, pages reverting to an earlier version reuse its embeddings, and
+        the versions a snapshot replaces stay searchable with search(as_of=...).
+        
+        Snapshots are added in chronological order, to an archive that was not
+        built with build_index.
+        
+        Args:
+            export_path: Path to the Notion export folder
+            label: Name to refer to the snapshot by (default: the folder name)
+            snapshot_date: Date the export was taken (default: today)
+            databases: Also index the rows of database CSV files
+            batch_size: Chunks embedded and written per batch
+            
+        Returns:
+            The snapshot record: ordinal, label, date and page and chunk counts
+        """
+        self._require_writable()
+        export_path = Path(export_path).resolve()
+        if not export_path.is_dir():
+            raise ValueError(f"Export path must be a directory: {export_path}")
+        if not self.versions and self.has_index():
+            raise ValueError("The index was built with build_index(). Keep snapshots in their own "
+                             "collection (collection_name=...), or clear_index() first.")
+        when = parse_date(snapshot_date) if snapshot_date is not None else date.today()
+        self.versions.check_date(when)
+        label = label or export_path.name
+        if any(record["label"] == label for record in self.versions.snapshots):
+            raise ValueError(f"There already is a snapshot labelled {label!r}")
+        
+        ordinal = self.versions.latest + 1
+        self._discard_partial_snapshot(ordinal)
+        
+        print(f"Parsing Notion export: {export_path}")
+        parser = NotionExportParser(export_path, html_mode=self.html_mode)
+        documents = parser.parse_export()
+        export_root = str(export_path)
+        self.databases = []
+        if databases:
+            self._add_databases(export_path)
+        self.large_pages = []
+        self._set_large_pages(export_root, parser.large_files)
+        
+        texts, metadatas, ids = self._prepare_chunks(documents)
+        self._chunk_pages = {}
+        chunks = itertools.chain(zip(texts, metadatas, ids), self._iter_large_page_chunks(),
+                                 self._iter_database_chunks())
+        
+        counts = dict.fromkeys(("unchanged", "new", "changed", "reverted", "removed"), 0)
+        seen = set()
+        closed = []
+        pending: List[Tuple[str, Dict[str, Any], str]] = []
+        embedded = copied = 0
+        try:
+            # Chunks of a page are consecutive; compare each page's digest with its current version
+            for page_id, group in itertools.groupby(chunks, key=lambda chunk: chunk[1]["original_id"]):
+                page_chunks = list(group)
+                if page_id in seen:
+                    print(f"Warning: page {page_id} occurs more than once in the export, keeping the first")
+                    continue
+                seen.add(page_id)
+                digest = page_digest(page_chunks)
+                current = self.versions.current(page_id)
+                if current is not None and current[0] == digest:
+                    counts["unchanged"] += 1
+                    continue
+                
+                earlier = self.versions.find(page_id, digest)
+                if current is not None:
+                    self.versions.close_version(page_id, ordinal)
+                    closed.append(page_id)
+                counts["reverted" if earlier else "changed" if current is not None else "new"] += 1
+                self.versions.open_version(page_id, digest, ordinal)
+                if earlier is not None:
+                    copied += self._copy_version(page_id, earlier[1], ordinal)
+                    continue
+                pending.extend(
+                    (text, dict(metadata, valid_from=ordinal, valid_to=OPEN), versioned_id(chunk_id, page_id, ordinal))
+                    for text, metadata, chunk_id in page_chunks
+                )
+                if len(pending) >= batch_size:
+                    embedded += self._embed_version_chunks(pending)
+                    pending = []
+            embedded += self._embed_version_chunks(pending)
+            
+            removed = [page_id for page_id in self.versions.current_pages() if page_id not in seen]
+            for page_id in removed:
+                self.versions.close_version(page_id, ordinal)
+            counts["removed"] = len(removed)
+            self._close_versions(closed + removed, ordinal)
+        except BaseException:
+            # Forget the partial snapshot; the next add_snapshot discards its chunks
+            self.versions = VersionHistory.load(self._versions_path())
+            raise
+        
+        # Titles and links of the new snapshot's pages (searches of earlier snapshots use them too)
+        self.documents = documents
+        self.title_index = self._snapshot_title_index(documents)
+        self.link_graph = self._build_link_graph(documents)
+        self._save_page_index("titles", self.title_index, self.collection.name)
+        self._save_page_index("links", self.link_graph, self.collection.name)
+        
+        record = {
+            "ordinal": ordinal,
+            "label": label,
+            "date": when.isoformat(),
+            "export_path": export_root,
+            "pages": len(seen),
+            **counts,
+            "embedded_chunks": embedded,
+            "copied_chunks": copied,
+            "added": datetime.now().isoformat(),
+        }
+        self.versions.snapshots.append(record)
+        self.versions.save()
+        self._index_changed()
+        print(f"Added snapshot {ordinal} ({label}): {len(seen)} pages, {counts['unchanged']} unchanged, "
+              f"{counts['new']} new, {counts['changed']} changed, {counts['removed']} removed; "
+              f"embedded {embedded} chunks")
+        return record
+    
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """
+        Export snapshots added with add_snapshot, oldest first.
+        
+        Returns:
+            One record per snapshot: ordinal, label, date, export_path, pages,
+            unchanged/new/changed/reverted/removed page counts and the chunks
+            embedded (or copied from an earlier version) for it
+        """
+        return [dict(record) for record in self.versions.snapshots]
+    
+    def _discard_partial_snapshot(self, ordinal: int) -> None:
+        """Undo the index changes of an add_snapshot run that died before recording snapshot `ordinal`."""
+        if not self.has_index():
+            return
+        self.collection.delete(where={"valid_from": {"$gte": ordinal}})
+        reclosed = self.collection.get(where={"valid_to": ordinal}, include=[])["ids"]
+        if reclosed:
+            self.collection.update(ids=reclosed, metadatas=[{"valid_to": OPEN}] * len(reclosed))
+        if self.pages is not None:
+            self.pages.discard_from(ordinal)
+    
+    def _embed_version_chunks(self, chunks: List[Tuple[str, Dict[str, Any], str]]) -> int:
+        """Embed and store the chunks of new page versions."""
+        if not chunks:
+            return 0
+        texts, metadatas, ids = (list(column) for column in zip(*chunks))
+        embeddings = self.embedding_model.encode(texts, show_progress_bar=False)
+        self._write_batch(self.collection, texts, metadatas, embeddings, ids)
+        return len(texts)
+    
+    def _copy_version(self, page_id: str, valid_from: int, ordinal: int) -> int:
+        """Store an earlier version of a page again as valid from snapshot `ordinal`, with its embeddings."""
+        stored = self.collection.get(where={"$and": [{"original_id": page_id}, {"valid_from": valid_from}]},
+                                     include=["documents", "metadatas", "embeddings"])
+        if not stored["ids"]:
+            return 0
+        prefix = len(f"{page_id}@{valid_from}")
+        ids = [f"{page_id}@{ordinal}{chunk_id[prefix:]}" for chunk_id in stored["ids"]]
+        metadatas = [dict(self._page_metadata(metadata), valid_from=ordinal, valid_to=OPEN)
+                     for metadata in stored["metadatas"]]
+        self._write_batch(self.collection, stored["documents"], metadatas,
+                          np.asarray(stored["embeddings"], dtype=np.float32), ids)
+        return len(ids)
+    
+    def _close_versions(self, page_ids: List[str], ordinal: int, batch_size: int = 500) -> None:
+        """Mark the current chunks of pages as no longer valid from snapshot `ordinal` on."""
+        for i in range(0, len(page_ids), batch_size):
+            stale = self.collection.get(
+                where={"$and": [{"original_id": {"$in": page_ids[i:i + batch_size]}},
+                                {"valid_to": OPEN}, {"valid_from": {"$lt": ordinal}}]},
+                include=[]
+            )["ids"]
+            if stale:
+                # Metadata updates merge, so only valid_to changes
+                self.collection.update(ids=stale, metadatas=[{"valid_to": ordinal}] * len(stale))
+        if self.pages is not None:
+            self.pages.close_versions(page_ids, ordinal)
+    
+    def _snapshot_title_index(self, documents: List[NotionDocument]) -> TitleIndex:
+        """Title index of a snapshot's pages, embedding only titles that are new or changed."""
+        if self.title_index is None or self.title_index.embeddings is None:
+            return self._build_title_index(documents)
+        kept, positions, missing = [], [], []
+        for doc in documents:
+            position = self.title_index.position(doc.id)
+            if position is not None and self.title_index.titles[position] == doc.title:
+                kept.append(self._title_record(doc))
+                positions.append(position)
+            else:
+                missing.append(self._title_record(doc))
+        embeddings = self._embed_titles([page[1] for page in missing])
+        if embeddings is not None:
+            embeddings = np.concatenate([self.title_index.embeddings[positions], embeddings])
+        return TitleIndex.from_pages(kept + missing, embeddings)
+    
+    def _load_deferred_documents(self) -> None:
+        """Load documents of exports added with defer_load=True."""
+        for export_root in list(self._deferred_exports):
+            documents = self._store().load(export_root, html_mode=self.html_mode)
+            self.documents.extend(documents)
+            del self._deferred_exports[export_root]
+            print(f"Loaded {len(documents)} stored documents from {export_root}")
+    
     def has_index(self) -> bool:
         """
         Check if the archive already has an index built.
@@ -128,144 +1148,361 @@ class NotionArchive:
         except:
             return False
     
-    def build_index(self, show_progress: bool = True, force_rebuild: bool = False) -> None:
+    def build_index(self,
+                    show_progress: bool = True,
+                    force_rebuild: bool = False,
+                    resume: bool = False,
+                    batch_size: int = 500) -> None:
         """
         Build the search index by generating embeddings for all documents.
         This is the computationally expensive step that should be run once.
         
+        Chunks are embedded and committed to a staging collection one batch at a
+        time, with progress recorded in a build journal. The current index keeps
+        serving searches until the new one is complete and swapped in.
+        
         Args:
             show_progress: Whether to show progress indicators
             force_rebuild: If True, rebuild even if index already exists
+            resume: Continue an interrupted build from its last committed batch
+            batch_size: Number of chunks embedded and committed per checkpoint (the
+                        maximum with a memory_budget, under which batches shrink)
         """
-        # Check if index already exists
+        build = self._start_build(force_rebuild, resume)
+        if build is None:
+            return
+        
+        for batch_texts, batch_metadatas, batch_ids in self._build_batches(build, batch_size):
+            try:
+                embeddings = self.embedding_model.encode(batch_texts, show_progress_bar=False)
+            except Exception:
+                print(f"Build interrupted after {build.progress()} chunks. "
+                      f"Run build_index(resume=True) to continue.")
+                raise
+            self._commit_batch(build, batch_texts, batch_metadatas, embeddings, batch_ids, show_progress)
+        
+        self._finish_build(build)
+    
+    def plan_build(self,
+                   resume: bool = False,
+                   batch_size: int = 500,
+                   calibration_chunks: int = DEFAULT_CALIBRATION_CHUNKS) -> BuildPlan:
+        """
+        Dry-run build_index: chunk everything it would embed, without embedding it.
+        
+        Reports exact chunk and token counts per workspace, duplicate and already
+        indexed volume, page titles embedded for title_boost, API requests and cost. A short calibration run embeds a
+        sample of the chunks with the configured model to estimate the build time
+        (with OpenAI models, it is billed like any other request).
+        
+        Args:
+            resume: Plan build_index(resume=True), skipping what an interrupted build embedded
+            batch_size: Chunks per batch, as passed to build_index
+            calibration_chunks: Chunks embedded to measure throughput (0: no ETA)
+            
+        Returns:
+            BuildPlan (print it for a report)
+        """
+        self._load_deferred_documents()
+        if not self.documents and not self.databases:
+            raise ValueError("No documents to plan. Call add_export() first.")
+        
+        # Planning must not change the live index's chunk-to-page map
+        chunk_pages = self._chunk_pages
         try:
-            existing_count = self.collection.count()
-            if existing_count > 0 and not force_rebuild:
-                print(f"Index already exists with {existing_count} documents.")
-                print("Use force_rebuild=True to rebuild, or skip this call to use existing index.")
-                return
-        except Exception as e:
-            print(f"Warning checking existing data: {e}")
+            texts, metadatas, ids = self._prepare_chunks() if self.documents else ([], [], [])
+        finally:
+            self._chunk_pages = chunk_pages
+        skip = 0
+        journal = BuildJournal.load(self._journal_path()) if resume else None
+        if journal:
+            digest = chunks_digest(ids, texts, self._stream_sources())
+            if journal.matches(self._model_signature(), digest):
+                skip = journal.committed_chunks
+            else:
+                print("Documents or embedding model changed since the interrupted build; planning a full build")
+        
+        chunks = itertools.chain(zip(texts, metadatas, ids), self._iter_large_page_chunks(),
+                                 self._iter_database_chunks())
+        titles = [doc.title for doc in self.documents] if self.title_boost else []
+        return plan_chunks(self.embedding_model, self._batches(chunks, batch_size), collection=self.collection,
+                           skip=skip, batch_size=batch_size, calibration_chunks=calibration_chunks, titles=titles)
+    
+    def _start_build(self, force_rebuild: bool, resume: bool) -> Optional["_IndexBuild"]:
+        """
+        Prepare an index build: chunk the documents and create (or reopen) the
+        staging collection and build journal.
+        
+        Returns:
+            The build to feed batches to, or None when the index exists and no
+            rebuild was requested
+        """
+        self._require_writable()
+        self._require_unversioned()
+        journal = BuildJournal.load(self._journal_path())
+        
+        # Check if index already exists
+        if not (resume and journal):
+            try:
+                existing_count = self.collection.count()
+                if existing_count > 0 and not force_rebuild:
+                    print(f"Index already exists with {existing_count} documents.")
+                    print("Use force_rebuild=True to rebuild, or skip this call to use existing index.")
+                    return None
+            except Exception as e:
+                print(f"Warning checking existing data: {e}")
         
-        if not self.documents:
+        # Under a memory budget, documents of deferred exports are streamed from the store instead
+        if not self.memory_budget:
+            self._load_deferred_documents()
+        document_count = self._document_count()
+        if not document_count and not self.databases:
             raise ValueError("No documents to index. Call add_export() first.")
         
         # Warn about large workspaces
-        if len(self.documents) > 1000:
-            print(f"⚠️  Warning: Large workspace with {len(self.documents)} documents")
+        if document_count > 1000:
+            print(f"⚠️  Warning: Large workspace with {document_count} documents")
             print("   This may take a long time and cost significant money with OpenAI models")
+            print("   Run plan_build() first for exact token counts, cost and an ETA")
         
-        print(f"Building index for {len(self.documents)} documents...")
+        if self.databases:
+            print(f"Building index for {document_count} documents and {len(self.databases)} databases...")
+        else:
+            print(f"Building index for {document_count} documents...")
         print(f"Using embedding model: {self.embedding_model.model_name}")
         
-        # Clear existing collection if rebuilding
-        try:
-            existing_count = self.collection.count()
-            if existing_count > 0:
-                print(f"Clearing existing {existing_count} documents...")
-                self.collection.delete()
-        except Exception as e:
-            print(f"Warning clearing collection: {e}")
-        
-        # Process documents into chunks
-        texts = []
-        metadatas = []
-        ids = []
+        governor = MemoryGovernor(self.memory_budget)
+        if self.memory_budget:
+            # Don't hold every chunk text: chunk the documents once for the
+            # digest and again while building
+            digest, token_counts = self._scan_document_chunks(governor)
+            page_chunks = len(token_counts)
+            if not page_chunks and not (self.databases or self.large_pages):
+                raise ValueError("No valid text content found in documents")
+        else:
+            texts, metadatas, ids = self._prepare_chunks() if self.documents else ([], [], [])
+            digest = chunks_digest(ids, texts, self._stream_sources())
+            page_chunks = len(texts)
+        # Database rows and large pages are streamed, so their chunk count is only known at the end
+        total = None if self.databases or self.large_pages else page_chunks
         
-        for doc in self.documents:
-            if len(doc.plain_text) > self.chunk_size:
-                # Split large documents into chunks
-                chunks = self.text_splitter.split_text(doc.plain_text)
-                
-                for i, chunk in enumerate(chunks):
-                    chunk_id = f"{doc.id}_chunk_{i}"
-                    ids.append(chunk_id)
-                    texts.append(chunk)
-                    
-                    metadata = {
-                        "original_id": doc.id,
-                        "title": doc.title,
-                        "workspace": doc.workspace,
-                        "url_path": doc.url_path,
-                        "breadcrumb": " > ".join(doc.breadcrumb),
-                        "tags": ", ".join(doc.tags),
-                        "chunk_index": i,
-                        "total_chunks": len(chunks),
-                        "created_by": doc.created_by or "",
-                        "last_edited_by": doc.last_edited_by or "",
-                        "created_time": doc.created_time.isoformat() if doc.created_time else "",
-                        "last_edited_time": doc.last_edited_time.isoformat() if doc.last_edited_time else ""
-                    }
-                    metadatas.append(metadata)
-            else:
-                # Use whole document
-                ids.append(doc.id)
-                texts.append(doc.plain_text)
-                
-                metadata = {
-                    "original_id": doc.id,
-                    "title": doc.title,
-                    "workspace": doc.workspace,
-                    "url_path": doc.url_path,
-                    "breadcrumb": " > ".join(doc.breadcrumb),
-                    "tags": ", ".join(doc.tags),
-                    "chunk_index": 0,
-                    "total_chunks": 1,
-                    "created_by": doc.created_by or "",
-                    "last_edited_by": doc.last_edited_by or "",
-                    "created_time": doc.created_time.isoformat() if doc.created_time else "",
-                    "last_edited_time": doc.last_edited_time.isoformat() if doc.last_edited_time else ""
-                }
-                metadatas.append(metadata)
-        
-        # Filter out empty texts
-        filtered_data = [(text, meta, id_) for text, meta, id_ in zip(texts, metadatas, ids) if text.strip()]
-        if not filtered_data:
-            raise ValueError("No valid text content found in documents")
+        # Pick up an interrupted build, or start a fresh one
+        staging = None
+        start = 0
+        if journal and resume:
+            if not journal.matches(self._model_signature(), digest):
+                raise ValueError("Documents or embedding model changed since the interrupted build. "
+                                 "Run build_index(force_rebuild=True) to start over.")
+            try:
+                staging = self.client.get_collection(journal.staging_collection)
+                start = journal.committed_chunks
+                print(f"Resuming build at chunk {start}")
+            except Exception:
+                print("Staging collection of the interrupted build is missing, starting over")
+        elif resume:
+            print("No interrupted build to resume, starting a new build")
         
-        texts, metadatas, ids = zip(*filtered_data)
-        texts, metadatas, ids = list(texts), list(metadatas), list(ids)
+        # A resumed staging collection always comes with its journal
+        if staging is None or journal is None:
+            if journal:
+                self._drop_staging(journal)
+            staging_name = self._new_collection_name()
+            staging = self._create_collection(staging_name)
+            os.makedirs(self.db_path, exist_ok=True)
+            journal = BuildJournal.start(
+                self._journal_path(), self.collection_name, staging_name,
+                self._model_signature(), digest, total
+            )
         
         # Generate embeddings
         print("Generating embeddings...")
         
         # Cost warning for OpenAI models
         if "text-embedding" in self.embedding_model.model_name:
-            total_tokens = sum(len(text.split()) for text in texts)
-            estimated_cost = total_tokens * 0.00001  # Rough estimate
+            if self.memory_budget:
+                total_tokens = sum(token_counts[start:])
+            else:
+                total_tokens = sum(estimate_tokens(text) for text in texts[start:])
+            estimated_cost = embedding_cost(self.embedding_model, total_tokens) or 0.0
             if estimated_cost > 1.0:
                 print(f"⚠️  Warning: Estimated OpenAI cost ~${estimated_cost:.2f}")
-                print(f"   Processing {len(texts)} chunks, ~{total_tokens} tokens")
+                print(f"   Processing {page_chunks - start} chunks, ~{total_tokens} tokens")
         
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=show_progress)
+        # Page chunks first, then large pages and database rows streamed from their files
+        if self.memory_budget:
+            page_stream = self._iter_document_chunks(governor=governor)
+        else:
+            page_stream = zip(texts, metadatas, ids)
+        chunks = itertools.islice(
+            itertools.chain(page_stream, self._iter_large_page_chunks(), self._iter_database_chunks()),
+            start, None
+        )
+        return _IndexBuild(staging=staging, journal=journal, chunks=chunks, committed=start, total=total,
+                           governor=governor)
+    
+    def _scan_document_chunks(self, governor: Optional[MemoryGovernor] = None) -> Tuple[str, array]:
+        """
+        Digest the document chunks without keeping their texts.
         
-        # Add to ChromaDB
-        print("Storing in vector database...")
-        embeddings_list = [emb.tolist() for emb in embeddings]
+        Args:
+            governor: Sizes the batches documents are read from the store in
         
-        # Add documents in batches
-        batch_size = 100
-        for i in range(0, len(texts), batch_size):
-            batch_end = min(i + batch_size, len(texts))
-            
-            try:
-                self.collection.add(
-                    documents=texts[i:batch_end],
-                    metadatas=metadatas[i:batch_end],
-                    embeddings=embeddings_list[i:batch_end],
-                    ids=ids[i:batch_end]
-                )
-            except Exception as e:
-                print(f"Error adding batch {i}-{batch_end}: {e}")
-                continue
+        Returns:
+            (chunks digest, estimated tokens of each chunk)
+        """
+        token_counts = array("I")
         
-        print(f"Successfully indexed {len(texts)} chunks from {len(self.documents)} documents")
+        def pairs():
+            for text, _, chunk_id in self._iter_document_chunks(governor=governor):
+                token_counts.append(estimate_tokens(text))
+                yield chunk_id, text
+        # Chunk pages come from their metadata during searches of this build
+        self._chunk_pages = {}
+        digest = chunk_pairs_digest(pairs(), self._stream_sources())
+        return digest, token_counts
+    
+    @staticmethod
+    def _build_batches(build: "_IndexBuild", batch_size: int
+                       ) -> Iterator[Tuple[List[str], List[Dict[str, Any]], List[str]]]:
+        """Batches of a build's chunks, up to batch_size, shrinking while memory is short."""
+        size = batch_size
+        while True:
+            batch = list(itertools.islice(build.chunks, size))
+            if not batch:
+                return
+            texts, metadatas, ids = (list(column) for column in zip(*batch))
+            yield texts, metadatas, ids
+            # The previous batch has been embedded and written by now
+            size = build.governor.adapt(size, batch_size)
+    
+    def _commit_batch(self, build: "_IndexBuild", texts: List[str], metadatas: List[Dict[str, Any]],
+                      embeddings, ids: List[str], show_progress: bool = True) -> None:
+        """Store one embedded batch in the staging collection and checkpoint it."""
+        # Upsert so a batch stored just before a crash can be safely re-sent. Writes
+        # copy the vectors into lists, so they go in slices while memory is short.
+        size = min(build.write_batch or len(texts), len(texts))
+        for i in range(0, len(texts), size):
+            self._write_batch(build.staging, texts[i:i + size], metadatas[i:i + size],
+                              embeddings[i:i + size], ids[i:i + size])
+        size = build.governor.adapt(size, len(texts))
+        build.write_batch = size if size < len(texts) else None
+        build.committed += len(texts)
+        build.journal.record(build.committed)
+        if show_progress:
+            print(f"  Embedded {build.progress()} chunks")
+    
+    def _finish_build(self, build: "_IndexBuild") -> None:
+        """Index page titles and links, and swap the finished index in."""
+        # Streamed documents are read from the store once more, for their titles and links
+        title_index = self._build_title_index(self._iter_documents(build.governor), build.governor)
+        link_graph = self._build_link_graph(self._iter_documents(build.governor))
+        print("Activating new index...")
+        self._swap_collection(build.staging, title_index, link_graph)
+        build.journal.discard()
+        
+        print(f"Successfully indexed {build.committed} chunks from {self._document_count()} documents"
+              + (f" and {len(self.databases)} databases" if self.databases else ""))
+        build.governor.check()
+        print(build.governor.report())
+    
+    def _prepare_chunks(self, documents: Optional[List[NotionDocument]] = None
+                        ) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+        """Split documents (default: all documents) into chunks, returning (texts, metadatas, ids)."""
+        if documents is None:
+            documents = self.documents
+            self._chunk_pages = {}
+        filtered_data = list(self._iter_document_chunks(documents))
+        for _, metadata, chunk_id in filtered_data:
+            self._chunk_pages[chunk_id] = metadata["original_id"]
+        if not filtered_data:
+            if documents is not self.documents or self.databases or self.large_pages:
+                return [], [], []
+            raise ValueError("No valid text content found in documents")
+        
+        texts, metadatas, ids = zip(*filtered_data)
+        return list(texts), list(metadatas), list(ids)
+    
+    def _iter_documents(self, governor: Optional[MemoryGovernor] = None) -> Iterator[NotionDocument]:
+        """
+        All documents: the loaded ones, then those of deferred exports read from
+        the document store in batches (which shrink while memory is short).
+        """
+        yield from self.documents
+        for export_root in list(self._deferred_exports):
+            after = None
+            size = PARSE_BATCH
+            while True:
+                batch = self._store().load_batch(export_root, after, size, self.html_mode)
+                if not batch:
+                    break
+                yield from batch
+                after = batch[-1].url_path
+                if governor is not None:
+                    size = governor.adapt(size, PARSE_BATCH)
+    
+    def _iter_document_chunks(self, documents: Optional[List[NotionDocument]] = None,
+                              governor: Optional[MemoryGovernor] = None
+                              ) -> Iterator[Tuple[str, Dict[str, Any], str]]:
+        """Split documents (default: all documents) into (text, metadata, id) chunks, one document at a time."""
+        for doc in self._iter_documents(governor) if documents is None else documents:
+            if len(doc.plain_text) > self.chunk_size:
+                # Split large documents into chunks
+                chunks = self.text_splitter.split_text(doc.plain_text)
+                for i, chunk in enumerate(chunks):
+                    if chunk.strip():
+                        yield chunk, self._chunk_metadata(doc, i, len(chunks)), f"{doc.id}_chunk_{i}"
+            elif doc.plain_text.strip():
+                # Use whole document
+                yield doc.plain_text, self._chunk_metadata(doc, 0, 1), doc.id
+    
+    def _chunk_metadata(self, doc: NotionDocument, chunk_index: int, total_chunks: int) -> Dict[str, Any]:
+        """Metadata stored with each chunk of a document."""
+        return {
+            "original_id": doc.id,
+            "title": doc.title,
+            "workspace": doc.workspace,
+            "url_path": doc.url_path,
+            "export_root": doc.export_root or "",
+            "breadcrumb": " > ".join(doc.breadcrumb),
+            "tags": ", ".join(doc.tags),
+            "chunk_index": chunk_index,
+            "total_chunks": total_chunks,
+            "created_by": doc.created_by or "",
+            "last_edited_by": doc.last_edited_by or "",
+            "created_time": doc.created_time.isoformat() if doc.created_time else "",
+            "last_edited_time": doc.last_edited_time.isoformat() if doc.last_edited_time else ""
+        }
+    
+    def _write_batch(self, collection, texts: List[str], metadatas: List[Dict[str, Any]],
+                     embeddings, ids: List[str]) -> None:
+        """Write chunks with their embeddings to a collection, and their page metadata to its page table."""
+        pages = self._page_table(collection)
+        if pages is not None:
+            metadatas = pages.add_chunks(metadatas)
+        collection.upsert(
+            documents=texts,
+            metadatas=metadatas,
+            embeddings=[emb.tolist() for emb in embeddings],
+            ids=ids
+        )
+    
+    def _drop_staging(self, journal: BuildJournal) -> None:
+        """Abandon an interrupted build."""
+        try:
+            self.client.delete_collection(journal.staging_collection)
+        except Exception:
+            pass
+        self._drop_page_table(journal.staging_collection)
+        journal.discard()
     
     def search(self, 
                query: str, 
                limit: int = 10,
                workspace: Optional[str] = None,
                tags: Optional[List[str]] = None,
+               group_by: Optional[str] = None,
+               fields: Optional[List[str]] = None,
+               as_of: Union[int, str, date, datetime, None] = None,
                **filters) -> List[Dict[str, Any]]:
         """
         Search the archive using semantic similarity.
@@ -275,100 +1512,722 @@ class NotionArchive:
             limit: Maximum number of results
             workspace: Filter by workspace name
             tags: Filter by tags (must contain ALL specified tags)
+            group_by: Set to "page" to collapse chunk hits into one result per page
+            fields: Result fields to return (default: all chunk fields, or the
+                    lightweight PAGE_RESULT_FIELDS when grouping by page).
+                    Include "snippet" to get a highlighted excerpt.
+            as_of: Export snapshot to search in a versioned archive (see
+                   add_snapshot): its number, label, or a date for the latest
+                   snapshot taken on or before it (default: the latest)
             **filters: Additional metadata filters
             
         Returns:
             List of search results with content and metadata
         """
-        # Build where clause for filtering
-        where_clause = {}
+        where_clause, cache_key, cached = self._prepare_search(query, limit, workspace, tags, group_by,
+                                                               fields, as_of, filters)
+        if cached is not None:
+            return cached
+        
+        # Generate query embedding
+        start = time.perf_counter()
+        query_embedding = self.embedding_model.encode([query])
+        
+        return self._search_cached(query, query_embedding, limit, where_clause, group_by, fields,
+                                   cache_key, embed_seconds=time.perf_counter() - start)
+    
+    def _prepare_search(self, query: str, limit: int, workspace: Optional[str], tags: Optional[List[str]],
+                        group_by: Optional[str], fields: Optional[List[str]], as_of,
+                        filters: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str], Optional[List[Dict[str, Any]]]]:
+        """
+        Check a search's arguments before its query is embedded.
+        
+        Returns:
+            (where clause, query cache key, results cached for the exact query text or None)
+        """
+        if group_by not in (None, "page"):
+            raise ValueError(f"Unsupported group_by: {group_by}. Supported: 'page'")
+        self._follow_manifest()
+        self._check_index_compatibility()
+        where_clause = self._where_clause(workspace, tags, filters)
+        where_clause.update(self._version_filter(as_of))
+        
+        if self.query_cache is None:
+            return where_clause, None, None
+        cache_key = self._cache_key(limit, where_clause, group_by, fields)
+        return where_clause, cache_key, self.query_cache.get(query, cache_key)
+    
+    def _cache_key(self, limit: int, where_clause: Dict[str, Any], group_by: Optional[str],
+                   fields: Optional[List[str]]) -> str:
+        """Search parameters besides the query; only searches with equal keys share cached results."""
+        return json.dumps([limit, where_clause, group_by, sorted(fields) if fields else None],
+                          sort_keys=True, default=str)
+    
+    def _search_cached(self, query: str, query_embedding, limit: int, where_clause: Dict[str, Any],
+                       group_by: Optional[str], fields: Optional[List[str]],
+                       cache_key: Optional[str] = None, embed_seconds: float = 0.0) -> List[Dict[str, Any]]:
+        """_search_embedded, answered from the query cache when a similar query was searched recently."""
+        if self.query_cache is None:
+            return self._search_embedded(query, query_embedding, limit, where_clause, group_by, fields)
+        if cache_key is None:
+            cache_key = self._cache_key(limit, where_clause, group_by, fields)
+        cached = self.query_cache.get(query, cache_key, query_embedding[0])
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        results = self._search_embedded(query, query_embedding, limit, where_clause, group_by, fields)
+        # Empty results may be a failed query; don't keep serving them
+        if results:
+            self.query_cache.put(query, cache_key, query_embedding[0], results,
+                                 search_seconds=time.perf_counter() - start, embed_seconds=embed_seconds)
+        return results
+    
+    @staticmethod
+    def _where_clause(workspace: Optional[str], tags: Optional[List[str]],
+                      filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the metadata filter of a search."""
+        where_clause: Dict[str, Any] = {}
         if workspace:
             where_clause["workspace"] = workspace
         if tags:
-            for tag in tags:
-                where_clause["tags"] = {"$contains": tag}
+            # Pages must have every tag
+            conditions = [{"tags": {"$contains": tag}} for tag in tags]
+            where_clause.update(conditions[0] if len(conditions) == 1 else {"$and": conditions})
         where_clause.update(filters)
+        return where_clause
+    
+    def _page_filter(self, where_clause: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Replace the conditions on page fields of a where clause with the pages satisfying them.
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])
+        Chunks only store CHUNK_FIELDS and NATIVE_PAGE_FIELDS, so conditions on
+        tags and other page fields are evaluated on the page table; the vector
+        store then filters on original_id. Conditions the vector store can
+        evaluate on the chunks themselves (workspace equality, ...) stay as they are.
+        
+        Returns:
+            A where clause on chunk fields, or None when no page matches
+        """
+        if self.pages is None or not where_clause:
+            return where_clause
+        chunk_where, page_where = {}, {}
+        for key, condition in where_clause.items():
+            fields = where_fields({key: condition})
+            if fields <= set(VERSION_FIELDS):
+                # Both: the version interval also picks each page's version to filter on
+                chunk_where[key] = page_where[key] = condition
+            elif fields <= CHUNK_FIELDS:
+                chunk_where[key] = condition
+            elif fields <= CHUNK_FIELDS | NATIVE_PAGE_FIELDS and \
+                    where_operators({key: condition}) <= NATIVE_OPERATORS:
+                chunk_where[key] = condition
+            elif fields & CHUNK_FIELDS - set(VERSION_FIELDS):
+                raise ValueError(f"A filter cannot combine page fields with {sorted(fields & CHUNK_FIELDS)}")
+            else:
+                page_where[key] = condition
+        if set(page_where) <= set(VERSION_FIELDS):
+            return where_clause
+        
+        page_ids = self.pages.matching(page_where)
+        if not page_ids:
+            return None
+        pages_condition = {"original_id": {"$in": page_ids}}
+        if "original_id" in chunk_where:
+            return {"$and": [{key: value} for key, value in chunk_where.items()] + [pages_condition]}
+        chunk_where.update(pages_condition)
+        return chunk_where
+    
+    def _page_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Chunk metadata joined with its page's metadata."""
+        return self.pages.join(metadata) if self.pages is not None else metadata
+    
+    def _version_filter(self, as_of) -> Dict[str, Any]:
+        """Filter restricting a search to one export snapshot (none for unversioned archives)."""
+        if self.versions:
+            return self.versions.where(as_of)
+        if as_of is not None:
+            raise ValueError("as_of needs an archive of export snapshots (see add_snapshot)")
+        return {}
+    
+    def _search_embedded(self, query: str, query_embedding, limit: int, where_clause: Dict[str, Any],
+                         group_by: Optional[str] = None,
+                         fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Run a search whose query has already been embedded."""
+        chunk_where = self._page_filter(where_clause)
+        if chunk_where is None:
+            return []
+        if group_by == "page":
+            return self._search_pages(query, query_embedding, limit, chunk_where, fields)
+        
+        n_results = max(limit, self.rerank_candidates) if self.reranker is not None else limit
+        results = self._query(query_embedding, n_results, chunk_where)
+        if results is None:
+            return []
+        
+        # Format results, boosting hits from pages whose title matches the query
+        formatted_results = []
+        if results and "documents" in results and results["documents"]:
+            strengths = self._title_strengths(query, query_embedding)
+            self._add_title_hits(query_embedding, results, chunk_where, strengths)
+            scores = self._boosted_scores(results, strengths)
+            order = sorted(range(len(scores)), key=lambda i: -scores[i])
+            order, rerank_scores = self._rerank(query, order, results["documents"][0])
+            for i in order[:limit]:
+                result = self._format_hit(results, i, query, fields, score=scores[i])
+                if rerank_scores is not None and "rerank_score" in (set(fields) if fields else CHUNK_RESULT_FIELDS):
+                    result["rerank_score"] = rerank_scores[i]
+                formatted_results.append(result)
+        
+        return formatted_results
+    
+    def _rerank(self, query: str, order: List[int],
+                texts: List[str]) -> Tuple[List[int], Optional[Dict[int, float]]]:
+        """
+        Reorder the top rerank_candidates hits with the cross-encoder.
+        
+        Args:
+            query: Search query
+            order: Hit indices, best first
+            texts: Text of every hit
+            
+        Returns:
+            (new order, rerank score per reranked hit); the order is unchanged and
+            the scores are None without a reranker or when it ran out of time
+        """
+        if self.reranker is None or not order:
+            return order, None
+        candidates = order[:self.rerank_candidates]
+        scores = self.reranker.score(query, [texts[i] for i in candidates])
+        if scores is None:
+            return order, None
+        rerank_scores = dict(zip(candidates, scores))
+        reranked = sorted(candidates, key=lambda i: -rerank_scores[i])
+        return reranked + order[len(candidates):], rerank_scores
+    
+    def _title_strengths(self, query: str, query_embedding) -> Dict[str, float]:
+        """Title match strength per page id (empty when title boosting is off)."""
+        if not self.title_boost or not self.title_index:
+            return {}
+        return self.title_index.strengths(query, query_embedding)
+    
+    def _add_title_hits(self, query_embedding, results: Dict[str, Any], where_clause: Dict[str, Any],
+                        strengths: Dict[str, float]) -> None:
+        """
+        Append the best chunks of strongly title-matched pages missing from `results`.
+        
+        A page named after the query may have no chunk among the nearest
+        neighbours (its body can be about anything), so the boost alone would
+        never surface it.
+        """
+        strong = {page_id for page_id, strength in strengths.items() if strength >= TITLE_PREFIX_MATCH}
+        if not strong:
+            return
+        for chunk_id, metadata in zip(results["ids"][0], results["metadatas"][0]):
+            strong.discard(self._chunk_pages.get(chunk_id) or metadata.get("original_id", chunk_id))
+        if not strong:
+            return
         
-        # Search in ChromaDB
+        page_filter = {"original_id": {"$in": sorted(strong)}}
+        where = {"$and": [page_filter, self._chroma_where(where_clause)]} if where_clause else page_filter
+        extra = self._query(query_embedding, len(strong) * TITLE_HIT_OVERFETCH, where)
+        if not extra or not extra.get("ids") or not extra["ids"][0]:
+            return
+        
+        seen = set(results["ids"][0])
+        for i, chunk_id in enumerate(extra["ids"][0]):
+            page_id = self._chunk_pages.get(chunk_id) or extra["metadatas"][0][i].get("original_id", chunk_id)
+            if chunk_id in seen or page_id not in strong:
+                continue
+            strong.discard(page_id)
+            for key in ("ids", "documents", "metadatas", "distances"):
+                results[key][0].append(extra[key][0][i])
+    
+    @staticmethod
+    def _chroma_where(where_clause: Dict[str, Any]) -> Dict[str, Any]:
+        """A where clause ChromaDB accepts inside $and: one condition per dict."""
+        if len(where_clause) == 1:
+            return where_clause
+        return {"$and": [{key: value} for key, value in where_clause.items()]}
+    
+    def _boosted_scores(self, results: Dict[str, Any], strengths: Dict[str, float]) -> List[float]:
+        """
+        Scores of query hits, plus title_boost for hits whose page title matches
+        the query and link_boost scaled by their page's link authority.
+        """
+        scores = [self._distance_to_score(distance) for distance in results["distances"][0]]
+        link_graph = self.link_graph if self.link_boost else None
+        if not strengths and link_graph is None:
+            return scores
+        for i, (chunk_id, metadata) in enumerate(zip(results["ids"][0], results["metadatas"][0])):
+            page_id = self._chunk_pages.get(chunk_id) or metadata.get("original_id", chunk_id)
+            scores[i] += self.title_boost * strengths.get(page_id, 0.0)
+            if link_graph is not None:
+                scores[i] += self.link_boost * link_graph.authority_of(page_id)
+        return scores
+    
+    def navigate(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find pages by name: exact, word-prefix or fuzzy matches on titles and breadcrumbs.
+        
+        Answers navigational queries ("Q3 roadmap", "eng onboard") from the title
+        index, without embedding the query or scanning chunks.
+        
+        Args:
+            query: Page name, or the start of its words
+            limit: Maximum number of pages
+            
+        Returns:
+            Pages (id, title, breadcrumb, url, workspace) with a match `score` in
+            [0, 1] and `match` ("exact", "prefix" or "fuzzy"), best first
+        """
+        self._follow_manifest()
+        if self.title_index is None:
+            return []
+        return [
+            dict(self.title_index.entry(i), score=strength, match=kind)
+            for i, strength, kind in self.title_index.match(query, limit)
+        ]
+    
+    def related(self, page_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find pages related to a page through the links between pages.
+        
+        Answers from the link graph built with the index: pages it links to or
+        is linked from, then pages sharing links with it. No embedding call or
+        vector search is made.
+        
+        Args:
+            page_id: Id of the page (as in search results)
+            limit: Maximum number of pages
+            
+        Returns:
+            Pages (id, title, breadcrumb, url, workspace) with a relatedness
+            `score`, their link `authority` in [0, 1] and `relation` ("mutual",
+            "links_to", "linked_from" or "shared_links"), best first
+        """
+        self._follow_manifest()
+        if self.link_graph is None:
+            return []
+        results = []
+        for i, score, relation in self.link_graph.related(page_id, limit):
+            related_id = self.link_graph.page_ids[i]
+            page: Dict[str, Any] = {"id": related_id}
+            position = self.title_index.position(related_id) if self.title_index is not None else None
+            if self.title_index is not None and position is not None:
+                page = self.title_index.entry(position)
+            page.update(score=score, authority=float(self.link_graph.authority[i]), relation=relation)
+            results.append(page)
+        return results
+    
+    def warmup(self, queries: Optional[List[str]] = None) -> float:
+        """
+        Run a few searches so lazily loaded state is ready before serving traffic.
+    
+        Loads model weights and kernels, pages in the vectors and decodes the
+        cached metadata columns of a snapshot. In a pre-fork server, warming up
+        the parent lets every worker share that state instead of rebuilding it.
+    
+        Args:
+            queries: Queries to run (default: one placeholder query)
+    
+        Returns:
+            Seconds taken
+        """
+        start = time.perf_counter()
+        # Warm-up searches must reach the model and index, not the query cache
+        query_cache, self.query_cache = self.query_cache, None
         try:
-            results = self.collection.query(
-                query_embeddings=query_embedding.tolist(),
-                n_results=limit,
-                where=where_clause if where_clause else None,
-                include=["documents", "metadatas", "distances"]
-            )
+            for query in queries or ["warm up"]:
+                self.search(query, limit=10)
+                self.search(query, limit=10, group_by="page")
+                self.navigate(query)
+        finally:
+            self.query_cache = query_cache
+        return time.perf_counter() - start
+    
+    def reset_after_fork(self) -> None:
+        """
+        Make a forked child safe to serve searches (see core/serving.py).
+    
+        Only snapshot-backed archives can be shared this way: a ChromaDB
+        client's database connections and threads do not survive fork().
+        """
+        if self.snapshot is None:
+            raise RuntimeError("Only archives loaded from a snapshot can be shared with forked workers. "
+                               "Write one with export_snapshot() and load it with snapshot_path=...")
+        self.embedding_model.reset_after_fork()
+        if self.reranker is not None:
+            self.reranker.reset_after_fork()
+        if self.query_cache is not None:
+            self.query_cache.reset_after_fork()
+        if self.pages is not None:
+            self.pages.reset_after_fork()
+    
+    def close(self) -> None:
+        """
+        Release the embedding model, document store and page table.
+        
+        A model shared with other archives (share_model) is only closed once
+        the last of them is closed.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._model_registry is not None:
+            self._model_registry.release(self.embedding_model)
+        else:
+            self.embedding_model.close()
+        if self.document_store is not None:
+            self.document_store.close()
+        if self.pages is not None:
+            self.pages.close()
+    
+    def _query(self, query_embedding, n_results: int, where_clause: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run a vector query against the collection, returning None on failure."""
+        page_ids, other_where = self._split_page_ids(where_clause)
+        try:
+            results = None
+            if page_ids is not None:
+                results = self._post_filtered_query(query_embedding, n_results, page_ids, other_where)
+            if results is None:
+                results = self._collection_call(
+                    "query",
+                    query_embeddings=query_embedding.tolist(),
+                    n_results=n_results,
+                    where=self._chroma_where(where_clause) if where_clause else None,
+                    include=["documents", "metadatas", "distances"]
+                )
         except Exception as e:
             print(f"Search error: {e}")
+            return None
+        if self.pages is not None and results.get("metadatas"):
+            results["metadatas"] = [[self.pages.join(metadata) for metadata in row] for row in results["metadatas"]]
+        return results
+    
+    @staticmethod
+    def _split_page_ids(where_clause: Dict[str, Any]) -> Tuple[Optional[List[str]], Optional[Dict[str, Any]]]:
+        """
+        Split a page id list longer than MAX_PAGE_FILTER_IDS off a where clause.
+        
+        Returns:
+            (page ids, ChromaDB where clause of the other conditions or None),
+            or (None, None) when the clause has no such list
+        """
+        conditions = []
+        pending = [where_clause] if where_clause else []
+        while pending:
+            for key, condition in pending.pop().items():
+                if key == "$and":
+                    pending.extend(condition)
+                else:
+                    conditions.append({key: condition})
+        for i, condition in enumerate(conditions):
+            page_filter = condition.get("original_id")
+            if isinstance(page_filter, dict) and list(page_filter) == ["$in"] and \
+                    len(page_filter["$in"]) > MAX_PAGE_FILTER_IDS:
+                rest = conditions[:i] + conditions[i + 1:]
+                return page_filter["$in"], (rest[0] if len(rest) == 1 else {"$and": rest} if rest else None)
+        return None, None
+    
+    def _post_filtered_query(self, query_embedding, n_results: int, page_ids: List[str],
+                             where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Query without a long page id list, keeping the hits of those pages.
+        
+        Fetches more hits the smaller the share of pages the list holds.
+        
+        Returns:
+            The query results, or None when too few of the fetched hits were of
+            the pages and the collection had more to fetch
+        """
+        allowed = set(page_ids)
+        total = self._collection_call("count")
+        pages = len(self.pages) if self.pages is not None else 0
+        fetch = min(total, 2 * n_results * max(pages, len(allowed)) // len(allowed) + 1)
+        results = self._collection_call(
+            "query",
+            query_embeddings=query_embedding.tolist(),
+            n_results=fetch,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        kept = [i for i, metadata in enumerate(results["metadatas"][0]) if metadata.get("original_id") in allowed]
+        if len(kept) < n_results and fetch == len(results["ids"][0]) < total:
+            return None
+        kept = kept[:n_results]
+        for key in ("ids", "documents", "metadatas", "distances"):
+            results[key] = [[results[key][0][i] for i in kept]]
+        return results
+    
+    def _format_hit(self, results: Dict[str, Any], i: int, query: str,
+                    fields: Optional[List[str]] = None, score: Optional[float] = None) -> Dict[str, Any]:
+        """Build a single chunk result, computing only the requested fields."""
+        wanted = set(fields) if fields else CHUNK_RESULT_FIELDS
+        metadata = results["metadatas"][0][i]
+        content = results["documents"][0][i]
+        
+        distance = results["distances"][0][i]
+        
+        result = {}
+        if "id" in wanted:
+            result["id"] = results["ids"][0][i]
+        if "content" in wanted:
+            result["content"] = content
+        if "metadata" in wanted:
+            result["metadata"] = metadata
+        if "score" in wanted:
+            result["score"] = self._distance_to_score(distance) if score is None else score
+        self._add_page_fields(result, wanted, metadata)
+        if "snippet" in wanted:
+            result["snippet"] = make_snippet(content, query)
+        return result
+    
+    def _add_page_fields(self, result: Dict[str, Any], wanted, metadata: Dict[str, Any]) -> None:
+        """Copy page-level display fields from (joined) chunk metadata into a result."""
+        record = self.pages.record_of(metadata) if self.pages is not None else None
+        if "title" in wanted:
+            result["title"] = metadata.get("title", "")
+        if "workspace" in wanted:
+            result["workspace"] = metadata.get("workspace", "")
+        if "tags" in wanted:
+            result["tags"] = list(record.tags) if record is not None else \
+                [tag.strip() for tag in metadata.get("tags", "").split(",") if tag.strip()]
+        if "breadcrumb" in wanted:
+            result["breadcrumb"] = list(record.breadcrumb) if record is not None else \
+                metadata.get("breadcrumb", "").split(" > ")
+        if "url" in wanted:
+            result["url"] = metadata.get("url_path", "")
+    
+    def _search_pages(self, query: str, query_embedding, limit: int,
+                      where_clause: Dict[str, Any],
+                      fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """
+        Over-fetch chunk hits and collapse them into one result per page.
+        
+        Chunks come back best-first, so the first chunk seen for a page is its
+        best match. The fetch size grows until `limit` distinct pages are found
+        or the collection is exhausted.
+        """
+        wanted = set(fields) if fields else PAGE_RESULT_FIELDS
+        try:
+            total = self._collection_call("count")
+        except Exception:
+            total = 0
+        if total == 0:
             return []
         
-        # Format results
+        # With a reranker, collect enough pages to rerank
+        wanted_pages = max(limit, self.rerank_candidates) if self.reranker is not None else limit
+        n_results = min(total, wanted_pages * self.group_overfetch)
+        while True:
+            results = self._query(query_embedding, n_results, where_clause)
+            if not results or not results.get("ids"):
+                return []
+            
+            pages: Dict[str, Dict[str, Any]] = {}
+            chunk_ids = results["ids"][0]
+            for i, chunk_id in enumerate(chunk_ids):
+                metadata = results["metadatas"][0][i]
+                page_id = self._chunk_pages.get(chunk_id) or metadata.get("original_id", chunk_id)
+                page = pages.get(page_id)
+                if page is None:
+                    pages[page_id] = {"best": i, "matched_chunks": 1}
+                else:
+                    page["matched_chunks"] += 1
+            
+            # Stop once we have enough pages, or nothing more can be fetched
+            if len(pages) >= wanted_pages or len(chunk_ids) < n_results or n_results >= total:
+                break
+            n_results = min(total, n_results * 2)
+        
+        # Rank pages by their best hit, boosted when the page title matches the query
+        strengths = self._title_strengths(query, query_embedding)
+        before = len(chunk_ids)
+        self._add_title_hits(query_embedding, results, where_clause, strengths)
+        for i in range(before, len(results["ids"][0])):
+            metadata = results["metadatas"][0][i]
+            pages[metadata.get("original_id", chunk_ids[i])] = {"best": i, "matched_chunks": 1}
+        scores = self._boosted_scores(results, strengths)
+        ranked = sorted(pages.items(), key=lambda item: -scores[item[1]["best"]])
+        
+        # Rerank pages by their best chunk
+        by_best = {page["best"]: (page_id, page) for page_id, page in ranked}
+        order, rerank_scores = self._rerank(query, [page["best"] for _, page in ranked], results["documents"][0])
+        
         formatted_results = []
-        if results and "documents" in results and results["documents"]:
-            for i in range(len(results["documents"][0])):
-                # Convert distance to similarity score (0-1, higher is better)
-                distance = results["distances"][0][i]
-                score = max(0, 1 - distance)
-                
-                result = {
-                    "id": results["ids"][0][i],
-                    "content": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "score": score,
-                    "title": results["metadatas"][0][i].get("title", ""),
-                    "workspace": results["metadatas"][0][i].get("workspace", ""),
-                    "tags": [tag.strip() for tag in results["metadatas"][0][i].get("tags", "").split(",") if tag.strip()],
-                    "breadcrumb": results["metadatas"][0][i].get("breadcrumb", "").split(" > "),
-                    "url": results["metadatas"][0][i].get("url_path", "")
-                }
-                formatted_results.append(result)
+        for i in order[:limit]:
+            page_id, page = by_best[i]
+            metadata = results["metadatas"][0][i]
+            result: Dict[str, Any] = {}
+            if "id" in wanted:
+                result["id"] = page_id
+            if "chunk_id" in wanted:
+                result["chunk_id"] = chunk_ids[i]
+            if "score" in wanted:
+                result["score"] = scores[i]
+            if "matched_chunks" in wanted:
+                result["matched_chunks"] = page["matched_chunks"]
+            if "rerank_score" in wanted and rerank_scores is not None:
+                result["rerank_score"] = rerank_scores[i]
+            self._add_page_fields(result, wanted, metadata)
+            if "content" in wanted:
+                result["content"] = results["documents"][0][i]
+            if "metadata" in wanted:
+                result["metadata"] = metadata
+            if "snippet" in wanted:
+                result["snippet"] = make_snippet(results["documents"][0][i], query)
+            formatted_results.append(result)
         
         return formatted_results
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the indexed archive."""
         try:
-            count = self.collection.count()
-            
-            # Get sample of documents to analyze
-            sample_results = self.collection.get(limit=min(100, count))
+            count = self._collection_call("count")
             
             workspaces = set()
             tags = set()
             
-            for metadata in sample_results.get("metadatas", []):
-                if metadata.get("workspace"):
-                    workspaces.add(metadata["workspace"])
-                if metadata.get("tags"):
-                    tags.update([tag.strip() for tag in metadata["tags"].split(",") if tag.strip()])
+            if self.pages is not None:
+                # Every current page
+                for record in self.pages.records():
+                    if record.valid_to == OPEN:
+                        if record.metadata.get("workspace"):
+                            workspaces.add(record.metadata["workspace"])
+                        tags.update(record.tags)
+            else:
+                # Get sample of documents to analyze
+                sample_results = self.collection.get(limit=min(100, count))
+                for metadata in sample_results.get("metadatas", []):
+                    if metadata.get("workspace"):
+                        workspaces.add(metadata["workspace"])
+                    if metadata.get("tags"):
+                        tags.update([tag.strip() for tag in metadata["tags"].split(",") if tag.strip()])
             
             return {
-                "total_documents": len(self.documents),
+                "total_documents": self._document_count(),
                 "total_chunks": count,
                 "workspaces": sorted(list(workspaces)),
                 "tags": sorted(list(tags)),
                 "embedding_model": self.embedding_model.model_name,
-                "embedding_dimension": self.embedding_model.dimension
+                "embedding_dimension": self.embedding_model.dimension,
+                "snapshots": self.versions.latest,
+                "query_cache": self.query_cache.stats() if self.query_cache is not None else None
             }
         except Exception as e:
             return {
                 "error": str(e),
-                "total_documents": len(self.documents),
+                "total_documents": self._document_count(),
                 "total_chunks": 0,
                 "workspaces": [],
                 "tags": []
             }
     
+    def rebuild_vector_index(self, batch_size: int = 1000, **hnsw_params) -> None:
+        """
+        Rebuild the vector index with new HNSW settings, reusing the stored embeddings.
+        
+        Nothing is re-embedded: chunks and vectors are copied into a new collection,
+        which replaces the live one once complete.
+        
+        Args:
+            batch_size: Chunks copied per batch
+            **hnsw_params: New settings (space, M, construction_ef, search_ef)
+        """
+        self._require_writable()
+        unknown = set(hnsw_params) - set(HNSW_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown HNSW parameters: {sorted(unknown)}. Supported: {list(HNSW_DEFAULTS)}")
+        if hnsw_params.get("space", self.hnsw_params["space"]) not in HNSW_SPACES:
+            raise ValueError(f"Unsupported hnsw_space: {hnsw_params['space']}. Supported: {list(HNSW_SPACES)}")
+        self.hnsw_params.update(hnsw_params)
+        
+        target = self._create_collection(self._new_collection_name())
+        if self.pages is not None:
+            self._staging_pages[target.name] = self.pages.copy_to(self._page_table_path(target.name))
+        total = self.collection.count()
+        for offset in range(0, total, batch_size):
+            batch = self.collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"]
+            )
+            target.upsert(
+                ids=batch["ids"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"],
+                embeddings=np.asarray(batch["embeddings"], dtype=np.float32).tolist()
+            )
+        self._swap_collection(target, self.title_index, self.link_graph)
+        print(f"Rebuilt vector index with {total} chunks: {self.index_params()}")
+    
+    def _document_count(self) -> int:
+        """Number of added documents, including ones whose loading was deferred."""
+        count = len(self.documents) + sum(self._deferred_exports.values())
+        if not count and self.snapshot is not None and self.snapshot.catalog is not None:
+            return len(self.snapshot.catalog)
+        return count
+    
+    def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """
+        Write the index to a single read-only snapshot file for search replicas.
+        
+        Load it with NotionArchive(snapshot_path=path, ...): the vectors are
+        memory-mapped, so loading is near-instant and replica processes on one
+        host share them through the page cache.
+        
+        Args:
+            path: Destination file
+            
+        Returns:
+            The snapshot's info header (count, dimension, space, ...)
+        """
+        self._load_deferred_documents()
+        catalog = [self._catalog_entry(doc) for doc in self.documents] if self.documents else None
+        if catalog is None and self.snapshot is not None:
+            catalog = self.snapshot.catalog
+        extra_sections = {}
+        if self.title_index is not None:
+            extra_sections["titles"] = self.title_index.to_bytes()
+        if self.link_graph is not None:
+            extra_sections["links"] = self.link_graph.to_bytes()
+        if self.versions:
+            extra_sections["versions"] = self.versions.to_bytes()
+        if self.pages is not None:
+            extra_sections["pages"] = self.pages.to_bytes()
+        info = write_snapshot(path, self.collection, catalog=catalog, extra_sections=extra_sections or None)
+        print(f"Wrote snapshot {path}: {info['count']} chunks, {info['dimension']} dimensions")
+        return info
+    
+    @staticmethod
+    def _catalog_entry(doc: NotionDocument) -> Dict[str, Any]:
+        """Page-level record stored in snapshots."""
+        return {
+            "id": doc.id,
+            "title": doc.title,
+            "url_path": doc.url_path,
+            "workspace": doc.workspace,
+            "breadcrumb": doc.breadcrumb,
+            "tags": doc.tags,
+            "created_by": doc.created_by,
+            "last_edited_by": doc.last_edited_by,
+            "created_time": doc.created_time.isoformat() if doc.created_time else None,
+            "last_edited_time": doc.last_edited_time.isoformat() if doc.last_edited_time else None
+        }
+    
     def clear_index(self) -> None:
         """Clear the search index."""
+        self._require_writable()
         try:
-            self.client.delete_collection(self.collection_name)
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "Notion Archive documents"}
-            )
+            journal = BuildJournal.load(self._journal_path())
+            if journal:
+                self._drop_staging(journal)
+            self._swap_collection(self._create_collection(self._new_collection_name()),
+                                  self._build_title_index([]), self._build_link_graph([]))
+            self._chunk_pages = {}
+            if self.versions:
+                os.remove(self._versions_path())
+                self.versions = VersionHistory.load(self._versions_path())
             print("Index cleared successfully")
         except Exception as e:
-            print(f"Error clearing index: {e}")
\ No newline at end of file
+            print(f"Error clearing index: {e}")
@@ -0,0 +1,197 @@
+"""
+asyncio interface to NotionArchive for async services (FastAPI, aiohttp, ...).
+
+Blocking work never runs on the event loop: OpenAI embeddings use the native
+async client, while local model inference, parsing and ChromaDB I/O run in
+executors that can be configured separately. Searches are limited to
+`max_concurrency` at a time, and cancelling an awaited build stops it between
+batches, leaving a journal that build_index(resume=True) continues from.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .archive import NotionArchive
+
+
+class AsyncNotionArchive:
+    """
+    Awaitable wrapper around a NotionArchive.
+
+    Usage:
+        archive = AsyncNotionArchive(embedding_model="text-embedding-3-small")
+        await archive.add_export("./my_notion_export")
+        await archive.build_index()
+        results = await archive.search("AI strategy meetings")
+    """
+
+    def __init__(self,
+                 archive: Optional[NotionArchive] = None,
+                 executor: Optional[Executor] = None,
+                 io_executor: Optional[Executor] = None,
+                 max_concurrency: int = 16,
+                 **archive_kwargs):
+        """
+        Initialize the async archive.
+
+        Args:
+            archive: Existing NotionArchive to wrap (default: create one from archive_kwargs)
+            executor: Executor for CPU-bound work: local model inference, parsing and
+                      chunking (default: the event loop's default executor)
+            io_executor: Executor for ChromaDB reads and writes (default: `executor`)
+            max_concurrency: Searches allowed to run at the same time
+            **archive_kwargs: NotionArchive arguments, when `archive` is not given
+        """
+        self.archive = archive if archive is not None else NotionArchive(**archive_kwargs)
+        self.executor = executor
+        self.io_executor = io_executor or executor
+        self.max_concurrency = max(1, max_concurrency)
+        # Created on first use so they bind to the running loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._build_lock: Optional[asyncio.Lock] = None
+
+    async def _run(self, executor: Optional[Executor], fn, *args, **kwargs):
+        """Run a blocking call in an executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts natively async when the model supports it, else in the CPU executor."""
+        model = self.archive.embedding_model
+        aencode = getattr(model, "aencode", None)
+        if aencode is not None:
+            return await aencode(texts)
+        return await self._run(self.executor, model.encode, texts, show_progress_bar=False)
+
+    def _limit(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def add_export(self, export_path: str, **kwargs) -> None:
+        """Add a Notion export to the archive (see NotionArchive.add_export)."""
+        await self._run(self.executor, self.archive.add_export, export_path, **kwargs)
+
+    async def search(self,
+                     query: str,
+                     limit: int = 10,
+                     workspace: Optional[str] = None,
+                     tags: Optional[List[str]] = None,
+                     group_by: Optional[str] = None,
+                     fields: Optional[List[str]] = None,
+                     as_of=None,
+                     **filters) -> List[Dict[str, Any]]:
+        """
+        Search the archive using semantic similarity (see NotionArchive.search).
+
+        Returns:
+            List of search results with content and metadata
+        """
+        return (await self.search_many([query], limit, workspace, tags, group_by, fields, as_of, **filters))[0]
+
+    async def search_many(self,
+                          queries: List[str],
+                          limit: int = 10,
+                          workspace: Optional[str] = None,
+                          tags: Optional[List[str]] = None,
+                          group_by: Optional[str] = None,
+                          fields: Optional[List[str]] = None,
+                          as_of=None,
+                          **filters) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches with the same filters.
+
+        All queries are embedded in one batch, then searched concurrently
+        (within the concurrency limit).
+
+        Args:
+            queries: Search query texts
+            limit, workspace, tags, group_by, fields, as_of, **filters: As for search()
+
+        Returns:
+            One result list per query, in query order
+        """
+        if group_by not in (None, "page"):
+            raise ValueError(f"Unsupported group_by: {group_by}. Supported: 'page'")
+        if not queries:
+            return []
+
+        def prepare():
+            # Following the manifest and checking the index read from disk
+            return [self.archive._prepare_search(query, limit, workspace, tags, group_by, fields, as_of, filters)
+                    for query in queries]
+
+        prepared = await self._run(self.io_executor, prepare)
+        # Queries answered from the query cache by their exact text need no embedding
+        uncached = [i for i, (_, _, cached) in enumerate(prepared) if cached is None]
+        results: List[List[Dict[str, Any]]] = [cached or [] for _, _, cached in prepared]
+        if not uncached:
+            return results
+
+        async with self._limit():
+            embeddings = await self._encode([queries[i] for i in uncached])
+
+        async def search_one(i: int, embedding: np.ndarray) -> None:
+            where_clause, cache_key, _ = prepared[i]
+            async with self._limit():
+                results[i] = await self._run(
+                    self.io_executor, self.archive._search_cached,
+                    queries[i], embedding[np.newaxis, :], limit, where_clause, group_by, fields, cache_key
+                )
+
+        await asyncio.gather(*(search_one(i, embedding) for i, embedding in zip(uncached, embeddings)))
+        return results
+
+    async def build_index(self,
+                          show_progress: bool = True,
+                          force_rebuild: bool = False,
+                          resume: bool = False,
+                          batch_size: int = 500) -> None:
+        """
+        Build the search index without blocking the event loop (see NotionArchive.build_index).
+
+        Only one build runs at a time. Cancelling the awaiting task stops the
+        build after the batch in flight; continue it later with resume=True.
+        """
+        if self._build_lock is None:
+            self._build_lock = asyncio.Lock()
+
+        async with self._build_lock:
+            archive = self.archive
+            build = await self._run(self.executor, archive._start_build, force_rebuild, resume)
+            if build is None:
+                return
+
+            batches = archive._build_batches(build, batch_size)
+            try:
+                while True:
+                    # Chunking (and streaming large pages or databases) is CPU-bound
+                    batch = await self._run(self.executor, next, batches, None)
+                    if batch is None:
+                        break
+                    texts, metadatas, ids = batch
+                    embeddings = await self._encode(texts)
+                    await self._run(self.io_executor, archive._commit_batch,
+                                    build, texts, metadatas, embeddings, ids, show_progress)
+            except asyncio.CancelledError:
+                print(f"Build cancelled after {build.progress()} chunks. "
+                      f"Run build_index(resume=True) to continue.")
+                raise
+            except Exception:
+                print(f"Build interrupted after {build.progress()} chunks. "
+                      f"Run build_index(resume=True) to continue.")
+                raise
+
+            await self._run(self.io_executor, archive._finish_build, build)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the indexed archive."""
+        return await self._run(self.io_executor, self.archive.get_stats)
+
+    async def has_index(self) -> bool:
+        """Check if the archive already has an index built."""
+        return await self._run(self.io_executor, self.archive.has_index)
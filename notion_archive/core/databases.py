@@ -0,0 +1,193 @@
+"""
+Streaming ingestion of Notion database CSV exports.
+
+Notion exports every database as a CSV file (plus a `_all.csv` variant with
+rows hidden by the exported view). Trackers can have 100k+ rows, so rows are
+read one at a time and turned into small documents whose typed properties
+become filterable chunk metadata (`prop_<name>`). Nothing is kept in memory
+beyond the row being processed and a 64-bit hash of each row's title, used
+to number repeated titles: about 80 bytes per row, so 8MB for a 100k-row
+database.
+
+Rows are identified by their title rather than their position in the file,
+so adding, removing or reordering rows leaves the ids of the other rows (and
+their embeddings) unchanged.
+"""
+
+import csv
+import hashlib
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .parser import NotionDocument, NotionExportParser
+
+# Prefix of chunk metadata keys holding database properties
+PROPERTY_PREFIX = "prop_"
+
+# Properties that map onto NotionDocument fields instead of prop_ metadata
+_DOCUMENT_FIELDS = {
+    "tags": "tags",
+    "created": "created_time",
+    "created_time": "created_time",
+    "created_by": "created_by",
+    "last_edited_time": "last_edited_time",
+    "last_edited": "last_edited_time",
+    "last_edited_by": "last_edited_by",
+}
+
+_DATE_FORMATS = ("%B %d, %Y %I:%M %p", "%B %d, %Y", "%Y-%m-%d", "%Y/%m/%d")
+_INT_RE = re.compile(r"^-?\d{1,15}$")
+_FLOAT_RE = re.compile(r"^-?\d*\.\d+$|^-?\d+\.\d*$")
+_KEY_RE = re.compile(r"\W+", re.UNICODE)
+
+# One database row: (document, typed prop_ metadata)
+DatabaseRow = Tuple[NotionDocument, Dict[str, Any]]
+
+
+def find_database_files(export_path: Union[str, Path]) -> List[Path]:
+    """
+    Find the database CSV files of an export, in a stable order.
+
+    When both `Name.csv` and `Name_all.csv` exist, only `_all.csv` is used:
+    it holds every row, including ones filtered out of the exported view.
+    """
+    csv_files = sorted(Path(export_path).rglob("*.csv"))
+    all_variants = {f.with_name(f.name[:-len("_all.csv")] + ".csv") for f in csv_files
+                    if f.name.endswith("_all.csv")}
+    return [f for f in csv_files if f not in all_variants]
+
+
+def property_key(name: str) -> str:
+    """Normalize a property name into a metadata key, e.g. "Due Date" -> "due_date"."""
+    return _KEY_RE.sub("_", name.strip().lower()).strip("_")
+
+
+def parse_date(value: str) -> Optional[datetime]:
+    """Parse a date as Notion writes it to CSV; ranges ("A → B") give their start."""
+    value = value.split("→")[0].replace("@", "").strip()
+    value = re.sub(r"\s+", " ", value)
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_property(value: str) -> Union[str, int, float, bool, None]:
+    """
+    Convert a CSV cell into a typed metadata value.
+
+    Checkboxes ("Yes"/"No") become bools, numbers become ints or floats and
+    dates become ISO strings; everything else stays text. Empty cells give None.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    if value in ("Yes", "No"):
+        return value == "Yes"
+    if _INT_RE.match(value):
+        return int(value)
+    if _FLOAT_RE.match(value):
+        return float(value)
+    date = parse_date(value)
+    if date is not None:
+        return date.isoformat()
+    return value
+
+
+def _row_key(row: List[str], seen: Set[int], repeats: Dict[int, int]) -> str:
+    """
+    Stable key of a row: a hash of its title (of all its cells if untitled).
+    Rows repeating an earlier row's title are numbered in file order.
+
+    Args:
+        seen: Title hashes of the earlier rows (one small int per row)
+        repeats: Number of rows per repeated title hash
+    """
+    text = row[0].strip() or "\x1f".join(cell.strip() for cell in row)
+    digest = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+    key = f"{digest:016x}"
+    if digest not in seen:
+        seen.add(digest)
+        return key
+    repeats[digest] = repeats.get(digest, 1) + 1
+    return f"{key}_{repeats[digest]}"
+
+
+def iter_database_rows(csv_path: Union[str, Path], export_root: Union[str, Path]) -> Iterator[DatabaseRow]:
+    """
+    Stream the rows of a database CSV as documents.
+
+    The first column (the database's title property) becomes the title; the
+    document text lists every non-empty property as "Name: value" so rows are
+    searchable by their properties as well as their title.
+
+    Args:
+        csv_path: Database CSV file
+        export_root: Root folder of the export the file belongs to
+
+    Yields:
+        Tuples of (document, typed prop_ metadata)
+    """
+    csv_path = Path(csv_path)
+    parser = NotionExportParser(export_root)
+    rel_path = str(csv_path.relative_to(parser.export_path))
+    stem = re.sub(r"_all$", "", csv_path.stem)
+    database_name = parser._clean_folder_name(stem)
+    database_id = parser._extract_id_from_filename(stem)
+    workspace, breadcrumb = parser._extract_path_info(csv_path)
+    breadcrumb = breadcrumb + [database_name]
+    workspace = workspace or database_name
+
+    # Long text properties can exceed the csv module's default field limit
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        keys = [property_key(name) for name in header]
+        seen: Set[int] = set()
+        repeats: Dict[int, int] = {}
+
+        for row_number, row in enumerate(reader):
+            if not any(cell.strip() for cell in row):
+                continue
+            row_key = _row_key(row, seen, repeats)
+            title = row[0].strip() or f"{database_name} row {row_number + 1}"
+
+            fields: Dict[str, Any] = {}
+            properties: Dict[str, Any] = {}
+            lines = [title]
+            for name, key, cell in zip(header[1:], keys[1:], row[1:]):
+                value = parse_property(cell)
+                if value is None:
+                    continue
+                lines.append(f"{name}: {cell.strip()}")
+                field = _DOCUMENT_FIELDS.get(key)
+                if field == "tags":
+                    fields["tags"] = [tag.strip() for tag in cell.split(",") if tag.strip()]
+                elif field in ("created_time", "last_edited_time"):
+                    fields[field] = parse_date(cell)
+                elif field:
+                    fields[field] = cell.strip()
+                else:
+                    properties[PROPERTY_PREFIX + key] = value
+
+            document = NotionDocument(
+                id=f"{database_id}_row_{row_key}",
+                title=title,
+                content=None,
+                plain_text="\n".join(lines),
+                url_path=f"{rel_path}#row-{row_key}",
+                workspace=workspace,
+                breadcrumb=breadcrumb,
+                export_root=parser.export_root,
+                **fields
+            )
+            yield document, properties
@@ -0,0 +1,533 @@
+"""
+Distributed index builds.
+
+A single build_index process parses, chunks and embeds every page in turn.
+For the largest multi-export builds the work is split instead:
+
+1. plan:   the export files are partitioned into work units, written to a
+           build directory with the settings every worker must share
+2. work:   any number of worker processes, on one machine or several sharing
+           the build directory, claim units, parse, chunk and embed them, and
+           write each unit's chunks, embeddings and parsed pages to a shard
+3. merge:  the coordinator loads the shards in unit order into a new
+           collection and swaps it in, together with the title index, link
+           graph and document store entries rebuilt from the shards
+
+Claims are files created with O_EXCL, so they work on shared filesystems
+without a lock server. A worker refreshes its claim from a background thread
+for as long as it works on the unit, parsing included; claims not refreshed
+for `lease_seconds` are taken over, so a crashed worker's unit is eventually
+redone. Chunk ids are derived from page ids exactly as in
+build_index, so a merged index is the same as a single-process build.
+
+    build = DistributedBuild.plan("./build", ["./export"], archive)
+    # on each worker:  DistributedBuild("./build").run_worker()
+    build.merge(archive)
+
+or locally, with a pool of processes:
+
+    run_local_build(archive, ["./export"], workers=8)
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .databases import find_database_files
+from .parser import NotionDocument, NotionExportParser
+from .titles import TitleIndex
+from ..utils.files import atomic_write_json, file_fingerprint, read_json
+
+PLAN_FILE = "plan.json"
+PLAN_VERSION = 1
+
+# Files per work unit are added until a unit holds about this many bytes of HTML/CSV
+DEFAULT_UNIT_BYTES = 32 * 1024 * 1024
+
+# Seconds after which a claim that has not been refreshed is considered abandoned
+DEFAULT_LEASE_SECONDS = 600
+
+
+def _document_record(doc: NotionDocument) -> Dict[str, Any]:
+    """JSON-serializable form of a parsed document (without its HTML)."""
+    return {
+        "id": doc.id,
+        "title": doc.title,
+        "plain_text": doc.plain_text,
+        "url_path": doc.url_path,
+        "workspace": doc.workspace,
+        "breadcrumb": doc.breadcrumb,
+        "tags": doc.tags,
+        "links": doc.links,
+        "created_by": doc.created_by,
+        "created_time": doc.created_time.isoformat() if doc.created_time else None,
+        "last_edited_by": doc.last_edited_by,
+        "last_edited_time": doc.last_edited_time.isoformat() if doc.last_edited_time else None,
+    }
+
+
+def _document_from_record(record: Dict[str, Any], export_root: str, html_mode: str) -> NotionDocument:
+    """Rebuild a document from a shard record; its HTML is read back from the export as needed."""
+    record = dict(record)
+    for key in ("created_time", "last_edited_time"):
+        record[key] = datetime.fromisoformat(record[key]) if record[key] else None
+    return NotionDocument(content=None, source_path=os.path.join(export_root, record["url_path"]),
+                          html_mode=html_mode, export_root=export_root, **record)
+
+
+class DistributedBuild:
+    """A build directory: work unit plan, claims and shards."""
+
+    def __init__(self, build_dir: str):
+        """
+        Open an existing build directory (see plan()).
+
+        Args:
+            build_dir: Directory shared by the coordinator and all workers
+        """
+        self.build_dir = Path(build_dir)
+        plan = read_json(self.build_dir / PLAN_FILE, default=None)
+        if plan is None:
+            raise ValueError(f"No build plan in {build_dir}. Create one with DistributedBuild.plan().")
+        if plan.get("version") != PLAN_VERSION:
+            raise ValueError(f"Build plan in {build_dir} was written by an incompatible version")
+        self.settings: Dict[str, Any] = plan["settings"]
+        self.signature: str = plan["signature"]
+        self.units: List[Dict[str, Any]] = plan["units"]
+
+    @classmethod
+    def plan(cls, build_dir: str, export_paths: List[str], archive, databases: bool = True,
+             unit_bytes: int = DEFAULT_UNIT_BYTES) -> "DistributedBuild":
+        """
+        Partition exports into work units and write the plan to `build_dir`.
+
+        Files are taken in path order and grouped until a unit holds about
+        `unit_bytes`, so a unit covers neighbouring pages of one export. A page
+        or database bigger than that gets a unit of its own.
+
+        Args:
+            build_dir: Directory shared by the coordinator and all workers
+                       (must be empty or not exist)
+            export_paths: Notion export folders to index
+            archive: NotionArchive whose embedding and chunking settings the
+                     workers use (API keys are not written to the plan)
+            databases: Also index database CSV rows
+            unit_bytes: Target size of a work unit
+
+        Returns:
+            The planned build
+        """
+        build_path = Path(build_dir)
+        if build_path.exists() and any(build_path.iterdir()):
+            raise ValueError(f"Build directory is not empty: {build_dir}")
+
+        units: List[Dict[str, Any]] = []
+        for export_path in export_paths:
+            export_root = Path(export_path).resolve()
+            if not export_root.is_dir():
+                raise ValueError(f"Export path must be a directory: {export_root}")
+            parser = NotionExportParser(str(export_root))
+            files = [("files", path) for path in parser.find_html_files()]
+            if databases:
+                files += [("databases", path) for path in find_database_files(export_root)]
+            files.sort(key=lambda item: str(item[1]))
+
+            unit: Optional[Dict[str, Any]] = None
+            for kind, path in files:
+                size = path.stat().st_size
+                if unit is None or unit["bytes"] + size > unit_bytes and unit["bytes"]:
+                    unit = {"id": len(units), "export_root": str(export_root),
+                            "files": [], "databases": [], "bytes": 0}
+                    units.append(unit)
+                unit[kind].append(str(path.relative_to(export_root)))
+                unit["bytes"] += size
+
+        os.makedirs(build_path / "claims", exist_ok=True)
+        os.makedirs(build_path / "shards", exist_ok=True)
+        atomic_write_json(build_path / PLAN_FILE, {
+            "version": PLAN_VERSION,
+            "created": datetime.now().isoformat(),
+            "settings": archive._build_settings,
+            "signature": archive._model_signature(),
+            "units": units,
+        })
+        total_mb = sum(unit["bytes"] for unit in units) / 1024 / 1024
+        print(f"Planned {len(units)} work units ({total_mb:.1f}MB) in {build_dir}")
+        return cls(build_dir)
+
+    def _claim_path(self, unit: Dict[str, Any]) -> Path:
+        return self.build_dir / "claims" / f"unit_{unit['id']:05d}.json"
+
+    def _shard_path(self, unit: Dict[str, Any]) -> Path:
+        return self.build_dir / "shards" / f"unit_{unit['id']:05d}.npz"
+
+    def status(self) -> Dict[str, int]:
+        """Number of work units done, claimed and still pending."""
+        done = sum(1 for unit in self.units if self._shard_path(unit).exists())
+        claimed = sum(1 for unit in self.units
+                      if not self._shard_path(unit).exists() and self._claim_path(unit).exists())
+        return {"units": len(self.units), "done": done, "claimed": claimed,
+                "pending": len(self.units) - done - claimed}
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        Claim the next unit without a shard, taking over abandoned claims.
+
+        Returns:
+            The claimed unit, or None when every unit is done or claimed
+        """
+        claim = json.dumps({"worker": worker_id, "claimed": datetime.now().isoformat()})
+        for unit in self.units:
+            if self._shard_path(unit).exists():
+                continue
+            path = self._claim_path(unit)
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    abandoned = time.time() - path.stat().st_mtime > lease_seconds
+                except FileNotFoundError:
+                    abandoned = False
+                if not abandoned:
+                    continue
+                # Another worker may take it over at the same time; both then write
+                # the same shard, which is harmless
+                print(f"Taking over abandoned work unit {unit['id']}")
+                tmp_path = path.with_name(f"{path.name}.{worker_id}.tmp")
+                tmp_path.write_text(claim)
+                os.replace(tmp_path, path)
+                return unit
+            with os.fdopen(fd, "w") as f:
+                f.write(claim)
+            return unit
+        return None
+
+    def _release(self, unit: Dict[str, Any]) -> None:
+        try:
+            os.remove(self._claim_path(unit))
+        except OSError:
+            pass
+
+    def run_worker(self, worker_id: Optional[str] = None, max_units: Optional[int] = None,
+                   lease_seconds: float = DEFAULT_LEASE_SECONDS, batch_size: int = 500) -> int:
+        """
+        Claim and process work units until none are left.
+
+        Args:
+            worker_id: Name in claim files (default: host name and process id)
+            max_units: Stop after this many units
+            lease_seconds: Age after which other workers' claims are taken over
+            batch_size: Chunks embedded per batch
+
+        Returns:
+            Number of units processed
+        """
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        archive = None
+        scratch = None
+        processed = 0
+        try:
+            while max_units is None or processed < max_units:
+                unit = self.claim(worker_id, lease_seconds)
+                if unit is None:
+                    break
+                if archive is None:
+                    archive, scratch = self._worker_archive()
+                try:
+                    # Parsing a large unit can take longer than the lease, so the
+                    # claim is refreshed on a timer rather than between batches
+                    with _ClaimHeartbeat(self._claim_path(unit), lease_seconds / 4):
+                        self._process_unit(archive, unit, batch_size)
+                except BaseException:
+                    self._release(unit)
+                    raise
+                processed += 1
+        finally:
+            if scratch is not None:
+                shutil.rmtree(scratch, ignore_errors=True)
+        print(f"Worker {worker_id}: {processed} work units")
+        return processed
+
+    def _worker_archive(self):
+        """An archive with the plan's settings and a throwaway local database."""
+        from .archive import NotionArchive
+
+        scratch = tempfile.mkdtemp(prefix="notion_archive_worker_")
+        settings = dict(self.settings)
+        settings["embedding_options"] = settings.get("embedding_options") or None
+        archive = NotionArchive(db_path=scratch, document_store=False, html_mode="none", **settings)
+        if archive._model_signature() != self.signature:
+            raise ValueError(f"Worker embedding model {archive._model_signature()} does not match "
+                             f"the build plan ({self.signature})")
+        return archive, scratch
+
+    def _process_unit(self, archive, unit: Dict[str, Any], batch_size: int) -> None:
+        """Parse, chunk and embed one unit, and write its shard."""
+        start = time.perf_counter()
+        export_root = Path(unit["export_root"])
+        parser = NotionExportParser(str(export_root), html_mode="none")
+
+        pages = []
+        documents = []
+        for url_path in unit["files"]:
+            html_file = export_root / url_path
+            try:
+                fingerprint = file_fingerprint(html_file)
+            except FileNotFoundError:
+                continue
+            doc = parser.parse_file(html_file)
+            pages.append({"url_path": url_path, "fingerprint": list(fingerprint),
+                          "document": _document_record(doc) if doc else None})
+            if doc is not None:
+                documents.append(doc)
+
+        texts, metadatas, ids = archive._prepare_chunks(documents)
+        large_pages = [(str(export_root), str(path)) for path in parser.large_files]
+        archive.large_pages = large_pages
+        archive.databases = [(str(export_root), str(export_root / path)) for path in unit["databases"]]
+        chunks: Iterator[Tuple[str, Dict[str, Any], str]] = iter(zip(texts, metadatas, ids))
+        chunks = _chain(chunks, archive._iter_large_page_chunks(large_pages), archive._iter_database_chunks())
+
+        all_texts, all_metadatas, all_ids, embeddings = [], [], [], []
+        for batch_texts, batch_metadatas, batch_ids in archive._batches(chunks, batch_size):
+            embeddings.append(np.asarray(archive.embedding_model.encode(batch_texts, show_progress_bar=False),
+                                         dtype=np.float32))
+            all_texts.extend(batch_texts)
+            all_metadatas.extend(batch_metadatas)
+            all_ids.extend(batch_ids)
+
+        dimension = archive.embedding_model.dimension
+        payload = {
+            "unit": unit["id"],
+            "signature": self.signature,
+            "chunks": {"ids": all_ids, "texts": all_texts, "metadatas": all_metadatas},
+            "pages": pages,
+            "large_pages": [str(path.relative_to(export_root)) for path in parser.large_files],
+        }
+        arrays: Dict[str, np.ndarray] = {
+            "embeddings": np.concatenate(embeddings) if embeddings else np.zeros((0, dimension), np.float32),
+            "payload": np.frombuffer(zlib.compress(json.dumps(payload).encode("utf-8")), dtype=np.uint8),
+        }
+        title_embeddings = archive._embed_titles([doc.title for doc in documents])
+        if title_embeddings is not None:
+            arrays["title_embeddings"] = title_embeddings
+        shard_path = self._shard_path(unit)
+        tmp_path = shard_path.with_name(f"{shard_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, shard_path)
+        print(f"Work unit {unit['id']}: {len(documents)} pages, {len(all_ids)} chunks "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    def _load_shard(self, unit: Dict[str, Any]) -> Tuple[Dict[str, Any], np.ndarray, Optional[np.ndarray]]:
+        with open(self._shard_path(unit), "rb") as f:
+            data = f.read()
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            payload = json.loads(zlib.decompress(arrays["payload"].tobytes()).decode("utf-8"))
+            # Workers without a title_boost embed no titles
+            title_embeddings = arrays["title_embeddings"] if "title_embeddings" in arrays else None
+            return payload, arrays["embeddings"], title_embeddings
+
+    def merge(self, archive, batch_size: int = 500, show_progress: bool = True) -> int:
+        """
+        Load every shard into a new collection of `archive` and swap it in.
+
+        The archive's documents, title index, link graph and document store
+        are replaced by the ones rebuilt from the shards.
+
+        Args:
+            archive: NotionArchive to build (same embedding model as the plan)
+            batch_size: Chunks written per batch
+            show_progress: Print progress per shard
+
+        Returns:
+            Number of chunks in the merged index
+        """
+        archive._require_writable()
+        archive._require_unversioned()
+        missing = [unit["id"] for unit in self.units if not self._shard_path(unit).exists()]
+        if missing:
+            raise RuntimeError(f"{len(missing)} of {len(self.units)} work units are not done yet "
+                               f"(first: {missing[0]}). Run more workers, then merge again.")
+        if archive._model_signature() != self.signature:
+            raise ValueError(f"Archive embedding model {archive._model_signature()} does not match "
+                             f"the build plan ({self.signature})")
+
+        staging = archive._create_collection(archive._new_collection_name())
+        documents: List[NotionDocument] = []
+        title_embeddings: List[Optional[np.ndarray]] = []
+        chunk_pages: Dict[str, str] = {}
+        stored: Dict[str, List[Tuple[str, Tuple[int, int], Optional[NotionDocument]]]] = {}
+        large_pages: List[Tuple[str, str]] = []
+        seen = set()
+        duplicates = 0
+        try:
+            for unit in self.units:
+                payload, embeddings, unit_title_embeddings = self._load_shard(unit)
+                if payload["signature"] != self.signature:
+                    raise ValueError(f"Shard of work unit {unit['id']} was built with {payload['signature']}")
+
+                chunks = payload["chunks"]
+                keep = []
+                for i, chunk_id in enumerate(chunks["ids"]):
+                    if chunk_id in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(chunk_id)
+                    keep.append(i)
+                    chunk_pages[chunk_id] = chunks["metadatas"][i].get("original_id", chunk_id)
+                for offset in range(0, len(keep), batch_size):
+                    rows = keep[offset:offset + batch_size]
+                    archive._write_batch(staging, [chunks["texts"][i] for i in rows],
+                                         [chunks["metadatas"][i] for i in rows], embeddings[rows],
+                                         [chunks["ids"][i] for i in rows])
+
+                unit_documents = []
+                for page in payload["pages"]:
+                    doc = None
+                    if page["document"]:
+                        doc = _document_from_record(page["document"], unit["export_root"], archive.html_mode)
+                    stored.setdefault(unit["export_root"], []).append(
+                        (page["url_path"], tuple(page["fingerprint"]), doc))
+                    if doc is not None:
+                        unit_documents.append(doc)
+                documents.extend(unit_documents)
+                large_pages.extend((unit["export_root"], os.path.join(unit["export_root"], path))
+                                   for path in payload["large_pages"])
+                title_embeddings.append(unit_title_embeddings)
+                if show_progress:
+                    print(f"  Merged work unit {unit['id']}: {len(keep)} chunks")
+        except BaseException:
+            try:
+                archive.client.delete_collection(staging.name)
+            except Exception:
+                pass
+            archive._drop_page_table(staging.name)
+            raise
+
+        if duplicates:
+            print(f"Warning: skipped {duplicates} chunks whose id was already merged from an earlier unit")
+
+        # The archive now holds exactly the planned exports
+        if archive.document_store is not None:
+            for export_root, files in stored.items():
+                stale = set(archive.document_store.fingerprints(export_root)) - {url_path for url_path, _, _ in files}
+                archive.document_store.remove(export_root, stale)
+                archive.document_store.put_many(export_root, files)
+        archive.documents = documents
+        archive._deferred_exports = {}
+        archive.databases = [(unit["export_root"], str(Path(unit["export_root"]) / path))
+                             for unit in self.units for path in unit["databases"]]
+        archive.large_pages = large_pages
+        archive._chunk_pages = chunk_pages
+
+        pages = [archive._title_record(doc) for doc in documents]
+        embedded = [embeddings for embeddings in title_embeddings if embeddings is not None]
+        if embedded and len(embedded) == len(title_embeddings):
+            title_index = TitleIndex.from_pages(pages, np.concatenate(embedded))
+        else:
+            # Shards from workers without a title_boost: embed here if this archive boosts
+            title_index = TitleIndex.from_pages(pages, archive._embed_titles([page[1] for page in pages]))
+        print("Activating new index...")
+        archive._swap_collection(staging, title_index, archive._build_link_graph(documents))
+        print(f"Successfully merged {len(seen)} chunks from {len(documents)} documents "
+              f"in {len(self.units)} work units")
+        return len(seen)
+
+
+class _ClaimHeartbeat:
+    """Touches a claim file every `interval` seconds until the block exits."""
+
+    def __init__(self, path: Path, interval: float):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notion-archive-claim", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "_ClaimHeartbeat":
+        os.utime(self.path)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _chain(*iterators):
+    for iterator in iterators:
+        yield from iterator
+
+
+def _worker_main(build_dir: str, worker_id: str, lease_seconds: float, batch_size: int) -> None:
+    DistributedBuild(build_dir).run_worker(worker_id, lease_seconds=lease_seconds, batch_size=batch_size)
+
+
+def run_local_build(archive, export_paths: List[str], build_dir: Optional[str] = None,
+                    workers: Optional[int] = None, databases: bool = True,
+                    unit_bytes: int = DEFAULT_UNIT_BYTES,
+                    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                    batch_size: int = 500) -> int:
+    """
+    Plan, run and merge a distributed build with worker processes on this machine.
+
+    Args:
+        archive: NotionArchive to build
+        export_paths: Notion export folders to index
+        build_dir: Build directory to use (default: a temporary one, removed afterwards)
+        workers: Worker processes (default: CPU count)
+        databases: Also index database CSV rows
+        unit_bytes: Target size of a work unit
+        lease_seconds: Age after which a worker's claim is taken over
+        batch_size: Chunks embedded per batch
+
+    Returns:
+        Number of chunks in the merged index
+    """
+    workers = workers or os.cpu_count() or 1
+    owned = build_dir is None
+    build_dir = build_dir or tempfile.mkdtemp(prefix="notion_archive_build_")
+    try:
+        build = DistributedBuild.plan(build_dir, export_paths, archive, databases=databases, unit_bytes=unit_bytes)
+        workers = min(workers, len(build.units)) or 1
+
+        # Spawned (not forked) workers start clean of the coordinator's threads and clients
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_worker_main, args=(build_dir, f"local-{i}", lease_seconds, batch_size))
+            for i in range(workers)
+        ]
+        print(f"Starting {workers} worker processes")
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        failed = [process.exitcode for process in processes if process.exitcode]
+        status = build.status()
+        if status["done"] < status["units"]:
+            raise RuntimeError(f"{status['units'] - status['done']} work units failed "
+                               f"(worker exit codes: {failed}). The build directory is {build_dir}")
+        return build.merge(archive, batch_size=batch_size)
+    finally:
+        if owned:
+            shutil.rmtree(build_dir, ignore_errors=True)
@@ -1,10 +1,13 @@
 """
 Embedding models for generating vector representations of text.
-Supports both OpenAI and local sentence-transformers models.
+Supports OpenAI, local sentence-transformers models and self-hosted HTTP services.
 """
 
+import json
 import os
-from typing import List, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Union
 from abc import ABC, abstractmethod
 import numpy as np
 
@@ -28,6 +31,14 @@ class EmbeddingModel(ABC):
     def model_name(self) -> str:
         """Return the model name."""
         pass
+    
+    def reset_after_fork(self) -> None:
+        """Replace state a forked child must not share with its parent (connections, threads)."""
+        pass
+    
+    def close(self) -> None:
+        """Release connections and threads the model holds."""
+        pass
 
 
 class OpenAIEmbedding(EmbeddingModel):
@@ -39,19 +50,42 @@ class OpenAIEmbedding(EmbeddingModel):
         "text-embedding-ada-002": 1536
     }
     
-    def __init__(self, model_name: str = "text-embedding-3-large", api_key: str = None):
+    # Models that can return shortened embeddings via the `dimensions` parameter
+    SHORTENABLE_MODELS = {"text-embedding-3-large", "text-embedding-3-small"}
+    
+    # List prices in USD per million input tokens
+    PRICES_PER_MILLION_TOKENS = {
+        "text-embedding-3-large": 0.13,
+        "text-embedding-3-small": 0.02,
+        "text-embedding-ada-002": 0.10
+    }
+    
+    # Texts sent per API request
+    REQUEST_BATCH_SIZE = 100
+    
+    def __init__(self, model_name: str = "text-embedding-3-large", api_key: Optional[str] = None,
+                 dimensions: Optional[int] = None):
         """
         Initialize OpenAI embedding model.
         
         Args:
             model_name: Name of the OpenAI model
             api_key: OpenAI API key (or set OPENAI_API_KEY env var)
+            dimensions: Shortened output dimension (text-embedding-3 models only)
         """
         if model_name not in self.SUPPORTED_MODELS:
             raise ValueError(f"Unsupported model: {model_name}. Supported: {list(self.SUPPORTED_MODELS.keys())}")
         
         self._model_name = model_name
         self._dimension = self.SUPPORTED_MODELS[model_name]
+        self._shortened = False
+        if dimensions is not None and dimensions != self._dimension:
+            if model_name not in self.SHORTENABLE_MODELS:
+                raise ValueError(f"{model_name} does not support shortened embeddings. "
+                                 f"Supported: {sorted(self.SHORTENABLE_MODELS)}")
+            _check_dimensions(dimensions, self._dimension)
+            self._dimension = dimensions
+            self._shortened = True
         
         # Import OpenAI here to make it optional
         try:
@@ -65,6 +99,14 @@ class OpenAIEmbedding(EmbeddingModel):
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY env var or pass api_key parameter.")
         
         self.client = OpenAI(api_key=api_key)
+        self._api_key = api_key
+        self._async_client: Any = None  # AsyncOpenAI, created on first aencode
+    
+    def reset_after_fork(self) -> None:
+        """Open new clients; the parent's pooled connections stay with the parent."""
+        from openai import OpenAI
+        self.client = OpenAI(api_key=self._api_key)
+        self._async_client = None
     
     def encode(self, texts: Union[str, List[str]], show_progress_bar: bool = False) -> np.ndarray:
         """
@@ -82,16 +124,16 @@ class OpenAIEmbedding(EmbeddingModel):
         
         # Handle batch processing for large inputs
         embeddings = []
-        batch_size = 100  # OpenAI rate limit consideration
+        batch_size = self.REQUEST_BATCH_SIZE  # OpenAI rate limit consideration
         
         for i in range(0, len(texts), batch_size):
             batch = texts[i:i + batch_size]
             
             try:
-                response = self.client.embeddings.create(
-                    model=self._model_name,
-                    input=batch
-                )
+                request: Dict[str, Any] = {"model": self._model_name, "input": batch}
+                if self._shortened:
+                    request["dimensions"] = self._dimension
+                response = self.client.embeddings.create(**request)
                 
                 batch_embeddings = [item.embedding for item in response.data]
                 embeddings.extend(batch_embeddings)
@@ -101,6 +143,42 @@ class OpenAIEmbedding(EmbeddingModel):
         
         return np.array(embeddings)
     
+    async def aencode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """
+        Encode text(s) with the native async OpenAI client.
+        
+        Batches are requested concurrently instead of one after another.
+        
+        Args:
+            texts: Text or list of texts to encode
+            
+        Returns:
+            Numpy array of embeddings
+        """
+        import asyncio
+        
+        if isinstance(texts, str):
+            texts = [texts]
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self._api_key)
+        
+        async def encode_batch(batch: List[str]) -> List[List[float]]:
+            request: Dict[str, Any] = {"model": self._model_name, "input": batch}
+            if self._shortened:
+                request["dimensions"] = self._dimension
+            try:
+                response = await self._async_client.embeddings.create(**request)
+            except Exception as e:
+                raise RuntimeError(f"OpenAI API error: {e}")
+            return [item.embedding for item in response.data]
+        
+        batch_size = self.REQUEST_BATCH_SIZE  # OpenAI rate limit consideration
+        batches = await asyncio.gather(*(
+            encode_batch(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)
+        ))
+        return np.array([embedding for batch in batches for embedding in batch])
+    
     @property
     def dimension(self) -> int:
         return self._dimension
@@ -110,15 +188,65 @@ class OpenAIEmbedding(EmbeddingModel):
         return self._model_name
 
 
+def length_bucketed_batches(lengths: Sequence[int],
+                            max_batch_tokens: int,
+                            padding_budget: float = 0.05,
+                            max_batch_size: Optional[int] = None) -> List[List[int]]:
+    """
+    Group inputs of similar length into batches that waste little compute on padding.
+    
+    Inputs are taken shortest first. A batch is closed when adding the next
+    input would make its padded size (longest length x batch size) exceed
+    `max_batch_tokens`, or make padding more than `padding_budget` of it.
+    Short inputs therefore travel in large batches and long ones in small
+    batches of about the same cost.
+    
+    Args:
+        lengths: Length (in tokens) of every input
+        max_batch_tokens: Maximum padded tokens per batch
+        padding_budget: Maximum fraction of a batch's padded tokens that may be padding
+        max_batch_size: Maximum inputs per batch (default: no limit)
+        
+    Returns:
+        Batches of input indices; every index appears exactly once
+    """
+    batches = []
+    batch: List[int] = []
+    batch_tokens = 0
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        length = max(1, lengths[i])
+        if batch:
+            # Inputs come in ascending length, so the new one sets the padded length
+            padded = length * (len(batch) + 1)
+            if (padded > max_batch_tokens
+                    or padded - (batch_tokens + length) > padding_budget * padded
+                    or (max_batch_size and len(batch) >= max_batch_size)):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 class SentenceTransformerEmbedding(EmbeddingModel):
     """Sentence Transformers embedding model wrapper."""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 32,
+                 padding_budget: Optional[float] = None):
         """
         Initialize sentence transformer model.
         
         Args:
             model_name: Name of the sentence transformer model
+            batch_size: Inputs per batch at the model's maximum sequence length. Shorter
+                        inputs are batched more widely for the same padded token count.
+            padding_budget: Batch by token length with at most this fraction of padding
+                            per batch (see length_bucketed_batches). The default (None)
+                            keeps sentence-transformers' batching, which already sorts
+                            each encode call by length; benchmarks/bench_batching.py
+                            compares the two for a model and corpus.
         """
         try:
             from sentence_transformers import SentenceTransformer
@@ -129,11 +257,16 @@ class SentenceTransformerEmbedding(EmbeddingModel):
         print(f"Loading embedding model: {model_name}")
         self.model = SentenceTransformer(model_name)
         self._dimension = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+        self.padding_budget = padding_budget
     
     def encode(self, texts: Union[str, List[str]], show_progress_bar: bool = True) -> np.ndarray:
         """
         Encode text(s) using sentence transformers.
         
+        With a padding_budget, lists are split into length-bucketed batches (see
+        length_bucketed_batches); embeddings are always returned in input order.
+        
         Args:
             texts: Text or list of texts to encode
             show_progress_bar: Whether to show progress bar
@@ -141,7 +274,33 @@ class SentenceTransformerEmbedding(EmbeddingModel):
         Returns:
             Numpy array of embeddings
         """
-        return self.model.encode(texts, show_progress_bar=show_progress_bar)
+        if isinstance(texts, str) or len(texts) <= 1 or self.padding_budget is None:
+            return self.model.encode(texts, batch_size=self.batch_size, show_progress_bar=show_progress_bar)
+        
+        max_length = self.model.max_seq_length or 512
+        batches = length_bucketed_batches(
+            self.token_lengths(texts),
+            max_batch_tokens=self.batch_size * max_length,
+            padding_budget=self.padding_budget
+        )
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for done, batch in enumerate(batches, 1):
+            embeddings[batch] = self.model.encode(
+                [texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False
+            )
+            if show_progress_bar:
+                print(f"\r  Batches: {done}/{len(batches)}", end="" if done < len(batches) else "\n")
+        return embeddings
+    
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count of each text as the model sees it (truncated to its maximum length)."""
+        max_length = self.model.max_seq_length or 512
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            # Rough estimate for models without a Hugging Face tokenizer
+            return [min(max_length, len(text) // 4 + 2) for text in texts]
+        encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_length)
+        return [len(ids) for ids in encoded["input_ids"]]
     
     @property
     def dimension(self) -> int:
@@ -152,20 +311,367 @@ class SentenceTransformerEmbedding(EmbeddingModel):
         return self._model_name
 
 
-def create_embedding_model(model_name: str, **kwargs) -> EmbeddingModel:
+class HTTPEmbedding(EmbeddingModel):
+    """
+    Embedding model served over HTTP, e.g. a self-hosted service on the LAN.
+    
+    Speaks either the OpenAI embeddings API ("openai": POST {base_url}/embeddings)
+    or Hugging Face text-embeddings-inference ("tei": POST {base_url}/embed).
+    Requests go through one pooled keep-alive session; large inputs are split
+    into batches that are sent concurrently, with timeouts and retries.
+    """
+    
+    API_FORMATS = ("openai", "tei")
+    
+    def __init__(self,
+                 base_url: str,
+                 model_name: Optional[str] = None,
+                 api_format: str = "openai",
+                 api_key: Optional[str] = None,
+                 batch_size: int = 64,
+                 max_concurrency: int = 4,
+                 timeout: float = 30.0,
+                 max_retries: int = 3,
+                 dimension: Optional[int] = None):
+        """
+        Initialize an HTTP embedding backend.
+        
+        Args:
+            base_url: Service URL, e.g. "http://embeddings.lan:8080/v1"
+            model_name: Model name sent to OpenAI-compatible services
+            api_format: "openai" or "tei"
+            api_key: Bearer token, if the service needs one
+            batch_size: Texts per request
+            max_concurrency: Requests in flight at once (also the connection pool size)
+            timeout: Seconds before a request is abandoned
+            max_retries: Retries for connection errors, 429 and 5xx responses
+            dimension: Embedding dimension (default: probed with one request at startup)
+        """
+        if api_format not in self.API_FORMATS:
+            raise ValueError(f"Unsupported api_format: {api_format}. Supported: {list(self.API_FORMATS)}")
+        
+        try:
+            import requests  # noqa: F401
+            from urllib3.util.retry import Retry
+        except ImportError:
+            raise ImportError("requests package required. Install with: pip install requests")
+        
+        self.base_url = base_url.rstrip("/")
+        self.api_format = api_format
+        self.batch_size = batch_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self._model_name = model_name or self.base_url
+        self._request_model = model_name
+        
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False
+        )
+        self._retry = retry
+        self._api_key = api_key
+        self.session = self._new_session()
+        
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dimension = dimension or len(self._post(["dimension probe"])[0])
+    
+    def _new_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_concurrency,
+            max_retries=self._retry
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Content-Type"] = "application/json"
+        if self._api_key:
+            session.headers["Authorization"] = f"Bearer {self._api_key}"
+        return session
+    
+    def reset_after_fork(self) -> None:
+        """Use a new connection pool and request threads; the inherited ones belong to the parent."""
+        self.session = self._new_session()
+        self._executor = None
+    
+    def _post(self, batch: List[str]) -> List[List[float]]:
+        """Embed one batch with a single request."""
+        if self.api_format == "tei":
+            url, payload = f"{self.base_url}/embed", {"inputs": batch, "truncate": True}
+        else:
+            url, payload = f"{self.base_url}/embeddings", {"input": batch}
+            if self._request_model:
+                payload["model"] = self._request_model
+        
+        try:
+            response = self.session.post(url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            raise RuntimeError(f"Embedding service error ({url}): {e}")
+        
+        if self.api_format == "tei":
+            embeddings = data
+        else:
+            embeddings = [item["embedding"] for item in sorted(data["data"], key=lambda item: item["index"])]
+        if len(embeddings) != len(batch):
+            raise RuntimeError(f"Embedding service returned {len(embeddings)} embeddings for {len(batch)} texts")
+        return embeddings
+    
+    def encode(self, texts: Union[str, List[str]], show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """
+        Encode text(s) using the embedding service.
+        
+        Requests group texts of similar length, since the service pads each
+        request to its longest input; embeddings are returned in input order.
+        
+        Args:
+            texts: Text or list of texts to encode
+            show_progress_bar: Whether to show progress (ignored)
+            
+        Returns:
+            Numpy array of embeddings
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        index_batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        batches = [[texts[i] for i in batch] for batch in index_batches]
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = [self._post(batch) for batch in batches]
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="embedding-http")
+            results = list(self._executor.map(self._post, batches))
+        
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for index_batch, result in zip(index_batches, results):
+            embeddings[index_batch] = result
+        return embeddings
+    
+    def close(self) -> None:
+        """Release pooled connections and worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.session.close()
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+
+class TruncatedEmbedding(EmbeddingModel):
+    """
+    Shortens another model's embeddings locally by keeping the leading
+    dimensions and renormalizing to unit length.
+    
+    Works best with models trained for shortening (Matryoshka-style, such as
+    text-embedding-3); for other models recall drops faster with dimension.
+    """
+    
+    def __init__(self, model: EmbeddingModel, dimensions: int):
+        """
+        Args:
+            model: Model producing full-size embeddings
+            dimensions: Number of leading dimensions to keep
+        """
+        _check_dimensions(dimensions, model.dimension)
+        self.model = model
+        self._dimension = dimensions
+    
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        return self._truncate(self.model.encode(texts, **kwargs))
+    
+    def reset_after_fork(self) -> None:
+        self.model.reset_after_fork()
+    
+    def close(self) -> None:
+        self.model.close()
+    
+    def __getattr__(self, name):
+        # Only offer aencode when the wrapped model has a native async path
+        model_aencode = getattr(self.model, "aencode", None) if name == "aencode" else None
+        if model_aencode is not None:
+            async def aencode(texts: Union[str, List[str]]) -> np.ndarray:
+                return self._truncate(await model_aencode(texts))
+            return aencode
+        raise AttributeError(name)
+    
+    def _truncate(self, embeddings) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        truncated = embeddings[..., :self._dimension]
+        norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+        return truncated / np.maximum(norms, 1e-12)
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    @property
+    def model_name(self) -> str:
+        return self.model.model_name
+
+
+def _check_dimensions(dimensions: int, full_dimension: int) -> None:
+    if not 1 <= dimensions <= full_dimension:
+        raise ValueError(f"dimensions must be between 1 and {full_dimension}, got {dimensions}")
+
+
+# Settings of `http_options` that local sentence-transformers models take too
+LOCAL_OPTIONS = ("batch_size", "padding_budget")
+
+
+def _local_options(http_options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The settings of http_options that apply to local models."""
+    return {key: value for key, value in (http_options or {}).items() if key in LOCAL_OPTIONS}
+
+
+def create_embedding_model(model_name: str, dimensions: Optional[int] = None,
+                           truncate_locally: bool = False, base_url: Optional[str] = None,
+                           http_options: Optional[Dict[str, Any]] = None, **kwargs) -> EmbeddingModel:
     """
     Factory function to create embedding models.
     
     Args:
-        model_name: Name of the model
+        model_name: Name of the model, or the URL of an HTTP embedding service
+        base_url: URL of an HTTP embedding service serving `model_name`
+        http_options: Extra HTTPEmbedding arguments (api_format, batch_size, max_concurrency, ...);
+                      local models take batch_size and padding_budget from it
+        dimensions: Reduced output dimension (default: the model's full dimension).
+                    text-embedding-3 models shorten natively through the API,
+                    other models are truncated and renormalized locally.
+        truncate_locally: Always truncate locally, even for models that can shorten natively
         **kwargs: Additional arguments for model initialization
         
     Returns:
         EmbeddingModel instance
     """
+    model: EmbeddingModel
+    # Self-hosted HTTP services
+    if base_url or model_name.startswith(("http://", "https://")):
+        model = HTTPEmbedding(
+            base_url=base_url or model_name,
+            model_name=model_name if base_url else None,
+            api_key=kwargs.get("api_key"),
+            **(http_options or {})
+        )
     # OpenAI models
-    if model_name in OpenAIEmbedding.SUPPORTED_MODELS:
-        return OpenAIEmbedding(model_name=model_name, **kwargs)
+    elif model_name in OpenAIEmbedding.SUPPORTED_MODELS:
+        if dimensions is not None and not truncate_locally and model_name in OpenAIEmbedding.SHORTENABLE_MODELS:
+            return OpenAIEmbedding(model_name=model_name, dimensions=dimensions, **kwargs)
+        model = OpenAIEmbedding(model_name=model_name, **kwargs)
+    else:
+        # Sentence transformer models (default)
+        model = SentenceTransformerEmbedding(model_name=model_name, **_local_options(http_options))
     
-    # Sentence transformer models (default)
-    return SentenceTransformerEmbedding(model_name=model_name)
\ No newline at end of file
+    if dimensions is not None and dimensions != model.dimension:
+        return TruncatedEmbedding(model, dimensions)
+    return model
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of embedding models.
+    
+    Archives created with the same model settings get the same EmbeddingModel
+    instance, so a process serving many archives loads sentence-transformers
+    weights once and keeps one API client (and connection pool) per endpoint
+    and key. Locally truncated variants share the full-size model they wrap.
+    Shared models must not be reconfigured per archive, and are closed by
+    release() once the last archive using them gives them back.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[tuple, EmbeddingModel] = {}
+        self._users: Dict[tuple, int] = {}
+    
+    @staticmethod
+    def _key(model_name: str, dimensions: Optional[int], truncate_locally: bool, base_url: Optional[str],
+             http_options: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> tuple:
+        return (model_name, dimensions, truncate_locally, base_url,
+                json.dumps(http_options or {}, sort_keys=True, default=str),
+                json.dumps(kwargs, sort_keys=True, default=str))
+    
+    def get(self, model_name: str, dimensions: Optional[int] = None,
+            truncate_locally: bool = False, base_url: Optional[str] = None,
+            http_options: Optional[Dict[str, Any]] = None, **kwargs) -> EmbeddingModel:
+        """
+        The shared model for these settings, created on first use.
+        
+        Takes the arguments of create_embedding_model.
+        """
+        if not base_url and not model_name.startswith(("http://", "https://")) and \
+                model_name not in OpenAIEmbedding.SUPPORTED_MODELS:
+            # Local models take no API key, and only their batching settings
+            kwargs, http_options = {}, _local_options(http_options) or None
+        native = (not base_url and model_name in OpenAIEmbedding.SHORTENABLE_MODELS and not truncate_locally)
+        if dimensions is not None and not native:
+            # Share the full-size model between archives using different dimensions
+            base = self.get(model_name, None, False, base_url, http_options, **kwargs)
+            if dimensions == base.dimension:
+                return base
+        key = self._key(model_name, dimensions, truncate_locally, base_url, http_options, kwargs)
+        # Held while loading, so archives created concurrently don't load a model twice
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                if dimensions is not None and not native:
+                    model = TruncatedEmbedding(base, dimensions)
+                else:
+                    model = create_embedding_model(model_name, dimensions=dimensions,
+                                                   truncate_locally=truncate_locally, base_url=base_url,
+                                                   http_options=http_options, **kwargs)
+                self._models[key] = model
+            self._users[key] = self._users.get(key, 0) + 1
+            return model
+    
+    def release(self, model: EmbeddingModel) -> None:
+        """
+        Give back a model returned by get(), closing it when no archive uses it any more.
+        
+        Models this registry does not hold (any more, see clear()) are left alone.
+        """
+        with self._lock:
+            key = next((key for key, shared in self._models.items() if shared is model), None)
+            if key is None:
+                return
+            self._users[key] -= 1
+            unused = self._users[key] <= 0
+            if unused:
+                del self._models[key]
+                del self._users[key]
+        if isinstance(model, TruncatedEmbedding):
+            # get() counted a user of the full-size model too
+            self.release(model.model)
+        elif unused:
+            model.close()
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Loaded models: name, dimension and how many archives asked for each."""
+        with self._lock:
+            return [{"model": model.model_name, "dimension": model.dimension, "users": self._users[key]}
+                    for key, model in self._models.items()]
+    
+    def clear(self) -> None:
+        """Forget every model (archives holding one keep using it)."""
+        with self._lock:
+            self._models.clear()
+            self._users.clear()
+
+
+# Models shared by the archives of this process (see NotionArchive(share_model=...))
+model_registry = ModelRegistry()
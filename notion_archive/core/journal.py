@@ -0,0 +1,101 @@
+"""
+Build journal for checkpointed, resumable index builds.
+
+A build embeds chunks batch by batch into a staging collection and records
+after every committed batch how far it got. If the build dies part-way
+(e.g. an OpenAI error), `build_index(resume=True)` reads the journal and
+continues from the last committed batch instead of starting over. The live
+collection keeps serving searches until the finished build is swapped in.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..utils.files import Fingerprint, atomic_write_json, read_json
+
+
+def chunks_digest(ids: Iterable[str], texts: Iterable[str],
+                  sources: Iterable[Tuple[str, Fingerprint]] = ()) -> str:
+    """
+    Fingerprint of the ordered chunk list, used to check a resumed build matches.
+
+    Chunks streamed from files at build time (database CSVs) are not listed;
+    those files are identified by their (path, fingerprint) in `sources` instead.
+    """
+    return chunk_pairs_digest(zip(ids, texts), sources)
+
+
+def chunk_pairs_digest(chunks: Iterable[Tuple[str, str]],
+                       sources: Iterable[Tuple[str, Fingerprint]] = ()) -> str:
+    """chunks_digest of a stream of (id, text) pairs, e.g. chunks that are not kept in memory."""
+    digest = hashlib.sha1()
+    for chunk_id, text in chunks:
+        digest.update(chunk_id.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(hashlib.sha1(text.encode("utf-8")).digest())
+    for path, (mtime_ns, size) in sources:
+        digest.update(f"{path}\0{mtime_ns}\0{size}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BuildJournal:
+    """Progress record of one in-flight index build, persisted as JSON."""
+
+    def __init__(self, path: str, state: Dict[str, Any]):
+        self.path = path
+        self.state = state
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BuildJournal"]:
+        """Load the journal of an interrupted build, if there is one."""
+        state = read_json(path)
+        if not state:
+            return None
+        return cls(path, state)
+
+    @classmethod
+    def start(cls, path: str, collection: str, staging_collection: str,
+              model: str, digest: str, total_chunks: Optional[int]) -> "BuildJournal":
+        """Record the start of a new build (total_chunks is None when streamed sources make it unknown)."""
+        journal = cls(path, {
+            "collection": collection,
+            "staging_collection": staging_collection,
+            "model": model,
+            "chunks_digest": digest,
+            "total_chunks": total_chunks,
+            "committed_chunks": 0,
+            "started": datetime.now().isoformat(),
+            "updated": datetime.now().isoformat(),
+        })
+        journal.save()
+        return journal
+
+    @property
+    def staging_collection(self) -> str:
+        return self.state["staging_collection"]
+
+    @property
+    def committed_chunks(self) -> int:
+        return self.state["committed_chunks"]
+
+    def matches(self, model: str, digest: str) -> bool:
+        """Whether this journal belongs to a build of the same chunks with the same model."""
+        return self.state.get("model") == model and self.state.get("chunks_digest") == digest
+
+    def record(self, committed_chunks: int) -> None:
+        """Record that the first `committed_chunks` chunks are stored in the staging collection."""
+        self.state["committed_chunks"] = committed_chunks
+        self.state["updated"] = datetime.now().isoformat()
+        self.save()
+
+    def save(self) -> None:
+        atomic_write_json(self.path, self.state)
+
+    def discard(self) -> None:
+        """Remove the journal once the build is finished or abandoned."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,264 @@
+"""
+Internal link graph of an export.
+
+Notion pages link to each other with `<a href>`s whose target is another
+page's exported file ("Other%20Page%20<id>.html") or its notion.so URL. Both
+end in the target page id, so links are kept as normalized 32-hex page keys
+and resolved against the archive's pages. The resolved graph is stored as a
+compact CSR adjacency (two int32 arrays) with a precomputed PageRank-style
+authority per page, which is enough to answer "pages related to X" without
+touching the vector index or the embedding model.
+"""
+
+import io
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+
+_PAGE_ID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32}")
+
+# Hosts whose URLs point at Notion pages
+NOTION_HOSTS = ("notion.so", "notion.site")
+
+# PageRank damping factor and convergence tolerance (L1 change between iterations)
+DAMPING = 0.85
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+# Relatedness weights: a direct link in either direction, and a neighbour shared
+# with the page (weighted down by how many pages that neighbour links with)
+LINK_WEIGHT = 1.0
+SHARED_WEIGHT = 0.5
+
+
+def page_key(page_id: str) -> str:
+    """Normalize a page id (32-hex or dashed UUID) into the key links refer to it by."""
+    return page_id.replace("-", "").lower()
+
+
+def link_target(href: Optional[str]) -> Optional[str]:
+    """
+    The page key an `<a href>` points to, or None for external links and anchors.
+
+    Args:
+        href: Link target as written in the exported HTML
+
+    Returns:
+        Normalized 32-hex page key
+    """
+    if not href or href.startswith(("#", "mailto:")):
+        return None
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc:
+        host = parts.netloc.lower().split(":")[0]
+        if not any(host == notion or host.endswith("." + notion) for notion in NOTION_HOSTS):
+            return None
+    # notion.so links may carry the id in the query string (?p=<id>)
+    for text in (parts.path, parts.query):
+        ids = _PAGE_ID_RE.findall(unquote(text).lower())
+        if ids:
+            return page_key(ids[-1])
+    return None
+
+
+def extract_links(hrefs: Iterable[Optional[str]], page_id: Optional[str] = None) -> List[str]:
+    """Unique page keys linked from a page, in first-seen order, without self-links."""
+    own_key = page_key(page_id) if page_id else None
+    links = []
+    seen = set()
+    for href in hrefs:
+        key = link_target(href)
+        if key and key != own_key and key not in seen:
+            seen.add(key)
+            links.append(key)
+    return links
+
+
+class LinkGraph:
+    """
+    Directed page link graph in CSR form, with link authority scores.
+
+    Out-links of page i are `indices[indptr[i]:indptr[i + 1]]`. The raw link
+    keys of every page are kept as well, so links to pages that are not
+    (yet) in the archive resolve as soon as those pages are added.
+    """
+
+    def __init__(self):
+        self.page_ids: List[str] = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.authority = np.zeros(0, dtype=np.float32)
+        self._link_keys: List[List[str]] = []
+        self._positions: Dict[str, int] = {}
+        self._in_indptr = np.zeros(1, dtype=np.int64)
+        self._in_indices = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.page_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_links(cls, pages: Iterable[Tuple[str, Sequence[str]]]) -> "LinkGraph":
+        """
+        Build a graph from (page_id, linked page keys) pairs.
+
+        Links to keys that match no page are kept but not resolved; duplicate
+        links and self-links are dropped.
+        """
+        graph = cls()
+        for page_id, links in pages:
+            graph._positions[page_key(page_id)] = len(graph.page_ids)
+            graph.page_ids.append(page_id)
+            graph._link_keys.append(list(links))
+
+        indptr = [0]
+        indices: List[int] = []
+        for source, links in enumerate(graph._link_keys):
+            targets = {graph._positions[key] for key in links if key in graph._positions}
+            targets.discard(source)
+            indices.extend(sorted(targets))
+            indptr.append(len(indices))
+        graph.indptr = np.asarray(indptr, dtype=np.int64)
+        graph.indices = np.asarray(indices, dtype=np.int32)
+        graph._index_inbound()
+        graph.authority = graph._pagerank()
+        return graph
+
+    def _index_inbound(self) -> None:
+        """Reverse (in-link) CSR, derived from the out-link CSR."""
+        n = len(self.page_ids)
+        sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        self._in_indices = sources[order]
+        self._in_indptr = np.concatenate([[0], np.cumsum(np.bincount(self.indices, minlength=n))]).astype(np.int64)
+
+    def _pagerank(self) -> np.ndarray:
+        """PageRank by power iteration, rescaled to [0, 1] on a log scale."""
+        n = len(self.page_ids)
+        if n == 0:
+            return np.zeros(0, dtype=np.float32)
+        out_degree = np.diff(self.indptr).astype(np.float64)
+        sources = np.repeat(np.arange(n), np.diff(self.indptr))
+        dangling = out_degree == 0
+        weights = 1.0 / out_degree[sources] if len(sources) else np.zeros(0)
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(MAX_ITERATIONS):
+            spread = np.bincount(self.indices, weights=rank[sources] * weights, minlength=n)
+            new_rank = (1 - DAMPING) / n + DAMPING * (spread + rank[dangling].sum() / n)
+            converged = np.abs(new_rank - rank).sum() < TOLERANCE
+            rank = new_rank
+            if converged:
+                break
+
+        # Ranks are heavy-tailed; a log scale keeps ordinary pages distinguishable.
+        # 0 = least linked page, 1 = most linked page
+        scaled = np.log1p(rank * n)
+        spread = scaled.max() - scaled.min()
+        if spread <= 0:
+            return np.zeros(n, dtype=np.float32)
+        return ((scaled - scaled.min()) / spread).astype(np.float32)
+
+    def position(self, page_id: str) -> Optional[int]:
+        """Node index of a page, or None if it is not in the graph."""
+        return self._positions.get(page_key(page_id))
+
+    def authority_of(self, page_id: str) -> float:
+        """Link authority of a page in [0, 1] (0 for unknown pages)."""
+        i = self.position(page_id)
+        return float(self.authority[i]) if i is not None else 0.0
+
+    def links_from(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def links_to(self, i: int) -> np.ndarray:
+        return self._in_indices[self._in_indptr[i]:self._in_indptr[i + 1]]
+
+    def related(self, page_id: str, limit: int = 10) -> List[Tuple[int, float, str]]:
+        """
+        Pages related to a page through the link graph.
+
+        Pages it links to or is linked from score LINK_WEIGHT per direction;
+        pages sharing a neighbour with it (both linking to, or both linked
+        from, the same page) score SHARED_WEIGHT / log2(2 + neighbour degree)
+        per shared neighbour, so hubs count for little. Ties go to the page
+        with more link authority.
+
+        Args:
+            page_id: Page to find related pages for
+            limit: Maximum number of pages
+
+        Returns:
+            (node, score, relation) tuples, best first; relation is "mutual",
+            "links_to", "linked_from" or "shared_links"
+        """
+        i = self.position(page_id)
+        if i is None:
+            return []
+
+        scores: Dict[int, float] = {}
+        relations: Dict[int, str] = {}
+        outgoing, incoming = self.links_from(i), self.links_to(i)
+        for j in outgoing.tolist():
+            scores[j] = LINK_WEIGHT
+            relations[j] = "links_to"
+        for j in incoming.tolist():
+            scores[j] = scores.get(j, 0.0) + LINK_WEIGHT
+            relations[j] = "mutual" if j in relations else "linked_from"
+
+        # Co-citation (both linked from k) and coupling (both link to k)
+        for neighbours, expand in ((incoming, self.links_from), (outgoing, self.links_to)):
+            for k in neighbours.tolist():
+                others = expand(k)
+                weight = SHARED_WEIGHT / math.log2(2 + len(others))
+                for j in others.tolist():
+                    if j != i:
+                        scores[j] = scores.get(j, 0.0) + weight
+                        relations.setdefault(j, "shared_links")
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -self.authority[item[0]]))
+        return [(j, score, relations[j]) for j, score in ranked[:limit]]
+
+    def update(self, pages: List[Tuple[str, Sequence[str]]], removed: Iterable[str] = ()) -> "LinkGraph":
+        """Return a new graph with `pages` added or replaced and `removed` page ids dropped."""
+        replaced = {page_key(page_id) for page_id in removed} | {page_key(page[0]) for page in pages}
+        kept = [(page_id, links) for page_id, links in zip(self.page_ids, self._link_keys)
+                if page_key(page_id) not in replaced]
+        return LinkGraph.from_links(kept + list(pages))
+
+    def to_bytes(self) -> bytes:
+        """Serialize the graph (see from_bytes)."""
+        link_counts = [len(links) for links in self._link_keys]
+        arrays = {
+            "page_ids": np.array(self.page_ids, dtype=str),
+            "link_keys": np.array([key for links in self._link_keys for key in links], dtype=str),
+            "link_indptr": np.concatenate([[0], np.cumsum(link_counts, dtype=np.int64)]),
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "authority": self.authority,
+        }
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data) -> "LinkGraph":
+        """Load a graph written by to_bytes, without recomputing authority."""
+        graph = cls()
+        with np.load(io.BytesIO(bytes(data)), allow_pickle=False) as arrays:
+            graph.page_ids = arrays["page_ids"].tolist()
+            keys = arrays["link_keys"].tolist()
+            link_indptr = arrays["link_indptr"].tolist()
+            graph._link_keys = [keys[start:end] for start, end in zip(link_indptr[:-1], link_indptr[1:])]
+            graph.indptr = arrays["indptr"].astype(np.int64)
+            graph.indices = arrays["indices"].astype(np.int32)
+            graph.authority = arrays["authority"].astype(np.float32)
+        graph._positions = {page_key(page_id): i for i, page_id in enumerate(graph.page_ids)}
+        graph._index_inbound()
+        return graph
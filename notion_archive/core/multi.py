@@ -0,0 +1,298 @@
+"""
+Many archives served from one process.
+
+A service with one archive per team needs one NotionArchive per index
+(db_path and collection, or snapshot). `ArchiveManager` keeps them by name,
+routes each search to its archive and shares what archives can share:
+
+- embedding models come from the process-wide ModelRegistry, so archives
+  with the same model settings use one model instance (weights, API client)
+- query embeddings of archives sharing a model are computed in batches:
+  search_many() and search_all() embed all their queries in one call per
+  model, and concurrent search() calls from several threads are coalesced
+  (an encode call takes every query queued while the previous one ran)
+
+    manager = ArchiveManager(embedding_model="all-MiniLM-L6-v2")
+    manager.add("eng", db_path="./archives/eng")
+    manager.add("sales", db_path="./archives/sales")
+    manager.search("eng", "deploy checklist")
+    manager.search_all("holiday policy")      # every archive, best hits first
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .archive import NotionArchive
+from .embeddings import EmbeddingModel, ModelRegistry, model_registry
+
+# A search_many request: (archive name, query) or (archive name, query, search() arguments)
+SearchRequest = Union[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]
+
+
+class _Pending:
+    """Texts waiting in an _EncodeBatcher, and their embeddings once computed."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.ready = threading.Event()
+        self.done = False
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+
+class _EncodeBatcher:
+    """
+    Coalesces concurrent encode calls to one model.
+
+    The first caller encodes right away; callers arriving while it runs
+    queue up, and the next of them encodes everything queued in one call.
+    An idle model therefore adds no latency, and a busy one batches.
+    """
+
+    def __init__(self, model: EmbeddingModel, max_batch: int = 64, window: float = 0.0):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self._lock = threading.Lock()
+        self._queue: List[_Pending] = []
+        self._busy = False
+        self.calls = 0
+        self.texts = 0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        item = _Pending(list(texts))
+        with self._lock:
+            self._queue.append(item)
+            lead = not self._busy
+            self._busy = True
+        if not lead:
+            item.ready.wait()
+            if not item.done:
+                # Promoted: encode the queue (starting with this item)
+                self._encode_queued()
+        else:
+            self._encode_queued()
+        if item.error is not None:
+            raise item.error
+        if item.result is None:
+            raise RuntimeError("Encode batch finished without embeddings")
+        return item.result
+
+    def _encode_queued(self) -> None:
+        if self.window:
+            time.sleep(self.window)
+        with self._lock:
+            batch: List[_Pending] = []
+            size = 0
+            while self._queue and (not batch or size + len(self._queue[0].texts) <= self.max_batch):
+                size += len(self._queue[0].texts)
+                batch.append(self._queue.pop(0))
+        try:
+            # Equal texts (the same query to several archives) are embedded once
+            unique = list(dict.fromkeys(text for item in batch for text in item.texts))
+            embeddings = np.asarray(self.model.encode(unique, show_progress_bar=False), dtype=np.float32)
+            rows = {text: i for i, text in enumerate(unique)}
+            for item in batch:
+                item.result = embeddings[[rows[text] for text in item.texts]]
+        except BaseException as e:
+            for item in batch:
+                item.error = e
+        with self._lock:
+            self.calls += 1
+            self.texts += size
+            for item in batch:
+                item.done = True
+                item.ready.set()
+            if self._queue:
+                self._queue[0].ready.set()
+            else:
+                self._busy = False
+
+
+class ArchiveManager:
+    """Named NotionArchives in one process, with shared models and batched query embedding."""
+
+    def __init__(self,
+                 registry: Optional[ModelRegistry] = None,
+                 max_batch: int = 64,
+                 batch_window_ms: float = 0.0,
+                 **defaults):
+        """
+        Args:
+            registry: Model registry the archives share (default: the process-wide one)
+            max_batch: Most queries embedded in one call
+            batch_window_ms: Time the first of several concurrent searches waits for
+                             others to batch with (default: none; searches arriving
+                             while an embedding call runs are batched anyway)
+            **defaults: NotionArchive arguments for every archive added with add()
+        """
+        self.registry = registry or model_registry
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000
+        self.defaults = defaults
+        self._lock = threading.Lock()
+        self._archives: Dict[str, NotionArchive] = {}
+        self._batchers: Dict[int, _EncodeBatcher] = {}
+
+    # Archives
+
+    def add(self, name: str, archive: Optional[NotionArchive] = None, **kwargs) -> NotionArchive:
+        """
+        Add an archive under a name.
+
+        Args:
+            name: Name to route searches by (e.g. the team)
+            archive: Archive to add (default: create one from the manager's
+                     defaults overridden by kwargs, e.g. db_path, collection_name
+                     or snapshot_path)
+
+        Returns:
+            The archive
+        """
+        if name in self._archives:
+            raise ValueError(f"There already is an archive named {name!r}")
+        if archive is None:
+            settings = dict(self.defaults, **kwargs)
+            if settings.get("share_model", True) is True:
+                settings["share_model"] = self.registry
+            archive = NotionArchive(**settings)
+        with self._lock:
+            self._archives[name] = archive
+        return archive
+
+    def remove(self, name: str) -> NotionArchive:
+        """Stop routing to an archive and return it (close() it once it is no longer needed)."""
+        with self._lock:
+            return self._archives.pop(name)
+
+    def __getitem__(self, name: str) -> NotionArchive:
+        try:
+            return self._archives[name]
+        except KeyError:
+            raise KeyError(f"No archive named {name!r}. Archives: {sorted(self._archives)}") from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._archives
+
+    def __len__(self) -> int:
+        return len(self._archives)
+
+    def names(self) -> List[str]:
+        return list(self._archives)
+
+    def _batcher(self, archive: NotionArchive) -> _EncodeBatcher:
+        """Encode batcher of the archive's model, shared by every archive using that model instance."""
+        model = archive.embedding_model
+        with self._lock:
+            batcher = self._batchers.get(id(model))
+            if batcher is None or batcher.model is not model:
+                batcher = self._batchers[id(model)] = _EncodeBatcher(model, self.max_batch, self.batch_window)
+            return batcher
+
+    # Searching
+
+    def search(self, name: str, query: str, limit: int = 10, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Search one archive (see NotionArchive.search for the arguments).
+
+        The query is embedded together with concurrent searches of archives
+        sharing the model.
+        """
+        return self.search_many([(name, query, dict(kwargs, limit=limit))])[0]
+
+    def search_many(self, requests: List[SearchRequest]) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches, of any archives, embedding their queries in one call per model.
+
+        Args:
+            requests: (archive name, query) or (archive name, query, search()
+                      arguments) tuples
+
+        Returns:
+            One result list per request, in request order
+        """
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        prepared = []
+        for i, request in enumerate(requests):
+            name, query = request[0], request[1]
+            arguments = dict(request[2]) if len(request) > 2 else {}
+            archive = self[name]
+            search = self._search_arguments(arguments)
+            where_clause, cache_key, cached = archive._prepare_search(
+                query, search["limit"], search["workspace"], search["tags"], search["group_by"],
+                search["fields"], search["as_of"], search["filters"]
+            )
+            if cached is not None:
+                results[i] = cached
+            else:
+                prepared.append((i, archive, query, search, where_clause, cache_key))
+
+        # One encode call per model for everything not answered from a query cache
+        by_batcher: Dict[int, Tuple[_EncodeBatcher, list]] = {}
+        for entry in prepared:
+            batcher = self._batcher(entry[1])
+            by_batcher.setdefault(id(batcher), (batcher, []))[1].append(entry)
+        for batcher, entries in by_batcher.values():
+            start = time.perf_counter()
+            embeddings = batcher.encode([entry[2] for entry in entries])
+            embed_seconds = (time.perf_counter() - start) / len(entries)
+            for (i, archive, query, search, where_clause, cache_key), embedding in zip(entries, embeddings):
+                results[i] = archive._search_cached(query, embedding[np.newaxis, :], search["limit"], where_clause,
+                                                    search["group_by"], search["fields"], cache_key, embed_seconds)
+        return [results[i] for i in range(len(requests))]
+
+    @staticmethod
+    def _search_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        search = {key: arguments.pop(key, None) for key in ("workspace", "tags", "group_by", "fields", "as_of")}
+        search["limit"] = arguments.pop("limit", 10)
+        search["filters"] = arguments
+        return search
+
+    def search_all(self, query: str, names: Optional[List[str]] = None, limit: int = 10,
+                   **kwargs) -> List[Dict[str, Any]]:
+        """
+        Search several archives (default: all) and merge their hits, best first.
+
+        The query is embedded once per model. Scores are only comparable
+        between archives using the same model and distance metric.
+
+        Args:
+            query: Search query text
+            names: Archives to search
+            limit: Maximum number of results overall
+            **kwargs: Other search() arguments
+
+        Returns:
+            Search results with the name of their "archive"
+        """
+        names = self.names() if names is None else names
+        per_archive = self.search_many([(name, query, dict(kwargs, limit=limit)) for name in names])
+        merged = [dict(result, archive=name) for name, results in zip(names, per_archive) for result in results]
+        merged.sort(key=lambda result: -result.get("score", 0.0))
+        return merged[:limit]
+
+    # Stats
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Archives and shared models.
+
+        Returns:
+            Dict with per-archive "archives" (model, chunks, query cache
+            stats), the registry's "models" (with the number of archives
+            using each) and "batching" (encode calls and queries per model)
+        """
+        archives = {}
+        for name, archive in list(self._archives.items()):
+            stats = archive.get_stats()
+            archives[name] = {key: stats.get(key) for key in
+                              ("embedding_model", "total_documents", "total_chunks", "query_cache")}
+        with self._lock:
+            batching = [{"model": batcher.model.model_name, "encode_calls": batcher.calls,
+                         "queries": batcher.texts,
+                         "queries_per_call": batcher.texts / batcher.calls if batcher.calls else 0.0}
+                        for batcher in self._batchers.values()]
+        return {"archives": archives, "models": self.registry.stats(), "batching": batching}
@@ -0,0 +1,353 @@
+"""
+Page-level metadata, stored once per page.
+
+Chunks used to carry their page's title, breadcrumb, tags, authors, times
+and path in their vector store metadata, so a page split into 40 chunks
+stored (and wrote) all of it 40 times, and every search hit split the tags
+and breadcrumb strings again. Chunks now keep only what differs between
+them (CHUNK_FIELDS): the page id, their position in the page and, in
+versioned archives, the snapshots they are valid in. `PageTable` holds the
+rest, one row per page (per page version in versioned archives), in a small
+SQLite file saved with each physical collection:
+
+- search hits are joined with their page's row through an in-memory cache
+  whose rows have the tags and breadcrumb already split into lists
+- filters on page fields (tags, database properties, ...) are evaluated on
+  the page rows and reach the vector store as an `original_id $in [...]`
+  filter, memoized until the table changes
+- the workspace, short and selective, is also kept on every chunk
+  (NATIVE_PAGE_FIELDS) so filters on it run in the vector store itself
+- rows remember the export they were parsed from, so updates of one export
+  never touch pages of another export that has files at the same paths
+
+Snapshot replicas get the rows as an extra section (see to_bytes).
+"""
+
+import json
+import operator
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .versions import OPEN, VERSION_FIELDS
+
+# Chunk metadata kept in the vector store; everything else is page metadata
+CHUNK_FIELDS = frozenset(("original_id", "chunk_index", "total_chunks") + VERSION_FIELDS)
+
+# Page fields also kept on every chunk, so filters on them need no page id list
+NATIVE_PAGE_FIELDS = frozenset(("workspace",))
+
+# Operators the vector store evaluates on metadata ($contains only applies to documents there)
+NATIVE_OPERATORS = frozenset(("$eq", "$ne", "$in", "$nin", "$gt", "$gte", "$lt", "$lte"))
+
+_ORDERING = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+# Page ids per SQL statement
+_SQL_BATCH = 500
+
+
+def split_tags(tags: str) -> List[str]:
+    """Tags of a page from their comma-separated metadata string."""
+    return [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+
+@dataclass
+class PageRecord:
+    """One page (version) with its tags and breadcrumb parsed."""
+    page_id: str
+    valid_from: int
+    valid_to: int
+    metadata: Dict[str, Any]
+    tags: List[str]
+    breadcrumb: List[str]
+
+    @classmethod
+    def from_row(cls, page_id: str, valid_from: int, valid_to: int, metadata: Dict[str, Any]) -> "PageRecord":
+        return cls(page_id, valid_from, valid_to, metadata, split_tags(metadata.get("tags", "")),
+                   metadata.get("breadcrumb", "").split(" > "))
+
+    def fields(self) -> Dict[str, Any]:
+        """Metadata that page filters are evaluated on (including the version interval)."""
+        return dict(self.metadata, valid_from=self.valid_from, valid_to=self.valid_to)
+
+
+def where_fields(where: Dict[str, Any]) -> Set[str]:
+    """Metadata keys referenced by a where clause."""
+    fields = set()
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            for clause in condition:
+                fields |= where_fields(clause)
+        else:
+            fields.add(key)
+    return fields
+
+
+def where_operators(where: Dict[str, Any]) -> Set[str]:
+    """Comparison operators used by a where clause ($eq for plain values)."""
+    operators = set()
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            for clause in condition:
+                operators |= where_operators(clause)
+        elif isinstance(condition, dict):
+            operators.update(condition)
+        else:
+            operators.add("$eq")
+    return operators
+
+
+def matches(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """Whether metadata satisfies a where clause (same operators as SnapshotCollection)."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(_compare(metadata.get(key), key, op, operand) for op, operand in condition.items()):
+                return False
+        elif not _compare(metadata.get(key), key, "$eq", condition):
+            return False
+    return True
+
+
+def _compare(value: Any, key: str, op: str, operand: Any) -> bool:
+    if value is None:
+        return op in ("$ne", "$nin")
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if op == "$contains":
+        # A page has a tag if it is one of its tags, not part of one ("ops" is not in "devops")
+        if key == "tags" and isinstance(value, str):
+            return operand in split_tags(value)
+        return isinstance(value, str) and operand in value
+    if op in _ORDERING:
+        try:
+            return _ORDERING[op](value, operand)
+        except TypeError:
+            return False
+    raise ValueError(f"Unsupported operator {op} for field {key}")
+
+
+class PageTable:
+    """Page-level metadata of one collection, keyed by page id and version."""
+
+    def __init__(self, path: Optional[str] = None,
+                 rows: Optional[Iterable[Tuple[str, int, int, Dict[str, Any]]]] = None):
+        """
+        Args:
+            path: SQLite file of the table (None: kept in memory only, as in snapshot replicas)
+            rows: (page_id, valid_from, valid_to, metadata) rows of an in-memory table
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Rows by (page id, valid_from), loaded on first read
+        self._records: Optional[Dict[Tuple[str, int], PageRecord]] = None
+        # Matching page ids per page filter
+        self._filters: Dict[str, List[str]] = {}
+        if path is None:
+            self._records = {}
+            for row in rows or ():
+                record = PageRecord.from_row(*row)
+                self._records[(record.page_id, record.valid_from)] = record
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT NOT NULL,
+                valid_from INTEGER NOT NULL,
+                valid_to INTEGER NOT NULL,
+                metadata TEXT NOT NULL,
+                PRIMARY KEY (page_id, valid_from)
+            )
+        """)
+        self._conn.commit()
+
+    def _db(self) -> sqlite3.Connection:
+        """The table's SQLite connection; in-memory tables (of snapshot replicas) are only read."""
+        if self._conn is None:
+            raise RuntimeError("In-memory page tables cannot be changed")
+        return self._conn
+
+    def _load(self) -> Dict[Tuple[str, int], PageRecord]:
+        with self._lock:
+            if self._records is None:
+                records = {}
+                for page_id, valid_from, valid_to, metadata in self._db().execute(
+                        "SELECT page_id, valid_from, valid_to, metadata FROM pages"):
+                    records[(page_id, valid_from)] = PageRecord.from_row(page_id, valid_from, valid_to,
+                                                                         json.loads(metadata))
+                self._records = records
+            return self._records
+
+    def _changed(self) -> None:
+        self._filters = {}
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def records(self) -> Iterator[PageRecord]:
+        return iter(list(self._load().values()))
+
+    # Writing
+
+    def add_chunks(self, metadatas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store the page metadata of a batch of chunks.
+
+        Args:
+            metadatas: Full chunk metadata (page fields and CHUNK_FIELDS)
+
+        Returns:
+            The chunks' metadata without their page fields (but NATIVE_PAGE_FIELDS), for the vector store
+        """
+        chunk_metadatas = []
+        rows = {}
+        for metadata in metadatas:
+            chunk = {key: value for key, value in metadata.items()
+                     if key in CHUNK_FIELDS or key in NATIVE_PAGE_FIELDS}
+            page = {key: value for key, value in metadata.items() if key not in CHUNK_FIELDS}
+            chunk_metadatas.append(chunk)
+            # Chunks copied with only their chunk (and native) fields keep the page row they have
+            if page.keys() - NATIVE_PAGE_FIELDS:
+                key = (chunk["original_id"], chunk.get("valid_from", 0))
+                rows[key] = (*key, chunk.get("valid_to", OPEN), page)
+        if rows:
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO pages (page_id, valid_from, valid_to, metadata) VALUES (?, ?, ?, ?)",
+                        [(page_id, valid_from, valid_to, json.dumps(page))
+                         for page_id, valid_from, valid_to, page in rows.values()]
+                    )
+                    self._conn.commit()
+                if self._records is not None:
+                    for key, row in rows.items():
+                        self._records[key] = PageRecord.from_row(*row)
+                self._changed()
+        return chunk_metadatas
+
+    def _execute_batched(self, sql: str, page_ids: List[str], before: tuple = (), after: tuple = ()) -> None:
+        """Run a statement whose `IN ({})` takes page ids, for batches of them."""
+        for i in range(0, len(page_ids), _SQL_BATCH):
+            batch = page_ids[i:i + _SQL_BATCH]
+            self._db().execute(sql.format(", ".join("?" * len(batch))), [*before, *batch, *after])
+
+    def remove(self, page_ids: List[str]) -> None:
+        """Drop every version of pages."""
+        removed = set(page_ids)
+        with self._lock:
+            self._execute_batched("DELETE FROM pages WHERE page_id IN ({})", list(removed))
+            self._db().commit()
+            if self._records is not None:
+                for key in [key for key in self._records if key[0] in removed]:
+                    del self._records[key]
+            self._changed()
+
+    def close_versions(self, page_ids: List[str], ordinal: int) -> None:
+        """End the current versions of pages at snapshot `ordinal` (see NotionArchive._close_versions)."""
+        closed = set(page_ids)
+        with self._lock:
+            self._execute_batched("UPDATE pages SET valid_to = ? WHERE page_id IN ({}) AND valid_to = ? "
+                                  "AND valid_from < ?", list(closed), (ordinal,), (OPEN, ordinal))
+            self._db().commit()
+            if self._records is not None:
+                for record in self._records.values():
+                    if record.page_id in closed and record.valid_to == OPEN and record.valid_from < ordinal:
+                        record.valid_to = ordinal
+            self._changed()
+
+    def discard_from(self, ordinal: int) -> None:
+        """Undo the page versions of an unfinished snapshot `ordinal`."""
+        with self._lock:
+            conn = self._db()
+            conn.execute("DELETE FROM pages WHERE valid_from >= ?", (ordinal,))
+            conn.execute("UPDATE pages SET valid_to = ? WHERE valid_to = ?", (OPEN, ordinal))
+            conn.commit()
+            self._records = None
+            self._changed()
+
+    def copy_to(self, path: str) -> "PageTable":
+        """A copy of the table in a new file (for a rebuilt collection)."""
+        with self._lock:
+            target = sqlite3.connect(path)
+            try:
+                self._db().backup(target)
+            finally:
+                target.close()
+        return PageTable(path)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+    # Reading
+
+    def get(self, page_id: str, valid_from: int = 0) -> Optional[PageRecord]:
+        return self._load().get((page_id, valid_from))
+
+    def record_of(self, metadata: Dict[str, Any]) -> Optional[PageRecord]:
+        """Page row of a chunk."""
+        return self.get(metadata.get("original_id", ""), metadata.get("valid_from", 0))
+
+    def join(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """A chunk's metadata with its page's fields, as chunks stored before page tables had them."""
+        record = self.record_of(metadata)
+        if record is None:
+            return metadata
+        joined = dict(record.metadata)
+        joined.update(metadata)
+        return joined
+
+    def page_ids(self, export_root: str, url_paths: Iterable[str]) -> List[str]:
+        """
+        Ids of the pages stored from the given files of an export.
+
+        Args:
+            export_root: Absolute path of the export
+            url_paths: Paths of the files relative to the export
+        """
+        wanted = set(url_paths)
+        # Rows written before pages remembered their export match every export
+        return sorted({record.page_id for record in self._load().values()
+                       if record.metadata.get("url_path") in wanted
+                       and record.metadata.get("export_root", export_root) == export_root})
+
+    def matching(self, where: Dict[str, Any]) -> List[str]:
+        """Ids of the pages with a version satisfying a where clause on page fields (memoized)."""
+        key = json.dumps(where, sort_keys=True, default=str)
+        page_ids = self._filters.get(key)
+        if page_ids is None:
+            with self._lock:
+                page_ids = sorted({record.page_id for record in self._load().values()
+                                   if matches(record.fields(), where)})
+                self._filters[key] = page_ids
+        return page_ids
+
+    # Snapshots
+
+    def to_bytes(self) -> bytes:
+        rows = [[record.page_id, record.valid_from, record.valid_to, record.metadata] for record in self.records()]
+        return zlib.compress(json.dumps(rows).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data) -> "PageTable":
+        """In-memory table shipped in a snapshot file."""
+        return cls(None, json.loads(zlib.decompress(bytes(data)).decode("utf-8")))
+
+    def reset_after_fork(self) -> None:
+        """A fresh lock for a forked worker."""
+        self._lock = threading.RLock()
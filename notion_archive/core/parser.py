@@ -4,71 +4,233 @@ Notion export parser for extracting content from HTML files.
 
 import os
 import re
-from typing import Dict, List, Optional, Tuple
+import sys
+import zlib
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 from bs4 import BeautifulSoup
-from dataclasses import dataclass
 from datetime import datetime
 
+from .links import extract_links
+from .streaming import LARGE_PAGE_BYTES, PageStreamParser, stream_page
+
+
+# How a document keeps the HTML of its page body:
+#   "full"       - as a str (largest, fastest access)
+#   "compressed" - zlib-compressed bytes, decompressed on access
+#   "lazy"       - not kept; re-read from the source file on access
+#   "none"       - dropped; `content` is always empty
+HTML_MODES = ("full", "compressed", "lazy", "none")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern strings that repeat across many documents (workspaces, tags, users)."""
+    return sys.intern(value) if value else value
+
 
-@dataclass
 class NotionDocument:
-    """Represents a parsed Notion document."""
-    
-    id: str
-    title: str
-    content: str
-    plain_text: str
-    url_path: str
-    created_by: Optional[str] = None
-    created_time: Optional[datetime] = None
-    last_edited_by: Optional[str] = None
-    last_edited_time: Optional[datetime] = None
-    tags: List[str] = None
-    workspace: str = ""
-    breadcrumb: List[str] = None
-    
-    def __post_init__(self):
-        if self.tags is None:
-            self.tags = []
-        if self.breadcrumb is None:
-            self.breadcrumb = []
+    """
+    Represents a parsed Notion document.
+    
+    Uses __slots__ and interned strings for fields that repeat across pages,
+    and can keep the page HTML compressed, lazily re-readable or not at all
+    (see HTML_MODES). Indexing only needs `plain_text`.
+    """
+    
+    __slots__ = (
+        "id", "title", "_content", "plain_text", "url_path",
+        "created_by", "created_time", "last_edited_by", "last_edited_time",
+        "tags", "workspace", "breadcrumb", "source_path", "links", "export_root",
+    )
+    
+    def __init__(self,
+                 id: str,
+                 title: str,
+                 content: Union[str, bytes, None],
+                 plain_text: str,
+                 url_path: str,
+                 created_by: Optional[str] = None,
+                 created_time: Optional[datetime] = None,
+                 last_edited_by: Optional[str] = None,
+                 last_edited_time: Optional[datetime] = None,
+                 tags: Optional[List[str]] = None,
+                 workspace: str = "",
+                 breadcrumb: Optional[List[str]] = None,
+                 source_path: Optional[str] = None,
+                 html_mode: Optional[str] = None,
+                 links: Optional[List[str]] = None,
+                 export_root: Optional[str] = None):
+        """
+        Args:
+            content: Page body HTML, or zlib-compressed HTML bytes
+            source_path: Absolute path of the source HTML file (needed for html_mode="lazy")
+            links: Keys of the pages this page links to (see links.py)
+            export_root: Absolute path of the export the page was parsed from
+            html_mode: How to keep `content` in memory, one of HTML_MODES
+                       (default: keep `content` as given)
+        """
+        self.id = id
+        self.title = title
+        self.plain_text = plain_text
+        self.url_path = url_path
+        self.created_by = _intern(created_by)
+        self.created_time = created_time
+        self.last_edited_by = _intern(last_edited_by)
+        self.last_edited_time = last_edited_time
+        self.tags = [sys.intern(tag) for tag in tags] if tags else []
+        self.workspace = _intern(workspace)
+        self.breadcrumb = [sys.intern(part) for part in breadcrumb] if breadcrumb else []
+        self.source_path = source_path
+        self.links = links or []
+        self.export_root = export_root
+        self._content = content
+        if html_mode is not None:
+            self.set_html_mode(html_mode)
+    
+    @property
+    def content(self) -> str:
+        """HTML of the page body, decompressed or re-read as needed."""
+        if isinstance(self._content, str):
+            return self._content
+        if isinstance(self._content, bytes):
+            return zlib.decompress(self._content).decode("utf-8")
+        if self.source_path:
+            return read_page_body(self.source_path)
+        return ""
+    
+    @content.setter
+    def content(self, value: Union[str, bytes, None]) -> None:
+        self._content = value
+    
+    @property
+    def html_mode(self) -> str:
+        """The mode `content` is currently kept in."""
+        if isinstance(self._content, str):
+            return "full"
+        if isinstance(self._content, bytes):
+            return "compressed"
+        return "lazy" if self.source_path else "none"
+    
+    def set_html_mode(self, html_mode: str) -> None:
+        """Convert the stored HTML to another of HTML_MODES."""
+        if html_mode not in HTML_MODES:
+            raise ValueError(f"Unsupported html_mode: {html_mode}. Supported: {list(HTML_MODES)}")
+        
+        current = self.html_mode
+        if html_mode == current:
+            return
+        if html_mode == "full":
+            self._content = self.content
+        elif html_mode == "compressed":
+            html = self.content
+            self._content = zlib.compress(html.encode("utf-8")) if html else None
+        elif html_mode == "lazy":
+            if not self.source_path:
+                raise ValueError(f"html_mode='lazy' needs a source_path for document {self.id}")
+            self._content = None
+        else:
+            self._content = None
+            self.source_path = None
+    
+    def compressed_content(self) -> Optional[bytes]:
+        """Compressed HTML kept in memory, without re-reading lazy documents."""
+        if isinstance(self._content, bytes):
+            return self._content
+        if self._content:
+            return zlib.compress(self._content.encode("utf-8"))
+        return None
+    
+    def _key(self) -> tuple:
+        return (self.id, self.title, self.plain_text, self.url_path, self.created_by,
+                self.created_time, self.last_edited_by, self.last_edited_time,
+                self.tags, self.workspace, self.breadcrumb, self.links)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, NotionDocument):
+            return NotImplemented
+        return self._key() == other._key()
+    
+    __hash__ = None  # type: ignore[assignment]
+    
+    def __repr__(self) -> str:
+        return (f"NotionDocument(id={self.id!r}, title={self.title!r}, url_path={self.url_path!r}, "
+                f"workspace={self.workspace!r}, html_mode={self.html_mode!r})")
+    
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+    
+    def __setstate__(self, state):
+        self.export_root = None
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+
+def read_page_body(file_path: Union[str, Path]) -> str:
+    """Re-read the page body HTML of an exported page (used by html_mode="lazy")."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    page_body = soup.find('div', class_='page-body')
+    if not page_body:
+        return ""
+    for script in page_body(["script", "style"]):
+        script.decompose()
+    return str(page_body)
 
 
 class NotionExportParser:
     """Parser for Notion HTML exports."""
     
-    def __init__(self, export_path: str):
+    def __init__(self, export_path: Union[str, Path], html_mode: str = "full"):
+        if html_mode not in HTML_MODES:
+            raise ValueError(f"Unsupported html_mode: {html_mode}. Supported: {list(HTML_MODES)}")
         self.export_path = Path(export_path)
+        self.export_root = str(self.export_path.resolve())
+        self.html_mode = html_mode
         self.documents: List[NotionDocument] = []
+        # Pages over LARGE_PAGE_BYTES: only their header is parsed, the body is streamed at index time
+        self.large_files: List[Path] = []
         
     def parse_export(self) -> List[NotionDocument]:
         """Parse all HTML files in the Notion export."""
         
+        for html_file in self.find_html_files():
+            doc = self.parse_file(html_file)
+            if doc:
+                self.documents.append(doc)
+                
+        return self.documents
+    
+    def find_html_files(self) -> List[Path]:
+        """Find all page HTML files in the export, in a stable order."""
+        
         # Find all HTML files recursively
-        html_files = list(self.export_path.rglob("*.html"))
+        html_files = sorted(self.export_path.rglob("*.html"))
         
         # Skip the main index.html file
-        html_files = [f for f in html_files if f.name != "index.html"]
-        
-        for html_file in html_files:
-            try:
-                doc = self._parse_html_file(html_file)
-                if doc:
-                    self.documents.append(doc)
-            except Exception as e:
-                print(f"Error parsing {html_file}: {e}")
-                continue
-                
-        return self.documents
+        return [f for f in html_files if f.name != "index.html"]
+    
+    def parse_file(self, html_file: Path) -> Optional[NotionDocument]:
+        """Parse a single HTML file, reporting and swallowing parse errors."""
+        try:
+            return self._parse_html_file(html_file)
+        except Exception as e:
+            print(f"Error parsing {html_file}: {e}")
+            return None
     
     def _parse_html_file(self, file_path: Path) -> Optional[NotionDocument]:
         """Parse a single HTML file into a NotionDocument."""
         
-        # Safety check: file size limit (10MB)
-        if file_path.stat().st_size > 10 * 1024 * 1024:
-            print(f"Warning: Skipping large file {file_path.name} ({file_path.stat().st_size / 1024 / 1024:.1f}MB)")
-            return None
+        # Very large pages would not fit in memory as a parse tree; parse them
+        # incrementally for their header and links, and leave the body text to be
+        # streamed again while indexing
+        if file_path.stat().st_size > LARGE_PAGE_BYTES:
+            stream_parser = PageStreamParser()
+            for _ in stream_page(file_path, stream_parser):
+                pass
+            if not stream_parser.body_started:
+                return None
+            self.large_files.append(file_path)
+            return self.large_page_document(file_path, stream_parser)
         
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -91,9 +253,13 @@ class NotionExportParser:
         if not page_body:
             return None
             
+        # Links to other pages, before scripts are stripped from the body
+        links = extract_links((str(a['href']) for a in page_body.find_all('a', href=True)),
+                              doc_id if isinstance(doc_id, str) else None)
+        
         # Clean and extract text content
         plain_text = self._extract_plain_text(page_body)
-        html_content = str(page_body)
+        html_content = str(page_body) if self.html_mode in ("full", "compressed") else None
         
         # Determine workspace and breadcrumb from file path
         workspace, breadcrumb = self._extract_path_info(file_path)
@@ -109,9 +275,35 @@ class NotionExportParser:
             url_path=url_path,
             workspace=workspace,
             breadcrumb=breadcrumb,
+            source_path=str(file_path) if self.html_mode == "lazy" else None,
+            html_mode=self.html_mode,
+            links=links,
+            export_root=self.export_root,
             **metadata
         )
     
+    def large_page_document(self, file_path: Path, stream_parser: PageStreamParser) -> NotionDocument:
+        """
+        Build the document of a streamed large page from its parsed header.
+        
+        The document has no text or HTML: its body is chunked straight from the
+        file while indexing (see streaming.py).
+        """
+        workspace, breadcrumb = self._extract_path_info(file_path)
+        doc_id = stream_parser.doc_id or self._extract_id_from_filename(file_path.name)
+        return NotionDocument(
+            id=doc_id,
+            title=stream_parser.title or file_path.stem,
+            content=None,
+            plain_text="",
+            url_path=str(file_path.relative_to(self.export_path)),
+            workspace=workspace,
+            breadcrumb=breadcrumb,
+            links=extract_links(stream_parser.hrefs, doc_id),
+            export_root=self.export_root,
+            **stream_parser.metadata
+        )
+    
     def _extract_metadata(self, soup: BeautifulSoup) -> Dict:
         """Extract metadata from the properties table."""
         metadata = {}
@@ -216,7 +408,7 @@ class NotionExportParser:
         return filename.replace('.html', '')
 
 
-def parse_notion_export(export_path: str) -> List[NotionDocument]:
+def parse_notion_export(export_path: str, html_mode: str = "full") -> List[NotionDocument]:
     """Convenience function to parse a Notion export."""
-    parser = NotionExportParser(export_path)
+    parser = NotionExportParser(export_path, html_mode=html_mode)
     return parser.parse_export()
\ No newline at end of file
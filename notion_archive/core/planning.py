@@ -0,0 +1,286 @@
+"""
+Dry-run build planning.
+
+`NotionArchive.plan_build` chunks everything build_index would embed, without
+embedding it, and reports what the build will cost before any money is
+spent: exact chunk and token counts per workspace, how much of the volume is
+duplicate text or already embedded, the number of API requests, the price
+and an ETA. The ETA comes from a short calibration run that embeds a sample
+of the chunks with the configured backend, so it reflects the actual model,
+hardware or network.
+
+Token counts are exact for sentence-transformers models (their own
+tokenizer) and for OpenAI models when `tiktoken` is installed; otherwise
+they are estimated from the text length.
+"""
+
+import hashlib
+import math
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .embeddings import EmbeddingModel, HTTPEmbedding, OpenAIEmbedding, SentenceTransformerEmbedding, \
+    TruncatedEmbedding
+
+# Chunks embedded by the calibration run
+DEFAULT_CALIBRATION_CHUNKS = 64
+
+# Page titles per encode call when a build embeds them for title_boost
+TITLE_BATCH_SIZE = 500
+
+
+@dataclass
+class WorkspacePlan:
+    """Volume of one workspace."""
+
+    pages: int = 0
+    chunks: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class BuildPlan:
+    """What a build_index run would embed, and what it would cost."""
+
+    model: str
+    chunks: int = 0
+    tokens: int = 0
+    workspaces: Dict[str, WorkspacePlan] = field(default_factory=dict)
+    # Chunks whose text already occurred earlier in the build
+    duplicate_chunks: int = 0
+    duplicate_tokens: int = 0
+    # Chunks already in the live index with the same text, for information: build_index
+    # embeds every chunk into a new collection, so they are part of embed_chunks too
+    indexed_chunks: int = 0
+    indexed_tokens: int = 0
+    # Chunks already embedded by an interrupted build that resume=True skips
+    resumed_chunks: int = 0
+    resumed_tokens: int = 0
+    # What the build itself embeds
+    embed_chunks: int = 0
+    embed_tokens: int = 0
+    # Page titles the build embeds for title_boost, one per page
+    title_inputs: int = 0
+    title_tokens: int = 0
+    api_calls: int = 0
+    cost_usd: Optional[float] = None
+    tokens_exact: bool = True
+    tokens_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        approx = "" if self.tokens_exact else "~"
+        lines = [f"Build plan for {self.model}"]
+        width = max([len(name) for name in self.workspaces] + [9])
+        lines.append(f"  {'workspace':<{width}} {'pages':>8} {'chunks':>9} {'tokens':>12}")
+        for name, workspace in sorted(self.workspaces.items()):
+            lines.append(f"  {name or '(none)':<{width}} {workspace.pages:>8,} {workspace.chunks:>9,} "
+                         f"{approx + format(workspace.tokens, ','):>12}")
+        lines.append(f"  {'total':<{width}} {sum(w.pages for w in self.workspaces.values()):>8,} "
+                     f"{self.chunks:>9,} {approx + format(self.tokens, ','):>12}")
+        lines.append(f"  Duplicate text: {self.duplicate_chunks:,} chunks, {approx}{self.duplicate_tokens:,} tokens")
+        lines.append(f"  Already in the index: {self.indexed_chunks:,} chunks, {approx}{self.indexed_tokens:,} tokens "
+                     f"(info only: a rebuild embeds them again)")
+        if self.resumed_chunks:
+            lines.append(f"  Resumed from interrupted build: {self.resumed_chunks:,} chunks, "
+                         f"{approx}{self.resumed_tokens:,} tokens")
+        if self.title_inputs:
+            lines.append(f"  Page titles (title_boost): {self.title_inputs:,} titles, "
+                         f"{approx}{self.title_tokens:,} tokens")
+        lines.append(f"  To embed: {self.embed_chunks:,} chunks, {approx}{self.embed_tokens:,} tokens, "
+                     f"{self.api_calls:,} API requests")
+        if self.cost_usd is not None:
+            lines.append(f"  Cost: {approx}${self.cost_usd:,.2f}")
+        if self.eta_seconds is not None:
+            lines.append(f"  ETA: {_format_duration(self.eta_seconds)} "
+                         f"(measured {self.tokens_per_second:,.0f} tokens/s)")
+        return "\n".join(lines)
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}min"
+    return f"{seconds / 3600:.1f}h"
+
+
+def base_model(model: EmbeddingModel) -> EmbeddingModel:
+    """The model doing the work, below any local truncation wrapper."""
+    while isinstance(model, TruncatedEmbedding):
+        model = model.model
+    return model
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def token_counter(model: EmbeddingModel) -> Tuple[Callable[[List[str]], List[int]], bool]:
+    """
+    A function counting tokens per text as the model's backend does.
+
+    Returns:
+        (count function, whether the counts are exact)
+    """
+    model = base_model(model)
+    if isinstance(model, SentenceTransformerEmbedding) and getattr(model.model, "tokenizer", None) is not None:
+        return model.token_lengths, True
+    if isinstance(model, OpenAIEmbedding):
+        try:
+            import tiktoken
+        except ImportError:
+            print("Install tiktoken for exact OpenAI token counts (pip install tiktoken); estimating instead")
+        else:
+            encoding = tiktoken.encoding_for_model(model.model_name)
+            return lambda texts: [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)], True
+    return lambda texts: [estimate_tokens(text) for text in texts], False
+
+
+def requests_for(model: EmbeddingModel, inputs: int, batch_size: int) -> int:
+    """API requests embedding `inputs` texts in encode calls of `batch_size` makes."""
+    full_batches, remainder = divmod(inputs, batch_size)
+    requests = full_batches * requests_per_batch(model, batch_size)
+    if remainder:
+        requests += requests_per_batch(model, remainder)
+    return requests
+
+
+def requests_per_batch(model: EmbeddingModel, batch_size: int) -> int:
+    """API requests one encode call of `batch_size` texts makes (0 for local models)."""
+    model = base_model(model)
+    if isinstance(model, OpenAIEmbedding):
+        return math.ceil(batch_size / model.REQUEST_BATCH_SIZE)
+    if isinstance(model, HTTPEmbedding):
+        return math.ceil(batch_size / model.batch_size)
+    return 0
+
+
+def embedding_cost(model: EmbeddingModel, tokens: int) -> Optional[float]:
+    """Price of embedding `tokens` tokens in USD (0 for local models, None when unknown)."""
+    model = base_model(model)
+    if isinstance(model, OpenAIEmbedding):
+        return tokens / 1e6 * model.PRICES_PER_MILLION_TOKENS[model.model_name]
+    if isinstance(model, HTTPEmbedding):
+        return None
+    return 0.0
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def plan_chunks(model: EmbeddingModel,
+                batches: Iterable[Tuple[List[str], List[Dict[str, Any]], List[str]]],
+                collection=None,
+                skip: int = 0,
+                batch_size: int = 500,
+                calibration_chunks: int = DEFAULT_CALIBRATION_CHUNKS,
+                titles: Sequence[str] = ()) -> BuildPlan:
+    """
+    Plan the embedding of a stream of chunk batches.
+
+    Args:
+        model: Embedding model the build uses
+        batches: (texts, metadatas, ids) batches in build order
+        collection: Live collection, to count chunks that are already indexed
+        skip: Leading chunks an interrupted build already embedded
+        batch_size: Chunks per encode call in the build
+        calibration_chunks: Chunks to embed to measure throughput (0: no ETA)
+        titles: Page titles the build embeds for the title index (with title_boost)
+
+    Returns:
+        The build plan
+    """
+    count_tokens, exact = token_counter(model)
+    plan = BuildPlan(model=model.model_name, tokens_exact=exact)
+    pages: Dict[str, set] = {}
+    seen = set()
+    # Uniform sample of the chunks to embed, for the calibration run
+    rng = random.Random(0)
+    sample: List[Tuple[str, int]] = []
+    position = 0
+
+    for texts, metadatas, ids in batches:
+        lengths = count_tokens(texts)
+        indexed = {}
+        if collection is not None:
+            try:
+                existing = collection.get(ids=ids, include=["documents"])
+                indexed = dict(zip(existing["ids"], existing["documents"]))
+            except Exception:
+                collection = None
+
+        for text, metadata, chunk_id, length in zip(texts, metadatas, ids, lengths):
+            workspace = plan.workspaces.setdefault(metadata.get("workspace", ""), WorkspacePlan())
+            workspace.chunks += 1
+            workspace.tokens += length
+            pages.setdefault(metadata.get("workspace", ""), set()).add(metadata.get("original_id", chunk_id))
+            plan.chunks += 1
+            plan.tokens += length
+
+            digest = _digest(text)
+            if digest in seen:
+                plan.duplicate_chunks += 1
+                plan.duplicate_tokens += length
+            seen.add(digest)
+            if indexed.get(chunk_id) == text:
+                plan.indexed_chunks += 1
+                plan.indexed_tokens += length
+
+            if position < skip:
+                plan.resumed_chunks += 1
+                plan.resumed_tokens += length
+            else:
+                plan.embed_chunks += 1
+                plan.embed_tokens += length
+                if len(sample) < calibration_chunks:
+                    sample.append((text, length))
+                else:
+                    slot = rng.randrange(plan.embed_chunks)
+                    if slot < calibration_chunks:
+                        sample[slot] = (text, length)
+            position += 1
+
+    for name, workspace in plan.workspaces.items():
+        workspace.pages = len(pages[name])
+
+    if titles:
+        plan.title_inputs = len(titles)
+        plan.title_tokens = sum(count_tokens(list(titles)))
+
+    # build_index embeds the remaining chunks in batches of batch_size, then the titles
+    plan.api_calls = requests_for(model, plan.embed_chunks, batch_size) + \
+        requests_for(model, plan.title_inputs, TITLE_BATCH_SIZE)
+    plan.cost_usd = embedding_cost(model, plan.embed_tokens + plan.title_tokens)
+
+    if sample:
+        plan.tokens_per_second = calibrate(model, [text for text, _ in sample], sum(length for _, length in sample))
+        plan.eta_seconds = (plan.embed_tokens + plan.title_tokens) / plan.tokens_per_second
+    return plan
+
+
+def calibrate(model: EmbeddingModel, texts: List[str], tokens: int) -> float:
+    """
+    Measure embedding throughput on sample texts.
+
+    Args:
+        model: Embedding model to measure
+        texts: Sample chunk texts
+        tokens: Their total token count
+
+    Returns:
+        Tokens embedded per second
+    """
+    # The first call is slower (lazy initialization, connection setup); keep it out of the measurement
+    model.encode(texts[:1], show_progress_bar=False)
+    start = time.perf_counter()
+    model.encode(texts, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+    return tokens / max(elapsed, 1e-6)
@@ -0,0 +1,261 @@
+"""
+Semantic cache of recent search results.
+
+Search traffic repeats itself, often in other words ("pto policy", "PTO
+policy?", "what's the PTO policy"). `SemanticQueryCache` answers such
+queries from the results of an earlier one:
+
+- queries that are equal after lowercasing and dropping punctuation are
+  answered before the query is even embedded
+- otherwise the query embedding is looked up in a small locality-sensitive
+  hash index (random hyperplanes) over the cached queries' embeddings; the
+  candidates it returns are checked exactly, and the most similar one at or
+  above `threshold` cosine similarity is a hit
+
+Only searches with the same parameters (limit, filters, fields, ...) share
+results. The cache holds at most `capacity` queries, evicting the least
+recently used, and NotionArchive clears it whenever the index changes.
+
+    archive = NotionArchive(embedding_model="all-MiniLM-L6-v2",
+                            query_cache=SemanticQueryCache(threshold=0.95, capacity=1024))
+    archive.search("pto policy")
+    archive.search("What's the PTO policy?")   # may be answered from the cache
+    archive.query_cache.stats()                 # hit rate, saved latency
+
+Similarity of paraphrases depends on the embedding model; raise the
+threshold if unrelated queries ("q3 roadmap", "q4 roadmap") share results.
+Cached results keep the snippets highlighted for the query that produced them.
+"""
+
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+@dataclass
+class _Entry:
+    query: str
+    params: str
+    vector: np.ndarray
+    codes: Tuple[int, ...]
+    results: List[Dict[str, Any]]
+    # Time the uncached search took (embedding, then vector search and formatting)
+    embed_seconds: float
+    search_seconds: float
+
+
+def normalize_query(query: str) -> str:
+    """Lowercased words of a query, without punctuation."""
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+class SemanticQueryCache:
+    """Bounded LRU cache of search results, keyed by query text and embedding."""
+
+    def __init__(self,
+                 threshold: float = 0.95,
+                 capacity: int = 1024,
+                 tables: int = 8,
+                 bits: int = 8,
+                 seed: int = 0):
+        """
+        Args:
+            threshold: Minimum cosine similarity of a cached query's embedding to
+                       answer a new query with its results
+            capacity: Maximum number of cached queries
+            tables: Hash tables of the LSH index (more: fewer missed hits)
+            bits: Hyperplanes per table (more: fewer candidates to check)
+            seed: Seed of the random hyperplanes
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.capacity = max(1, capacity)
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._buckets: List[Dict[int, set]] = [{} for _ in range(tables)]
+        self._planes: Optional[np.ndarray] = None
+        self._next_id = 0
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._lookups = 0
+        self._exact_hits = 0
+        self._semantic_hits = 0
+        self._saved_seconds = 0.0
+        self._lookup_seconds = 0.0
+        self._invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Hashing
+
+    def _codes(self, vector: np.ndarray) -> Tuple[int, ...]:
+        """Bucket of the vector in each table: the signs of its projections on the hyperplanes."""
+        if self._planes is None or self._planes.shape[2] != vector.shape[0]:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.tables, self.bits, vector.shape[0])).astype(np.float32)
+        signs = (self._planes @ vector) > 0
+        return tuple(int(code) for code in signs @ (1 << np.arange(self.bits)))
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    # Lookup
+
+    def get(self, query: str, params: str, embedding=None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cached results for a query, if there are any.
+
+        Args:
+            query: Query text
+            params: Key of the other search parameters (see NotionArchive._cache_key)
+            embedding: Query embedding; without it only the query text is matched
+
+        Returns:
+            A copy of the cached results, or None
+        """
+        start = time.perf_counter()
+        with self._lock:
+            entry_id = self._exact.get((normalize_query(query), params))
+            exact = entry_id is not None
+            if not exact and embedding is not None:
+                entry_id = self._nearest(self._unit(embedding), params)
+            # A text-only lookup is followed by one with the embedding; count that one
+            if exact or embedding is not None:
+                self._lookups += 1
+            self._lookup_seconds += time.perf_counter() - start
+            if entry_id is None:
+                return None
+
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            if exact:
+                self._exact_hits += 1
+                # Answered before the query was embedded
+                saved = entry.embed_seconds + entry.search_seconds
+            else:
+                self._semantic_hits += 1
+                saved = entry.search_seconds
+            self._saved_seconds += max(0.0, saved - (time.perf_counter() - start))
+            return copy.deepcopy(entry.results)
+
+    def _nearest(self, vector: np.ndarray, params: str) -> Optional[int]:
+        """Most similar cached query with the same parameters at or above the threshold."""
+        if not self._entries:
+            return None
+        candidates: Set[int] = set()
+        for table, code in zip(self._buckets, self._codes(vector)):
+            candidates.update(table.get(code, ()))
+        best, best_similarity = None, self.threshold
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry.params != params:
+                continue
+            similarity = float(entry.vector @ vector)
+            if similarity >= best_similarity:
+                best, best_similarity = entry_id, similarity
+        return best
+
+    # Updates
+
+    def put(self, query: str, params: str, embedding, results: List[Dict[str, Any]],
+            search_seconds: float, embed_seconds: float = 0.0) -> None:
+        """
+        Cache the results of a search.
+
+        Args:
+            query: Query text
+            params: Key of the other search parameters
+            embedding: Query embedding
+            results: Search results (copied)
+            search_seconds: Time the vector search and formatting took
+            embed_seconds: Time embedding the query took
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            key = (normalize_query(query), params)
+            if key in self._exact:
+                self._remove(self._exact[key])
+            while len(self._entries) >= self.capacity:
+                self._remove(next(iter(self._entries)))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            codes = self._codes(vector)
+            self._entries[entry_id] = _Entry(query, params, vector, codes, copy.deepcopy(results),
+                                             embed_seconds, search_seconds)
+            self._exact[key] = entry_id
+            for table, code in zip(self._buckets, codes):
+                table.setdefault(code, set()).add(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._exact.pop((normalize_query(entry.query), entry.params), None)
+        for table, code in zip(self._buckets, entry.codes):
+            bucket = table.get(code)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del table[code]
+
+    def invalidate(self) -> None:
+        """Drop every cached result (the index changed)."""
+        with self._lock:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._exact.clear()
+            for table in self._buckets:
+                table.clear()
+
+    # Stats
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache effectiveness since creation (or the last reset_stats()).
+
+        Returns:
+            Dict with size, capacity, lookups, hits (exact_hits answered from the
+            query text, semantic_hits from a similar query), hit_rate,
+            saved_ms (search time not spent thanks to hits, in total and per hit),
+            the average lookup_ms and the number of invalidations
+        """
+        with self._lock:
+            hits = self._exact_hits + self._semantic_hits
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "lookups": self._lookups,
+                "hits": hits,
+                "exact_hits": self._exact_hits,
+                "semantic_hits": self._semantic_hits,
+                "hit_rate": hits / self._lookups if self._lookups else 0.0,
+                "saved_ms": self._saved_seconds * 1000,
+                "saved_ms_per_hit": self._saved_seconds * 1000 / hits if hits else 0.0,
+                "lookup_ms": self._lookup_seconds * 1000 / self._lookups if self._lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._reset_stats()
+
+    def reset_after_fork(self) -> None:
+        """A fresh lock for a forked worker (entries cached so far stay shared)."""
+        self._lock = threading.Lock()
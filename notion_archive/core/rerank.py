@@ -0,0 +1,177 @@
+"""
+Cross-encoder reranking of search candidates.
+
+Vector search ranks chunks by embedding distance, which is cheap but only
+roughly orders the top hits. A cross-encoder reads the query and each
+candidate together and ranks the top few much better, at the cost of one
+model forward pass per search. The reranker scores all candidate pairs in a
+single batch, caches pair scores, and gives up (so the search keeps its
+vector order) whenever the pass would not finish within a latency budget.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """
+    Latency-budgeted reranker around a sentence-transformers CrossEncoder.
+
+    Usage:
+        reranker = CrossEncoderReranker(latency_budget_ms=150)
+        archive = NotionArchive(reranker=reranker)
+    """
+
+    def __init__(self,
+                 model_name: str = DEFAULT_RERANK_MODEL,
+                 latency_budget_ms: Optional[float] = 150.0,
+                 cache_size: int = 10000,
+                 max_length: int = 512,
+                 device: Optional[str] = None):
+        """
+        Initialize the reranker.
+
+        Args:
+            model_name: Cross-encoder model name or path
+            latency_budget_ms: Per-query time allowed for scoring; searches fall
+                               back to vector order when it would be exceeded
+                               (None: no budget)
+            cache_size: Query/chunk pair scores kept (least recently used are dropped)
+            max_length: Maximum tokens per query/chunk pair
+            device: Torch device (default: sentence-transformers' choice)
+        """
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("sentence-transformers package required. Install with: pip install sentence-transformers")
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length, device=device)
+        self.latency_budget_ms = latency_budget_ms
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[Tuple[str, bytes], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One forward pass at a time; a pass that overran its budget finishes in the
+        # background and still fills the cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._ms_per_pair: Optional[float] = None
+        self.stats: Dict[str, int] = {
+            "queries": 0, "reranked": 0, "fallbacks": 0, "pairs_scored": 0, "cache_hits": 0,
+        }
+        # The first pass is much slower (lazy initialization); keep it out of the estimate
+        self.model.predict([("warm up", "warm up")], show_progress_bar=False)
+
+    @staticmethod
+    def _key(query: str, text: str) -> Tuple[str, bytes]:
+        return query, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _cached(self, key: Tuple[str, bytes]) -> Optional[float]:
+        score = self._cache.get(key)
+        if score is not None:
+            self._cache.move_to_end(key)
+        return score
+
+    def _remember(self, keys: List[Tuple[str, bytes]], scores: Iterable[float]) -> None:
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = float(score)
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _score_pairs(self, pairs: List[Tuple[str, str]], keys: List[Tuple[str, bytes]]) -> np.ndarray:
+        """Score pairs in one batch, updating the cache and the per-pair cost estimate."""
+        start = time.perf_counter()
+        scores = np.asarray(self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False),
+                            dtype=np.float32).reshape(-1)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._remember(keys, scores)
+        with self._lock:
+            per_pair = elapsed_ms / len(pairs)
+            self._ms_per_pair = per_pair if self._ms_per_pair is None else 0.8 * self._ms_per_pair + 0.2 * per_pair
+            self.stats["pairs_scored"] += len(pairs)
+        return scores
+
+    def score(self, query: str, texts: Sequence[str],
+              latency_budget_ms: Optional[float] = None) -> Optional[List[float]]:
+        """
+        Score candidate texts against a query.
+
+        Args:
+            query: Search query
+            texts: Candidate chunk texts
+            latency_budget_ms: Budget for this call (default: the reranker's)
+
+        Returns:
+            One score per text (higher is more relevant), or None when scoring
+            did not fit in the latency budget
+        """
+        budget = self.latency_budget_ms if latency_budget_ms is None else latency_budget_ms
+        start = time.perf_counter()
+        keys = [self._key(query, text) for text in texts]
+        scores: List[Optional[float]] = []
+        computed: Dict[int, float] = {}
+        with self._lock:
+            self.stats["queries"] += 1
+            for key in keys:
+                scores.append(self._cached(key))
+            missing = [i for i, score in enumerate(scores) if score is None]
+            self.stats["cache_hits"] += len(keys) - len(missing)
+            ms_per_pair = self._ms_per_pair
+
+        if missing:
+            # Don't start a pass that is already expected to overrun. Let the estimate
+            # decay meanwhile, so a pass is tried again once load may have dropped
+            if budget is not None and ms_per_pair is not None and ms_per_pair * len(missing) > budget:
+                with self._lock:
+                    if self._ms_per_pair is not None:
+                        self._ms_per_pair *= 0.9
+                return self._fallback()
+
+            future = self._executor.submit(
+                self._score_pairs,
+                [(query, texts[i]) for i in missing],
+                [keys[i] for i in missing]
+            )
+            timeout = None
+            if budget is not None:
+                timeout = max(0.0, budget / 1000 - (time.perf_counter() - start))
+            try:
+                new_scores = future.result(timeout=timeout)
+            except FutureTimeout:
+                # Drop it if it is still queued behind another query's pass
+                future.cancel()
+                return self._fallback()
+            computed = {i: float(score) for i, score in zip(missing, new_scores)}
+
+        with self._lock:
+            self.stats["reranked"] += 1
+        return [computed[i] if score is None else score for i, score in enumerate(scores)]
+
+    def _fallback(self) -> Optional[List[float]]:
+        with self._lock:
+            self.stats["fallbacks"] += 1
+        return None
+
+    def clear_cache(self) -> None:
+        """Forget cached pair scores."""
+        with self._lock:
+            self._cache.clear()
+
+    def reset_after_fork(self) -> None:
+        """Start a fresh scoring thread and lock; threads do not survive fork()."""
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    def close(self) -> None:
+        """Stop the scoring thread."""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,314 @@
+"""
+Pre-fork serving of a read-only archive.
+
+A WSGI server with N worker processes that each construct their own
+NotionArchive loads N copies of the embedding model and index, and a restart
+pays that cost N times. `PreforkServer` loads everything once in a parent
+process, warms it up, freezes the garbage collector's view of it and then
+forks the workers:
+
+- model weights, snapshot vectors (memory-mapped) and the title index and
+  link graph are shared copy-on-write; gc.freeze() keeps the collector from
+  touching (and so copying) the parent's objects in every child
+- each worker re-creates what must not be shared (HTTP connection pools,
+  thread pools; see NotionArchive.reset_after_fork), warms up once more and
+  only then reports itself ready
+- the parent restarts workers that die; SIGHUP restarts them one at a time
+  (a fork of a warm parent takes milliseconds); SIGTERM/SIGINT stop all
+
+Worker state (pid, ready, requests served) lives in a small shared-memory
+table, so any worker can answer a health check for all of them, including
+their memory: PSS and private (USS) bytes, which unlike RSS do not count
+the shared pages once per worker.
+
+    archive = NotionArchive(embedding_model="all-MiniLM-L6-v2", snapshot_path="./index.nasnap")
+    PreforkServer(app, archive, port=5000, workers=16).serve_forever()
+
+Fork is POSIX-only; archives must be snapshot-backed (ChromaDB clients do not
+survive fork()).
+"""
+
+import gc
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils.memory import process_memory
+
+# Worker table columns (one row per worker slot)
+_PID, _READY, _STARTED, _REQUESTS = range(4)
+_COLUMNS = 4
+
+# Seconds a replacement worker gets to become ready during a rolling restart
+READY_TIMEOUT = 60.0
+
+# Workers dying sooner than this after starting are restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+class PreforkServer:
+    """Serve a WSGI app from forked workers sharing one warmed-up archive."""
+
+    def __init__(self,
+                 app: Callable,
+                 archive=None,
+                 host: str = "0.0.0.0",
+                 port: int = 5000,
+                 workers: Optional[int] = None,
+                 threads: int = 1,
+                 warmup_queries: Optional[List[str]] = None,
+                 backlog: int = 128):
+        """
+        Args:
+            app: WSGI application (e.g. a Flask app)
+            archive: Snapshot-backed NotionArchive the app searches (warmed up
+                     before forking and made fork-safe in each worker)
+            host: Interface to listen on
+            port: Port to listen on
+            workers: Worker processes (default: CPU count)
+            threads: Request threads per worker
+            warmup_queries: Queries run by the parent and each worker before serving
+            backlog: Listen backlog of the shared socket
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Pre-fork serving needs os.fork() (Linux or macOS)")
+        try:
+            import werkzeug.serving  # noqa: F401
+        except ImportError:
+            raise ImportError("werkzeug package required for pre-fork serving. "
+                              "Install with: pip install notion-archive[serve]")
+        if archive is not None and archive.snapshot is None:
+            raise ValueError("Pre-fork serving needs a snapshot-backed archive "
+                             "(NotionArchive(snapshot_path=...)); see export_snapshot()")
+        self.app = app
+        self.archive = archive
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = max(1, threads)
+        self.warmup_queries = warmup_queries
+        self.backlog = backlog
+
+        # Shared with every worker: written by the parent (pid, started) and by
+        # the worker owning the row (ready, requests)
+        self._table = multiprocessing.RawArray("d", self.workers * _COLUMNS)
+        self._parent_pid: Optional[int] = None
+        self._socket: Optional[socket.socket] = None
+        self._slot: Optional[int] = None
+        self._stopping = False
+        self._restart_requested = False
+
+    # Parent
+
+    def serve_forever(self) -> None:
+        """Load, fork the workers and supervise them until SIGTERM or SIGINT."""
+        self._parent_pid = os.getpid()
+        if self.archive is not None:
+            seconds = self.archive.warmup(self.warmup_queries)
+            print(f"Warmed up in {seconds * 1000:.0f}ms")
+
+        self._socket = socket.create_server((self.host, self.port), backlog=self.backlog)
+        self.port = self._socket.getsockname()[1]
+
+        # Everything allocated so far is shared with the workers; keep the
+        # collector from writing to those objects (and copying their pages)
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+
+        print(f"Serving on http://{self.host}:{self.port} with {self.workers} workers")
+        for slot in range(self.workers):
+            self._spawn(slot)
+        try:
+            self._supervise()
+        finally:
+            self._socket.close()
+
+    def _spawn(self, slot: int) -> int:
+        row = slot * _COLUMNS
+        self._table[row + _READY] = 0
+        self._table[row + _REQUESTS] = 0
+        self._table[row + _STARTED] = time.time()
+        pid = os.fork()
+        if pid == 0:
+            self._slot = slot
+            code = 1
+            try:
+                self._run_worker()
+                code = 0
+            except BaseException as e:
+                print(f"Worker {slot} failed: {e!r}", file=sys.stderr)
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                # Skip the parent's atexit handlers and finalizers
+                os._exit(code)
+        self._table[row + _PID] = pid
+        return pid
+
+    def _supervise(self) -> None:
+        while True:
+            if self._stopping:
+                self._stop_workers()
+                return
+            if self._restart_requested:
+                self._restart_requested = False
+                self._rolling_restart()
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+            slot = self._slot_of(pid)
+            if slot is None or self._stopping:
+                continue
+            lifetime = time.time() - self._table[slot * _COLUMNS + _STARTED]
+            code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            print(f"Worker {slot} (pid {pid}) exited with status {code}, restarting")
+            if lifetime < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self._spawn(slot)
+
+    def _slot_of(self, pid: int) -> Optional[int]:
+        for slot in range(self.workers):
+            if int(self._table[slot * _COLUMNS + _PID]) == pid:
+                return slot
+        return None
+
+    def _rolling_restart(self) -> None:
+        """Replace workers one at a time, so the others keep serving."""
+        print("Restarting workers")
+        for slot in range(self.workers):
+            pid = int(self._table[slot * _COLUMNS + _PID])
+            self._terminate(pid)
+            self._spawn(slot)
+            deadline = time.time() + READY_TIMEOUT
+            while not self._table[slot * _COLUMNS + _READY] and time.time() < deadline and not self._stopping:
+                time.sleep(0.05)
+
+    def _terminate(self, pid: int, timeout: float = 30.0) -> None:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    return
+            except ChildProcessError:
+                return
+            time.sleep(0.05)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+    def _stop_workers(self) -> None:
+        print("Stopping workers")
+        for slot in range(self.workers):
+            self._terminate(int(self._table[slot * _COLUMNS + _PID]))
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_restart(self, signum, frame) -> None:
+        self._restart_requested = True
+
+    # Worker
+
+    def _run_worker(self) -> None:
+        from werkzeug.serving import BaseWSGIServer, ThreadedWSGIServer
+
+        if self._socket is None or self._slot is None:
+            raise RuntimeError("Workers are started by serve_forever()")
+        row = self._slot * _COLUMNS
+        for signum in (signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        random.seed()
+        if self.archive is not None:
+            self.archive.reset_after_fork()
+            self.archive.warmup(self.warmup_queries)
+
+        app = self._count_requests(self.app, row)
+        server: BaseWSGIServer
+        if self.threads > 1:
+            # werkzeug's threaded server starts a thread per connection; stop
+            # accepting while `threads` requests are in progress
+            semaphore = threading.BoundedSemaphore(self.threads)
+
+            class BoundedWSGIServer(ThreadedWSGIServer):
+                def process_request(self, request, client_address):
+                    semaphore.acquire()
+                    try:
+                        super().process_request(request, client_address)
+                    except BaseException:
+                        semaphore.release()
+                        raise
+
+                def process_request_thread(self, request, client_address):
+                    try:
+                        super().process_request_thread(request, client_address)
+                    finally:
+                        semaphore.release()
+
+            server = BoundedWSGIServer(self.host, self.port, app, fd=self._socket.fileno())
+        else:
+            server = BaseWSGIServer(self.host, self.port, app, fd=self._socket.fileno())
+
+        # Finish the request in progress, then exit
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+        self._table[row + _READY] = 1
+        server.serve_forever()
+
+    def _count_requests(self, app: Callable, row: int) -> Callable:
+        lock = threading.Lock()
+
+        def counting_app(environ, start_response):
+            with lock:
+                self._table[row + _REQUESTS] += 1
+            return app(environ, start_response)
+        return counting_app
+
+    # Health
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Health and memory of all workers (callable from the parent or any worker).
+
+        Returns:
+            Dict with "workers" (slot, pid, ready, uptime_s, requests and memory
+            per worker), "ready" count, total worker "pss"/"uss" bytes and the
+            parent's memory
+        """
+        workers: List[Dict[str, Any]] = []
+        now = time.time()
+        for slot in range(self.workers):
+            row = slot * _COLUMNS
+            pid = int(self._table[row + _PID])
+            workers.append({
+                "slot": slot,
+                "pid": pid,
+                "ready": bool(self._table[row + _READY]),
+                "uptime_s": round(now - self._table[row + _STARTED], 1) if pid else 0.0,
+                "requests": int(self._table[row + _REQUESTS]),
+                "memory": process_memory(pid) if pid else {},
+                "current": slot == self._slot,
+            })
+        return {
+            "workers": workers,
+            "ready": sum(worker["ready"] for worker in workers),
+            "pss": sum(worker["memory"].get("pss", 0) for worker in workers),
+            "uss": sum(worker["memory"].get("uss", 0) for worker in workers),
+            "parent": {"pid": self._parent_pid,
+                       "memory": process_memory(self._parent_pid) if self._parent_pid else {}},
+        }
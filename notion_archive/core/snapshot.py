@@ -0,0 +1,493 @@
+"""
+Portable, read-only index snapshots.
+
+A snapshot is one versioned file holding everything a search replica needs:
+
+- embeddings as one contiguous float32 matrix
+- chunk ids, texts and metadata in a compact columnar layout
+- the page catalog and any other optional sections (e.g. lexical indexes)
+
+Layout::
+
+    b"NASNAP" | u16 format version | sections... | JSON table of contents | u64 toc length | b"NASNAPEND"
+
+Every section starts on a page boundary, so the file can be memory-mapped and
+the vectors used in place: loading takes milliseconds regardless of size, and
+all replica processes on a host share one copy of the vectors in the page
+cache. `SnapshotCollection` answers the subset of the ChromaDB collection API
+that NotionArchive uses for searching, with exact (brute-force) scoring.
+"""
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b"NASNAP"
+END_MAGIC = b"NASNAPEND"
+FORMAT_VERSION = 1
+ALIGNMENT = 4096
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a file is not a snapshot or uses an unsupported format version."""
+
+
+class _SnapshotWriter:
+    """Appends page-aligned sections to a snapshot file and records them in the TOC."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        f.write(MAGIC + struct.pack("<H", FORMAT_VERSION))
+
+    def _align(self) -> int:
+        offset = self.f.tell()
+        padding = (-offset) % ALIGNMENT
+        if padding:
+            self.f.write(b"\0" * padding)
+        return offset + padding
+
+    def begin(self, name: str, **info) -> None:
+        self.sections[name] = dict(info, offset=self._align())
+
+    def end(self, name: str) -> None:
+        section = self.sections[name]
+        section["length"] = self.f.tell() - section["offset"]
+
+    def write_array(self, name: str, array: np.ndarray) -> None:
+        array = np.ascontiguousarray(array)
+        self.begin(name, kind="array", dtype=array.dtype.str, shape=list(array.shape))
+        self.f.write(array.tobytes())
+        self.end(name)
+
+    def write_strings(self, name: str, values: List[str]) -> None:
+        """Strings as a uint64 offsets array followed by one UTF-8 blob."""
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        self.write_array(f"{name}.offsets", offsets)
+        self.begin(f"{name}.data", kind="bytes")
+        for value in encoded:
+            self.f.write(value)
+        self.end(f"{name}.data")
+
+    def write_json(self, name: str, data: Any) -> None:
+        self.begin(name, kind="json", compression="zlib")
+        self.f.write(zlib.compress(json.dumps(data).encode("utf-8")))
+        self.end(name)
+
+    def write_bytes(self, name: str, data: bytes) -> None:
+        self.begin(name, kind="bytes")
+        self.f.write(data)
+        self.end(name)
+
+    def finish(self, info: Dict[str, Any]) -> None:
+        toc = json.dumps({"info": info, "sections": self.sections}).encode("utf-8")
+        self.f.write(toc)
+        self.f.write(struct.pack("<Q", len(toc)))
+        self.f.write(END_MAGIC)
+
+
+def _column_type(values: List[Any]) -> str:
+    kinds = {type(value) for value in values if value is not None}
+    if kinds <= {bool}:
+        return "bool"
+    if kinds <= {int, bool}:
+        return "int"
+    if kinds <= {int, float, bool}:
+        return "float"
+    return "str"
+
+
+def write_snapshot(path: str,
+                   collection,
+                   catalog: Optional[List[Dict[str, Any]]] = None,
+                   extra_sections: Optional[Dict[str, bytes]] = None,
+                   batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Write a collection (vectors, texts, metadata) and optional extras to a snapshot file.
+
+    Vectors are streamed to disk batch by batch; texts and metadata are
+    collected in memory and written as columns at the end.
+
+    Args:
+        path: Destination file (written to a temporary file, then renamed)
+        collection: ChromaDB collection to export
+        catalog: Page-level records (title, url, workspace, ...) to include
+        extra_sections: Additional named binary sections
+        batch_size: Chunks read from the collection per batch
+
+    Returns:
+        The snapshot's info header
+    """
+    total = collection.count()
+    collection_metadata = dict(collection.metadata or {})
+    space = collection_metadata.get("hnsw:space", "l2")
+
+    ids: List[str] = []
+    texts: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    dimension = None
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        writer = _SnapshotWriter(f)
+        sq_norms = []
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"]
+            )
+            vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+            if dimension is None:
+                dimension = vectors.shape[1]
+                writer.begin("vectors", kind="array", dtype=np.dtype(np.float32).str)
+            if space == "cosine":
+                # Store unit vectors so cosine distance is a single dot product
+                vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            sq_norms.append(np.sum(vectors ** 2, axis=1))
+            f.write(vectors.tobytes())
+            ids.extend(batch["ids"])
+            texts.extend(text or "" for text in batch["documents"])
+            metadatas.extend(metadata or {} for metadata in batch["metadatas"])
+
+        if dimension is None:
+            raise ValueError("Cannot snapshot an empty index. Run build_index() first.")
+        writer.end("vectors")
+        writer.sections["vectors"]["shape"] = [len(ids), dimension]
+        writer.write_array("sq_norms", np.concatenate(sq_norms).astype(np.float32))
+
+        writer.write_strings("ids", ids)
+        writer.write_strings("documents", texts)
+
+        # One column per metadata key, typed so filters can run on numpy arrays
+        columns = {}
+        keys = sorted({key for metadata in metadatas for key in metadata})
+        for key in keys:
+            values = [metadata.get(key) for metadata in metadatas]
+            column_type = _column_type(values)
+            missing = np.array([value is None for value in values], dtype=np.bool_)
+            name = f"meta.{key}"
+            if column_type == "str":
+                writer.write_strings(name, ["" if value is None else str(value) for value in values])
+            else:
+                dtype = {"bool": np.bool_, "int": np.int64, "float": np.float64}[column_type]
+                writer.write_array(name, np.array([0 if value is None else value for value in values], dtype=dtype))
+            if missing.any():
+                writer.write_array(f"{name}.missing", missing)
+            columns[key] = {"type": column_type, "nullable": bool(missing.any())}
+
+        if catalog is not None:
+            writer.write_json("catalog", catalog)
+        for name, data in (extra_sections or {}).items():
+            writer.write_bytes(f"extra.{name}", data)
+
+        info = {
+            "format_version": FORMAT_VERSION,
+            "created": datetime.now().isoformat(),
+            "count": len(ids),
+            "dimension": dimension,
+            "space": space,
+            "collection_metadata": collection_metadata,
+            "columns": columns,
+        }
+        writer.finish(info)
+    os.replace(tmp_path, path)
+    return info
+
+
+class Snapshot:
+    """A memory-mapped, read-only snapshot file."""
+
+    def __init__(self, path: str):
+        """
+        Open a snapshot. Only the table of contents is read; sections are
+        mapped on access.
+
+        Args:
+            path: Snapshot file written by write_snapshot
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = self._mmap[:len(MAGIC) + 2]
+        if header[:len(MAGIC)] != MAGIC or self._mmap[-len(END_MAGIC):] != END_MAGIC:
+            raise SnapshotFormatError(f"Not a Notion Archive snapshot: {path}")
+        version = struct.unpack("<H", header[len(MAGIC):])[0]
+        if version > FORMAT_VERSION:
+            raise SnapshotFormatError(f"Snapshot format version {version} is newer than supported ({FORMAT_VERSION})")
+
+        end = len(self._mmap) - len(END_MAGIC)
+        (toc_length,) = struct.unpack("<Q", self._mmap[end - 8:end])
+        toc = json.loads(self._mmap[end - 8 - toc_length:end - 8].decode("utf-8"))
+        self.info: Dict[str, Any] = toc["info"]
+        self.sections: Dict[str, Dict[str, Any]] = toc["sections"]
+        self._cache: Dict[str, Any] = {}
+
+    def has_section(self, name: str) -> bool:
+        return name in self.sections
+
+    def array(self, name: str) -> np.ndarray:
+        """A read-only numpy view of an array section (no copy)."""
+        if name not in self._cache:
+            section = self.sections[name]
+            dtype = np.dtype(section["dtype"])
+            count = int(np.prod(section["shape"])) if section["shape"] else 0
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=section["offset"])
+            self._cache[name] = array.reshape(section["shape"])
+        return self._cache[name]
+
+    def raw(self, name: str) -> memoryview:
+        """The bytes of a section, without copying."""
+        section = self.sections[name]
+        return memoryview(self._mmap)[section["offset"]:section["offset"] + section["length"]]
+
+    def string(self, name: str, index: int) -> str:
+        """One value of a string column."""
+        offsets = self.array(f"{name}.offsets")
+        base = self.sections[f"{name}.data"]["offset"]
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        return self._mmap[base + start:base + end].decode("utf-8")
+
+    def strings(self, name: str) -> List[str]:
+        """All values of a string column (decoded once, then cached)."""
+        key = f"{name}.decoded"
+        if key not in self._cache:
+            offsets = self.array(f"{name}.offsets").astype(np.int64)
+            data = bytes(self.raw(f"{name}.data"))
+            self._cache[key] = [
+                data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)
+            ]
+        return self._cache[key]
+
+    def json(self, name: str) -> Any:
+        """Decode a JSON section."""
+        return json.loads(zlib.decompress(self.raw(name)).decode("utf-8"))
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.array("vectors")
+
+    @property
+    def catalog(self) -> Optional[List[Dict[str, Any]]]:
+        if "catalog" not in self.sections:
+            return None
+        if "catalog" not in self._cache:
+            self._cache["catalog"] = self.json("catalog")
+        return self._cache["catalog"]
+
+    def extra(self, name: str) -> Optional[memoryview]:
+        """An optional extra section written with extra_sections, if present."""
+        key = f"extra.{name}"
+        return self.raw(key) if key in self.sections else None
+
+    def close(self) -> None:
+        self._cache.clear()
+        self._mmap.close()
+        self._file.close()
+
+
+class SnapshotCollection:
+    """
+    Read-only stand-in for a ChromaDB collection backed by a Snapshot.
+
+    Supports count(), get() and query() with metadata `where` filters
+    ($eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $contains, $and, $or).
+    Queries are exact: every vector is scored with one matrix product.
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self.name = f"snapshot:{os.path.basename(snapshot.path)}"
+        self.metadata = snapshot.info["collection_metadata"]
+        self._columns = snapshot.info["columns"]
+        self._id_index: Optional[Dict[str, int]] = None
+
+    def count(self) -> int:
+        return self.snapshot.info["count"]
+
+    # Filtering
+
+    def _column(self, key: str):
+        info = self._columns.get(key)
+        if info is None:
+            return None, None
+        name = f"meta.{key}"
+        values = self.snapshot.strings(name) if info["type"] == "str" else self.snapshot.array(name)
+        missing = self.snapshot.array(f"{name}.missing") if info["nullable"] else None
+        return values, missing
+
+    def _compare(self, key: str, op: str, operand: Any) -> np.ndarray:
+        values, missing = self._column(key)
+        n = self.count()
+        if values is None:
+            return np.full(n, op in ("$ne", "$nin"), dtype=np.bool_)
+
+        if isinstance(values, np.ndarray):
+            if op == "$eq":
+                mask = values == operand
+            elif op == "$ne":
+                mask = values != operand
+            elif op == "$gt":
+                mask = values > operand
+            elif op == "$gte":
+                mask = values >= operand
+            elif op == "$lt":
+                mask = values < operand
+            elif op == "$lte":
+                mask = values <= operand
+            elif op == "$in":
+                mask = np.isin(values, operand)
+            elif op == "$nin":
+                mask = ~np.isin(values, operand)
+            else:
+                raise ValueError(f"Unsupported operator {op} for numeric field {key}")
+        else:
+            if op == "$eq":
+                mask = np.fromiter((value == operand for value in values), dtype=np.bool_, count=n)
+            elif op == "$ne":
+                mask = np.fromiter((value != operand for value in values), dtype=np.bool_, count=n)
+            elif op in ("$in", "$nin"):
+                wanted = set(operand)
+                mask = np.fromiter((value in wanted for value in values), dtype=np.bool_, count=n)
+                if op == "$nin":
+                    mask = ~mask
+            elif op == "$contains":
+                mask = np.fromiter((operand in value for value in values), dtype=np.bool_, count=n)
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                compare = {"$gt": str.__gt__, "$gte": str.__ge__, "$lt": str.__lt__, "$lte": str.__le__}[op]
+                mask = np.fromiter((compare(value, operand) for value in values), dtype=np.bool_, count=n)
+            else:
+                raise ValueError(f"Unsupported operator {op} for field {key}")
+
+        if missing is not None and op not in ("$ne", "$nin"):
+            mask = mask & ~missing
+        return mask
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Rows satisfying a where clause (None: no clause, every row)."""
+        if not where:
+            return None
+        return self._where_mask(where)
+
+    def _where_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        masks = []
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                parts = [self._where_mask(clause) for clause in condition]
+                combined = parts[0]
+                for part in parts[1:]:
+                    combined = (combined & part) if key == "$and" else (combined | part)
+                masks.append(combined)
+            elif isinstance(condition, dict):
+                for op, operand in condition.items():
+                    masks.append(self._compare(key, op, operand))
+            else:
+                masks.append(self._compare(key, "$eq", condition))
+        mask = masks[0]
+        for part in masks[1:]:
+            mask = mask & part
+        return mask
+
+    # Reading
+
+    def _metadata(self, i: int) -> Dict[str, Any]:
+        metadata = {}
+        for key, info in self._columns.items():
+            values, missing = self._column(key)
+            if missing is not None and missing[i]:
+                continue
+            value = values[i]
+            if info["type"] == "bool":
+                value = bool(value)
+            elif info["type"] == "int":
+                value = int(value)
+            elif info["type"] == "float":
+                value = float(value)
+            metadata[key] = value
+        return metadata
+
+    def _rows(self, indices, include: List[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"ids": [self.snapshot.string("ids", int(i)) for i in indices]}
+        if "documents" in include:
+            result["documents"] = [self.snapshot.string("documents", int(i)) for i in indices]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadata(int(i)) for i in indices]
+        if "embeddings" in include:
+            result["embeddings"] = self.snapshot.vectors[np.asarray(indices, dtype=np.int64)]
+        return result
+
+    def get(self,
+            ids: Optional[List[str]] = None,
+            where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            include: Optional[List[str]] = None) -> Dict[str, Any]:
+        if include is None:
+            include = ["documents", "metadatas"]
+        indices: Sequence[int]
+        if ids is not None:
+            if self._id_index is None:
+                self._id_index = {chunk_id: i for i, chunk_id in enumerate(self.snapshot.strings("ids"))}
+            indices = [self._id_index[chunk_id] for chunk_id in ids if chunk_id in self._id_index]
+        else:
+            indices = range(self.count())
+        mask = self._mask(where)
+        if mask is not None:
+            indices = [i for i in indices if mask[i]]
+        start = offset or 0
+        end = start + limit if limit is not None else None
+        return self._rows(list(indices)[start:end], include)
+
+    def query(self,
+              query_embeddings: List[List[float]],
+              n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None,
+              include: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        if include is None:
+            include = ["documents", "metadatas", "distances"]
+        vectors = self.snapshot.vectors
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        space = self.snapshot.info["space"]
+        if space == "cosine":
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        dots = queries @ vectors.T
+        if space == "l2":
+            distances = self.snapshot.array("sq_norms")[None, :] - 2 * dots + np.sum(queries ** 2, axis=1)[:, None]
+        else:
+            distances = 1 - dots
+
+        mask = self._mask(where)
+        if mask is not None:
+            distances = np.where(mask[None, :], distances, np.inf)
+
+        result: Dict[str, List[Any]] = {key: [] for key in ["ids"] + list(include)}
+        for row in distances:
+            available = int(np.isfinite(row).sum())
+            k = min(n_results, available)
+            if k == 0:
+                top = np.array([], dtype=np.int64)
+            else:
+                top = np.argpartition(row, k - 1)[:k]
+                top = top[np.argsort(row[top])]
+            rows = self._rows(top, include)
+            for key in rows:
+                result[key].append(rows[key])
+            if "distances" in include:
+                result["distances"].append(row[top].astype(float).tolist())
+        return result
+
+    def _read_only(self, *args, **kwargs):
+        raise ValueError("Snapshot indexes are read-only. Build or update the index in a "
+                         "regular archive and export a new snapshot.")
+
+    add = upsert = update = delete = modify = _read_only
@@ -0,0 +1,229 @@
+"""
+Persistent store of parsed Notion documents.
+
+Parsing an export with BeautifulSoup is the slowest part of starting up an
+archive. The store keeps every parsed page in a small SQLite database next to
+the vector index, keyed by its source file and an mtime/size fingerprint, so
+later runs only re-parse files that actually changed.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .parser import NotionDocument
+from ..utils.files import Fingerprint
+
+SCHEMA_VERSION = 2
+
+# One stored file: (relative path, fingerprint, parsed document or None)
+StoredFile = Tuple[str, Fingerprint, Optional[NotionDocument]]
+
+
+class DocumentStore:
+    """SQLite-backed cache of parsed documents, keyed by export root and file path."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a document store.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        """Create tables, discarding stores written by an incompatible version."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self._conn.execute("DROP TABLE IF EXISTS documents")
+
+        # Files that produced no document (no page body, parse error) are kept
+        # with a NULL doc_id so they are not re-parsed on every start.
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                export_root TEXT NOT NULL,
+                url_path TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                doc_id TEXT,
+                title TEXT,
+                plain_text BLOB,
+                content BLOB,
+                workspace TEXT,
+                breadcrumb TEXT,
+                tags TEXT,
+                created_by TEXT,
+                created_time TEXT,
+                last_edited_by TEXT,
+                last_edited_time TEXT,
+                links TEXT,
+                PRIMARY KEY (export_root, url_path)
+            )
+        """)
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def fingerprints(self, export_root: str) -> Dict[str, Fingerprint]:
+        """Return the stored fingerprint of every file of an export."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url_path, mtime_ns, size FROM documents WHERE export_root = ?",
+                (export_root,)
+            ).fetchall()
+        return {url_path: (mtime_ns, size) for url_path, mtime_ns, size in rows}
+
+    def count(self, export_root: str) -> int:
+        """Return the number of stored documents for an export."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE export_root = ? AND doc_id IS NOT NULL",
+                (export_root,)
+            ).fetchone()[0]
+
+    def load(self, export_root: str, url_paths: Optional[Iterable[str]] = None,
+             html_mode: str = "full") -> List[NotionDocument]:
+        """
+        Load stored documents of an export.
+
+        Args:
+            export_root: Absolute path of the export
+            url_paths: Only load these files (default: every file of the export)
+            html_mode: How loaded documents keep their HTML, one of HTML_MODES
+
+        Returns:
+            Documents in url_path order
+        """
+        query = """
+            SELECT doc_id, title, plain_text, content, url_path, workspace, breadcrumb, tags,
+                   created_by, created_time, last_edited_by, last_edited_time, links
+            FROM documents WHERE export_root = ? AND doc_id IS NOT NULL
+        """
+        with self._lock:
+            if url_paths is None:
+                rows = self._conn.execute(query + " ORDER BY url_path", (export_root,)).fetchall()
+            else:
+                wanted = set(url_paths)
+                rows = [
+                    row for row in self._conn.execute(query + " ORDER BY url_path", (export_root,))
+                    if row[4] in wanted
+                ]
+        return [self._row_to_document(export_root, row, html_mode) for row in rows]
+
+    def load_batch(self, export_root: str, after: Optional[str], limit: int,
+                   html_mode: str = "full") -> List[NotionDocument]:
+        """
+        Load the next stored documents of an export, for reading it in batches.
+
+        Args:
+            export_root: Absolute path of the export
+            after: url_path of the last document of the previous batch (None: start)
+            limit: Documents to load
+            html_mode: How loaded documents keep their HTML, one of HTML_MODES
+
+        Returns:
+            Up to `limit` documents in url_path order (empty at the end)
+        """
+        query = """
+            SELECT doc_id, title, plain_text, content, url_path, workspace, breadcrumb, tags,
+                   created_by, created_time, last_edited_by, last_edited_time, links
+            FROM documents WHERE export_root = ? AND doc_id IS NOT NULL AND url_path > ?
+            ORDER BY url_path LIMIT ?
+        """
+        with self._lock:
+            rows = self._conn.execute(query, (export_root, after or "", limit)).fetchall()
+        return [self._row_to_document(export_root, row, html_mode) for row in rows]
+
+    def put_many(self, export_root: str, files: Iterable[StoredFile]) -> None:
+        """Insert or replace parsed files in a single transaction."""
+        rows = [
+            self._document_to_row(export_root, url_path, fingerprint, doc)
+            for url_path, fingerprint, doc in files
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def remove(self, export_root: str, url_paths: Iterable[str]) -> None:
+        """Forget files that no longer exist in the export."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM documents WHERE export_root = ? AND url_path = ?",
+                [(export_root, url_path) for url_path in url_paths]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _document_to_row(export_root: str, url_path: str, fingerprint: Fingerprint,
+                         doc: Optional[NotionDocument]) -> tuple:
+        mtime_ns, size = fingerprint
+        if doc is None:
+            return (export_root, url_path, mtime_ns, size) + (None,) * 12
+        return (
+            export_root,
+            url_path,
+            mtime_ns,
+            size,
+            doc.id,
+            doc.title,
+            zlib.compress(doc.plain_text.encode("utf-8")),
+            doc.compressed_content(),
+            doc.workspace,
+            json.dumps(doc.breadcrumb),
+            json.dumps(doc.tags),
+            doc.created_by,
+            doc.created_time.isoformat() if doc.created_time else None,
+            doc.last_edited_by,
+            doc.last_edited_time.isoformat() if doc.last_edited_time else None,
+            json.dumps(doc.links),
+        )
+
+    @staticmethod
+    def _row_to_document(export_root: str, row: tuple, html_mode: str) -> NotionDocument:
+        (doc_id, title, plain_text, content, url_path, workspace, breadcrumb, tags,
+         created_by, created_time, last_edited_by, last_edited_time, links) = row
+
+        source_path = None
+        if html_mode == "full":
+            content = zlib.decompress(content).decode("utf-8") if content else ""
+        elif html_mode == "lazy":
+            content, source_path = None, os.path.join(export_root, url_path)
+        elif html_mode == "none":
+            content = None
+
+        return NotionDocument(
+            id=doc_id,
+            title=title,
+            content=content,
+            plain_text=zlib.decompress(plain_text).decode("utf-8"),
+            url_path=url_path,
+            created_by=created_by,
+            created_time=datetime.fromisoformat(created_time) if created_time else None,
+            last_edited_by=last_edited_by,
+            last_edited_time=datetime.fromisoformat(last_edited_time) if last_edited_time else None,
+            tags=json.loads(tags),
+            workspace=workspace,
+            breadcrumb=json.loads(breadcrumb),
+            source_path=source_path,
+            links=json.loads(links) if links else [],
+            export_root=export_root,
+        )
@@ -0,0 +1,224 @@
+"""
+Incremental parsing of very large Notion pages.
+
+Loading a page with `f.read()` and BeautifulSoup keeps the whole file, its
+parse tree and its text in memory at once, which is why pages over
+LARGE_PAGE_BYTES used to be skipped. Those pages are parsed here with the
+event-based `html.parser` instead: the file is fed in blocks, the title,
+id and properties table are collected as they go by, and page-body text is
+handed on as soon as it is decoded, so the chunker can consume it while the
+rest of the file is still unread.
+"""
+
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+# Pages above this size are streamed instead of parsed with BeautifulSoup
+LARGE_PAGE_BYTES = 10 * 1024 * 1024
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class PageStreamParser(HTMLParser):
+    """
+    Event-based parser for one exported Notion page.
+
+    Collects `title`, `doc_id`, `metadata` (same keys as
+    NotionExportParser._extract_metadata) and the `hrefs` of page-body links,
+    and buffers page-body text until `drain()` is called.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.doc_id: Optional[str] = None
+        self.metadata: Dict[str, Any] = {}
+        self.hrefs: List[str] = []
+        self.body_started = False
+        self.body_finished = False
+
+        self._pending: List[str] = []
+        self._title_parts: Optional[List[str]] = None
+        self._body_depth = 0
+        self._skip_depth = 0
+
+        # Properties table state: cells of the current row, and what is being captured
+        self._in_properties = False
+        self._row: Optional[List[Dict[str, List[str]]]] = None
+        self._capture: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get("class") or "").split()
+
+        if tag == "article" and self.doc_id is None:
+            self.doc_id = dict(attrs).get("id")
+        elif tag == "h1" and "page-title" in classes and self.title is None:
+            self._title_parts = []
+        elif tag == "table" and "properties" in classes:
+            self._in_properties = True
+        elif self._in_properties:
+            if tag == "tr":
+                self._row = []
+            elif tag in ("th", "td") and self._row is not None:
+                self._row.append({"text": [], "user": [], "time": [], "tags": []})
+            elif tag == "span" and "user" in classes:
+                self._capture = "user"
+            elif tag == "span" and "selected-value" in classes:
+                self._capture = "tags"
+                self._cell()["tags"].append("")
+            elif tag == "time":
+                self._capture = "time"
+
+        if tag == "div":
+            if self._body_depth:
+                self._body_depth += 1
+            elif "page-body" in classes and not self.body_started:
+                self.body_started = True
+                self._body_depth = 1
+        elif tag in ("script", "style") and self._body_depth:
+            self._skip_depth += 1
+        elif tag == "a" and self._body_depth:
+            href = dict(attrs).get("href")
+            if href:
+                self.hrefs.append(href)
+
+    def handle_endtag(self, tag):
+        if tag == "h1" and self._title_parts is not None:
+            self.title = "".join(self._title_parts).strip()
+            self._title_parts = None
+        elif tag == "table" and self._in_properties:
+            self._in_properties = False
+        elif tag == "tr" and self._row is not None:
+            self._add_property(self._row)
+            self._row = None
+        elif tag in ("span", "time"):
+            self._capture = None
+
+        if tag == "div" and self._body_depth:
+            self._body_depth -= 1
+            if not self._body_depth:
+                self.body_finished = True
+        elif tag in ("script", "style") and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        if self._row:
+            cell = self._cell()
+            cell["text"].append(data)
+            if self._capture == "tags":
+                cell["tags"][-1] += data
+            elif self._capture:
+                cell[self._capture].append(data)
+        if self._body_depth and not self._skip_depth:
+            self._pending.append(data)
+
+    def drain(self) -> str:
+        """Return the page-body text decoded since the last call, whitespace-collapsed."""
+        text = _WHITESPACE_RE.sub(" ", "".join(self._pending))
+        self._pending = []
+        return text
+
+    def _cell(self) -> Dict[str, List[str]]:
+        return self._row[-1] if self._row else {"text": [], "user": [], "time": [], "tags": []}
+
+    def _add_property(self, cells: List[Dict[str, List[str]]]) -> None:
+        """Convert one properties-table row, mirroring NotionExportParser._extract_metadata."""
+        if len(cells) < 2:
+            return
+        key = "".join(cells[0]["text"]).strip().lower().replace(' ', '_')
+        value = cells[1]
+
+        if key in ("created_by", "last_edited_by"):
+            user = "".join(value["user"]).strip()
+            self.metadata[key] = user or None
+        elif key in ("created_time", "last_edited_time"):
+            if value["time"]:
+                time_str = "".join(value["time"]).strip().replace('@', '').strip()
+                try:
+                    self.metadata[key] = datetime.strptime(time_str, '%B %d, %Y %I:%M %p')
+                except ValueError:
+                    self.metadata[key] = None
+        elif key == "tags":
+            self.metadata[key] = [tag.strip() for tag in value["tags"]]
+
+
+def stream_page(file_path: Union[str, Path],
+                parser: Optional[PageStreamParser] = None,
+                block_size: int = 1 << 16,
+                header_only: bool = False) -> Iterator[str]:
+    """
+    Feed a page to a PageStreamParser block by block, yielding page-body text.
+
+    The header (title, id, properties) precedes the body in Notion exports, so
+    it is complete on the parser by the time the first text is yielded.
+
+    Args:
+        file_path: Exported HTML page
+        parser: Parser to feed (pass one in to read its header fields)
+        block_size: Characters read per block
+        header_only: Stop as soon as the page body starts
+
+    Yields:
+        Whitespace-collapsed body text, in order
+    """
+    parser = parser or PageStreamParser()
+    last_space = True
+    with open(file_path, "r", encoding="utf-8") as f:
+        for block in iter(lambda: f.read(block_size), ""):
+            parser.feed(block)
+            if header_only and parser.body_started:
+                break
+            text = parser.drain()
+            # Collapse whitespace across block boundaries too
+            if last_space:
+                text = text.lstrip()
+            if text:
+                last_space = text[-1] == " "
+                yield text
+            if parser.body_finished:
+                break
+    parser.close()
+    if not header_only:
+        text = parser.drain()
+        text = text.lstrip() if last_space else text
+        if text.strip():
+            yield text.rstrip()
+
+
+def stream_chunks(blocks: Iterable[str], text_splitter, chunk_size: int,
+                  window_chunks: int = 8) -> Iterator[str]:
+    """
+    Split streamed text into chunks while it is still arriving.
+
+    Text is buffered until it spans about `window_chunks` chunks; all chunks but
+    the last are emitted, and the tail from the last chunk on is kept so it can
+    continue into the next block. Memory stays bounded by the window size.
+
+    Args:
+        blocks: Text blocks in order
+        text_splitter: Splitter with a `split_text` method
+        chunk_size: The splitter's chunk size
+        window_chunks: Chunks of text buffered before splitting
+
+    Yields:
+        Chunk texts
+    """
+    window = chunk_size * window_chunks
+    buffer = ""
+    for block in blocks:
+        buffer += block
+        if len(buffer) < window:
+            continue
+        chunks = text_splitter.split_text(buffer)
+        if len(chunks) < 2:
+            continue
+        yield from chunks[:-1]
+        tail = buffer.rfind(chunks[-1])
+        buffer = buffer[tail:] if tail != -1 else chunks[-1]
+    if buffer.strip():
+        yield from text_splitter.split_text(buffer)
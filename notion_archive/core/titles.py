@@ -0,0 +1,260 @@
+"""
+Title and breadcrumb index for navigational queries.
+
+Many queries are just page names ("Q3 roadmap", "Eng onboarding"). The title
+index answers them without embedding the query or scanning body chunks:
+exact titles, word-prefix matches over title and breadcrumb words, and
+fuzzy trigram matches for typos, all from small in-memory dictionaries.
+It also keeps one embedding per title, so full-text searches (which embed
+the query anyway) can boost pages whose title is semantically close.
+"""
+
+import io
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Match strengths, in [0, 1]
+EXACT_MATCH = 1.0
+TITLE_PREFIX_MATCH = 0.9
+PATH_PREFIX_MATCH = 0.7
+FUZZY_MATCH = 0.6
+
+# Minimum trigram similarity between a query word and a title word for a fuzzy match
+FUZZY_THRESHOLD = 0.4
+
+# Minimum cosine similarity between query and title embeddings to count as a match
+SEMANTIC_THRESHOLD = 0.8
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase words separated by single spaces."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """In-memory lexical index over page titles and breadcrumbs, plus title embeddings."""
+
+    def __init__(self):
+        self.page_ids: List[str] = []
+        self.titles: List[str] = []
+        self.breadcrumbs: List[str] = []
+        self.url_paths: List[str] = []
+        self.workspaces: List[str] = []
+        self.embeddings: Optional[np.ndarray] = None
+        self._positions: Dict[str, int] = {}
+        self._reset_lexical()
+
+    def _reset_lexical(self) -> None:
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._title_words: Dict[str, Set[int]] = defaultdict(set)
+        self._path_words: Dict[str, Set[int]] = defaultdict(set)
+        self._word_trigrams: Dict[str, List[str]] = defaultdict(list)
+        self._vocabulary: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.page_ids)
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[Tuple[str, str, str, str, str]],
+                   embeddings: Optional[np.ndarray] = None) -> "TitleIndex":
+        """
+        Build an index from (page_id, title, breadcrumb, url_path, workspace) tuples.
+
+        Args:
+            pages: Page records; breadcrumb is the " > "-joined path
+            embeddings: One title embedding per page (optional)
+        """
+        index = cls()
+        for page_id, title, breadcrumb, url_path, workspace in pages:
+            index._positions[page_id] = len(index.page_ids)
+            index.page_ids.append(page_id)
+            index.titles.append(title)
+            index.breadcrumbs.append(breadcrumb)
+            index.url_paths.append(url_path)
+            index.workspaces.append(workspace)
+        if embeddings is not None:
+            index.embeddings = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(index.embeddings, axis=1, keepdims=True)
+            index.embeddings /= np.maximum(norms, 1e-12)
+        index._build_lexical()
+        return index
+
+    def _build_lexical(self) -> None:
+        self._reset_lexical()
+        for i, (title, breadcrumb) in enumerate(zip(self.titles, self.breadcrumbs)):
+            normalized = normalize_title(title)
+            self._exact[normalized].append(i)
+            for word in normalized.split():
+                self._title_words[word].add(i)
+            for word in normalize_title(breadcrumb).split():
+                self._path_words[word].add(i)
+        self._vocabulary = sorted(set(self._title_words) | set(self._path_words))
+        for word in self._vocabulary:
+            for trigram in _trigrams(word):
+                self._word_trigrams[trigram].append(word)
+
+    def _prefix_matches(self, token: str) -> Tuple[Set[int], Set[int]]:
+        """Entries with a title word, or any title/breadcrumb word, starting with `token`."""
+        in_title: Set[int] = set()
+        anywhere: Set[int] = set()
+        position = bisect_left(self._vocabulary, token)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(token):
+            word = self._vocabulary[position]
+            in_title |= self._title_words.get(word, set())
+            anywhere |= self._path_words.get(word, set())
+            position += 1
+        return in_title, anywhere | in_title
+
+    def _similar_words(self, token: str) -> Dict[str, float]:
+        """Vocabulary words whose trigram similarity to `token` reaches FUZZY_THRESHOLD."""
+        token_trigrams = _trigrams(token)
+        shared: Dict[str, int] = defaultdict(int)
+        for trigram in token_trigrams:
+            for word in self._word_trigrams.get(trigram, ()):
+                shared[word] += 1
+        similar = {}
+        for word, count in shared.items():
+            similarity = count / (len(token_trigrams) + len(_trigrams(word)) - count)
+            if similarity >= FUZZY_THRESHOLD:
+                similar[word] = similarity
+        return similar
+
+    def match(self, query: str, limit: int = 10) -> List[Tuple[int, float, str]]:
+        """
+        Find pages whose title or breadcrumb matches a query lexically.
+
+        Args:
+            query: Page name, or the start of its words ("eng onboard")
+            limit: Maximum number of matches
+
+        Returns:
+            (entry, strength, kind) tuples, strongest first; kind is "exact",
+            "prefix" or "fuzzy"
+        """
+        normalized = normalize_title(query)
+        if not normalized or not self.page_ids:
+            return []
+
+        scores: Dict[int, Tuple[float, str]] = {}
+        for i in self._exact.get(normalized, ()):
+            scores[i] = (EXACT_MATCH, "exact")
+
+        # Every query word must start a title or breadcrumb word
+        title_hits: Optional[Set[int]] = None
+        all_hits: Optional[Set[int]] = None
+        for token in normalized.split():
+            in_title, anywhere = self._prefix_matches(token)
+            title_hits = in_title if title_hits is None else title_hits & in_title
+            all_hits = anywhere if all_hits is None else all_hits & anywhere
+        for i in all_hits or ():
+            strength = TITLE_PREFIX_MATCH if i in (title_hits or ()) else PATH_PREFIX_MATCH
+            if i not in scores:
+                scores[i] = (strength, "prefix")
+
+        # Fall back to similar words for typos: every query word must prefix-match
+        # or resemble a title/breadcrumb word
+        if len(scores) < limit:
+            fuzzy: Optional[Dict[int, float]] = None
+            for token in normalized.split():
+                matches = dict.fromkeys(self._prefix_matches(token)[1], 1.0)
+                for word, similarity in self._similar_words(token).items():
+                    for i in self._title_words.get(word, set()) | self._path_words.get(word, set()):
+                        matches[i] = max(matches.get(i, 0.0), similarity)
+                if fuzzy is None:
+                    fuzzy = matches
+                else:
+                    fuzzy = {i: fuzzy[i] + similarity for i, similarity in matches.items() if i in fuzzy}
+            n_tokens = len(normalized.split())
+            for i, total in (fuzzy or {}).items():
+                if i not in scores:
+                    scores[i] = (FUZZY_MATCH * total / n_tokens, "fuzzy")
+
+        # Strongest first; shorter titles first among equals
+        ranked = sorted(scores.items(), key=lambda item: (-item[1][0], len(self.titles[item[0]])))
+        return [(i, strength, kind) for i, (strength, kind) in ranked[:limit]]
+
+    def strengths(self, query: str, query_embedding: Optional[np.ndarray] = None,
+                  limit: int = 50) -> Dict[str, float]:
+        """
+        Title match strength per page id, combining lexical and embedding matches.
+
+        Args:
+            query: Search query
+            query_embedding: Query embedding, to also match titles semantically
+            limit: Maximum lexical matches considered
+
+        Returns:
+            Page id -> strength in [0, 1], for matching pages only
+        """
+        strengths = {self.page_ids[i]: strength for i, strength, _ in self.match(query, limit)}
+        if query_embedding is not None and self.embeddings is not None and len(self.embeddings):
+            vector = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+            vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+            similarities = self.embeddings @ vector
+            for i in np.flatnonzero(similarities >= SEMANTIC_THRESHOLD):
+                page_id = self.page_ids[i]
+                strengths[page_id] = max(strengths.get(page_id, 0.0), float(similarities[i]))
+        return strengths
+
+    def position(self, page_id: str) -> Optional[int]:
+        """Entry index of a page, or None if it is not indexed."""
+        return self._positions.get(page_id)
+
+    def entry(self, i: int) -> Dict[str, Any]:
+        """Page fields of an entry."""
+        return {
+            "id": self.page_ids[i],
+            "title": self.titles[i],
+            "breadcrumb": self.breadcrumbs[i].split(" > ") if self.breadcrumbs[i] else [],
+            "url": self.url_paths[i],
+            "workspace": self.workspaces[i],
+        }
+
+    def update(self, pages: List[Tuple[str, str, str, str, str]],
+               embeddings: Optional[np.ndarray] = None,
+               removed: Iterable[str] = ()) -> "TitleIndex":
+        """Return a new index with `pages` added or replaced and `removed` page ids dropped."""
+        replaced = set(removed) | {page[0] for page in pages}
+        keep = [i for i, page_id in enumerate(self.page_ids) if page_id not in replaced]
+        kept_pages = [(self.page_ids[i], self.titles[i], self.breadcrumbs[i], self.url_paths[i],
+                       self.workspaces[i]) for i in keep]
+
+        combined = None
+        if self.embeddings is not None and embeddings is not None:
+            combined = np.concatenate([self.embeddings[keep], np.asarray(embeddings, dtype=np.float32)])
+        return TitleIndex.from_pages(kept_pages + list(pages), combined)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index (see from_bytes)."""
+        buffer = io.BytesIO()
+        arrays = {
+            "page_ids": np.array(self.page_ids, dtype=str),
+            "titles": np.array(self.titles, dtype=str),
+            "breadcrumbs": np.array(self.breadcrumbs, dtype=str),
+            "url_paths": np.array(self.url_paths, dtype=str),
+            "workspaces": np.array(self.workspaces, dtype=str),
+        }
+        if self.embeddings is not None:
+            arrays["embeddings"] = self.embeddings
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data) -> "TitleIndex":
+        """Load an index written by to_bytes."""
+        with np.load(io.BytesIO(bytes(data)), allow_pickle=False) as arrays:
+            pages = zip(*(arrays[name].tolist() for name in
+                          ("page_ids", "titles", "breadcrumbs", "url_paths", "workspaces")))
+            embeddings = arrays["embeddings"] if "embeddings" in arrays.files else None
+            return cls.from_pages(list(pages), embeddings)
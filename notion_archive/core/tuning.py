@@ -0,0 +1,230 @@
+"""
+HNSW index settings and an automatic recall/latency tuner.
+
+ChromaDB builds an HNSW graph per collection. Its settings trade recall
+against latency and build time:
+
+- space: distance metric ("cosine", "ip" or "l2")
+- M: number of graph neighbours per node (memory and recall)
+- construction_ef: candidate list size while inserting (build time and recall)
+- search_ef: candidate list size while querying (latency and recall)
+
+`tune_hnsw` measures recall@k against exact search and p50/p99 query latency
+for a grid of settings on the archive's own vectors, then recommends (and
+optionally applies) the fastest setting that reaches a target recall.
+"""
+
+import itertools
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+HNSW_SPACES = ("cosine", "ip", "l2")
+
+# ChromaDB's defaults, used for settings that are not configured
+HNSW_DEFAULTS: Dict[str, Any] = {
+    "space": "l2",
+    "M": 16,
+    "construction_ef": 100,
+    "search_ef": 10,
+}
+
+DEFAULT_GRID: Dict[str, Sequence[int]] = {
+    "M": (8, 16, 32),
+    "construction_ef": (100, 200),
+    "search_ef": (10, 50, 100),
+}
+
+
+def hnsw_metadata(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn HNSW settings into ChromaDB collection metadata, skipping unset values."""
+    return {f"hnsw:{key}": value for key, value in params.items() if value is not None}
+
+
+@dataclass
+class TuningResult:
+    """Measured quality and speed of one HNSW setting."""
+
+    params: Dict[str, Any]
+    recall: float
+    p50_ms: float
+    p99_ms: float
+    build_seconds: float
+
+    def __str__(self) -> str:
+        return (f"M={self.params['M']:<3} construction_ef={self.params['construction_ef']:<4} "
+                f"search_ef={self.params['search_ef']:<4} recall={self.recall:.3f} "
+                f"p50={self.p50_ms:.2f}ms p99={self.p99_ms:.2f}ms build={self.build_seconds:.1f}s")
+
+
+@dataclass
+class TuningReport:
+    """All measured settings and the recommended one."""
+
+    results: List[TuningResult]
+    recommended: TuningResult
+    k: int
+    target_recall: float
+    vectors: int
+    queries: int
+    exact_ms_per_query: float = 0.0
+    applied: bool = False
+    notes: List[str] = field(default_factory=list)
+
+
+def _load_vectors(collection, max_vectors: Optional[int], batch_size: int = 1000) -> np.ndarray:
+    """Read (up to max_vectors) embeddings from a collection."""
+    total = collection.count()
+    if max_vectors:
+        total = min(total, max_vectors)
+    batches = []
+    for offset in range(0, total, batch_size):
+        batch = collection.get(limit=min(batch_size, total - offset), offset=offset, include=["embeddings"])
+        batches.append(np.asarray(batch["embeddings"], dtype=np.float32))
+    if not batches:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack(batches)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Indices of the exact k nearest vectors for each query under a metric."""
+    if space == "cosine":
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        distances = -(queries @ vectors.T)
+    elif space == "ip":
+        distances = -(queries @ vectors.T)
+    else:
+        distances = (
+            np.sum(queries ** 2, axis=1, keepdims=True)
+            - 2 * queries @ vectors.T
+            + np.sum(vectors ** 2, axis=1)
+        )
+    k = min(k, vectors.shape[0])
+    top = np.argpartition(distances, kth=k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _measure(client, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray,
+             params: Dict[str, Any], k: int, batch_size: int = 1000) -> TuningResult:
+    """Build a throwaway collection with `params` and measure recall and latency."""
+    name = f"tune_{uuid.uuid4().hex[:16]}"
+    collection = client.create_collection(name=name, metadata=hnsw_metadata(params))
+    try:
+        ids = [str(i) for i in range(len(vectors))]
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), batch_size):
+            collection.add(
+                ids=ids[offset:offset + batch_size],
+                embeddings=vectors[offset:offset + batch_size].tolist()
+            )
+        build_seconds = time.perf_counter() - start
+
+        hits = 0
+        latencies = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+            latencies.append((time.perf_counter() - start) * 1000)
+            found = {int(i) for i in result["ids"][0]}
+            hits += len(found & set(expected.tolist()))
+
+        return TuningResult(
+            params=dict(params),
+            recall=hits / truth.size,
+            p50_ms=float(np.percentile(latencies, 50)),
+            p99_ms=float(np.percentile(latencies, 99)),
+            build_seconds=build_seconds
+        )
+    finally:
+        client.delete_collection(name)
+
+
+def _grid(grid: Dict[str, Sequence[int]], space: str) -> List[Dict[str, Any]]:
+    keys = ["M", "construction_ef", "search_ef"]
+    values = [grid.get(key, (HNSW_DEFAULTS[key],)) for key in keys]
+    return [dict(zip(keys, combo), space=space) for combo in itertools.product(*values)]
+
+
+def recommend(results: List[TuningResult], target_recall: float) -> TuningResult:
+    """Fastest (p50, then p99) setting reaching the target recall, else the most accurate one."""
+    good = [r for r in results if r.recall >= target_recall]
+    if good:
+        return min(good, key=lambda r: (r.p50_ms, r.p99_ms, r.build_seconds))
+    return max(results, key=lambda r: (r.recall, -r.p50_ms))
+
+
+def tune_hnsw(archive,
+              queries: Optional[List[str]] = None,
+              k: int = 10,
+              grid: Optional[Dict[str, Sequence[int]]] = None,
+              target_recall: float = 0.95,
+              n_queries: int = 100,
+              max_vectors: Optional[int] = 50000,
+              apply: bool = False,
+              seed: int = 0) -> TuningReport:
+    """
+    Measure recall@k and latency of HNSW settings on an archive's own vectors.
+
+    Args:
+        archive: NotionArchive with a built index
+        queries: Query texts to tune for (default: a sample of stored chunk vectors)
+        k: Number of results whose recall is measured
+        grid: Values to try for "M", "construction_ef" and "search_ef" (default: DEFAULT_GRID)
+        target_recall: Minimum recall@k for the recommended setting
+        n_queries: Number of sampled queries when `queries` is not given
+        max_vectors: Tune on at most this many stored vectors (keeps tuning fast on big indexes)
+        apply: Rebuild the archive's live index with the recommended setting
+        seed: Random seed for query sampling
+
+    Returns:
+        TuningReport with every measured setting and the recommendation
+    """
+    import chromadb
+
+    space = archive.index_params()["space"]
+    vectors = _load_vectors(archive.collection, max_vectors)
+    if len(vectors) == 0:
+        raise ValueError("The archive has no index to tune. Run build_index() first.")
+
+    notes = []
+    if queries:
+        query_vectors = np.asarray(archive.embedding_model.encode(queries), dtype=np.float32)
+    else:
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+        query_vectors = vectors[sample]
+        notes.append("Queries are stored chunk vectors; pass real queries for representative numbers.")
+
+    k = min(k, len(vectors))
+    start = time.perf_counter()
+    truth = exact_top_k(vectors, query_vectors, k, space)
+    exact_ms_per_query = (time.perf_counter() - start) / len(query_vectors) * 1000
+
+    client = chromadb.EphemeralClient()
+    results = []
+    for params in _grid(grid or DEFAULT_GRID, space):
+        result = _measure(client, vectors, query_vectors, truth, params, k)
+        print(f"  {result}")
+        results.append(result)
+
+    report = TuningReport(
+        results=results,
+        recommended=recommend(results, target_recall),
+        k=k,
+        target_recall=target_recall,
+        vectors=len(vectors),
+        queries=len(query_vectors),
+        exact_ms_per_query=exact_ms_per_query,
+        notes=notes
+    )
+
+    if apply:
+        archive.rebuild_vector_index(**report.recommended.params)
+        report.applied = True
+
+    return report
@@ -0,0 +1,176 @@
+"""
+Version history of an archive that keeps several export snapshots.
+
+Compliance archives keep an export per month, and most pages do not change
+between two of them. `NotionArchive.add_snapshot` indexes each export as a
+new snapshot, but stores every page version only once:
+
+- a page version is addressed by a digest of its chunks (texts and
+  metadata); a page whose digest is unchanged since the previous snapshot
+  costs nothing
+- the chunks of a version carry the snapshots they are valid in as an
+  interval in their metadata: valid_from (the snapshot that introduced them)
+  and valid_to (the first snapshot without them, OPEN while still current).
+  Search filters on that interval, so `as_of` is an ordinary metadata filter
+  on one index rather than a separate index per snapshot
+- a page that reverts to an earlier version gets copies of that version's
+  stored embeddings instead of being embedded again
+
+Snapshots are numbered from 1 in the order they were added; searches can name
+them by number, label or date.
+"""
+
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from ..utils.files import atomic_write_json, read_json
+
+# valid_to of chunks that are part of the latest snapshot
+OPEN = 2 ** 31 - 1
+
+# Chunk metadata keys added by versioning (not part of a version's digest)
+VERSION_FIELDS = ("valid_from", "valid_to")
+
+# Page version: [digest, valid_from, valid_to]
+_DIGEST, _FROM, _TO = range(3)
+
+
+def page_digest(chunks: Iterable[tuple]) -> str:
+    """Content address of a page version: digest of its (text, metadata, id) chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    for text, metadata, chunk_id in chunks:
+        # Snapshots are exported to different folders: the export path is not content
+        record = {key: value for key, value in metadata.items()
+                  if key not in VERSION_FIELDS and key != "export_root"}
+        digest.update(json.dumps([chunk_id, text, record], sort_keys=True).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def versioned_id(chunk_id: str, page_id: str, ordinal: int) -> str:
+    """Id of a chunk of the page version introduced by snapshot `ordinal` ("<page>@<ordinal>...")."""
+    return f"{page_id}@{ordinal}{chunk_id[len(page_id):]}"
+
+
+def parse_date(value: Union[str, date, datetime]) -> date:
+    """A date, or the date of a datetime or ISO date string."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        raise ValueError(f"Not a snapshot number, label or ISO date: {value!r}")
+
+
+class VersionHistory:
+    """Snapshots of a versioned archive and the versions of every page, persisted as JSON."""
+
+    def __init__(self, path: Optional[str], state: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.state = state or {"snapshots": [], "pages": {}}
+
+    @classmethod
+    def load(cls, path: str) -> "VersionHistory":
+        return cls(path, read_json(path))
+
+    @classmethod
+    def from_bytes(cls, data) -> "VersionHistory":
+        """Read-only history shipped in a snapshot file (snapshot records only)."""
+        return cls(None, {"snapshots": json.loads(bytes(data).decode("utf-8")), "pages": {}})
+
+    def to_bytes(self) -> bytes:
+        """Snapshot records, for resolving as_of in snapshot-backed replicas."""
+        return json.dumps(self.snapshots).encode("utf-8")
+
+    def save(self) -> None:
+        if self.path is None:
+            raise RuntimeError("Version history read from a snapshot file is read-only")
+        atomic_write_json(self.path, self.state)
+
+    @property
+    def snapshots(self) -> List[Dict[str, Any]]:
+        return self.state["snapshots"]
+
+    @property
+    def pages(self) -> Dict[str, List[list]]:
+        return self.state["pages"]
+
+    def __bool__(self) -> bool:
+        return bool(self.snapshots)
+
+    @property
+    def latest(self) -> int:
+        """Ordinal of the latest snapshot (0 when there is none)."""
+        return len(self.snapshots)
+
+    def current(self, page_id: str) -> Optional[list]:
+        """The page's version in the latest snapshot, if it has one."""
+        versions = self.pages.get(page_id)
+        if versions and versions[-1][_TO] == OPEN:
+            return versions[-1]
+        return None
+
+    def find(self, page_id: str, digest: str) -> Optional[list]:
+        """An earlier version of the page with the given digest."""
+        for version in self.pages.get(page_id, ()):
+            if version[_DIGEST] == digest:
+                return version
+        return None
+
+    def open_version(self, page_id: str, digest: str, ordinal: int) -> None:
+        self.pages.setdefault(page_id, []).append([digest, ordinal, OPEN])
+
+    def close_version(self, page_id: str, ordinal: int) -> None:
+        version = self.current(page_id)
+        if version is not None:
+            version[_TO] = ordinal
+
+    def current_pages(self) -> List[str]:
+        return [page_id for page_id in self.pages if self.current(page_id) is not None]
+
+    def check_date(self, when: date) -> None:
+        """Snapshots must be added in chronological order."""
+        if self.snapshots and when < parse_date(self.snapshots[-1]["date"]):
+            raise ValueError(f"Snapshot date {when} is before the latest snapshot "
+                             f"({self.snapshots[-1]['date']}); add snapshots in chronological order")
+
+    def resolve(self, as_of: Union[int, str, date, datetime]) -> int:
+        """
+        Ordinal of the snapshot a search should see.
+
+        Args:
+            as_of: Snapshot number, snapshot label, or a date (or ISO date
+                   string): the latest snapshot taken on or before it.
+                   Strings are tried as a label first.
+
+        Returns:
+            The snapshot's ordinal
+        """
+        if isinstance(as_of, bool):
+            raise ValueError(f"Unknown snapshot: {as_of!r}")
+        if isinstance(as_of, int):
+            if not 1 <= as_of <= self.latest:
+                raise ValueError(f"Unknown snapshot: {as_of} (the archive has {self.latest})")
+            return as_of
+        if isinstance(as_of, str):
+            for record in reversed(self.snapshots):
+                if record["label"] == as_of:
+                    return record["ordinal"]
+            if as_of.isdigit():
+                return self.resolve(int(as_of))
+        when = parse_date(as_of)
+        matching = [record["ordinal"] for record in self.snapshots if parse_date(record["date"]) <= when]
+        if not matching:
+            raise ValueError(f"No snapshot on or before {when}")
+        return matching[-1]
+
+    def where(self, as_of=None) -> Dict[str, Any]:
+        """Metadata filter selecting the chunks of one snapshot (default: the latest)."""
+        # An interval even for the latest snapshot, so a snapshot being added
+        # meanwhile (valid_from beyond it) stays invisible until it is recorded
+        ordinal = self.latest if as_of is None else self.resolve(as_of)
+        return {"valid_from": {"$lte": ordinal}, "valid_to": {"$gt": ordinal}}
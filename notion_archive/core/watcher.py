@@ -0,0 +1,260 @@
+"""
+Watch mode: keep an archive's index in sync with an export directory.
+
+The watcher polls the export for added, changed and removed HTML files. A file
+counts as changed when its mtime or size moved and its content hash differs,
+so a sync job that rewrites identical files does not trigger re-embedding.
+Bursts of changes are debounced into one batch, and only the affected pages
+are re-parsed and re-embedded (see NotionArchive.update_pages) while the
+index keeps serving searches. The indexed file states are saved in db_path,
+so changes made while the watcher was not running are picked up on restart.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .parser import NotionExportParser
+from ..utils.files import atomic_write_json, content_hash, file_fingerprint, read_json
+
+# (mtime in nanoseconds, size in bytes, content hash or None if not computed yet)
+FileState = Tuple[int, int, Optional[str]]
+
+
+@dataclass
+class ChangeSet:
+    """Files that changed between two scans of an export (paths relative to the export)."""
+
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+
+@dataclass
+class WatchMetrics:
+    """Throughput and lag of a watcher since it started."""
+
+    scans: int = 0
+    batches: int = 0
+    files_added: int = 0
+    files_changed: int = 0
+    files_removed: int = 0
+    pages_indexed: int = 0
+    chunks_embedded: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    last_batch_seconds: float = 0.0
+    last_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
+    last_sync: Optional[float] = None
+    last_error: Optional[str] = None
+
+    @property
+    def pages_per_second(self) -> float:
+        """Pages re-indexed per second of indexing work."""
+        return self.pages_indexed / self.busy_seconds if self.busy_seconds else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Chunks embedded per second of indexing work."""
+        return self.chunks_embedded / self.busy_seconds if self.busy_seconds else 0.0
+
+    def as_dict(self) -> Dict:
+        data = asdict(self)
+        data["pages_per_second"] = self.pages_per_second
+        data["chunks_per_second"] = self.chunks_per_second
+        return data
+
+
+class ExportWatcher:
+    """Polls an export directory and incrementally re-indexes changed pages."""
+
+    def __init__(self,
+                 archive,
+                 export_path: str,
+                 interval: float = 5.0,
+                 debounce: float = 2.0,
+                 max_delay: float = 60.0):
+        """
+        Args:
+            archive: NotionArchive to keep up to date
+            export_path: Notion export folder to watch
+            interval: Seconds between scans
+            debounce: Quiet period (no further changes) before a batch is indexed
+            max_delay: Index a batch after this many seconds even if changes keep coming
+        """
+        self.archive = archive
+        self.export_path = Path(export_path).resolve()
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.metrics = WatchMetrics()
+
+        self._parser = NotionExportParser(self.export_path)
+        export_key = hashlib.sha1(str(self.export_path).encode("utf-8")).hexdigest()[:12]
+        self.state_path = os.path.join(archive.db_path, f"watch_state_{export_key}.json")
+        self._known: Dict[str, FileState] = self._baseline()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _baseline(self) -> Dict[str, FileState]:
+        """
+        Files the index was last updated from: the state saved by the previous
+        watcher run, else the document store, else the directory as it is now.
+        """
+        saved = read_json(self.state_path)
+        if saved and saved.get("export_path") == str(self.export_path):
+            return {url_path: tuple(state) for url_path, state in saved["files"].items()}
+
+        store = self.archive.document_store
+        if store is not None:
+            stored = store.fingerprints(str(self.export_path))
+            if stored:
+                return {url_path: (mtime_ns, size, None) for url_path, (mtime_ns, size) in stored.items()}
+        return {url_path: (mtime_ns, size, None) for url_path, (mtime_ns, size) in self._scan_fingerprints().items()}
+
+    def _scan_fingerprints(self) -> Dict[str, Tuple[int, int]]:
+        fingerprints = {}
+        for html_file in self._parser.find_html_files():
+            try:
+                fingerprints[str(html_file.relative_to(self.export_path))] = file_fingerprint(html_file)
+            except FileNotFoundError:
+                continue
+        return fingerprints
+
+    def scan(self) -> ChangeSet:
+        """Compare the directory with the last indexed state (does not update that state)."""
+        self.metrics.scans += 1
+        current = self._scan_fingerprints()
+        added, changed = [], []
+
+        for url_path, (mtime_ns, size) in current.items():
+            known = self._known.get(url_path)
+            if known is None:
+                added.append(url_path)
+            elif known[:2] != (mtime_ns, size):
+                # mtime/size moved: confirm with the content hash before re-embedding
+                try:
+                    digest = content_hash(self.export_path / url_path)
+                except FileNotFoundError:
+                    continue
+                if known[2] is None or known[2] != digest:
+                    changed.append(url_path)
+                else:
+                    self._known[url_path] = (mtime_ns, size, digest)
+
+        removed = [url_path for url_path in self._known if url_path not in current]
+        return ChangeSet(added=sorted(added), changed=sorted(changed), removed=sorted(removed))
+
+    def poll(self) -> Optional[ChangeSet]:
+        """
+        Scan once and, if anything changed, wait for the burst to settle and index it.
+
+        Returns:
+            The indexed change set, or None if nothing changed
+        """
+        changes = self.scan()
+        if not changes:
+            return None
+
+        # Debounce: keep rescanning until the directory has been quiet for `debounce`
+        # seconds, so a sync job writing many files produces one batch
+        detected = time.time()
+        quiet_since = detected
+        while not self._stop.is_set() and time.time() - detected < self.max_delay:
+            remaining = self.debounce - (time.time() - quiet_since)
+            if remaining <= 0:
+                break
+            self._stop.wait(min(remaining, self.interval))
+            latest = self.scan()
+            if (latest.added, latest.changed, latest.removed) != (changes.added, changes.changed, changes.removed):
+                changes = latest
+                quiet_since = time.time()
+
+        self.apply(changes, detected)
+        return changes
+
+    def apply(self, changes: ChangeSet, detected: Optional[float] = None) -> None:
+        """Re-index the pages of a change set and record it as the new known state."""
+        start = time.time()
+        try:
+            pages, chunks = self.archive.update_pages(
+                self.export_path,
+                changed=changes.added + changes.changed,
+                removed=changes.removed
+            )
+        except Exception as e:
+            self.metrics.errors += 1
+            self.metrics.last_error = str(e)
+            print(f"Watch: error indexing {len(changes)} changed files: {e}")
+            return
+
+        for url_path in changes.added + changes.changed:
+            try:
+                mtime_ns, size = file_fingerprint(self.export_path / url_path)
+                self._known[url_path] = (mtime_ns, size, content_hash(self.export_path / url_path))
+            except FileNotFoundError:
+                self._known.pop(url_path, None)
+        for url_path in changes.removed:
+            self._known.pop(url_path, None)
+        self._save_state()
+
+        end = time.time()
+        lag = end - (detected or start)
+        m = self.metrics
+        m.batches += 1
+        m.files_added += len(changes.added)
+        m.files_changed += len(changes.changed)
+        m.files_removed += len(changes.removed)
+        m.pages_indexed += pages
+        m.chunks_embedded += chunks
+        m.last_batch_seconds = end - start
+        m.busy_seconds += end - start
+        m.last_lag_seconds = lag
+        m.max_lag_seconds = max(m.max_lag_seconds, lag)
+        m.last_sync = end
+        print(f"Watch: +{len(changes.added)} ~{len(changes.changed)} -{len(changes.removed)} files, "
+              f"{pages} pages / {chunks} chunks re-indexed in {end - start:.1f}s (lag {lag:.1f}s)")
+
+    def _save_state(self) -> None:
+        """Persist the indexed file states so a restarted watcher picks up offline changes."""
+        os.makedirs(self.archive.db_path, exist_ok=True)
+        atomic_write_json(self.state_path, {
+            "export_path": str(self.export_path),
+            "files": self._known
+        })
+
+    def run(self) -> None:
+        """Poll until stop() is called."""
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.metrics.errors += 1
+                self.metrics.last_error = str(e)
+                print(f"Watch: error scanning {self.export_path}: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> "ExportWatcher":
+        """Run the watcher in a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="notion-archive-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
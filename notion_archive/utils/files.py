@@ -0,0 +1,73 @@
+"""
+File system helpers shared by the parser, document store and index builders.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Tuple, Union
+
+# (mtime in nanoseconds, size in bytes)
+Fingerprint = Tuple[int, int]
+
+
+def file_fingerprint(path: Union[str, Path]) -> Fingerprint:
+    """
+    Return a cheap fingerprint of a file used to detect changes between runs.
+
+    Args:
+        path: File to fingerprint
+
+    Returns:
+        Tuple of (modification time in nanoseconds, size in bytes)
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def atomic_write_json(path: Union[str, Path], data: Any) -> None:
+    """
+    Write JSON so readers see either the old or the new file, never a partial one.
+
+    Every call writes its own temporary file, so concurrent writers (two
+    archives or processes sharing a db_path) never interleave their writes:
+    the last replace wins with a complete file.
+
+    Args:
+        path: Destination file
+        data: JSON-serializable data
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates files readable by the owner only
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(path: Union[str, Path], default: Any = None) -> Any:
+    """Read a JSON file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def content_hash(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """Return the SHA-1 of a file's contents, read in blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,164 @@
+"""
+Process memory measurement, and a governor that keeps builds under a budget.
+
+RSS counts every resident page a process maps, including pages it shares
+copy-on-write with its parent or siblings, so summing RSS over forked workers
+overstates their footprint. On Linux, /proc/<pid>/smaps_rollup also gives
+PSS (shared pages divided among the processes sharing them) and USS (pages
+private to the process), which is what a worker really costs.
+
+`MemoryGovernor` samples the resident size of the current process while an
+index is built (a read of /proc/self/statm, cheap enough to do per batch)
+and tells the build to shrink its batches when usage approaches the budget
+and to grow them back when there is room.
+"""
+
+import os
+import re
+import resource
+import sys
+from typing import Dict, Optional, Union
+
+# smaps_rollup fields (in kB) -> keys of process_memory()
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "uss",
+    "Private_Dirty": "uss",
+}
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, int]:
+    """
+    Resident memory of a process in bytes.
+
+    Args:
+        pid: Process to measure (default: this process)
+
+    Returns:
+        Dict with "rss", and on Linux also "pss", "uss" (private) and "shared"
+    """
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            lines = f.readlines()
+    except OSError:
+        lines = None
+
+    if lines is None:
+        if pid != os.getpid():
+            return {}
+        # Peak RSS is all that is portable; kB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss": peak if sys.platform == "darwin" else peak * 1024}
+
+    memory = dict.fromkeys(set(_SMAPS_FIELDS.values()), 0)
+    for line in lines:
+        name, _, value = line.partition(":")
+        key = _SMAPS_FIELDS.get(name)
+        if key:
+            memory[key] += int(value.split()[0]) * 1024
+    return memory
+
+
+# Size suffix -> power of 1024
+_SIZE_UNITS = {"": 0, "K": 1, "M": 2, "G": 3, "T": 4}
+
+
+def parse_size(value: Union[int, str, None]) -> Optional[int]:
+    """Bytes from an int or a size string like "6GB" or "512 MB" (binary units)."""
+    if value is None or isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", value.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r} (expected e.g. 6GB or 512MB)")
+    return int(float(match.group(1)) * 1024 ** _SIZE_UNITS[match.group(2)])
+
+
+def format_size(size: float) -> str:
+    """Human-readable size, e.g. "1.5GB"."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def current_rss() -> int:
+    """Current resident size of this process in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return process_memory()["rss"]
+
+
+class MemoryGovernor:
+    """
+    Adapts batch sizes to keep the process under a memory budget, and records its peak.
+
+    Callers keep their own batch sizes and pass them through adapt() after each
+    batch: sizes halve while resident memory is above `high` of the budget and
+    double back (up to what was requested) once it is below `low`. Without a
+    budget sizes never change, but the peak is still recorded.
+    """
+
+    def __init__(self, budget: Optional[int] = None, high: float = 0.85, low: float = 0.6):
+        """
+        Args:
+            budget: Resident memory to stay under, in bytes (None: unlimited)
+            high: Fraction of the budget above which batches shrink
+            low: Fraction of the budget below which batches grow again
+        """
+        self.budget = budget
+        self.high = high
+        self.low = low
+        self.peak = 0
+        self.shrinks = 0
+        self.check()
+
+    def check(self) -> int:
+        """Sample resident memory (and update the peak)."""
+        rss = current_rss()
+        self.peak = max(self.peak, rss)
+        return rss
+
+    @property
+    def pressure(self) -> float:
+        """Resident memory as a fraction of the budget (0 without a budget)."""
+        return self.check() / self.budget if self.budget else 0.0
+
+    def headroom(self) -> Optional[int]:
+        """Bytes left under the budget (None without a budget)."""
+        return self.budget - self.check() if self.budget else None
+
+    def adapt(self, size: int, maximum: int) -> int:
+        """
+        The next batch size after a batch of `size`.
+
+        Args:
+            size: Current batch size
+            maximum: Batch size the caller asked for (never exceeded)
+        """
+        pressure = self.pressure
+        if pressure > self.high and size > 1:
+            self.shrinks += 1
+            return max(1, size // 2)
+        if pressure < self.low and size < maximum:
+            return min(maximum, size * 2)
+        return size
+
+    def should_spill(self, size: int) -> bool:
+        """Whether `size` more bytes should go to disk rather than memory."""
+        headroom = self.headroom()
+        return headroom is not None and size > headroom * (1 - self.high)
+
+    def report(self) -> str:
+        """One-line summary for the end of a build."""
+        line = f"Peak RSS: {format_size(self.peak)}"
+        if self.budget:
+            line += f" (budget {format_size(self.budget)}"
+            line += f", batches shrunk {self.shrinks} times)" if self.shrinks else ")"
+        return line
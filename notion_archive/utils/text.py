@@ -0,0 +1,73 @@
+"""
+Text helpers for presenting search results.
+"""
+
+import re
+from typing import List, Tuple
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def query_terms(query: str) -> List[str]:
+    """Return the distinct lowercase terms of a query, longest first."""
+    terms = {term.lower() for term in _WORD_RE.findall(query) if len(term) > 1}
+    return sorted(terms, key=len, reverse=True)
+
+
+def make_snippet(text: str,
+                 query: str,
+                 width: int = 200,
+                 highlight: Tuple[str, str] = ("**", "**")) -> str:
+    """
+    Build a short snippet of `text` centred on the densest run of query terms.
+
+    Args:
+        text: Full chunk text
+        query: Search query whose terms should be highlighted
+        width: Approximate snippet length in characters
+        highlight: Opening and closing markers placed around matched terms
+
+    Returns:
+        Snippet with matched terms wrapped in the highlight markers
+    """
+    if not text:
+        return ""
+
+    terms = query_terms(query)
+    pattern = None
+    start = 0
+
+    if terms:
+        pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+        positions = [m.start() for m in pattern.finditer(text)]
+        if positions:
+            # Slide a window over the match positions and keep the one covering the most hits
+            best_count, best_start = 0, positions[0]
+            right = 0
+            for left in range(len(positions)):
+                while right < len(positions) and positions[right] - positions[left] < width:
+                    right += 1
+                if right - left > best_count:
+                    best_count, best_start = right - left, positions[left]
+            start = max(0, best_start - width // 4)
+
+    end = min(len(text), start + width)
+    start = max(0, end - width) if end == len(text) else start
+
+    # Snap to word boundaries so we never cut a word in half
+    if start > 0:
+        space = text.find(" ", start)
+        if space != -1 and space < end:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+
+    snippet = text[start:end].strip()
+    if pattern is not None:
+        snippet = pattern.sub(lambda m: f"{highlight[0]}{m.group(0)}{highlight[1]}", snippet)
+
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(text) else ""
+    return f"{prefix}{snippet}{suffix}"
@@ -24,7 +24,9 @@ install_requires = [
 
 # Optional dependencies
 extras_require = {
-    "openai": ["openai>=1.0.0"],
+    "openai": ["openai>=1.0.0", "tiktoken>=0.5.0"],
+    "http": ["requests>=2.25.0"],
+    "serve": ["werkzeug>=2.0.0"],
     "dev": [
         "pytest>=6.0.0",
         "pytest-cov>=2.10.0",
@@ -32,7 +34,7 @@ extras_require = {
         "flake8>=3.8.0",
         "mypy>=0.800",
     ],
-    "all": ["openai>=1.0.0"],
+    "all": ["openai>=1.0.0", "tiktoken>=0.5.0", "requests>=2.25.0", "werkzeug>=2.0.0"],
 }
 
 setup(
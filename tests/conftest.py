@@ -0,0 +1,205 @@
+"""
+Shared fixtures: a deterministic embedding model and a small Notion export.
+
+Tests never download a model. `FakeEmbedding` hashes words into a small
+vector (texts sharing words are similar), and `make_archive` creates
+NotionArchives that use it. Code running in other processes (distributed
+builds, pre-fork workers) uses `stub_embedding_url`, the stub embedding
+service from examples/ served on a local port.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+import notion_archive.core.archive as archive_module  # noqa: E402
+import notion_archive.core.embeddings as embeddings_module  # noqa: E402
+from notion_archive import NotionArchive  # noqa: E402
+from notion_archive.core.embeddings import EmbeddingModel, TruncatedEmbedding  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "examples"))
+
+FAKE_DIMENSION = 64
+
+
+class FakeEmbedding(EmbeddingModel):
+    """Bag of hashed words, normalized: deterministic and loosely lexical."""
+
+    def __init__(self, dimension: int = FAKE_DIMENSION, name: str = "fake"):
+        self._dimension = dimension
+        self._name = name
+        self.calls: List[List[str]] = []
+
+    def encode(self, texts, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        self.calls.append(texts)
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                word = word.strip(".,:;!?()\"'")
+                if word:
+                    vectors[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % self._dimension] += 1
+            norm = np.linalg.norm(vectors[i])
+            if norm:
+                vectors[i] /= norm
+            else:
+                vectors[i, 0] = 1.0
+        return vectors
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    @property
+    def model_name(self) -> str:
+        return self._name
+
+
+def fake_factory(model_name: str, dimensions: Optional[int] = None, truncate_locally: bool = False,
+                 base_url: Optional[str] = None, http_options: Optional[Dict] = None, **kwargs) -> EmbeddingModel:
+    """create_embedding_model for tests: every model name gets a FakeEmbedding."""
+    model = FakeEmbedding(name=model_name)
+    if dimensions is not None and dimensions != model.dimension:
+        return TruncatedEmbedding(model, dimensions)
+    return model
+
+
+# Page title, workspace folder, tags, body words and titles of linked pages
+PAGES = [
+    ("Deploy Checklist", "Engineering", ["ops"],
+     "deploy release rollback canary pipeline staging production approval", ["Incident Runbook"]),
+    ("Incident Runbook", "Engineering", ["ops", "oncall"],
+     "incident pager escalation outage postmortem severity oncall", ["Deploy Checklist"]),
+    ("API Design Guide", "Engineering", ["design"],
+     "api endpoint versioning pagination errors authentication schema", []),
+    ("PTO Policy", "People", ["policy"],
+     "vacation holiday leave pto accrual approval calendar", ["Onboarding Guide"]),
+    ("Onboarding Guide", "People", ["hiring"],
+     "onboarding laptop buddy first week accounts benefits", []),
+    ("Quarterly Roadmap", "Product", ["planning"],
+     "roadmap quarter goals milestones launch priorities", ["API Design Guide"]),
+]
+
+
+def page_id(title: str) -> str:
+    """Notion id of a test page (stable, 32 hex characters)."""
+    return hashlib.md5(title.encode()).hexdigest()
+
+
+def folder_name(workspace: str) -> str:
+    return f"{workspace} {hashlib.md5(workspace.encode()).hexdigest()}"
+
+
+def page_file(title: str) -> str:
+    return f"{title} {page_id(title)}.html"
+
+
+def page_html(title: str, body: str, tags: Sequence[str] = (), hrefs: Sequence[str] = (),
+              created_by: str = "Ada Lovelace") -> str:
+    """Notion-style HTML of a page with a properties table and links to `hrefs`."""
+    tag_spans = "".join(f'<span class="selected-value">{tag}</span>' for tag in tags)
+    anchors = "".join(f'<p><a href="{href}">link</a></p>' for href in hrefs)
+    return f"""<html><head><title>{title}</title></head><body>
+<article id="{page_id(title)}" class="page sans"><header><h1 class="page-title">{title}</h1>
+<table class="properties"><tbody>
+<tr class="property-row"><th>Created By</th><td><span class="user">{created_by}</span></td></tr>
+<tr class="property-row"><th>Created time</th><td><time>@March 3, 2023 10:15 AM</time></td></tr>
+<tr class="property-row"><th>Tags</th><td>{tag_spans}</td></tr>
+</tbody></table></header>
+<div class="page-body"><p>{body}</p>{anchors}</div></article></body></html>"""
+
+
+def write_page(export: Path, workspace: str, title: str, body: str, tags: Sequence[str] = (),
+               links: Sequence[str] = (), workspaces: Optional[Dict[str, str]] = None) -> Path:
+    """
+    Write (or overwrite) one page of a test export.
+
+    Args:
+        links: Titles of the pages it links to
+        workspaces: Workspace of each linked page (default: the page's own)
+    """
+    folder = export / folder_name(workspace)
+    folder.mkdir(parents=True, exist_ok=True)
+    # Links are relative to the page's folder and URL-encoded, as in Notion exports
+    hrefs = []
+    for target in links:
+        target_workspace = (workspaces or {}).get(target, workspace)
+        prefix = "" if target_workspace == workspace else f"../{folder_name(target_workspace)}/"
+        hrefs.append((prefix + page_file(target)).replace(" ", "%20"))
+    path = folder / page_file(title)
+    path.write_text(page_html(title, body, tags, hrefs), encoding="utf-8")
+    return path
+
+
+def long_body(words: str, repeats: int = 12) -> str:
+    """Body long enough to be split into several chunks at the test chunk size."""
+    return ". ".join(f"{words} section {i}" for i in range(repeats))
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    """Make NotionArchive (and the model registry) create FakeEmbedding models."""
+    monkeypatch.setattr(archive_module, "create_embedding_model", fake_factory)
+    monkeypatch.setattr(embeddings_module, "create_embedding_model", fake_factory)
+    return fake_factory
+
+
+@pytest.fixture
+def export_dir(tmp_path) -> Path:
+    """A small export: six pages in three workspaces, linked to each other."""
+    export = tmp_path / "Export-test"
+    workspaces = {title: workspace for title, workspace, _, _, _ in PAGES}
+    for title, workspace, tags, words, links in PAGES:
+        write_page(export, workspace, title, long_body(words), tags, links, workspaces)
+    return export
+
+
+@pytest.fixture
+def make_archive(tmp_path, fake_embeddings):
+    """Create NotionArchives with the fake model, in the test's own directory."""
+    archives = []
+
+    def make(**kwargs) -> NotionArchive:
+        settings = dict(embedding_model="fake", db_path=str(tmp_path / "db"), chunk_size=200,
+                        chunk_overlap=20, share_model=False)
+        settings.update(kwargs)
+        archive = NotionArchive(**settings)
+        archives.append(archive)
+        return archive
+
+    yield make
+    for archive in archives:
+        if archive.document_store is not None:
+            archive.document_store.close()
+
+
+@pytest.fixture
+def built_archive(make_archive, export_dir) -> NotionArchive:
+    """An archive of export_dir with its index built."""
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    archive.build_index()
+    return archive
+
+
+@pytest.fixture
+def stub_embedding_url():
+    """Base URL of the stub embedding service (OpenAI API), served for the test."""
+    from embedding_stub_server import make_handler
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(FAKE_DIMENSION))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,138 @@
+"""asyncio interface (AsyncNotionArchive)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from notion_archive.core.async_archive import AsyncNotionArchive
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_searches_match_the_blocking_archive(built_archive):
+    async_archive = AsyncNotionArchive(built_archive)
+
+    assert run(async_archive.search("deploy rollback", limit=3)) == built_archive.search("deploy rollback", limit=3)
+    grouped = run(async_archive.search("vacation", limit=2, group_by="page", workspace="People"))
+    assert grouped == built_archive.search("vacation", limit=2, group_by="page", workspace="People")
+    assert run(async_archive.has_index())
+    assert run(async_archive.get_stats())["total_chunks"] == built_archive.collection.count()
+
+
+def test_search_many_embeds_all_queries_in_one_batch(built_archive):
+    async_archive = AsyncNotionArchive(built_archive)
+    queries = ["deploy rollback", "vacation policy", "roadmap planning"]
+    calls = built_archive.embedding_model.calls
+    before = len(calls)
+
+    results = run(async_archive.search_many(queries, limit=2))
+
+    assert calls[before:] == [queries]
+    assert results == [built_archive.search(query, limit=2) for query in queries]
+    with pytest.raises(ValueError, match="Unsupported group_by"):
+        run(async_archive.search_many(queries, group_by="workspace"))
+
+
+def test_searches_are_limited_to_max_concurrency(built_archive, monkeypatch):
+    async_archive = AsyncNotionArchive(built_archive, max_concurrency=2)
+    search_cached = built_archive._search_cached
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def slow_search(*args, **kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return search_cached(*args, **kwargs)
+
+    monkeypatch.setattr(built_archive, "_search_cached", slow_search)
+    run(async_archive.search_many([f"query {i}" for i in range(6)]))
+
+    assert running["max"] == 2
+
+
+def test_build_index_builds_off_the_event_loop(make_archive, export_dir):
+    archive = make_archive()
+    async_archive = AsyncNotionArchive(archive)
+
+    async def build():
+        await async_archive.add_export(str(export_dir))
+        await async_archive.build_index(batch_size=8)
+
+    run(build())
+
+    assert archive.collection.count() == 30
+    assert archive.navigate("pto")
+
+
+def test_cancelled_builds_resume(make_archive, export_dir, monkeypatch):
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    async_archive = AsyncNotionArchive(archive)
+    commit_batch = archive._commit_batch
+    committed = []
+
+    async def build_and_cancel():
+        task = asyncio.create_task(async_archive.build_index(batch_size=8))
+        while not committed:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    def commit_and_record(build, texts, *args, **kwargs):
+        commit_batch(build, texts, *args, **kwargs)
+        committed.append(len(texts))
+        time.sleep(0.05)
+
+    monkeypatch.setattr(archive, "_commit_batch", commit_and_record)
+    run(build_and_cancel())
+
+    assert 0 < sum(committed) < 30
+    assert not archive.has_index()
+    archive.build_index(resume=True, batch_size=8)
+    assert archive.collection.count() == 30
+
+
+def test_searches_follow_a_rebuild_by_another_archive(make_archive, export_dir):
+    writer = make_archive()
+    writer.add_export(str(export_dir))
+    writer.build_index()
+    reader = make_archive()
+    async_archive = AsyncNotionArchive(reader)
+    before = run(async_archive.search("deploy rollback", limit=3))
+
+    writer.build_index(force_rebuild=True)
+
+    assert run(async_archive.search("deploy rollback", limit=3)) == before
+    assert reader.collection.name == writer.collection.name
+
+
+def test_cached_queries_skip_embedding_and_prepare_off_the_loop(make_archive, export_dir, monkeypatch):
+    archive = make_archive(query_cache=True)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+    async_archive = AsyncNotionArchive(archive)
+    loop_threads = []
+    follow = archive._follow_manifest
+
+    def record_follow():
+        loop_threads.append(threading.current_thread() is threading.main_thread())
+        return follow()
+
+    monkeypatch.setattr(archive, "_follow_manifest", record_follow)
+    first = run(async_archive.search("deploy rollback", limit=3))
+    calls = len(archive.embedding_model.calls)
+
+    results = run(async_archive.search_many(["deploy rollback", "vacation policy"], limit=3))
+
+    assert archive.embedding_model.calls[calls:] == [["vacation policy"]]
+    assert len(loop_threads) == 3 and not any(loop_threads)
+    assert results == [first, archive.search("vacation policy", limit=3)]
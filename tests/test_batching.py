@@ -0,0 +1,105 @@
+"""Length-bucketed batching of local model inputs (length_bucketed_batches)."""
+
+import numpy as np
+import pytest
+
+from notion_archive.core.embeddings import SentenceTransformerEmbedding, length_bucketed_batches
+
+LENGTHS = [5, 300, 12, 8, 512, 40, 41, 7, 300, 6, 90, 512, 13, 39]
+
+
+@pytest.mark.parametrize("padding_budget", [0.0, 0.05, 0.3])
+def test_batches_stay_within_the_token_and_padding_budgets(padding_budget):
+    batches = length_bucketed_batches(LENGTHS, max_batch_tokens=1024, padding_budget=padding_budget)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(LENGTHS)))
+    for batch in batches:
+        lengths = [LENGTHS[i] for i in batch]
+        assert lengths == sorted(lengths)
+        padded = max(lengths) * len(lengths)
+        if len(batch) > 1:
+            assert padded <= 1024
+            assert padded - sum(lengths) <= padding_budget * padded
+
+
+def test_short_inputs_travel_in_larger_batches():
+    lengths = [10] * 40 + [500] * 4
+
+    batches = length_bucketed_batches(lengths, max_batch_tokens=1000, padding_budget=0.05, max_batch_size=32)
+
+    assert [len(batch) for batch in batches] == [32, 8, 2, 2]
+
+
+class FakeSentenceTransformer:
+    """Records the batches it is asked to encode."""
+
+    max_seq_length = 128
+    tokenizer = None
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.batches.append(list(texts))
+        return np.array([[len(text), text.count("x")] for text in texts], dtype=np.float32)
+
+
+def fake_model(padding_budget, batch_size=4):
+    model = SentenceTransformerEmbedding.__new__(SentenceTransformerEmbedding)
+    model.model = FakeSentenceTransformer()
+    model._model_name, model._dimension = "fake-st", 2
+    model.batch_size, model.padding_budget = batch_size, padding_budget
+    return model
+
+
+def test_bucketed_encoding_returns_embeddings_in_input_order():
+    model = fake_model(padding_budget=0.1)
+    texts = ["x" * n for n in (400, 8, 200, 12, 8, 396, 16)]
+
+    embeddings = model.encode(texts, show_progress_bar=False)
+
+    np.testing.assert_array_equal(embeddings[:, 0], [len(text) for text in texts])
+    assert len(model.model.batches) > 1
+    for batch in model.model.batches:
+        lengths = [len(text) for text in batch]
+        assert lengths == sorted(lengths)
+
+
+def test_without_a_padding_budget_sentence_transformers_batches():
+    model = fake_model(padding_budget=None)
+    texts = ["a", "bb", "ccc"]
+
+    model.encode(texts, show_progress_bar=False)
+
+    assert model.model.batches == [texts]
+
+
+def test_embedding_options_reach_local_models(monkeypatch, tmp_path):
+    import notion_archive.core.embeddings as embeddings_module
+    from notion_archive import NotionArchive
+    from notion_archive.core.embeddings import ModelRegistry, create_embedding_model
+
+    created = []
+
+    def record(model_name, **options):
+        created.append((model_name, options))
+        model = fake_model(options.get("padding_budget"), options.get("batch_size", 32))
+        model._model_name = model_name
+        return model
+
+    monkeypatch.setattr(embeddings_module, "SentenceTransformerEmbedding", record)
+    options = {"batch_size": 64, "padding_budget": 0.05, "api_format": "tei"}
+
+    model = create_embedding_model("all-MiniLM-L6-v2", http_options=options)
+    assert (model.batch_size, model.padding_budget) == (64, 0.05)
+
+    registry = ModelRegistry()
+    shared = registry.get("all-MiniLM-L6-v2", http_options=options)
+    assert registry.get("all-MiniLM-L6-v2", http_options={"padding_budget": 0.05, "batch_size": 64}) is shared
+    assert registry.get("all-MiniLM-L6-v2") is not shared
+
+    archive = NotionArchive(embedding_model="all-MiniLM-L6-v2", db_path=str(tmp_path / "db"),
+                            embedding_options={"batch_size": 16, "padding_budget": 0.1}, share_model=registry)
+    assert (archive.embedding_model.batch_size, archive.embedding_model.padding_budget) == (16, 0.1)
+    assert created[-1] == ("all-MiniLM-L6-v2", {"batch_size": 16, "padding_budget": 0.1})
+    archive.document_store.close()
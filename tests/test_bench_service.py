@@ -0,0 +1,91 @@
+"""Load test of the search API (benchmarks/bench_service.py): schedules and reports."""
+
+import json
+import random
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from bench_service import KINDS, compare, make_schedule, run_level, summarize
+
+MIX = SimpleNamespace(hot_queries=2, repeated=0.5, filtered=0.5, limit=5, group_by=None)
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """GET /search answering with as many results as the query has words; "boom" fails."""
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)["q"][0]
+        if query == "boom":
+            self.send_error(500)
+            return
+        body = json.dumps({"count": len(query.split())}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def search_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SearchHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_schedules_mix_query_kinds_and_depend_only_on_the_seed():
+    queries = ["hot one", "hot two", "unique a", "unique b", "unique c"]
+
+    schedule = make_schedule(queries, ["Engineering", "People"], 200, random.Random(3), MIX)
+
+    assert schedule == make_schedule(queries, ["Engineering", "People"], 200, random.Random(3), MIX)
+    assert {kind for kind, _ in schedule} == set(KINDS)
+    for kind, params in schedule:
+        assert ("workspace" in params) == kind.startswith("filtered/") and params["limit"] == "5"
+    unique = [params["q"] for kind, params in schedule if kind.endswith("/unique")]
+    # Unique queries are each sent once, then fall back to hot ones
+    assert unique[:3] == ["unique a", "unique b", "unique c"] and set(unique[3:]) <= {"hot one", "hot two"}
+    assert all("workspace" not in params for _, params in make_schedule(queries, [], 20, random.Random(3), MIX))
+
+
+def test_levels_report_latency_results_and_errors(search_url):
+    schedule = [("unfiltered/unique", {"q": query}) for query in ["a b", "c", "boom", "a b c"]]
+
+    seconds, samples = run_level(search_url, schedule, concurrency=2, timeout=5)
+    summary = summarize(samples, seconds)
+
+    assert sorted(count for _, _, error, count in samples if error is None) == [1, 2, 3]
+    assert (summary["requests"], summary["errors"], summary["error_rate"]) == (4, 1, 0.25)
+    assert summary["error_types"] == {"HTTP 500": 1} and summary["empty_results"] == 0
+    assert 0 < summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+
+
+def test_summaries_of_failed_levels_have_no_latency():
+    summary = summarize([("filtered/unique", 0.5, "URLError", 0)], 1.0)
+
+    assert summary["p50_ms"] is None and summary["mean_ms"] is None
+    assert (summary["error_rate"], summary["throughput_rps"]) == (1.0, 1.0)
+    assert summarize([], 0.0)["error_rate"] == 0.0
+
+
+def test_comparisons_show_the_change_against_a_baseline(tmp_path, capsys):
+    overall = {"throughput_rps": 100.0, "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": None, "error_rate": 0.0}
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"version": "0.1", "levels": {"4": {"overall": overall}}}))
+
+    compare({"levels": {"4": {"overall": dict(overall, throughput_rps=150.0, p50_ms=8.0)},
+                        "16": {"overall": overall}}}, str(baseline))
+
+    output = capsys.readouterr().out
+    assert "version 0.1" in output and "+50%" in output and "-20%" in output
+    assert not any(line.startswith("16") for line in output.splitlines())
@@ -0,0 +1,109 @@
+"""Database CSV ingestion: rows as documents with typed properties (databases.py)."""
+
+import hashlib
+
+import pytest
+
+from notion_archive.core.databases import (
+    find_database_files, iter_database_rows, parse_property, property_key
+)
+
+DATABASE_ID = "0123456789abcdef0123456789abcdef"
+
+TASKS = """Name,Status,Estimate,Done,Due Date,Tags,Created time
+Fix billing bug,In progress,3,No,"March 5, 2024",bug,"March 1, 2024 9:00 AM"
+Launch checklist,Done,5,Yes,2024-04-01,"launch, marketing",
+,,,,,,
+Write changelog,Not started,1.5,No,,,
+"""
+
+
+def write_tasks(export, name=f"Tasks {DATABASE_ID}_all.csv", text=TASKS):
+    folder = export / "Engineering 0cd845efbf2d5f1d5b5d8f1d2e51558b"
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_the_complete_all_variant_is_preferred(tmp_path):
+    write_tasks(tmp_path, f"Tasks {DATABASE_ID}.csv")
+    complete = write_tasks(tmp_path)
+    other = write_tasks(tmp_path, "Bugs.csv")
+
+    assert find_database_files(tmp_path) == [other, complete]
+
+
+@pytest.mark.parametrize("cell, value", [
+    ("Yes", True), ("No", False), ("42", 42), ("-1.5", -1.5), ("", None), ("  ", None),
+    ("March 5, 2024", "2024-03-05T00:00:00"), ("2024-04-01 → 2024-04-03", "2024-04-01T00:00:00"),
+    ("In progress", "In progress"), ("1234567890123456789", "1234567890123456789"),
+])
+def test_cells_become_typed_values(cell, value):
+    assert parse_property(cell) == value
+
+
+def test_property_names_become_metadata_keys():
+    assert property_key(" Due Date ") == "due_date"
+    assert property_key("Estimate (h)") == "estimate_h"
+
+
+def test_rows_become_documents_with_properties(tmp_path):
+    rows = list(iter_database_rows(write_tasks(tmp_path), tmp_path))
+
+    assert [doc.title for doc, _ in rows] == ["Fix billing bug", "Launch checklist", "Write changelog"]
+    doc, properties = rows[0]
+    assert doc.workspace == "Engineering" and doc.breadcrumb[-1] == "Tasks"
+    assert doc.id.startswith(DATABASE_ID)
+    assert doc.tags == ["bug"] and doc.created_time.day == 1
+    assert properties == {"prop_status": "In progress", "prop_estimate": 3, "prop_done": False,
+                          "prop_due_date": "2024-03-05T00:00:00"}
+    assert doc.plain_text.splitlines()[:3] == ["Fix billing bug", "Status: In progress", "Estimate: 3"]
+    assert rows[1][0].tags == ["launch", "marketing"]
+    assert len({doc.id for doc, _ in rows}) == 3
+
+
+def test_rows_are_indexed_and_filterable_by_property(make_archive, export_dir):
+    write_tasks(export_dir)
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    results = archive.search("billing bug", limit=3, prop_status="In progress")
+    assert [result["title"] for result in results] == ["Fix billing bug"]
+    estimates = archive.search("tasks", limit=10, prop_estimate={"$gte": 2})
+    assert sorted(result["title"] for result in estimates) == ["Fix billing bug", "Launch checklist"]
+
+    skipped = make_archive(db_path=str(export_dir.parent / "no-databases"))
+    skipped.add_export(str(export_dir), databases=False)
+    assert skipped.databases == []
+
+
+def test_row_ids_survive_added_and_reordered_rows(tmp_path):
+    before = {doc.title: doc.id for doc, _ in iter_database_rows(write_tasks(tmp_path), tmp_path)}
+    header, *rows = TASKS.splitlines()
+    reordered = "\n".join([header, "New task,Not started,2,No,,,"] + rows[::-1]) + "\n"
+
+    after = {doc.title: doc for doc, _ in iter_database_rows(write_tasks(tmp_path, text=reordered), tmp_path)}
+
+    assert {title: after[title].id for title in before} == before
+    assert after["Fix billing bug"].url_path.endswith("#row-" + before["Fix billing bug"].split("_row_")[1])
+
+
+def test_rows_with_the_same_title_get_distinct_ids(tmp_path):
+    text = "Name,Status\nStandup,Done\nStandup,Done\nStandup,Open\n"
+    ids = [doc.id for doc, _ in iter_database_rows(write_tasks(tmp_path, text=text), tmp_path)]
+
+    assert len(set(ids)) == 3
+    assert ids[1:] == [f"{ids[0]}_2", f"{ids[0]}_3"]
+    # Keys are the leading 64 bits of the title's SHA-1, as in earlier releases
+    assert ids[0].endswith("_row_" + hashlib.sha1(b"Standup").hexdigest()[:16])
+
+
+def test_only_a_trailing_all_is_stripped_from_the_name(tmp_path):
+    path = write_tasks(tmp_path, "Budget_allocations_all.csv", "Name\nRent\n")
+
+    doc, _ = next(iter_database_rows(path, tmp_path))
+
+    assert doc.id.startswith("Budget_allocations_row_")
+    assert doc.breadcrumb[-1] == "Budget_allocations"
@@ -0,0 +1,112 @@
+"""Distributed index builds (DistributedBuild, run_local_build)."""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from conftest import page_id
+from notion_archive import NotionArchive
+from notion_archive.core.distributed import DistributedBuild, run_local_build
+from notion_archive.core.parser import NotionExportParser
+
+
+@pytest.fixture
+def stub_archive(tmp_path, stub_embedding_url):
+    """Create archives embedding through the stub service, which worker processes can reach too."""
+    archives = []
+
+    def make(name: str, **kwargs) -> NotionArchive:
+        archive = NotionArchive(embedding_model="stub", embedding_base_url=stub_embedding_url,
+                                db_path=str(tmp_path / name), chunk_size=200, share_model=False, **kwargs)
+        archives.append(archive)
+        return archive
+
+    yield make
+    for archive in archives:
+        archive.document_store.close()
+
+
+def index_contents(archive):
+    index = archive.collection.get(include=["documents", "metadatas", "embeddings"])
+    return sorted(zip(index["ids"], index["documents"], index["metadatas"],
+                      (embedding.tolist() for embedding in index["embeddings"])))
+
+
+def test_local_build_matches_a_single_process_build(stub_archive, export_dir, tmp_path):
+    single = stub_archive("single")
+    single.add_export(str(export_dir))
+    single.build_index()
+    merged = stub_archive("merged")
+
+    count = run_local_build(merged, [str(export_dir)], build_dir=str(tmp_path / "build"), workers=2,
+                            unit_bytes=2048, batch_size=8)
+
+    assert len(DistributedBuild(str(tmp_path / "build")).units) > 2
+    assert count == single.collection.count()
+    assert index_contents(merged) == index_contents(single)
+    assert merged.search("deploy rollback", limit=5) == single.search("deploy rollback", limit=5)
+    assert merged.navigate("pto polcy")[0]["id"] == page_id("PTO Policy")
+    assert merged.related(page_id("Deploy Checklist")) == single.related(page_id("Deploy Checklist"))
+    assert merged.document_store.fingerprints(str(export_dir.resolve()))
+
+
+def test_workers_embed_titles_for_a_title_boost(stub_archive, export_dir, tmp_path):
+    single = stub_archive("single", title_boost=0.5)
+    single.add_export(str(export_dir))
+    single.build_index()
+    merged = stub_archive("merged", title_boost=0.5)
+
+    run_local_build(merged, [str(export_dir)], build_dir=str(tmp_path / "build"), workers=2, unit_bytes=2048)
+
+    order = [merged.title_index.position(page) for page in single.title_index.page_ids]
+    assert sorted(merged.title_index.page_ids) == sorted(single.title_index.page_ids)
+    np.testing.assert_allclose(merged.title_index.embeddings[order], single.title_index.embeddings, rtol=1e-5)
+    assert merged.search("glossary deploy", limit=5) == single.search("glossary deploy", limit=5)
+
+
+def test_workers_claim_each_unit_once_and_take_over_abandoned_claims(make_archive, export_dir, tmp_path):
+    build = DistributedBuild.plan(str(tmp_path / "build"), [str(export_dir)], make_archive(), unit_bytes=2048)
+
+    first, second = build.claim("a"), build.claim("b")
+    assert (first["id"], second["id"]) == (0, 1)
+    assert build.status() == {"units": len(build.units), "done": 0, "claimed": 2,
+                              "pending": len(build.units) - 2}
+
+    stale = time.time() - 120
+    os.utime(build._claim_path(first), (stale, stale))
+    assert build.claim("c", lease_seconds=60)["id"] == 0
+    assert build.claim("d", lease_seconds=60)["id"] == 2
+
+
+def test_claims_stay_fresh_while_a_slow_unit_is_parsed(stub_archive, export_dir, tmp_path, monkeypatch):
+    build = DistributedBuild.plan(str(tmp_path / "build"), [str(export_dir)], stub_archive("db"))
+    parse_file = NotionExportParser.parse_file
+
+    def slow_parse(parser, path):
+        time.sleep(0.2)
+        return parse_file(parser, path)
+
+    monkeypatch.setattr(NotionExportParser, "parse_file", slow_parse)
+    worker = threading.Thread(target=build.run_worker, args=("slow",), kwargs={"lease_seconds": 0.4})
+    worker.start()
+    time.sleep(0.8)
+    taken_over = build.claim("other", lease_seconds=0.4)
+    worker.join()
+
+    assert taken_over is None
+    assert build.status()["done"] == 1
+
+
+def test_plans_and_merges_are_checked(make_archive, export_dir, tmp_path):
+    archive = make_archive()
+    with pytest.raises(ValueError, match="No build plan"):
+        DistributedBuild(str(tmp_path))
+
+    build = DistributedBuild.plan(str(tmp_path / "build"), [str(export_dir)], archive)
+    with pytest.raises(ValueError, match="not empty"):
+        DistributedBuild.plan(str(tmp_path / "build"), [str(export_dir)], archive)
+    with pytest.raises(RuntimeError, match="1 of 1 work units are not done"):
+        build.merge(archive)
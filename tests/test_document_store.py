@@ -0,0 +1,89 @@
+"""Parsed document store: unchanged pages are not parsed again (add_export, DocumentStore)."""
+
+from datetime import datetime
+
+import pytest
+
+from conftest import page_id, write_page
+from notion_archive.core.parser import NotionDocument, NotionExportParser
+from notion_archive.core.store import DocumentStore
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    """Names of the files parsed from HTML."""
+    calls = []
+    parse_file = NotionExportParser.parse_file
+
+    def counting_parse_file(self, html_file):
+        calls.append(html_file.name)
+        return parse_file(self, html_file)
+
+    monkeypatch.setattr(NotionExportParser, "parse_file", counting_parse_file)
+    return calls
+
+
+def test_second_run_loads_unchanged_pages_from_the_store(make_archive, export_dir, parse_calls):
+    first = make_archive()
+    first.add_export(str(export_dir))
+    assert len(parse_calls) == 6
+
+    second = make_archive()
+    second.add_export(str(export_dir))
+
+    assert len(parse_calls) == 6
+    by_id = {doc.id: doc for doc in first.documents}
+    assert sorted(doc.id for doc in second.documents) == sorted(by_id)
+    for doc in second.documents:
+        assert doc.plain_text == by_id[doc.id].plain_text
+        assert doc.tags == by_id[doc.id].tags
+        assert doc.links == by_id[doc.id].links
+
+
+def test_changed_and_removed_files_are_synced(make_archive, export_dir, parse_calls):
+    make_archive().add_export(str(export_dir))
+    parse_calls.clear()
+
+    write_page(export_dir, "People", "PTO Policy", "unlimited vacation now", ["policy"])
+    removed = next(export_dir.rglob("Onboarding Guide *.html"))
+    removed.unlink()
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+
+    assert [name.split(" ")[0] for name in parse_calls] == ["PTO"]
+    documents = {doc.id: doc for doc in archive.documents}
+    assert page_id("Onboarding Guide") not in documents
+    assert documents[page_id("PTO Policy")].plain_text.startswith("unlimited vacation now")
+    assert archive.document_store.count(str(export_dir)) == 5
+
+
+def test_deferred_documents_are_loaded_for_a_build(make_archive, export_dir):
+    make_archive().add_export(str(export_dir))
+
+    archive = make_archive()
+    archive.add_export(str(export_dir), defer_load=True)
+    assert archive.documents == []
+    assert archive.get_stats()["total_documents"] == 6
+
+    archive.build_index()
+    assert len(archive.documents) == 6
+    assert archive.collection.count() > 6
+
+
+def test_store_round_trips_documents(tmp_path):
+    store = DocumentStore(str(tmp_path / "documents.sqlite3"))
+    doc = NotionDocument(id="a" * 32, title="Page", content="<p>Hello</p>", plain_text="Hello",
+                         url_path="Space/Page.html", created_by="Ada", tags=["x", "y"],
+                         created_time=datetime(2024, 1, 2, 3, 4), workspace="Space",
+                         breadcrumb=["Space"], links=["b" * 32])
+    store.put_many("/export", [("Space/Page.html", (1, 2), doc), ("Space/Empty.html", (3, 4), None)])
+
+    loaded, = store.load("/export", html_mode="full")
+    # Files without a page are remembered too, so they are not parsed again
+    assert store.fingerprints("/export") == {"Space/Page.html": (1, 2), "Space/Empty.html": (3, 4)}
+    assert store.count("/export") == 1
+    store.close()
+
+    assert (loaded.id, loaded.title, loaded.plain_text, loaded.content) == (doc.id, "Page", "Hello", "<p>Hello</p>")
+    assert (loaded.tags, loaded.breadcrumb, loaded.links) == (["x", "y"], ["Space"], ["b" * 32])
+    assert loaded.created_time == datetime(2024, 1, 2, 3, 4)
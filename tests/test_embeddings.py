@@ -0,0 +1,77 @@
+"""Embedding models: reduced dimensions (create_embedding_model, TruncatedEmbedding)."""
+
+import numpy as np
+import pytest
+
+from conftest import FAKE_DIMENSION, FakeEmbedding
+from notion_archive.core.embeddings import TruncatedEmbedding, create_embedding_model
+
+
+def test_truncated_embeddings_keep_the_leading_dimensions_at_unit_length():
+    full = FakeEmbedding()
+    model = TruncatedEmbedding(full, 48)
+    texts = ["deploy release rollback", "vacation holiday leave"]
+
+    embeddings = model.encode(texts)
+
+    assert model.dimension == 48 and model.model_name == "fake"
+    assert embeddings.shape == (2, 48)
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-5)
+    leading = full.encode(texts)[:, :48]
+    np.testing.assert_allclose(embeddings * np.linalg.norm(leading, axis=1, keepdims=True), leading, atol=1e-6)
+
+
+@pytest.mark.parametrize("dimensions", [0, FAKE_DIMENSION + 1])
+def test_dimensions_must_fit_the_model(dimensions):
+    with pytest.raises(ValueError, match="dimensions must be between"):
+        TruncatedEmbedding(FakeEmbedding(), dimensions)
+
+
+def test_http_models_are_truncated_locally(stub_embedding_url):
+    model = create_embedding_model("stub", dimensions=8, base_url=stub_embedding_url)
+
+    assert isinstance(model, TruncatedEmbedding)
+    assert model.encode(["hello"]).shape == (1, 8)
+    assert create_embedding_model("stub", dimensions=FAKE_DIMENSION, base_url=stub_embedding_url).dimension == \
+        FAKE_DIMENSION
+
+
+def test_text_embedding_3_models_shorten_through_the_api(monkeypatch):
+    pytest.importorskip("openai")
+    from notion_archive.core.embeddings import OpenAIEmbedding
+
+    model = create_embedding_model("text-embedding-3-small", dimensions=256, api_key="sk-test")
+    requests = []
+
+    class Embeddings:
+        def create(self, **request):
+            requests.append(request)
+            return type("Response", (), {"data": [type("Item", (), {"embedding": [0.0] * 256})()]})()
+
+    monkeypatch.setattr(model.client, "embeddings", Embeddings())
+    assert isinstance(model, OpenAIEmbedding) and model.dimension == 256
+    assert model.encode("hi").shape == (1, 256)
+    assert requests[0]["dimensions"] == 256
+    assert isinstance(create_embedding_model("text-embedding-3-small", dimensions=256, truncate_locally=True,
+                                             api_key="sk-test"), TruncatedEmbedding)
+    with pytest.raises(ValueError, match="does not support shortened"):
+        OpenAIEmbedding("text-embedding-ada-002", api_key="sk-test", dimensions=256)
+
+
+def test_archive_builds_and_searches_at_the_reduced_dimension(make_archive, export_dir):
+    archive = make_archive(embedding_dimensions=48)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    assert archive.collection.metadata["embedding_dimension"] == 48
+    assert len(archive.collection.get(limit=1, include=["embeddings"])["embeddings"][0]) == 48
+    assert archive.search("pto vacation holiday", limit=1, fields=["title"]) == [{"title": "PTO Policy"}]
+
+
+def test_searching_with_another_dimension_is_refused(make_archive, export_dir):
+    archive = make_archive(embedding_dimensions=48)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    with pytest.raises(ValueError, match="48 dimensions"):
+        make_archive(embedding_dimensions=32).search("pto")
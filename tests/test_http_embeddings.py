@@ -0,0 +1,112 @@
+"""Self-hosted embedding services over HTTP (HTTPEmbedding)."""
+
+import io
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from conftest import FAKE_DIMENSION
+from embedding_stub_server import make_handler, stub_embedding
+from notion_archive.core.embeddings import HTTPEmbedding, create_embedding_model
+
+
+@pytest.fixture
+def service():
+    """The stub embedding service, recording requests and failing the first `failures` of them."""
+    requests = []
+    state = {"failures": 0}
+
+    class RecordingHandler(make_handler(FAKE_DIMENSION)):
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            requests.append((self.path, dict(self.headers), json.loads(raw)))
+            if state["failures"]:
+                state["failures"] -= 1
+                self.send_error(503)
+                return
+            self.rfile = io.BytesIO(raw)
+            super().do_POST()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.requests = requests
+    server.state = state
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def expected(texts):
+    return np.array([stub_embedding(text, FAKE_DIMENSION) for text in texts], dtype=np.float32)
+
+
+@pytest.mark.parametrize("api_format, path", [("openai", "/v1/embeddings"), ("tei", "/v1/embed")])
+def test_batches_are_embedded_concurrently_in_input_order(service, api_format, path):
+    model = HTTPEmbedding(f"{service.url}/v1", model_name="stub", api_format=api_format,
+                          batch_size=3, max_concurrency=3)
+    texts = [f"text {'x' * (i * 7 % 11)} {i}" for i in range(10)]
+
+    embeddings = model.encode(texts)
+    model.close()
+
+    assert model.dimension == FAKE_DIMENSION and model.model_name == "stub"
+    np.testing.assert_allclose(embeddings, expected(texts), rtol=1e-6)
+    # One probe for the dimension, then four batches of at most three texts
+    batches = service.requests[1:]
+    assert [request[0] for request in batches] == [path] * 4
+    inputs = [body["input" if api_format == "openai" else "inputs"] for _, _, body in batches]
+    assert sorted(len(batch) for batch in inputs) == [1, 3, 3, 3]
+    assert sorted(text for batch in inputs for text in batch) == sorted(texts)
+
+
+def test_requests_name_the_model_and_send_the_key(service):
+    model = HTTPEmbedding(f"{service.url}/v1", model_name="bge-small", api_key="secret", dimension=FAKE_DIMENSION)
+    model.encode("hello")
+
+    assert len(service.requests) == 1
+    _, headers, body = service.requests[0]
+    assert body == {"input": ["hello"], "model": "bge-small"}
+    assert headers["Authorization"] == "Bearer secret"
+
+
+def test_unavailable_services_are_retried(service):
+    model = HTTPEmbedding(f"{service.url}/v1", dimension=FAKE_DIMENSION, max_retries=1)
+    service.state["failures"] = 1
+
+    np.testing.assert_allclose(model.encode(["hello"]), expected(["hello"]), rtol=1e-6)
+    assert len(service.requests) == 2
+
+    service.state["failures"] = 2
+    with pytest.raises(RuntimeError, match="Embedding service error"):
+        model.encode(["hello"])
+
+
+def test_unknown_api_formats_are_rejected(service):
+    with pytest.raises(ValueError, match="Unsupported api_format"):
+        HTTPEmbedding(service.url, api_format="cohere")
+
+
+def test_factory_builds_http_models_from_urls(stub_embedding_url):
+    by_url = create_embedding_model(stub_embedding_url, http_options={"batch_size": 2})
+    by_base_url = create_embedding_model("stub", base_url=stub_embedding_url)
+
+    assert isinstance(by_url, HTTPEmbedding) and by_url.batch_size == 2
+    assert by_url.model_name == stub_embedding_url and by_base_url.model_name == "stub"
+    np.testing.assert_allclose(by_url.encode(["a", "b", "c"]), by_base_url.encode(["a", "b", "c"]))
+
+
+def test_archives_build_and_search_through_the_service(tmp_path, export_dir, stub_embedding_url):
+    from notion_archive import NotionArchive
+
+    archive = NotionArchive(embedding_model="stub", embedding_base_url=stub_embedding_url,
+                            db_path=str(tmp_path / "db"), chunk_size=200, share_model=False)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    chunk = archive.collection.get(limit=1, include=["documents"])["documents"][0]
+    assert archive.search(chunk, limit=1)[0]["content"] == chunk
+    archive.document_store.close()
@@ -0,0 +1,170 @@
+"""Checkpointed index builds: staging collections, the manifest swap and resuming (build_index)."""
+
+import json
+import os
+import threading
+
+import pytest
+
+from conftest import page_id
+from notion_archive.utils.files import atomic_write_json
+
+
+def _rebuild(archive):
+    archive.build_index(force_rebuild=True)
+    return archive.collection.name
+
+
+def test_other_archives_follow_a_rebuild(make_archive, export_dir):
+    writer = make_archive()
+    writer.add_export(str(export_dir))
+    writer.build_index()
+    reader = make_archive()
+    before = reader.search("deploy rollback", limit=3)
+
+    _rebuild(writer)
+
+    assert reader.search("deploy rollback", limit=3) == before
+    assert reader.collection.name == writer.collection.name
+    assert reader.navigate("pto")[0]["id"] == page_id("PTO Policy")
+
+
+def test_previous_collection_is_kept_until_the_next_swap(built_archive):
+    first = built_archive.collection.name
+    second = _rebuild(built_archive)
+
+    # Still there for archives that have not switched yet
+    assert built_archive.client.get_collection(first).count() > 0
+    assert os.path.exists(built_archive._page_table_path(first))
+
+    _rebuild(built_archive)
+
+    with pytest.raises(Exception):
+        built_archive.client.get_collection(first)
+    assert not os.path.exists(built_archive._page_table_path(first))
+    assert not os.path.exists(built_archive._page_index_path("titles", first))
+    assert built_archive.client.get_collection(second).count() > 0
+
+
+def test_reader_reopens_a_deleted_collection(make_archive, export_dir):
+    writer = make_archive()
+    writer.add_export(str(export_dir))
+    writer.build_index()
+    reader = make_archive()
+    expected = reader.search("incident pager", limit=2, fields=["id"])
+
+    _rebuild(writer)
+    _rebuild(writer)
+    # As if the manifest change went unnoticed: the search itself finds the collection gone
+    reader._manifest_fingerprint = reader._read_manifest_fingerprint()
+
+    assert reader.search("incident pager", limit=2, fields=["id"]) == expected
+    assert reader.get_stats()["total_chunks"] == writer.collection.count()
+
+
+@pytest.fixture
+def failing_encode(monkeypatch):
+    """Make an archive's model fail on its n-th encode call; returns the texts it embedded."""
+    def install(archive, fail_on_call):
+        model = archive.embedding_model
+        encode = model.encode
+        embedded = []
+
+        def flaky_encode(texts, **kwargs):
+            if len(model.calls) + 1 == fail_on_call:
+                model.calls.append(None)
+                raise RuntimeError("embedding service unavailable")
+            embedded.extend(texts)
+            return encode(texts, **kwargs)
+
+        monkeypatch.setattr(model, "encode", flaky_encode)
+        return embedded
+
+    return install
+
+
+def _chunk_ids(archive):
+    return sorted(archive.collection.get(include=[])["ids"])
+
+
+def test_resume_continues_after_the_last_committed_batch(make_archive, export_dir, failing_encode):
+    reference = make_archive(db_path=str(export_dir.parent / "reference"))
+    reference.add_export(str(export_dir))
+    reference.build_index()
+
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    embedded = failing_encode(archive, fail_on_call=3)
+    with pytest.raises(RuntimeError, match="unavailable"):
+        archive.build_index(batch_size=8)
+
+    journal = archive._journal_path()
+    assert os.path.exists(journal)
+    # Nothing is swapped in before the build completes
+    assert archive.collection.count() == 0
+    assert len(embedded) == 16
+
+    archive.build_index(resume=True, batch_size=8)
+
+    # Each chunk is embedded once; titles are only embedded with a title_boost
+    assert len(embedded) == reference.collection.count()
+    assert _chunk_ids(archive) == _chunk_ids(reference)
+    assert not os.path.exists(journal)
+    assert archive.search("pto vacation", limit=1, fields=["title"]) == [{"title": "PTO Policy"}]
+
+
+def test_the_live_index_serves_searches_while_a_rebuild_fails(built_archive, failing_encode):
+    before = built_archive.search("roadmap milestones", limit=2)
+    failing_encode(built_archive, fail_on_call=len(built_archive.embedding_model.calls) + 2)
+
+    with pytest.raises(RuntimeError):
+        built_archive.build_index(force_rebuild=True, batch_size=8)
+
+    assert built_archive.search("roadmap milestones", limit=2) == before
+
+
+def test_resume_refuses_changed_documents(make_archive, export_dir, failing_encode):
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    failing_encode(archive, fail_on_call=2)
+    with pytest.raises(RuntimeError):
+        archive.build_index(batch_size=8)
+
+    archive.documents[0].plain_text += " edited"
+
+    with pytest.raises(ValueError, match="changed since the interrupted build"):
+        archive.build_index(resume=True, batch_size=8)
+    archive.build_index(force_rebuild=True, batch_size=8)
+    assert not os.path.exists(archive._journal_path())
+
+
+def test_existing_index_is_not_rebuilt_without_force(built_archive):
+    name = built_archive.collection.name
+    calls = len(built_archive.embedding_model.calls)
+
+    built_archive.build_index()
+
+    assert built_archive.collection.name == name
+    assert len(built_archive.embedding_model.calls) == calls
+
+
+def test_concurrent_manifest_writes_never_tear(tmp_path):
+    path = tmp_path / "archive_manifest.json"
+    errors = []
+
+    def write(writer):
+        try:
+            for i in range(50):
+                atomic_write_json(path, {"writer": writer, "collections": {"documents": "x" * 4096}, "i": i})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(writer,)) for writer in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert json.loads(path.read_text())["i"] == 49
+    assert os.listdir(tmp_path) == ["archive_manifest.json"]
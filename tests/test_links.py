@@ -0,0 +1,104 @@
+"""Link graph between pages (links.py, related, link_boost)."""
+
+import numpy as np
+import pytest
+
+from conftest import page_id, write_page
+from notion_archive.core.links import LinkGraph, extract_links, link_target
+
+A, B, C, D, E = (f"{i:032x}" for i in range(1, 6))
+
+
+@pytest.mark.parametrize("href, key", [
+    (f"Other%20Page%20{A}.html", A),
+    (f"../Space/Sub%20Page%20{B}.html#heading", B),
+    (f"https://www.notion.so/team/Page-{C}", C),
+    (f"https://notion.so/team?p={D}", D),
+    ("https://www.notion.so/team/Page-0000000a-0000-0000-0000-00000000000b",
+     "0000000a00000000000000000000000b"),
+    (f"https://example.com/{A}", None),
+    ("#section", None),
+    ("mailto:ops@example.com", None),
+    (None, None),
+])
+def test_link_targets(href, key):
+    assert link_target(href) == key
+
+
+def test_extracted_links_are_unique_and_skip_self_links():
+    hrefs = [f"x%20{B}.html", f"y%20{A}.html", f"https://notion.so/{B}", "https://example.com"]
+
+    assert extract_links(hrefs, page_id=A) == [B]
+
+
+def graph():
+    # A <-> B, A -> C, D -> C, E -> A, E -> B
+    return LinkGraph.from_links([(A, [B, C]), (B, [A]), (C, []), (D, [C, "f" * 32]), (E, [A, B])])
+
+
+def test_related_pages_rank_direct_links_before_shared_ones():
+    g = graph()
+    related = {g.page_ids[j]: (score, relation) for j, score, relation in g.related(A)}
+
+    # Two direct links, plus E linking to both
+    assert related[B] == (pytest.approx(2.25), "mutual")
+    assert related[C][1] == "links_to" and related[E][1] == "linked_from"
+    assert related[D][1] == "shared_links"
+    assert [g.page_ids[j] for j, _, _ in g.related(A)][0] == B
+    assert g.related("9" * 32) == []
+
+
+def test_authority_favours_linked_pages():
+    g = graph()
+
+    assert g.authority.min() == 0.0 and g.authority.max() == pytest.approx(1.0)
+    assert g.authority_of(A) > g.authority_of(D)
+    assert g.authority_of("9" * 32) == 0.0
+    assert g.edge_count == 6
+
+
+def test_updates_resolve_links_to_new_pages_and_round_trip():
+    g = graph().update([("f" * 32, [D])], removed=[E])
+    loaded = LinkGraph.from_bytes(g.to_bytes())
+
+    assert loaded.position(E) is None
+    f = loaded.position("f" * 32)
+    assert loaded.links_from(loaded.position(D)).tolist() == sorted([loaded.position(C), f])
+    np.testing.assert_allclose(loaded.authority, g.authority)
+    assert loaded.related(A) == g.related(A)
+
+
+def test_archive_related_pages(built_archive):
+    related = built_archive.related(page_id("Deploy Checklist"))
+
+    assert related[0]["id"] == page_id("Incident Runbook") and related[0]["relation"] == "mutual"
+    assert related[0]["title"] == "Incident Runbook"
+    api = built_archive.related(page_id("API Design Guide"))
+    assert [(page["title"], page["relation"]) for page in api] == [("Quarterly Roadmap", "linked_from")]
+    assert built_archive.related("0" * 32) == []
+
+
+def test_link_boost_adds_authority_to_scores(make_archive, built_archive):
+    plain = {hit["id"]: hit["score"] for hit in built_archive.search("roadmap design guide", limit=30)}
+    boosted = make_archive(link_boost=0.5).search("roadmap design guide", limit=30)
+
+    assert len(boosted) == len(plain) == 30
+    for hit in boosted:
+        authority = built_archive.link_graph.authority_of(hit["metadata"]["original_id"])
+        assert hit["score"] == pytest.approx(plain[hit["id"]] + 0.5 * authority, abs=1e-6)
+
+
+def test_updates_keep_the_link_graph_without_a_title_index(built_archive, export_dir):
+    built_archive.title_index = None
+    runbook = next(export_dir.rglob("Incident Runbook *.html"))
+    roadmap = write_page(export_dir, "Product", "Quarterly Roadmap", "roadmap", links=["PTO Policy"],
+                         workspaces={"PTO Policy": "People"})
+    runbook.unlink()
+
+    built_archive.update_pages(str(export_dir), changed=[str(roadmap.relative_to(export_dir))],
+                               removed=[str(runbook.relative_to(export_dir))])
+
+    assert built_archive.link_graph.position(page_id("Incident Runbook")) is None
+    assert built_archive.related(page_id("Deploy Checklist")) == []
+    assert [page["id"] for page in built_archive.related(page_id("Quarterly Roadmap"))][0] == page_id("PTO Policy")
+    assert built_archive.related(page_id("API Design Guide")) == []
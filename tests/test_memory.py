@@ -0,0 +1,113 @@
+"""Memory-budgeted builds (memory_budget, MemoryGovernor)."""
+
+import pytest
+
+from conftest import long_body, page_id, write_page
+from notion_archive.utils.memory import MemoryGovernor, current_rss, format_size, parse_size
+
+
+@pytest.mark.parametrize("value, size", [
+    (None, None), (1024, 1024), ("6GB", 6 * 1024 ** 3), ("512 mb", 512 * 1024 ** 2), ("1.5K", 1536),
+])
+def test_sizes_parse_in_binary_units(value, size):
+    assert parse_size(value) == size
+
+
+def test_invalid_sizes_are_rejected():
+    with pytest.raises(ValueError, match="Invalid size"):
+        parse_size("lots")
+    assert format_size(1536) == "1.5KB" and format_size(3 * 1024 ** 3) == "3.0GB"
+
+
+def test_batches_shrink_over_the_budget_and_grow_back_under_it():
+    tight = MemoryGovernor(current_rss() // 2)
+    assert tight.adapt(64, 64) == 32 and tight.adapt(1, 64) == 1
+    assert tight.shrinks == 1 and tight.should_spill(1)
+    assert "batches shrunk 1 times" in tight.report()
+
+    roomy = MemoryGovernor(current_rss() * 100)
+    assert roomy.adapt(16, 64) == 32 and roomy.adapt(64, 64) == 64
+    assert not roomy.should_spill(1024)
+
+    unlimited = MemoryGovernor()
+    assert unlimited.adapt(64, 64) == 64 and unlimited.headroom() is None
+    assert unlimited.report().startswith("Peak RSS: ") and unlimited.peak > 0
+
+
+def test_budgeted_builds_match_unbudgeted_ones(make_archive, built_archive, export_dir, tmp_path, capsys):
+    archive = make_archive(db_path=str(tmp_path / "budgeted"), memory_budget=current_rss() // 2)
+    archive.add_export(str(export_dir))
+
+    archive.build_index(batch_size=8)
+
+    # Every batch after the first is halved down to single chunks
+    assert [len(texts) for texts in archive.embedding_model.calls[:4]] == [8, 4, 2, 1]
+    expected = built_archive.collection.get(include=["documents"])
+    index = archive.collection.get(include=["documents"])
+    assert sorted(zip(index["ids"], index["documents"])) == sorted(zip(expected["ids"], expected["documents"]))
+    assert archive.navigate("pto")[0]["title"] == "PTO Policy"
+    assert "Peak RSS" in capsys.readouterr().out
+
+
+def test_budgeted_builds_resume(make_archive, export_dir, monkeypatch):
+    archive = make_archive(memory_budget="64GB")
+    archive.add_export(str(export_dir))
+    model = archive.embedding_model
+    encode = model.encode
+
+    def flaky_encode(texts, **kwargs):
+        if len(model.calls) == 2:
+            raise RuntimeError("embedding service unavailable")
+        return encode(texts, **kwargs)
+
+    monkeypatch.setattr(model, "encode", flaky_encode)
+    with pytest.raises(RuntimeError):
+        archive.build_index(batch_size=8)
+    monkeypatch.undo()
+
+    archive.build_index(resume=True, batch_size=8)
+
+    assert archive.collection.count() == 30
+    assert [len(texts) for texts in model.calls[2:4]] == [8, 6]
+
+
+def test_budgeted_exports_are_streamed_from_the_store(make_archive, built_archive, export_dir, tmp_path,
+                                                      monkeypatch):
+    archive = make_archive(db_path=str(tmp_path / "budgeted"), memory_budget=current_rss() // 2)
+    archive.add_export(str(export_dir))
+    assert archive.documents == [] and archive.get_stats()["total_documents"] == 6
+
+    store = archive.document_store
+    batches = []
+    load_batch = store.load_batch
+
+    def record_batch(export_root, after, limit, html_mode="full"):
+        batches.append(limit)
+        return load_batch(export_root, after, limit, html_mode)
+
+    monkeypatch.setattr(store, "load", lambda *args, **kwargs: pytest.fail("documents loaded at once"))
+    monkeypatch.setattr(store, "load_batch", record_batch)
+    archive.build_index(batch_size=8)
+
+    # Chunk digest, embedding, titles and links each read the export once, in
+    # batches that halve under memory pressure
+    assert batches == [200, 100] * 4
+    expected = built_archive.collection.get(include=["documents"])
+    index = archive.collection.get(include=["documents"])
+    assert sorted(zip(index["ids"], index["documents"])) == sorted(zip(expected["ids"], expected["documents"]))
+    assert archive.navigate("pto")[0]["title"] == "PTO Policy"
+    assert archive.related(page_id("Deploy Checklist")) == built_archive.related(page_id("Deploy Checklist"))
+
+
+def test_updates_of_streamed_exports_stay_in_the_store(make_archive, export_dir):
+    archive = make_archive(memory_budget="64GB")
+    archive.add_export(str(export_dir))
+    archive.build_index()
+    page = write_page(export_dir, "People", "PTO Policy", long_body("sabbatical unpaid leave rules"))
+
+    archive.update_pages(str(export_dir), changed=[str(page.relative_to(export_dir))])
+
+    assert archive.documents == []
+    archive.build_index(force_rebuild=True)
+    assert len(archive.link_graph.page_ids) == 6
+    assert archive.search("sabbatical unpaid", limit=1)[0]["title"] == "PTO Policy"
@@ -0,0 +1,125 @@
+"""Many archives in one process (ArchiveManager, ModelRegistry)."""
+
+import threading
+
+import pytest
+
+from notion_archive.core.embeddings import ModelRegistry, TruncatedEmbedding
+from notion_archive.core.multi import ArchiveManager
+
+
+@pytest.fixture
+def manager(fake_embeddings, export_dir, tmp_path):
+    """Two archives of the export sharing one fake model."""
+    manager = ArchiveManager(registry=ModelRegistry(), embedding_model="fake", chunk_size=200, chunk_overlap=20)
+    for name in ("eng", "people"):
+        archive = manager.add(name, db_path=str(tmp_path / name))
+        archive.add_export(str(export_dir))
+        archive.build_index()
+    yield manager
+    for name in manager.names():
+        manager[name].document_store.close()
+
+
+def test_registry_shares_models_between_equal_settings(fake_embeddings):
+    registry = ModelRegistry()
+    model = registry.get("fake")
+
+    # Local models ignore API keys; truncated variants count as users of the full model too
+    assert registry.get("fake", api_key="sk-test") is model
+    truncated = registry.get("fake", dimensions=16)
+    assert isinstance(truncated, TruncatedEmbedding) and truncated.model is model
+    assert registry.get("fake", dimensions=16) is truncated
+    assert registry.get("other") is not model
+    assert sorted((entry["model"], entry["dimension"], entry["users"]) for entry in registry.stats()) == \
+        [("fake", 16, 2), ("fake", 64, 4), ("other", 64, 1)]
+    registry.clear()
+    assert registry.get("fake") is not model
+
+
+def test_archives_share_the_model_and_route_searches(manager, built_archive):
+    assert manager["eng"].embedding_model is manager["people"].embedding_model
+    assert "eng" in manager and len(manager) == 2
+    assert manager.search("eng", "incident pager", limit=3) == built_archive.search("incident pager", limit=3)
+    with pytest.raises(ValueError, match="already is an archive"):
+        manager.add("eng")
+    with pytest.raises(KeyError, match="No archive named 'sales'"):
+        manager.search("sales", "pto")
+
+
+def test_search_many_embeds_every_query_in_one_call(manager):
+    model = manager["eng"].embedding_model
+    calls = len(model.calls)
+
+    results = manager.search_many([("eng", "incident pager"), ("people", "pto vacation", {"workspace": "People"}),
+                                   ("eng", "incident pager", {"limit": 2})])
+
+    assert model.calls[calls:] == [["incident pager", "pto vacation"]]
+    assert [len(hits) for hits in results] == [10, 8, 2]
+    assert {hit["workspace"] for hit in results[1]} == {"People"}
+    batching = manager.stats()["batching"][0]
+    assert (batching["encode_calls"], batching["queries"]) == (1, 3)
+
+
+def test_search_all_merges_hits_best_first(manager):
+    hits = manager.search_all("onboarding laptop", limit=4)
+
+    assert len(hits) == 4 and {hit["archive"] for hit in hits} == {"eng", "people"}
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+    assert hits[0]["title"] == "Onboarding Guide"
+    assert manager.stats()["archives"]["eng"]["total_chunks"] == 30
+
+
+def test_concurrent_searches_are_embedded_together(manager):
+    model = manager["eng"].embedding_model
+    manager.batch_window = 0.1
+    calls = len(model.calls)
+    results = {}
+
+    def search(name, query):
+        results[query] = manager.search(name, query, limit=1)
+
+    threads = [threading.Thread(target=search, args=(name, query))
+               for name, query in [("eng", "incident pager"), ("people", "pto vacation"), ("eng", "roadmap")]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(model.calls) - calls < 3
+    assert sum(len(texts) for texts in model.calls[calls:]) == 3
+    assert results["roadmap"][0]["title"] == "Quarterly Roadmap"
+
+
+def test_long_collection_names_build_within_the_name_limit(make_archive, export_dir):
+    name = "team-" + "handbook" * 7
+    archive = make_archive(collection_name=name)
+    archive.add_export(str(export_dir))
+
+    archive.build_index()
+    first = archive.collection.name
+    archive.build_index(force_rebuild=True)
+
+    assert len(name) == 61 and 3 <= len(first) <= 63 and len(archive.collection.name) <= 63
+    assert first.startswith(name[:27]) and first != archive.collection.name
+    assert make_archive(collection_name=name).search("incident pager", limit=1)[0]["title"] == "Incident Runbook"
+
+
+def test_shared_models_are_closed_by_their_last_archive(make_archive, monkeypatch):
+    registry = ModelRegistry()
+    first = make_archive(share_model=registry)
+    second = make_archive(share_model=registry, embedding_dimensions=16, collection_name="small")
+    model = first.embedding_model
+    closed = []
+    monkeypatch.setattr(model, "close", lambda: closed.append(model))
+
+    first.close()
+    first.close()
+
+    assert second.embedding_model.model is model and closed == []
+    second.close()
+    assert closed == [model] and registry.stats() == []
+    private = make_archive(collection_name="private")
+    monkeypatch.setattr(private.embedding_model, "close", lambda: closed.append(private.embedding_model))
+    private.close()
+    assert closed[-1] is private.embedding_model
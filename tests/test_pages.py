@@ -0,0 +1,148 @@
+"""Page-level metadata stored once per page (PageTable)."""
+
+import pytest
+
+import notion_archive.core.archive as archive_module
+from conftest import long_body, page_id, write_page
+from notion_archive.core.pages import CHUNK_FIELDS, NATIVE_PAGE_FIELDS, PageTable, matches, where_fields
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"workspace": "Engineering"}, True),
+    ({"workspace": {"$ne": "Engineering"}}, False),
+    ({"tags": {"$contains": "ops"}}, True),
+    # Whole tags only: "call" is part of "oncall", not a tag
+    ({"tags": {"$contains": "call"}}, False),
+    ({"$or": [{"workspace": "People"}, {"chunk_index": {"$gte": 2}}]}, True),
+    ({"$and": [{"workspace": "Engineering"}, {"chunk_index": {"$lt": 2}}]}, False),
+    ({"owner": {"$nin": ["ada"]}}, True),
+])
+def test_where_clauses_match_like_the_vector_store(where, expected):
+    metadata = {"workspace": "Engineering", "tags": "ops, oncall", "chunk_index": 3}
+
+    assert matches(metadata, where) is expected
+
+
+def test_where_fields_include_nested_clauses():
+    assert where_fields({"$and": [{"workspace": "a"}, {"$or": [{"tags": "b"}, {"chunk_index": 1}]}]}) == \
+        {"workspace", "tags", "chunk_index"}
+
+
+def test_pages_are_stored_once_and_joined_with_their_chunks(tmp_path):
+    table = PageTable(str(tmp_path / "pages.sqlite3"))
+    page = {"title": "Runbook", "tags": "ops, oncall", "breadcrumb": "Engineering > Ops", "url_path": "r.html",
+            "export_root": "/exports/a"}
+
+    chunks = table.add_chunks([dict(page, original_id="p", chunk_index=i, total_chunks=3) for i in range(3)])
+
+    assert chunks[1] == {"original_id": "p", "chunk_index": 1, "total_chunks": 3}
+    assert len(table) == 1
+    record = table.get("p")
+    assert (record.tags, record.breadcrumb) == (["ops", "oncall"], ["Engineering", "Ops"])
+    assert table.join(chunks[2])["title"] == "Runbook" and table.join(chunks[2])["chunk_index"] == 2
+    assert table.page_ids("/exports/a", ["r.html", "other.html"]) == ["p"]
+    assert table.page_ids("/exports/b", ["r.html"]) == []
+    assert table.matching({"tags": {"$contains": "oncall"}}) == ["p"]
+
+    reopened = PageTable(str(tmp_path / "pages.sqlite3"))
+    assert reopened.get("p").metadata == page
+    assert PageTable.from_bytes(table.to_bytes()).get("p").metadata == page
+    table.remove(["p"])
+    assert len(table) == 0 and table.matching({"tags": {"$contains": "oncall"}}) == []
+
+
+def test_chunks_in_the_index_carry_only_chunk_fields(built_archive):
+    stored = built_archive.collection.get(include=["metadatas"])
+
+    assert all(set(metadata) <= CHUNK_FIELDS | NATIVE_PAGE_FIELDS for metadata in stored["metadatas"])
+    assert len(built_archive.pages) == 6
+
+    hit = built_archive.search("incident pager", limit=1)[0]
+    assert hit["title"] == "Incident Runbook"
+    assert hit["metadata"]["workspace"] == "Engineering" and hit["metadata"]["tags"] == "ops, oncall"
+
+
+def test_filters_on_page_fields(built_archive):
+    def pages(**filters):
+        return {hit["metadata"]["original_id"] for hit in built_archive.search("policy", limit=30, **filters)}
+
+    assert pages(workspace="People") == {page_id("PTO Policy"), page_id("Onboarding Guide")}
+    assert pages(tags=["oncall"]) == {page_id("Incident Runbook")}
+    # Pages need every tag
+    assert pages(tags=["oncall", "ops"]) == {page_id("Incident Runbook")}
+    assert pages(tags=["ops", "design"]) == set()
+    assert pages(workspace="People", tags=["hiring"]) == {page_id("Onboarding Guide")}
+    assert pages(workspace="Nowhere") == set()
+    assert pages(chunk_index=0, workspace="Product") == {page_id("Quarterly Roadmap")}
+
+
+def test_tag_filters_match_whole_tags(make_archive, export_dir):
+    write_page(export_dir, "Engineering", "Platform Charter", long_body("platform team charter"), ["devops"])
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    def pages(tags):
+        return {hit["metadata"]["original_id"] for hit in archive.search("charter", limit=40, tags=tags)}
+
+    assert pages(["ops"]) == {page_id("Deploy Checklist"), page_id("Incident Runbook")}
+    assert pages(["devops"]) == {page_id("Platform Charter")}
+
+
+def test_workspace_filters_run_in_the_vector_store(built_archive, monkeypatch):
+    queries = []
+    call = built_archive._collection_call
+
+    def record_query(method, *args, **kwargs):
+        if method == "query":
+            queries.append(kwargs["where"])
+        return call(method, *args, **kwargs)
+
+    monkeypatch.setattr(built_archive, "_collection_call", record_query)
+    hits = built_archive.search("policy", limit=30, workspace="People")
+    built_archive.search("policy", limit=30, workspace="People", tags=["hiring"])
+
+    assert len(hits) == 8 and {hit["workspace"] for hit in hits} == {"People"}
+    assert queries[0] == {"workspace": "People"}
+    assert queries[1] == {"$and": [{"workspace": "People"}, {"original_id": {"$in": [page_id("Onboarding Guide")]}}]}
+
+
+def test_long_page_lists_filter_over_fetched_hits(built_archive, monkeypatch):
+    def search(**filters):
+        return built_archive.search("incident pager rollback", limit=5, tags=["ops"], **filters)
+
+    expected, expected_first_chunks = search(), search(chunk_index=0)
+    queries = []
+    call = built_archive._collection_call
+
+    def record_query(method, *args, **kwargs):
+        if method == "query":
+            queries.append(kwargs["where"])
+        return call(method, *args, **kwargs)
+
+    monkeypatch.setattr(archive_module, "MAX_PAGE_FILTER_IDS", 1)
+    monkeypatch.setattr(built_archive, "_collection_call", record_query)
+
+    assert search() == expected
+    assert search(chunk_index=0) == expected_first_chunks
+    assert queries == [None, {"chunk_index": 0}]
+
+
+def test_updates_leave_pages_of_other_exports_at_the_same_paths(make_archive, export_dir, tmp_path):
+    # Another export with a different page stored at the PTO Policy file's path
+    other = tmp_path / "Export-other"
+    path = write_page(other, "People", "PTO Policy", long_body("parental leave stipend"))
+    path.write_text(path.read_text().replace(page_id("PTO Policy"), page_id("Parental Leave")))
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    archive.add_export(str(other))
+    archive.build_index()
+
+    write_page(other, "People", "PTO Policy", long_body("sabbatical unpaid rules"))
+    path.write_text(path.read_text().replace(page_id("PTO Policy"), page_id("Parental Leave")))
+    archive.update_pages(str(other), changed=[str(path.relative_to(other))])
+
+    assert archive.pages.get(page_id("PTO Policy")) is not None
+    assert archive.search("vacation holiday accrual", limit=1)[0]["title"] == "PTO Policy"
+    assert archive.search("sabbatical unpaid", limit=1)[0]["metadata"]["original_id"] == page_id("Parental Leave")
+    assert sum(doc.id == page_id("PTO Policy") for doc in archive.documents) == 1
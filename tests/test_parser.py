@@ -0,0 +1,81 @@
+"""Export parsing and the memory-lean NotionDocument (html modes, interning)."""
+
+import pickle
+
+import pytest
+
+from conftest import page_id
+from notion_archive.core.parser import HTML_MODES, NotionDocument, NotionExportParser
+
+
+@pytest.fixture
+def documents(export_dir):
+    return {doc.title: doc for doc in NotionExportParser(export_dir, html_mode="full").parse_export()}
+
+
+def test_pages_are_parsed_with_their_properties_and_path(documents):
+    doc = documents["Incident Runbook"]
+
+    assert doc.id == page_id("Incident Runbook")
+    assert doc.workspace == "Engineering"
+    assert doc.breadcrumb == ["Engineering"]
+    assert doc.tags == ["ops", "oncall"]
+    assert doc.created_by == "Ada Lovelace"
+    assert doc.created_time.year == 2023
+    assert doc.plain_text.startswith("incident pager escalation")
+    assert doc.url_path.endswith(f"Incident Runbook {page_id('Incident Runbook')}.html")
+
+
+@pytest.mark.parametrize("html_mode", HTML_MODES)
+def test_html_modes_keep_the_text_and_only_change_the_html(export_dir, documents, html_mode):
+    parsed = {doc.title: doc for doc in NotionExportParser(export_dir, html_mode=html_mode).parse_export()}
+    doc, full = parsed["PTO Policy"], documents["PTO Policy"]
+
+    assert doc == full  # equality ignores how the HTML is kept
+    assert doc.html_mode == html_mode
+    if html_mode == "none":
+        assert doc.content == ""
+    else:
+        assert doc.content == full.content
+        assert "vacation holiday" in doc.content
+
+
+def test_documents_convert_between_html_modes(documents):
+    doc = documents["PTO Policy"]
+    html = doc.content
+
+    doc.set_html_mode("compressed")
+    assert isinstance(doc._content, bytes) and doc.content == html
+    doc.set_html_mode("full")
+    assert doc.content == html
+    with pytest.raises(ValueError, match="source_path"):
+        doc.set_html_mode("lazy")
+    with pytest.raises(ValueError, match="Unsupported html_mode"):
+        doc.set_html_mode("gzip")
+
+
+def test_repeated_strings_are_shared_and_documents_have_no_dict(documents):
+    first, second = documents["Deploy Checklist"], documents["API Design Guide"]
+
+    assert first.workspace is second.workspace
+    assert first.created_by is second.created_by
+    assert not hasattr(first, "__dict__")
+
+
+def test_documents_pickle_for_worker_processes(documents):
+    doc = documents["Deploy Checklist"]
+    doc.set_html_mode("compressed")
+
+    copy = pickle.loads(pickle.dumps(doc))
+
+    assert copy == doc and copy.content == doc.content
+
+
+def test_lazy_documents_reread_their_html(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text('<html><body><div class="page-body"><p>Hi</p><script>x()</script></div></body></html>')
+    doc = NotionDocument(id="x", title="X", content=None, plain_text="Hi", url_path="page.html",
+                         source_path=str(path), html_mode="lazy")
+
+    assert doc.html_mode == "lazy"
+    assert doc.content == '<div class="page-body"><p>Hi</p></div>'
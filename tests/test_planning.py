@@ -0,0 +1,94 @@
+"""Dry-run build planning (plan_build, BuildPlan)."""
+
+import pytest
+
+from conftest import write_page
+from notion_archive import NotionArchive
+
+
+def test_plans_count_what_build_index_embeds(make_archive, export_dir):
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+
+    plan = archive.plan_build(calibration_chunks=0)
+
+    assert not archive.embedding_model.calls
+    assert plan.chunks == plan.embed_chunks == 30 and plan.indexed_chunks == 0
+    assert {name: (w.pages, w.chunks) for name, w in plan.workspaces.items()} == {
+        "Engineering": (3, 18), "People": (2, 8), "Product": (1, 4)}
+    assert plan.tokens == sum(w.tokens for w in plan.workspaces.values()) == plan.embed_tokens
+    assert not plan.tokens_exact and plan.api_calls == 0 and plan.cost_usd == 0.0
+    assert plan.eta_seconds is None
+    archive.build_index()
+    assert archive.collection.count() == plan.chunks
+
+
+def test_duplicates_and_indexed_chunks_are_counted(built_archive, tmp_path):
+    extra = tmp_path / "Export-extra"
+    write_page(extra, "Product", "Roadmap Copy", "roadmap quarter goals milestones launch priorities")
+    write_page(extra, "Product", "Roadmap Notes", "roadmap quarter goals milestones launch priorities")
+    built_archive.add_export(str(extra))
+    chunk_pages = dict(built_archive._chunk_pages)
+
+    plan = built_archive.plan_build(calibration_chunks=0)
+
+    assert (plan.chunks, plan.indexed_chunks, plan.duplicate_chunks) == (32, 30, 1)
+    assert plan.as_dict()["workspaces"]["Product"]["pages"] == 3
+    # build_index re-embeds indexed chunks, so they are reported but not subtracted
+    assert plan.embed_chunks == 32
+    assert "Already in the index: 30 chunks, ~" in str(plan) and "(info only" in str(plan)
+    # Planning leaves the live index's chunk-to-page map alone
+    assert built_archive._chunk_pages == chunk_pages
+
+
+def test_resumed_plans_skip_committed_chunks(make_archive, export_dir, monkeypatch):
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    model = archive.embedding_model
+    encode = model.encode
+
+    def flaky_encode(texts, **kwargs):
+        if len(model.calls) == 2:
+            raise RuntimeError("embedding service unavailable")
+        return encode(texts, **kwargs)
+
+    monkeypatch.setattr(model, "encode", flaky_encode)
+    with pytest.raises(RuntimeError):
+        archive.build_index(batch_size=8)
+
+    plan = archive.plan_build(resume=True, batch_size=8, calibration_chunks=0)
+
+    assert (plan.resumed_chunks, plan.embed_chunks) == (16, 14)
+    assert "Resumed from interrupted build: 16 chunks" in str(plan)
+    assert archive.plan_build(batch_size=8, calibration_chunks=0).resumed_chunks == 0
+
+
+def test_http_plans_count_requests_and_time_a_calibration_run(tmp_path, export_dir, stub_embedding_url):
+    archive = NotionArchive(embedding_model="stub", embedding_base_url=stub_embedding_url,
+                            db_path=str(tmp_path / "db"), chunk_size=200, chunk_overlap=20, share_model=False,
+                            embedding_options={"batch_size": 4})
+    archive.add_export(str(export_dir))
+
+    plan = archive.plan_build(batch_size=10, calibration_chunks=8)
+
+    # Three build batches of 10 chunks, each sent in requests of 4
+    assert plan.api_calls == 9 and plan.cost_usd is None
+    assert plan.tokens_per_second > 0 and plan.eta_seconds == pytest.approx(plan.embed_tokens / plan.tokens_per_second)
+    assert "9 API requests" in str(plan) and "ETA:" in str(plan)
+    archive.document_store.close()
+
+
+def test_plans_count_page_titles_only_for_a_title_boost(tmp_path, export_dir, stub_embedding_url):
+    archive = NotionArchive(embedding_model="stub", embedding_base_url=stub_embedding_url,
+                            db_path=str(tmp_path / "db"), chunk_size=200, chunk_overlap=20, share_model=False,
+                            embedding_options={"batch_size": 4}, title_boost=0.5)
+    archive.add_export(str(export_dir))
+
+    plan = archive.plan_build(batch_size=10, calibration_chunks=0)
+
+    # Three build batches of 10 chunks in requests of 4, then the 6 titles in two requests
+    assert (plan.title_inputs, plan.api_calls) == (6, 11) and plan.title_tokens > 0
+    assert "Page titles (title_boost): 6 titles" in str(plan)
+    archive.title_boost = 0.0
+    assert archive.plan_build(batch_size=10, calibration_chunks=0).title_inputs == 0
+    archive.document_store.close()
@@ -0,0 +1,81 @@
+"""Semantic cache of recent search results (SemanticQueryCache, query_cache)."""
+
+import numpy as np
+import pytest
+
+from conftest import long_body, write_page
+from notion_archive.core.query_cache import SemanticQueryCache, normalize_query
+
+RESULTS = [{"id": "a", "score": 0.9, "metadata": {"title": "A"}}]
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_equal_query_texts_hit_before_embedding():
+    cache = SemanticQueryCache()
+    cache.put("What's the PTO policy?", "k", unit(1, 0, 0), RESULTS, search_seconds=0.01)
+
+    assert normalize_query("What's the PTO policy?") == "what s the pto policy"
+    assert cache.get("what's the pto POLICY", "k") == RESULTS
+    assert cache.get("what's the pto policy", "other parameters") is None
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_similar_embeddings_hit_above_the_threshold():
+    cache = SemanticQueryCache(threshold=0.95)
+    cache.put("pto policy", "k", unit(1, 0.1, 0), RESULTS, search_seconds=0.01)
+
+    assert cache.get("vacation rules", "k", unit(1, 0.12, 0)) == RESULTS
+    assert cache.get("vacation rules", "k", unit(1, 1, 0)) is None
+    assert cache.get("vacation rules", "other", unit(1, 0.12, 0)) is None
+    stats = cache.stats()
+    assert (stats["lookups"], stats["semantic_hits"], stats["hit_rate"]) == (3, 1, pytest.approx(1 / 3))
+
+
+def test_results_are_copies_and_the_least_recently_used_query_is_evicted():
+    cache = SemanticQueryCache(capacity=2)
+    for i, query in enumerate(["a", "b"]):
+        cache.put(query, "k", unit(1, i, 0), RESULTS, search_seconds=0.0)
+
+    cache.get("a", "k")[0]["metadata"]["title"] = "changed"
+    cache.put("c", "k", unit(0, 0, 1), RESULTS, search_seconds=0.0)
+
+    assert len(cache) == 2 and cache.get("b", "k") is None
+    assert cache.get("a", "k") == RESULTS
+    cache.invalidate()
+    assert len(cache) == 0 and cache.stats()["invalidations"] == 1
+    with pytest.raises(ValueError, match="threshold"):
+        SemanticQueryCache(threshold=0)
+
+
+def test_archives_answer_repeated_queries_from_the_cache(make_archive, export_dir):
+    archive = make_archive(query_cache=True)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+    calls = archive.embedding_model.calls
+    first = archive.search("PTO policy?", limit=3)
+    embedded = len(calls)
+
+    assert archive.search("pto policy", limit=3) == first
+    assert len(calls) == embedded
+    # Same words in another order: the same fake embedding, so a semantic hit
+    assert archive.search("policy pto", limit=3) == first
+    assert archive.search("pto policy", limit=4) != first
+    stats = archive.get_stats()["query_cache"]
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["size"]) == (1, 1, 2)
+
+
+def test_index_changes_clear_the_cache(make_archive, export_dir):
+    archive = make_archive(query_cache=SemanticQueryCache(capacity=8))
+    archive.add_export(str(export_dir))
+    archive.build_index()
+    archive.search("sabbatical", limit=3)
+    page = write_page(export_dir, "People", "PTO Policy", long_body("sabbatical unpaid leave rules"))
+
+    archive.update_pages(str(export_dir), changed=[str(page.relative_to(export_dir))])
+
+    assert len(archive.query_cache) == 0
+    assert archive.search("sabbatical", limit=1)[0]["title"] == "PTO Policy"
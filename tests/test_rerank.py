@@ -0,0 +1,97 @@
+"""Cross-encoder reranking with a latency budget (CrossEncoderReranker)."""
+
+import sys
+import time
+import types
+
+import pytest
+
+from notion_archive.core.rerank import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the query words found in the text; `delay` seconds per predict call."""
+
+    delay = 0.0
+
+    def __init__(self, model_name, max_length=512, device=None):
+        self.model_name = model_name
+        self.pairs = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay)
+        self.pairs.extend(pairs)
+        return [float(sum(word in text.lower() for word in query.lower().split())) for query, text in pairs]
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    """Create CrossEncoderRerankers around FakeCrossEncoder."""
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=FakeCrossEncoder))
+    rerankers = []
+
+    def make(**kwargs):
+        rerankers.append(CrossEncoderReranker("fake-cross-encoder", **kwargs))
+        return rerankers[-1]
+
+    yield make
+    for created in rerankers:
+        created.close()
+
+
+def test_pairs_are_scored_in_one_batch_and_cached(reranker):
+    model = reranker(latency_budget_ms=None)
+    texts = ["deploy the release", "vacation policy", "release notes and deploy steps"]
+
+    assert model.score("deploy release", texts) == [2.0, 0.0, 2.0]
+    assert model.score("deploy release", texts[:2]) == [2.0, 0.0]
+
+    assert model.model.pairs[1:] == [("deploy release", text) for text in texts]
+    assert model.stats["pairs_scored"] == 3 and model.stats["cache_hits"] == 2
+    model.clear_cache()
+    model.score("deploy release", texts[:1])
+    assert model.stats["pairs_scored"] == 4
+
+
+def test_cache_keeps_the_most_recently_used_pairs(reranker):
+    model = reranker(latency_budget_ms=None, cache_size=2)
+    model.score("q", ["a", "b"])
+    model.score("q", ["a"])
+    model.score("q", ["c"])
+
+    model.score("q", ["a", "b"])
+
+    assert model.stats["pairs_scored"] == 4
+
+
+def test_searches_fall_back_when_scoring_overruns_the_budget(reranker):
+    model = reranker(latency_budget_ms=20)
+    model.model.delay = 0.2
+
+    assert model.score("deploy", ["deploy now"]) is None
+    assert model.stats["fallbacks"] == 1
+    # The pass finishes in the background and fills the cache
+    time.sleep(0.3)
+    assert model.score("deploy", ["deploy now"]) == [1.0]
+
+    # Now known to be slow: the next pass is not even started
+    assert model.score("deploy", ["a", "b", "c"]) is None
+    assert model.stats["pairs_scored"] == 1
+
+
+def test_search_reorders_the_top_candidates(reranker, make_archive, export_dir):
+    archive = make_archive(reranker=reranker(latency_budget_ms=None), rerank_candidates=10)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+    query = "oncall incident escalation"
+
+    results = archive.search(query, limit=5)
+
+    assert len(archive.reranker.model.pairs) == 1 + 10
+    scores = [result["rerank_score"] for result in results]
+    assert scores == sorted(scores, reverse=True) and scores[0] == 3.0
+    pages = archive.search(query, limit=2, group_by="page")
+    assert [page["title"] for page in pages][0] == "Incident Runbook" and "rerank_score" in pages[0]
+
+    archive.reranker = None
+    assert all("rerank_score" not in result for result in archive.search(query, limit=5))
@@ -0,0 +1,70 @@
+"""Search result grouping by page, field selection and snippets (search(group_by=, fields=))."""
+
+import pytest
+
+from conftest import page_id
+from notion_archive.core.archive import CHUNK_RESULT_FIELDS, PAGE_RESULT_FIELDS
+from notion_archive.utils.text import make_snippet
+
+
+def test_chunk_results_have_the_default_fields(built_archive):
+    results = built_archive.search("deploy rollback canary", limit=3)
+
+    assert len(results) == 3
+    assert set(results[0]) == CHUNK_RESULT_FIELDS - {"rerank_score"}
+    assert results[0]["title"] == "Deploy Checklist"
+    assert results[0]["tags"] == ["ops"]
+
+
+def test_group_by_page_returns_one_result_per_page(built_archive):
+    results = built_archive.search("deploy rollback canary", limit=3, group_by="page")
+
+    assert len({result["id"] for result in results}) == 3
+    assert results[0]["id"] == page_id("Deploy Checklist")
+    assert results[0]["matched_chunks"] > 1
+    # Lightweight payloads: no chunk text or raw metadata unless asked for
+    assert set(results[0]) <= PAGE_RESULT_FIELDS
+    assert "content" not in results[0] and "metadata" not in results[0]
+
+
+def test_group_by_page_fetches_more_chunks_until_enough_pages(make_archive, export_dir):
+    archive = make_archive(group_overfetch=1)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    # Every page has several chunks, so the first `limit` chunks cover fewer pages
+    results = archive.search("deploy rollback canary", limit=4, group_by="page")
+
+    assert len({result["id"] for result in results}) == 4
+
+
+def test_fields_select_the_result_keys(built_archive):
+    chunks = built_archive.search("incident pager", limit=2, fields=["id", "score"])
+    pages = built_archive.search("incident pager", limit=2, group_by="page", fields=["id", "content"])
+
+    assert all(set(result) == {"id", "score"} for result in chunks)
+    assert all(set(result) == {"id", "content"} for result in pages)
+    assert "incident" in pages[0]["content"]
+
+
+def test_snippets_are_only_built_when_requested(built_archive):
+    plain = built_archive.search("pager escalation", limit=1, group_by="page")
+    with_snippet = built_archive.search("pager escalation", limit=1, group_by="page", fields=["id", "snippet"])
+
+    assert "snippet" in plain[0]
+    assert "snippet" not in built_archive.search("pager escalation", limit=1)[0]
+    assert "**pager**" in with_snippet[0]["snippet"]
+
+
+def test_unsupported_group_by_is_rejected(built_archive):
+    with pytest.raises(ValueError, match="group_by"):
+        built_archive.search("deploy", group_by="workspace")
+
+
+def test_make_snippet_centres_on_the_query_terms():
+    text = "filler " * 100 + "the canary release went out " + "filler " * 100
+
+    snippet = make_snippet(text, "canary release", width=60)
+
+    assert "**canary** **release**" in snippet
+    assert len(snippet) < 120
@@ -0,0 +1,135 @@
+"""Pre-fork serving of a snapshot-backed archive (PreforkServer)."""
+
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import types
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from notion_archive.core.serving import PreforkServer
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork serving needs os.fork()")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_app(archive, servers):
+    """WSGI app answering /search?q=... from the archive and /status from the server."""
+    def app(environ, start_response):
+        if environ["PATH_INFO"] == "/status":
+            body = servers[0].status()
+            body["pid"] = os.getpid()
+        else:
+            query = urllib.parse.parse_qs(environ["QUERY_STRING"])["q"][0]
+            body = archive.search(query, limit=3, fields=["id", "score"])
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [json.dumps(body).encode()]
+    return app
+
+
+@pytest.fixture
+def serve(built_archive, make_archive, tmp_path, request):
+    """Start a PreforkServer over a snapshot of built_archive in a child process (threads: indirect param)."""
+    path = str(tmp_path / "index.snapshot")
+    built_archive.export_snapshot(path)
+    replica = make_archive(snapshot_path=path)
+    port = free_port()
+    servers = []
+    servers.append(PreforkServer(make_app(replica, servers), replica, host="127.0.0.1", port=port,
+                                 workers=2, threads=getattr(request, "param", 1), warmup_queries=["deploy"]))
+    process = multiprocessing.get_context("fork").Process(target=servers[0].serve_forever)
+    process.start()
+
+    def get(path: str):
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=10) as response:
+            return json.loads(response.read())
+
+    def wait_ready(exclude=()):
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                status = get("/status")
+                pids = {worker["pid"] for worker in status["workers"]}
+                if status["ready"] == 2 and not pids & set(exclude):
+                    return status
+            except OSError:
+                pass
+            time.sleep(0.1)
+        raise AssertionError("workers did not become ready")
+
+    yield types.SimpleNamespace(get=get, wait_ready=wait_ready, process=process, archive=replica)
+    if process.is_alive():
+        os.kill(process.pid, signal.SIGTERM)
+        process.join(30)
+
+
+def test_workers_answer_searches_like_the_archive(serve):
+    serve.wait_ready()
+
+    expected = serve.archive.search("deploy rollback", limit=3, fields=["id", "score"])
+    for _ in range(4):
+        assert serve.get("/search?q=deploy%20rollback") == expected
+
+    status = serve.get("/status")
+    assert status["pid"] in {worker["pid"] for worker in status["workers"]}
+    assert sum(worker["requests"] for worker in status["workers"]) >= 5
+    assert status["parent"]["pid"] == serve.process.pid
+    assert all(worker["uptime_s"] >= 0 for worker in status["workers"])
+
+
+def test_dead_workers_are_replaced_and_sighup_restarts_all(serve):
+    first = [worker["pid"] for worker in serve.wait_ready()["workers"]]
+
+    os.kill(first[0], signal.SIGKILL)
+    second = [worker["pid"] for worker in serve.wait_ready(exclude=first[:1])["workers"]]
+    assert second[1] == first[1]
+
+    os.kill(serve.process.pid, signal.SIGHUP)
+    serve.wait_ready(exclude=second)
+
+    os.kill(serve.process.pid, signal.SIGTERM)
+    serve.process.join(30)
+    assert serve.process.exitcode == 0
+
+
+def test_archives_must_be_snapshot_backed(built_archive):
+    with pytest.raises(ValueError, match="snapshot-backed"):
+        PreforkServer(make_app(built_archive, []), built_archive)
+
+
+@pytest.mark.parametrize("serve", [2], indirect=True)
+def test_threaded_workers_answer_concurrent_searches(serve):
+    serve.wait_ready()
+    expected = serve.archive.search("deploy rollback", limit=3, fields=["id", "score"])
+    results = []
+
+    def search():
+        results.append(serve.get("/search?q=deploy%20rollback"))
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [expected] * 8
+    assert sum(worker["requests"] for worker in serve.get("/status")["workers"]) >= 9
+
+
+def test_serving_needs_werkzeug(built_archive, monkeypatch):
+    monkeypatch.setitem(sys.modules, "werkzeug.serving", None)
+
+    with pytest.raises(ImportError, match=r"pip install notion-archive\[serve\]"):
+        PreforkServer(make_app(built_archive, []))
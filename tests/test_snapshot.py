@@ -0,0 +1,61 @@
+"""Read-only index snapshots for search replicas (export_snapshot, snapshot_path)."""
+
+import pytest
+
+from conftest import page_id
+from notion_archive.core.snapshot import SnapshotFormatError
+
+
+@pytest.fixture
+def replica(built_archive, make_archive, tmp_path):
+    """An archive serving a snapshot of built_archive."""
+    path = str(tmp_path / "index.snapshot")
+    info = built_archive.export_snapshot(path)
+    assert info["count"] == built_archive.collection.count()
+    return make_archive(snapshot_path=path)
+
+
+def ranked(results):
+    """
+    Page and score of each matching result. The fixture repeats chunks and
+    unrelated pages all score 0, so chunk ids and the order of ties may differ.
+    """
+    return [(result["metadata"]["original_id"] if "metadata" in result else result["id"], round(result["score"], 4))
+            for result in results if result["score"] > 0]
+
+
+@pytest.mark.parametrize("query, options", [
+    ("rollback deploy release", {}),
+    ("vacation leave", {"workspace": "People"}),
+    ("incident pager", {"tags": ["oncall"]}),
+    ("roadmap planning", {"group_by": "page"}),
+])
+def test_snapshot_answers_searches_like_the_index(built_archive, replica, query, options):
+    expected = built_archive.search(query, limit=5, **options)
+
+    assert ranked(expected)
+    assert ranked(replica.search(query, limit=5, **options)) == ranked(expected)
+
+
+def test_snapshot_keeps_titles_links_and_stats(built_archive, replica):
+    assert replica.navigate("pto")[0]["id"] == page_id("PTO Policy")
+    assert [page["id"] for page in replica.related(page_id("Deploy Checklist"))] == \
+        [page["id"] for page in built_archive.related(page_id("Deploy Checklist"))]
+    stats = replica.get_stats()
+    assert stats["total_chunks"] == built_archive.collection.count()
+    assert stats["workspaces"] == built_archive.get_stats()["workspaces"]
+
+
+def test_snapshots_are_read_only(replica, export_dir):
+    with pytest.raises(ValueError, match="read-only snapshot"):
+        replica.build_index()
+    with pytest.raises(ValueError, match="read-only snapshot"):
+        replica.update_pages(str(export_dir), removed=["x.html"])
+
+
+def test_other_files_are_rejected(make_archive, tmp_path):
+    path = tmp_path / "not-a.snapshot"
+    path.write_bytes(b"\0" * 64)
+
+    with pytest.raises(SnapshotFormatError):
+        make_archive(snapshot_path=str(path))
@@ -0,0 +1,79 @@
+"""Incremental parsing and chunking of very large pages (streaming.py)."""
+
+import re
+
+import pytest
+
+import notion_archive.core.archive as archive_module
+import notion_archive.core.parser as parser_module
+from conftest import page_html, page_id, write_page
+from notion_archive.core.parser import NotionExportParser
+from notion_archive.core.streaming import PageStreamParser, stream_chunks, stream_page
+
+BODY = "  Glacier   migration plan.\n\nStep one: freeze writes &amp; snapshot. " * 40
+
+
+@pytest.fixture
+def small_large_pages(monkeypatch):
+    """Treat pages over 2KB as large."""
+    monkeypatch.setattr(parser_module, "LARGE_PAGE_BYTES", 2048)
+    monkeypatch.setattr(archive_module, "LARGE_PAGE_BYTES", 2048)
+
+
+def test_header_matches_the_regular_parser(tmp_path):
+    path = write_page(tmp_path, "Engineering", "Storage Migration", BODY, ["infra", "q3"],
+                      ["Deploy Checklist"])
+    regular = NotionExportParser(tmp_path).parse_file(path)
+
+    stream_parser = PageStreamParser()
+    text = "".join(stream_page(path, stream_parser, block_size=97))
+
+    assert stream_parser.title == regular.title and stream_parser.doc_id == regular.id
+    assert stream_parser.metadata["tags"] == regular.tags
+    assert stream_parser.metadata["created_by"] == regular.created_by
+    assert stream_parser.metadata["created_time"] == regular.created_time
+    assert text == " ".join(regular.plain_text.split())
+
+
+def test_header_only_stops_at_the_body(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text(page_html("Huge", BODY * 10), encoding="utf-8")
+    stream_parser = PageStreamParser()
+
+    assert list(stream_page(path, stream_parser, block_size=256, header_only=True)) == []
+    assert stream_parser.title == "Huge" and stream_parser.body_started
+
+
+def test_streamed_chunks_cover_the_text_within_the_chunk_size():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=120, chunk_overlap=0, separators=[". ", " ", ""])
+    text = " ".join(f"sentence number {i} of the page." for i in range(300))
+    blocks = [text[i:i + 50] for i in range(0, len(text), 50)]
+
+    chunks = list(stream_chunks(blocks, splitter, 120, window_chunks=4))
+
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    words = re.findall(r"\d+", " ".join(chunks))
+    assert words == [str(i) for i in range(300)]
+
+
+def test_large_pages_are_streamed_into_the_index(make_archive, export_dir, small_large_pages):
+    write_page(export_dir, "Engineering", "Storage Migration", BODY, ["infra"], ["Deploy Checklist"])
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+
+    assert [path.rsplit("/", 1)[-1] for _, path in archive.large_pages] == \
+        [f"Storage Migration {page_id('Storage Migration')}.html"]
+    large = next(doc for doc in archive.documents if doc.title == "Storage Migration")
+    assert large.plain_text == "" and large.tags == ["infra"]
+
+    archive.build_index()
+
+    chunks = archive.collection.get(where={"original_id": page_id("Storage Migration")}, include=["documents"])
+    assert len(chunks["ids"]) > 10
+    assert all("&amp;" not in text and len(text) <= 200 for text in chunks["documents"])
+    top = archive.search("glacier migration freeze writes", limit=1)[0]
+    assert top["metadata"]["original_id"] == page_id("Storage Migration")
+    assert archive.navigate("storage migration")[0]["id"] == page_id("Storage Migration")
+    assert page_id("Deploy Checklist") in [page["id"] for page in archive.related(page_id("Storage Migration"))]
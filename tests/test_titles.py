@@ -0,0 +1,109 @@
+"""Title index: finding pages by name (navigate, TitleIndex, title_boost)."""
+
+import numpy as np
+
+from conftest import page_id, write_page
+from notion_archive.core.titles import TitleIndex, normalize_title
+
+PAGES = [
+    ("a", "Q3 Roadmap", "Product > Planning", "Product/Q3 Roadmap.html", "Product"),
+    ("b", "Engineering Onboarding", "Engineering > People", "Engineering/Onboarding.html", "Engineering"),
+    ("c", "Roadmap Archive", "Product", "Product/Roadmap Archive.html", "Product"),
+    ("d", "Deploy Checklist", "Engineering > Onboarding", "Engineering/Deploy.html", "Engineering"),
+]
+
+
+def titles(index, query, limit=10):
+    return [(index.titles[i], kind) for i, _, kind in index.match(query, limit)]
+
+
+def test_exact_titles_rank_first():
+    index = TitleIndex.from_pages(PAGES)
+
+    assert titles(index, "q3 roadmap")[0] == ("Q3 Roadmap", "exact")
+    assert normalize_title("  Q3:  Roadmap! ") == "q3 roadmap"
+
+
+def test_word_prefixes_match_titles_before_breadcrumbs():
+    index = TitleIndex.from_pages(PAGES)
+
+    assert titles(index, "eng onboard") == [("Engineering Onboarding", "prefix"), ("Deploy Checklist", "prefix")]
+    assert titles(index, "road") == [("Q3 Roadmap", "prefix"), ("Roadmap Archive", "prefix")]
+
+
+def test_typos_match_fuzzily():
+    index = TitleIndex.from_pages(PAGES)
+
+    assert titles(index, "checklst") == [("Deploy Checklist", "fuzzy")]
+    assert titles(index, "onbaording")[0][1] == "fuzzy"
+    assert titles(index, "zzzz") == []
+
+
+def test_updates_and_serialization_keep_entries_and_embeddings():
+    embeddings = np.eye(4, dtype=np.float32)
+    index = TitleIndex.from_pages(PAGES, embeddings * 2)
+
+    updated = index.update([("c", "Roadmap 2025", "Product", "Product/Roadmap 2025.html", "Product")],
+                           np.array([[0, 0, 0, 1]], dtype=np.float32), removed=["d"])
+    loaded = TitleIndex.from_bytes(updated.to_bytes())
+
+    assert loaded.page_ids == ["a", "b", "c"] and loaded.titles[2] == "Roadmap 2025"
+    np.testing.assert_allclose(loaded.embeddings, np.eye(4, dtype=np.float32)[[0, 1, 3]])
+    assert loaded.entry(loaded.position("a"))["breadcrumb"] == ["Product", "Planning"]
+    assert loaded.strengths("zzz", np.array([0, 1, 0, 0])) == {"b": 1.0}
+
+
+def test_navigate_answers_without_embedding_the_query(built_archive):
+    calls = len(built_archive.embedding_model.calls)
+
+    pages = built_archive.navigate("pto polcy")
+
+    assert pages[0]["id"] == page_id("PTO Policy") and pages[0]["match"] == "fuzzy"
+    assert pages[0]["workspace"] == "People" and pages[0]["url"].endswith(".html")
+    assert len(built_archive.embedding_model.calls) == calls
+
+
+def test_title_boost_surfaces_pages_named_after_the_query(make_archive, export_dir):
+    write_page(export_dir, "Engineering", "Glossary", "terms used across teams and what they mean")
+    archive = make_archive(title_boost=0.5)
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    top = archive.search("glossary", limit=1)[0]
+
+    assert top["metadata"]["original_id"] == page_id("Glossary")
+    plain = make_archive(title_boost=0.0)
+    assert page_id("Glossary") not in [r["metadata"]["original_id"] for r in plain.search("glossary", limit=3)]
+
+
+def test_title_boosting_is_off_by_default(make_archive, export_dir):
+    write_page(export_dir, "Engineering", "Glossary", "terms used across teams and what they mean")
+    archive = make_archive()
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    assert archive.title_boost == 0.0
+    results = archive.search("glossary deploy", limit=5)
+    assert all(result["score"] <= 1.0 for result in results)
+    assert results == make_archive(title_boost=0.0).search("glossary deploy", limit=5)
+
+
+def test_titles_are_embedded_only_for_a_title_boost(make_archive, export_dir):
+    plain = make_archive()
+    plain.add_export(str(export_dir))
+    plain.build_index()
+    archive = make_archive(title_boost=0.5, db_path=str(export_dir.parent / "boosted"))
+    archive.add_export(str(export_dir))
+    archive.build_index()
+
+    titles = {doc.title for doc in plain.documents}
+    assert plain.title_index.embeddings is None
+    assert not any(set(texts) <= titles for texts in plain.embedding_model.calls)
+    assert archive.title_index.embeddings.shape == (6, archive.embedding_model.dimension)
+
+    path = write_page(export_dir, "Engineering", "Deploy Checklist", "canary first then the fleet")
+    calls = len(archive.embedding_model.calls)
+    archive.update_pages(str(export_dir), changed=[str(path.relative_to(export_dir))])
+
+    assert ["Deploy Checklist"] in archive.embedding_model.calls[calls:]
+    assert archive.title_index.embeddings.shape == (6, archive.embedding_model.dimension)
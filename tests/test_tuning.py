@@ -0,0 +1,60 @@
+"""HNSW settings and the recall/latency tuner (tune_hnsw)."""
+
+import numpy as np
+import pytest
+
+from notion_archive.core.tuning import TuningResult, exact_top_k, hnsw_metadata, recommend, tune_hnsw
+
+
+@pytest.mark.parametrize("space", ["cosine", "ip", "l2"])
+def test_exact_top_k_matches_brute_force(space):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    queries = rng.normal(size=(4, 8)).astype(np.float32)
+
+    top = exact_top_k(vectors, queries, 5, space)
+
+    for query, found in zip(queries, top):
+        if space == "l2":
+            distances = np.sum((vectors - query) ** 2, axis=1)
+        elif space == "ip":
+            distances = -(vectors @ query)
+        else:
+            distances = -(vectors @ query) / np.linalg.norm(vectors, axis=1)
+        assert list(found) == list(np.argsort(distances)[:5])
+
+
+def test_recommend_picks_the_fastest_setting_above_the_target():
+    slow = TuningResult({"M": 32}, recall=1.0, p50_ms=2.0, p99_ms=3.0, build_seconds=1.0)
+    fast = TuningResult({"M": 16}, recall=0.96, p50_ms=1.0, p99_ms=2.0, build_seconds=1.0)
+    inaccurate = TuningResult({"M": 8}, recall=0.5, p50_ms=0.1, p99_ms=0.2, build_seconds=0.1)
+
+    assert recommend([slow, fast, inaccurate], target_recall=0.95) is fast
+    assert recommend([fast, inaccurate], target_recall=0.99) is fast
+
+
+def test_unset_settings_are_left_to_chromadb():
+    assert hnsw_metadata({"space": "cosine", "M": None, "search_ef": 50}) == \
+        {"hnsw:space": "cosine", "hnsw:search_ef": 50}
+
+
+def test_tune_hnsw_measures_the_grid_and_applies_the_recommendation(built_archive):
+    expected = built_archive.search("rollback deploy release", limit=3)
+    grid = {"M": (8,), "construction_ef": (100,), "search_ef": (10, 40)}
+
+    report = tune_hnsw(built_archive, grid=grid, k=3, n_queries=5, target_recall=0.9, apply=True)
+
+    assert len(report.results) == 2 and report.queries == 5 and report.applied
+    assert all(0.0 <= result.recall <= 1.0 for result in report.results)
+    assert built_archive.index_params() == report.recommended.params
+    assert built_archive.index_params()["space"] == "cosine"
+    results = built_archive.search("rollback deploy release", limit=3)
+    assert len(expected) == 3
+    assert [r["id"] for r in results] == [r["id"] for r in expected]
+
+
+def test_rebuilding_rejects_unknown_settings(built_archive):
+    with pytest.raises(ValueError, match="Unknown HNSW parameters"):
+        built_archive.rebuild_vector_index(ef=10)
+    with pytest.raises(ValueError, match="Unsupported hnsw_space"):
+        built_archive.rebuild_vector_index(space="hamming")
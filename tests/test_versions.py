@@ -0,0 +1,106 @@
+"""Versioned archives of export snapshots (add_snapshot, search as_of, VersionHistory)."""
+
+import shutil
+
+import pytest
+
+from conftest import long_body, page_id, write_page
+from notion_archive.core.versions import OPEN, VersionHistory
+
+
+def pages_of(results):
+    return {result["metadata"]["original_id"] for result in results}
+
+
+@pytest.fixture
+def versioned(make_archive, export_dir, tmp_path):
+    """An archive of two monthly snapshots: PTO Policy rewritten, Onboarding Guide removed in February."""
+    february = tmp_path / "Export-2024-02"
+    shutil.copytree(export_dir, february)
+    write_page(february, "People", "PTO Policy", long_body("sabbatical unpaid leave rules"), ["policy"],
+               ["Onboarding Guide"])
+    next(february.rglob("Onboarding Guide *.html")).unlink()
+
+    archive = make_archive(collection_name="compliance")
+    archive.add_snapshot(str(export_dir), label="january", snapshot_date="2024-01-31")
+    archive.add_snapshot(str(february), label="february", snapshot_date="2024-02-29")
+    return archive
+
+
+def test_snapshots_store_only_changed_pages(versioned):
+    january, february = versioned.list_snapshots()
+
+    assert (january["new"], january["embedded_chunks"]) == (6, 30)
+    assert {key: february[key] for key in ("unchanged", "new", "changed", "reverted", "removed")} == \
+        {"unchanged": 4, "new": 0, "changed": 1, "reverted": 0, "removed": 1}
+    assert february["embedded_chunks"] == 3
+    # Every version is stored once: 30 chunks plus the rewritten page
+    assert versioned.collection.count() == 33
+
+
+def test_as_of_searches_return_the_old_versions(versioned):
+    latest = versioned.search("vacation holiday leave", limit=10)
+    old = versioned.search("vacation holiday leave", limit=10, as_of="january")
+
+    pto = [result["content"] for result in old if result["metadata"]["original_id"] == page_id("PTO Policy")]
+    assert pto and all("vacation holiday" in content for content in pto)
+    assert all("vacation" not in result["content"] for result in latest
+               if result["metadata"]["original_id"] == page_id("PTO Policy"))
+    assert page_id("Onboarding Guide") in pages_of(versioned.search("onboarding laptop", limit=5, as_of=1))
+    assert page_id("Onboarding Guide") not in pages_of(versioned.search("onboarding laptop", limit=5))
+
+
+@pytest.mark.parametrize("as_of", [1, "1", "january", "2024-02-15", "2024-01-31"])
+def test_snapshots_are_named_by_number_label_or_date(versioned, as_of):
+    assert versioned.search("pto", limit=5, as_of=as_of) == versioned.search("pto", limit=5, as_of=1)
+
+
+def test_reverted_pages_reuse_their_stored_embeddings(versioned, export_dir):
+    calls = len(versioned.embedding_model.calls)
+
+    record = versioned.add_snapshot(str(export_dir), label="march", snapshot_date="2024-03-31")
+
+    assert (record["reverted"], record["embedded_chunks"], record["copied_chunks"]) == (2, 0, 8)
+    # Nothing is embedded (titles only are, for a title_boost)
+    assert versioned.embedding_model.calls[calls:] == []
+    assert versioned.search("vacation holiday", limit=3) == versioned.search("vacation holiday", limit=3, as_of=3)
+    assert page_id("Onboarding Guide") in pages_of(versioned.search("onboarding laptop", limit=5))
+
+
+def test_versioned_archives_reject_builds_and_misordered_snapshots(versioned, built_archive, export_dir):
+    with pytest.raises(ValueError, match="add_snapshot"):
+        versioned.build_index(force_rebuild=True)
+    with pytest.raises(ValueError, match="chronological order"):
+        versioned.add_snapshot(str(export_dir), snapshot_date="2024-01-01")
+    with pytest.raises(ValueError, match="already is a snapshot"):
+        versioned.add_snapshot(str(export_dir), label="january", snapshot_date="2024-04-30")
+    with pytest.raises(ValueError, match="No snapshot on or before"):
+        versioned.search("pto", as_of="2023-12-31")
+    with pytest.raises(ValueError, match="built with build_index"):
+        built_archive.add_snapshot(str(export_dir))
+    with pytest.raises(ValueError, match="as_of needs"):
+        built_archive.search("pto", as_of=1)
+
+
+def test_replicas_search_earlier_snapshots(versioned, make_archive, tmp_path):
+    path = str(tmp_path / "versions.snapshot")
+    versioned.export_snapshot(path)
+    replica = make_archive(snapshot_path=path)
+
+    assert page_id("Onboarding Guide") in pages_of(replica.search("onboarding laptop", limit=5, as_of="january"))
+    assert page_id("Onboarding Guide") not in pages_of(replica.search("onboarding laptop", limit=5))
+
+
+def test_history_filters_on_the_validity_interval():
+    history = VersionHistory(None)
+    history.snapshots.extend([{"ordinal": 1, "label": "a", "date": "2024-01-31"},
+                              {"ordinal": 2, "label": "b", "date": "2024-02-29"}])
+    history.open_version("p", "d1", 1)
+    history.close_version("p", 2)
+    history.open_version("p", "d2", 2)
+
+    assert history.where() == {"valid_from": {"$lte": 2}, "valid_to": {"$gt": 2}}
+    assert history.where("2024-02-01") == {"valid_from": {"$lte": 1}, "valid_to": {"$gt": 1}}
+    assert history.current("p") == ["d2", 2, OPEN] and history.find("p", "d1") == ["d1", 1, 2]
+    with pytest.raises(ValueError, match="Unknown snapshot"):
+        history.resolve(3)
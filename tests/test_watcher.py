@@ -0,0 +1,71 @@
+"""Watch mode: changed pages are re-indexed in place (ExportWatcher, update_pages)."""
+
+import os
+
+from conftest import page_id, write_page
+from notion_archive.core.watcher import ExportWatcher
+
+
+def page_ids_of(results):
+    return {result["metadata"]["original_id"] for result in results}
+
+
+def test_scan_reports_added_changed_and_removed_files(built_archive, export_dir):
+    watcher = ExportWatcher(built_archive, str(export_dir), debounce=0)
+    assert not watcher.scan()
+
+    added = write_page(export_dir, "Product", "Launch Plan", "launch plan for the beta", ["planning"])
+    changed = write_page(export_dir, "People", "PTO Policy", "unlimited vacation now", ["policy"])
+    removed = next(export_dir.rglob("Onboarding Guide *.html"))
+    removed.unlink()
+
+    changes = watcher.scan()
+    assert changes.added == [str(added.relative_to(export_dir))]
+    assert changes.changed == [str(changed.relative_to(export_dir))]
+    assert changes.removed == [str(removed.relative_to(export_dir))]
+    assert len(changes) == 3
+
+
+def test_touched_files_with_identical_content_are_not_reindexed(built_archive, export_dir):
+    watcher = ExportWatcher(built_archive, str(export_dir), debounce=0)
+    touched = write_page(export_dir, "People", "PTO Policy", "unlimited vacation now", ["policy"])
+    assert watcher.poll() is not None
+
+    stat = touched.stat()
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert not watcher.scan()
+    assert watcher.poll() is None
+    assert watcher.metrics.batches == 1
+
+
+def test_poll_updates_the_index_in_place(built_archive, export_dir):
+    watcher = ExportWatcher(built_archive, str(export_dir), debounce=0)
+    before = built_archive.collection.count()
+    write_page(export_dir, "People", "PTO Policy", "sabbatical leave after five years", ["policy"])
+    next(export_dir.rglob("Onboarding Guide *.html")).unlink()
+
+    changes = watcher.poll()
+
+    assert len(changes.changed) == 1 and len(changes.removed) == 1
+    assert watcher.metrics.batches == 1 and watcher.metrics.pages_indexed == 1
+    assert watcher.metrics.chunks_embedded > 0
+    assert built_archive.collection.count() < before
+    assert page_id("Onboarding Guide") not in page_ids_of(built_archive.search("onboarding", limit=30))
+    top = built_archive.search("sabbatical leave", limit=1)[0]
+    assert top["metadata"]["original_id"] == page_id("PTO Policy")
+    assert watcher.poll() is None
+
+
+def test_a_restarted_watcher_picks_up_offline_changes(built_archive, export_dir):
+    watcher = ExportWatcher(built_archive, str(export_dir), debounce=0)
+    write_page(export_dir, "Product", "Launch Plan", "launch plan for the beta", ["planning"])
+    watcher.poll()
+
+    # Written while no watcher was running
+    write_page(export_dir, "Product", "Pricing", "pricing tiers and discounts", ["planning"])
+    restarted = ExportWatcher(built_archive, str(export_dir), debounce=0)
+
+    changes = restarted.scan()
+    assert [path.split("/")[-1].split(" ")[0] for path in changes.added] == ["Pricing"]
+    assert not changes.changed and not changes.removed